@@ -0,0 +1,340 @@
+"""
+Higher-timeframe bars built locally from M1 bars or ticks.
+
+An EA that looks at M1, H1 and H4 asked the terminal for each of them, so
+three copy_rates calls per symbol and minute where one carries all the
+information: every higher bar is the OHLC of the M1 bars (or ticks) in its
+period. BarAggregator fetches each higher timeframe from the terminal once
+(the history), then keeps it up to date from the M1 bars in the bar cache,
+which the EA fetches anyway. Reading an aggregated timeframe costs no
+terminal call.
+
+Aggregated bars are the terminal's bars: open of the first M1 bar, highest
+high, lowest low, close and spread of the last M1 bar, summed volumes, open
+time floored to the period. Timeframes up to D1 are supported (periods that
+divide a day; weeks and months do not start on a multiple of their length).
+
+``get(symbol, timeframe, count)`` has the BarCache signature, so the
+aggregator can stand in for the bar cache of an IndicatorFeed or get_rates;
+timeframes it does not aggregate are passed through. When a bar closes, the
+aggregator calls its subscribers with ``(symbol, timeframe, bar)``, so a
+strategy can recompute exactly when a higher bar closes.
+
+``update_ticks(symbol, ticks)`` switches a symbol to ticks (tick_stream
+batches) as the source instead of M1 bars; include TIMEFRAME_M1 in
+``timeframes`` to have M1 built from the ticks as well.
+"""
+
+import logging
+import threading
+
+import numpy as np
+
+from ALGORITHMSMT5EA.bar_cache import timeframe_seconds
+
+# MetaTrader5 timeframe constants (this module does not import MetaTrader5)
+TIMEFRAME_M1 = 1
+TIMEFRAME_M5 = 5
+TIMEFRAME_M15 = 15
+TIMEFRAME_H1 = 0x4000 | 1
+TIMEFRAME_H4 = 0x4000 | 4
+TIMEFRAME_D1 = 0x4000 | 24
+
+DEFAULT_TIMEFRAMES = (TIMEFRAME_M5, TIMEFRAME_M15, TIMEFRAME_H1, TIMEFRAME_H4, TIMEFRAME_D1)
+
+# Base bars looked at per refresh at least: an hour without a refresh is caught up without refetching
+MIN_BASE_COUNT = 64
+
+logger = logging.getLogger(__name__)
+
+
+def aggregate(bars, seconds):
+    """OHLC bars (or tick records shaped like bars) grouped into periods of ``seconds``, in time order"""
+    periods = bars['time'] - bars['time'] % seconds
+    starts = np.flatnonzero(np.diff(periods, prepend=periods[0] - 1))
+    ends = np.append(starts[1:], len(bars)) - 1
+    result = np.zeros(len(starts), dtype=bars.dtype)
+    result['time'] = periods[starts]
+    result['open'] = bars['open'][starts]
+    result['high'] = np.maximum.reduceat(bars['high'], starts)
+    result['low'] = np.minimum.reduceat(bars['low'], starts)
+    result['close'] = bars['close'][ends]
+    result['tick_volume'] = np.add.reduceat(bars['tick_volume'], starts)
+    result['spread'] = bars['spread'][ends]
+    result['real_volume'] = np.add.reduceat(bars['real_volume'], starts)
+    return result
+
+
+def _merge(bar, later):
+    """Bar (one-record array) extended by ``later`` bars of the same period"""
+    merged = bar.copy()
+    merged['high'] = max(bar['high'][0], later['high'].max())
+    merged['low'] = min(bar['low'][0], later['low'].min())
+    merged['close'] = later['close'][-1]
+    merged['tick_volume'] += later['tick_volume'].sum()
+    merged['spread'] = later['spread'][-1]
+    merged['real_volume'] += later['real_volume'].sum()
+    return merged
+
+
+class _Aggregate:
+    """Bars of one (symbol, timeframe): closed bars are buffer[start:end], ``partial`` is the open period"""
+
+    def __init__(self, seconds, dtype, capacity):
+        self.seconds = seconds
+        self.capacity = capacity
+        # One spare slot after the closed bars for the forming bar of get()
+        self.buffer = np.zeros(capacity * 2 + 1, dtype=dtype)
+        self.start = 0
+        self.end = 0
+        self.partial = None
+        self.history_exhausted = False
+
+    @property
+    def size(self):
+        return self.end - self.start
+
+    def append(self, bars):
+        bars = bars[-self.capacity:]
+        if self.end + len(bars) + 1 > len(self.buffer):
+            # Out of room at the tail: move the bars we keep to the front of the buffer
+            keep_from = max(self.start, self.end + len(bars) - self.capacity)
+            kept = self.end - keep_from
+            self.buffer[:kept] = self.buffer[keep_from:self.end]
+            self.start, self.end = 0, kept
+        self.buffer[self.end:self.end + len(bars)] = bars
+        self.end += len(bars)
+        self.start = max(self.start, self.end - self.capacity)
+
+    def add(self, bars, closes):
+        """Fold finished base bars (or ticks) into the open period; closed periods go to ``closes``"""
+        grouped = aggregate(bars, self.seconds)
+        for index in range(len(grouped)):
+            bar = grouped[index:index + 1]
+            if self.partial is not None and self.partial['time'][0] == bar['time'][0]:
+                self.partial = _merge(self.partial, bar)
+                continue
+            self.close(closes)
+            self.partial = bar
+
+    def close(self, closes):
+        if self.partial is not None:
+            self.append(self.partial)
+            closes.append(self.partial[0].copy())
+            self.partial = None
+
+    def forming(self, base):
+        """The forming bar: the open period plus the forming base bar, if it belongs to it"""
+        current = aggregate(base, self.seconds) if base is not None else None
+        if self.partial is None:
+            return current
+        if current is None or current['time'][0] != self.partial['time'][0]:
+            return self.partial
+        return _merge(self.partial, current)
+
+    def view(self, count, base):
+        forming = self.forming(base)
+        if forming is None:
+            return self.buffer[max(self.start, self.end - count):self.end]
+        self.buffer[self.end] = forming[0]
+        return self.buffer[max(self.start, self.end + 1 - count):self.end + 1]
+
+
+class _SymbolBars:
+    """Aggregation state of one symbol"""
+
+    def __init__(self):
+        self.series = {}            # timeframe -> _Aggregate
+        self.last_base_time = None  # open time of the newest finished base bar folded in
+        self.forming = None         # forming base bar (one-record array)
+        self.ticks = False          # built from update_ticks() instead of base bars
+
+
+class BarAggregator:
+    """
+    Bars of higher timeframes per symbol, built from the base timeframe.
+
+    Args:
+        source: the BarCache the base bars (and each timeframe's history) are read from.
+        timeframes: timeframes to aggregate; others are passed through to ``source``.
+        base: timeframe the others are built from.
+        capacity: minimum number of closed bars kept per (symbol, timeframe).
+        max_age: base bars fetched less than this many seconds ago are reused
+            rather than asked from the terminal again.
+    """
+
+    def __init__(self, source, timeframes=DEFAULT_TIMEFRAMES, base=TIMEFRAME_M1, capacity=1000, max_age=1.0):
+        self.base_seconds = timeframe_seconds(base)
+        for timeframe in timeframes:
+            seconds = timeframe_seconds(timeframe)
+            if 86400 % seconds or seconds % self.base_seconds:
+                raise ValueError(f"Timeframe {timeframe} cannot be built from timeframe {base}")
+        self.source = source
+        self.timeframes = frozenset(timeframes)
+        self.base = base
+        self.capacity = capacity
+        self.max_age = max_age
+        self._symbols = {}
+        self._subscribers = []
+        self._lock = threading.RLock()
+        self.seeds = 0
+        self.bars_closed = 0
+
+    def subscribe(self, callback):
+        """Call ``callback(symbol, timeframe, bar)`` for every bar that closes"""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
+
+    def get(self, symbol: str, timeframe: int, count: int):
+        """
+        Latest ``count`` bars like BarCache.get: a view whose last bar is the
+        forming one, valid until the next call for the same symbol.
+        """
+        if timeframe not in self.timeframes:
+            return self.source.get(symbol, timeframe, count)
+        closes = []
+        with self._lock:
+            state = self._symbols.setdefault(symbol, _SymbolBars())
+            if not state.ticks:
+                self._refresh(symbol, state, closes)
+            series = state.series.get(timeframe)
+            if series is None or (count > series.size + 1 and not series.history_exhausted):
+                series = self._seed(symbol, state, timeframe, count)
+            bars = series.view(count, state.forming) if series is not None else None
+        self._publish(symbol, closes)
+        return bars
+
+    def update(self, symbol: str):
+        """Fold in the base bars finished since the last call; returns the closed ``(timeframe, bar)`` pairs"""
+        closes = []
+        with self._lock:
+            state = self._symbols.get(symbol)
+            if state is not None and state.series and not state.ticks:
+                self._refresh(symbol, state, closes)
+        return self._publish(symbol, closes)
+
+    def update_ticks(self, symbol: str, ticks, point: float = None):
+        """
+        Fold a batch of ticks (copy_ticks_* records in time order) into the
+        symbol's bars, which from now on are built from ticks only. Prices are
+        the bid (``last`` where there is no bid); the spread is in points when
+        ``point`` is given, else 0. Returns the closed ``(timeframe, bar)`` pairs.
+        """
+        closes = []
+        with self._lock:
+            state = self._symbols.setdefault(symbol, _SymbolBars())
+            if not state.ticks:
+                # Seeding from the terminal counts every tick up to then
+                state.series.clear()
+                state.ticks = True
+                state.forming = None
+                state.last_base_time = None
+            if len(ticks) and state.series:
+                records = self._tick_records(ticks, point, next(iter(state.series.values())).buffer.dtype)
+                for timeframe, series in state.series.items():
+                    closed = []
+                    series.add(records, closed)
+                    closes.extend((timeframe, bar) for bar in closed)
+        return self._publish(symbol, closes)
+
+    def invalidate(self, symbol: str = None):
+        """Forget the bars of a symbol (or all); they are fetched again on the next get()"""
+        with self._lock:
+            if symbol is None:
+                self._symbols.clear()
+            else:
+                self._symbols.pop(symbol, None)
+
+    def _publish(self, symbol, closes):
+        self.bars_closed += len(closes)
+        for timeframe, bar in closes:
+            for callback in list(self._subscribers):
+                try:
+                    callback(symbol, timeframe, bar)
+                except Exception as e:
+                    logger.exception(f"Bar close subscriber failed for {symbol} {timeframe}: {e}")
+        return closes
+
+    def _base_count(self, state):
+        periods = [series.seconds // self.base_seconds for series in state.series.values()]
+        return max([MIN_BASE_COUNT] + [period + 2 for period in periods])
+
+    def _refresh(self, symbol, state, closes):
+        """Fold in the finished base bars and note the forming one"""
+        if not state.series:
+            return
+        count = self._base_count(state)
+        rates = self.source.get(symbol, self.base, count, max_age=self.max_age)
+        if rates is None or len(rates) == 0:
+            return
+        times = rates['time']
+        new = int(np.searchsorted(times, state.last_base_time, side='right'))
+        if new == 0 and len(rates) == count:
+            # More base bars finished since the last refresh than were fetched: start over
+            logger.info(f"Bar aggregator lost track of {symbol}, fetching its bars again")
+            state.series.clear()
+            state.last_base_time = None
+            return
+        finished = rates[new:-1]
+        state.forming = rates[-1:].copy()
+        if len(finished):
+            state.last_base_time = finished['time'][-1]
+        forming_time = state.forming['time'][0]
+        for timeframe, series in state.series.items():
+            closed = []
+            if len(finished):
+                series.add(finished, closed)
+            # The forming base bar opened a new period: the open one is complete
+            if series.partial is not None and forming_time - forming_time % series.seconds > series.partial['time'][0]:
+                series.close(closed)
+            closes.extend((timeframe, bar) for bar in closed)
+
+    def _seed(self, symbol, state, timeframe, count):
+        """Fetch the history of ``timeframe`` from the terminal and line it up with the base bars"""
+        seconds = timeframe_seconds(timeframe)
+        capacity = max(self.capacity, count)
+        rates = self.source.get(symbol, timeframe, capacity + 1)
+        if rates is None or len(rates) == 0:
+            state.series.pop(timeframe, None)
+            return None
+        self.seeds += 1
+        series = _Aggregate(seconds, rates.dtype, capacity)
+        series.history_exhausted = len(rates) < capacity + 1
+        series.append(rates[:-1])
+        if state.ticks:
+            # The terminal's forming bar already holds every tick so far
+            series.partial = rates[-1:].copy()
+        else:
+            # The open period from the finished base bars in it, so the forming base bar is not counted twice
+            base = self.source.get(symbol, self.base, max(seconds // self.base_seconds + 2, self._base_count(state)),
+                                   max_age=self.max_age)
+            if base is None or len(base) == 0:
+                return None
+            if state.last_base_time is None:
+                state.last_base_time = base['time'][-2] if len(base) > 1 else base['time'][0] - self.base_seconds
+                state.forming = base[-1:].copy()
+            opened = rates['time'][-1]
+            finished = base[(base['time'] >= opened) & (base['time'] <= state.last_base_time)]
+            if len(finished):
+                series.partial = aggregate(finished, seconds)[-1:]
+            forming_time = state.forming['time'][0]
+            if series.partial is not None and forming_time - forming_time % seconds > series.partial['time'][0]:
+                series.append(series.partial)
+                series.partial = None
+        state.series[timeframe] = series
+        return series
+
+    @staticmethod
+    def _tick_records(ticks, point, dtype):
+        """Ticks as one-tick bars"""
+        price = np.where(ticks['bid'] > 0, ticks['bid'], ticks['last'])
+        records = np.zeros(len(ticks), dtype=dtype)
+        records['time'] = ticks['time_msc'] // 1000
+        records['open'] = records['high'] = records['low'] = records['close'] = price
+        records['tick_volume'] = 1
+        records['real_volume'] = ticks['volume']
+        if point:
+            records['spread'] = np.round((ticks['ask'] - ticks['bid']) / point)
+        return records
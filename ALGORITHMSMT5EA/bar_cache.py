@@ -0,0 +1,155 @@
+"""
+Incremental OHLC bar cache shared by the EAs and the backend.
+
+EAs used to call copy_rates_from_pos for 50-500 full bars on every loop even
+though at most one or two bars change between loops. BarCache keeps the
+series per (symbol, timeframe) and on each request only asks the terminal for
+the bars that can have changed since the previous fetch: the forming bar plus
+the bars opened in the elapsed wall-clock time.
+
+The delta is fetched with copy_rates_from_pos and a small count rather than
+copy_rates_from/copy_rates_range by time: bar times are in broker server time,
+so asking "bars newer than T" would need the server's UTC offset, while
+"the last n bars" does not.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+
+def timeframe_seconds(timeframe: int) -> int:
+    """Length of an MT5 timeframe in seconds (months count as 28 days, the shortest)"""
+    # MT5 encodes the unit in the high bits: minutes, 0x4000 hours, 0x8000 weeks, 0xC000 months
+    unit, value = timeframe & 0xC000, timeframe & 0x3FFF
+    if unit == 0xC000:
+        return value * 28 * 86400
+    if unit == 0x8000:
+        return value * 7 * 86400
+    if unit == 0x4000:
+        return value * 3600
+    return timeframe * 60
+
+
+class _Series:
+    """Bars for one (symbol, timeframe); valid bars are buffer[start:end]"""
+
+    def __init__(self):
+        self.buffer = None
+        self.capacity = 0
+        self.start = 0
+        self.end = 0
+        self.last_fetch = 0.0
+        self.history_exhausted = False
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start
+
+
+class BarCache:
+    """
+    Cache of recent bars per (symbol, timeframe).
+
+    Args:
+        source: anything with copy_rates_from_pos (the MetaTrader5 module or a
+            backend terminal handle).
+        capacity: minimum number of bars kept per series; a series grows to the
+            largest count requested for it.
+    """
+
+    def __init__(self, source, capacity: int = 1000):
+        self.source = source
+        self.capacity = capacity
+        self._series = {}
+        self._lock = threading.Lock()
+        self.full_fetches = 0
+        self.incremental_fetches = 0
+        self.bars_fetched = 0
+
+    def get(self, symbol: str, timeframe: int, count: int, max_age: float = 0.0, copy: bool = False):
+        """
+        Return the latest ``count`` bars as a numpy structured array, or None if
+        the terminal has no data. The result is a view into the cache: it is
+        only valid until the next call for the same series, so copy it (or
+        build a DataFrame from it) before keeping it. Callers sharing the cache
+        between threads pass ``copy=True``, which copies the bars while the
+        cache is still locked. With ``max_age``, bars fetched less than that
+        many seconds ago are returned without asking the terminal.
+        """
+        with self._lock:
+            series = self._series.get((symbol, timeframe))
+            if series is None:
+                series = self._series[(symbol, timeframe)] = _Series()
+            if series.buffer is None or (count > series.size and not series.history_exhausted):
+                if not self._fetch_full(series, symbol, timeframe, count):
+                    return None
+            elif max_age and time.time() - series.last_fetch < max_age:
+                pass
+            elif not self._fetch_delta(series, symbol, timeframe):
+                if not self._fetch_full(series, symbol, timeframe, max(count, series.size)):
+                    return None
+            bars = series.buffer[max(series.start, series.end - count):series.end]
+            return bars.copy() if copy else bars
+
+    def invalidate(self, symbol: str = None, timeframe: int = None):
+        """Forget cached bars for a symbol/timeframe (or everything)"""
+        with self._lock:
+            for key in list(self._series):
+                if (symbol is None or key[0] == symbol) and (timeframe is None or key[1] == timeframe):
+                    del self._series[key]
+
+    def _fetch(self, symbol, timeframe, count):
+        rates = self.source.copy_rates_from_pos(symbol, timeframe, 0, count)
+        if rates is None or len(rates) == 0:
+            return None
+        self.bars_fetched += len(rates)
+        return rates
+
+    def _fetch_full(self, series: _Series, symbol: str, timeframe: int, count: int) -> bool:
+        fetched_at = time.time()
+        rates = self._fetch(symbol, timeframe, count)
+        if rates is None:
+            return False
+        self.full_fetches += 1
+        series.capacity = max(self.capacity, count)
+        series.buffer = np.empty(series.capacity * 2, dtype=rates.dtype)
+        series.buffer[:len(rates)] = rates
+        series.start, series.end = 0, len(rates)
+        series.history_exhausted = len(rates) < count
+        series.last_fetch = fetched_at
+        return True
+
+    def _fetch_delta(self, series: _Series, symbol: str, timeframe: int) -> bool:
+        """Merge the bars changed since the last fetch; False if they do not overlap the cache"""
+        fetched_at = time.time()
+        # The forming bar, every bar opened since the last fetch, and one spare for clock skew
+        count = int((fetched_at - series.last_fetch) // timeframe_seconds(timeframe)) + 2
+        if count >= series.size:
+            return False
+        rates = self._fetch(symbol, timeframe, count)
+        if rates is None:
+            return False
+
+        times = series.buffer['time'][series.start:series.end]
+        position = series.start + int(np.searchsorted(times, rates['time'][0]))
+        if position >= series.end:
+            # Gap between the cached bars and the new ones (e.g. terminal was offline)
+            return False
+        if position < series.end - count:
+            # Newest bars start further back than possible: the history was rebuilt
+            return False
+        self.incremental_fetches += 1
+
+        if position + len(rates) > len(series.buffer):
+            # Out of room at the tail: move the bars we keep to the front of the buffer
+            keep_from = max(series.start, position + len(rates) - series.capacity)
+            kept = position - keep_from
+            series.buffer[:kept] = series.buffer[keep_from:position]
+            series.start, position = 0, kept
+        series.buffer[position:position + len(rates)] = rates
+        series.end = position + len(rates)
+        series.start = max(series.start, series.end - series.capacity)
+        series.last_fetch = fetched_at
+        return True
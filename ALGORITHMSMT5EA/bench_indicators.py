@@ -0,0 +1,191 @@
+"""
+Benchmark: pandas indicators vs. NumPy kernels vs. streaming updates.
+
+For each indicator the EAs use, times one call the way the EAs used to
+compute it (a DataFrame built from the bars, times converted, then
+rolling/ewm), the same series from indicator_kernels on the structured
+array, and one update of the streaming indicator from indicators.py. The
+second table is the peak RSS of a fresh interpreter that imports the
+indicator stack and computes every indicator once, with and without
+pandas (what an EA process saves in ``EA_PANDAS_FREE=1`` mode).
+
+    python ALGORITHMSMT5EA/bench_indicators.py
+    python ALGORITHMSMT5EA/bench_indicators.py --bars 2000 --repeat 200
+
+No terminal is needed; the bars are a synthetic random walk.
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ALGORITHMSMT5EA import indicator_kernels as kernels
+from ALGORITHMSMT5EA.indicators import ADX, ATR, EMA, RSI, SMA, Channel
+
+RATES_DTYPE = [('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+               ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8')]
+
+
+def random_rates(count, seed=1):
+    """Random-walk M5 bars shaped like copy_rates_from_pos output"""
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0004, count))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    rates = np.zeros(count, dtype=RATES_DTYPE)
+    rates['time'] = 1_700_000_000 + np.arange(count) * 300
+    rates['open'] = open_
+    rates['close'] = close
+    rates['high'] = np.maximum(open_, close) + rng.uniform(0, 0.0005, count)
+    rates['low'] = np.minimum(open_, close) - rng.uniform(0, 0.0005, count)
+    rates['tick_volume'] = rng.integers(1, 500, count)
+    return rates
+
+
+def _frame(rates):
+    """What the EAs' get_market_data did on every call"""
+    import pandas as pd
+    df = pd.DataFrame(rates)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return df
+
+
+def _pandas_rsi(rates, period=14):
+    close = _frame(rates)['close']
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    return 100 - (100 / (1 + gain / loss))
+
+
+def _pandas_atr(rates, period=14):
+    import pandas as pd
+    data = _frame(rates)
+    high, low, close = data['high'], data['low'], data['close']
+    tr = pd.concat([high - low, abs(high - close.shift()), abs(low - close.shift())], axis=1).max(axis=1)
+    return tr.rolling(window=period).mean()
+
+
+def _pandas_adx(rates, period=14):
+    import pandas as pd
+    data = _frame(rates)
+    high, low, close = data['high'], data['low'], data['close']
+    plus_dm = high.diff()
+    minus_dm = low.diff()
+    plus_dm[plus_dm < 0] = 0
+    minus_dm[minus_dm > 0] = 0
+    minus_dm = minus_dm.abs()
+    tr = pd.concat([high - low, abs(high - close.shift()), abs(low - close.shift())], axis=1).max(axis=1)
+    atr = tr.rolling(window=period).mean()
+    plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
+    minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
+    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+    return dx.rolling(window=period).mean(), plus_di, minus_di
+
+
+def _pandas_channel(rates, period=14):
+    data = _frame(rates)
+    return data['high'].rolling(window=period).max() - data['low'].rolling(window=period).min()
+
+
+# name -> (pandas call, kernel call, streaming indicator factory)
+BENCHMARKS = {
+    'SMA(20)': (lambda r: _frame(r)['close'].rolling(window=20).mean(),
+                lambda r: kernels.sma(r, 20), lambda: SMA(20)),
+    'EMA(200)': (lambda r: _frame(r)['close'].ewm(span=200, adjust=False).mean(),
+                 lambda r: kernels.ema(r, 200), lambda: EMA(200)),
+    'RSI(14)': (_pandas_rsi, lambda r: kernels.rsi(r, 14, wilder=False), lambda: RSI(14, wilder=False)),
+    'ATR(14)': (_pandas_atr, lambda r: kernels.atr(r, 14, wilder=False), lambda: ATR(14, wilder=False)),
+    'ADX(14)': (_pandas_adx, lambda r: kernels.adx(r, 14, wilder=False), lambda: ADX(14, wilder=False)),
+    'Channel(14)': (_pandas_channel, lambda r: kernels.channel(r, 14), lambda: Channel(14)),
+}
+
+
+def _per_call_us(call, repeat):
+    call()  # warm-up (first-use imports and allocations)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def benchmark_calls(bars, repeat):
+    """[(name, pandas µs, kernel µs, streaming update µs)] per indicator"""
+    rates = random_rates(bars + repeat)
+    window = rates[:bars]
+    rows = []
+    for name, (pandas_call, kernel_call, factory) in BENCHMARKS.items():
+        pandas_us = _per_call_us(lambda: pandas_call(window), repeat)
+        kernel_us = _per_call_us(lambda: kernel_call(window), repeat)
+        indicator = factory()
+        indicator.warm_up(window)
+        new_bars = iter(rates[bars:])
+        streaming_us = _per_call_us(lambda: indicator.update_bar(next(new_bars)), repeat - 1)
+        rows.append((name, pandas_us, kernel_us, streaming_us))
+    return rows
+
+
+def _peak_rss_mb():
+    """Peak RSS of this process; Linux keeps ru_maxrss across exec, so the parent's peak would leak in"""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def _child(mode, bars):
+    """Body of the RSS subprocess: import the stack, compute everything once, print the peak RSS"""
+    rates = random_rates(bars)
+    for pandas_call, kernel_call, _ in BENCHMARKS.values():
+        if mode == 'pandas':
+            pandas_call(rates)
+        else:
+            kernel_call(rates)
+    assert mode == 'pandas' or 'pandas' not in sys.modules, "the NumPy path imported pandas"
+    print(_peak_rss_mb())
+
+
+def benchmark_rss(bars):
+    """{mode: peak RSS in MB} of a fresh interpreter per mode"""
+    rss = {}
+    for mode in ('pandas', 'numpy'):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, '--bars', str(bars)],
+                                capture_output=True, text=True, check=True).stdout
+        rss[mode] = float(output.split()[-1])
+    return rss
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time pandas indicators against the NumPy kernels")
+    parser.add_argument('--bars', type=int, default=500, help="bars per call (the EAs load 100-500)")
+    parser.add_argument('--repeat', type=int, default=100, help="calls per measurement")
+    parser.add_argument('--child', choices=('pandas', 'numpy'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        _child(args.child, args.bars)
+        return
+
+    print(f"Per call on {args.bars} bars (µs):")
+    print(f"{'indicator':<12} {'pandas':>10} {'kernel':>10} {'speedup':>8} {'streaming':>10} {'speedup':>8}")
+    for name, pandas_us, kernel_us, streaming_us in benchmark_calls(args.bars, args.repeat):
+        print(f"{name:<12} {pandas_us:>10.1f} {kernel_us:>10.1f} {pandas_us / kernel_us:>7.1f}x "
+              f"{streaming_us:>10.1f} {pandas_us / streaming_us:>7.1f}x")
+
+    rss = benchmark_rss(args.bars)
+    print("\nPeak RSS of an interpreter computing every indicator once:")
+    print(f"  pandas: {rss['pandas']:.1f} MB")
+    print(f"  NumPy:  {rss['numpy']:.1f} MB ({rss['pandas'] - rss['numpy']:.1f} MB less)")
+
+
+if __name__ == '__main__':
+    main()
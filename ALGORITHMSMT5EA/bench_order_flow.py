@@ -0,0 +1,131 @@
+"""
+Benchmark: the scalper's order-flow metrics per tick, three ways.
+
+Each step appends one tick to the window and computes the metrics:
+
+- pandas: ``pd.DataFrame(list(tick_data))`` and the pandas reductions, as
+  analyze_order_flow/calculate_flow_metrics did originally;
+- columns: NumPy columns rebuilt from the tick deque and reduced (the
+  pandas-free version);
+- window: OrderFlowWindow.update() and metrics(), the running sums.
+
+    python ALGORITHMSMT5EA/bench_order_flow.py
+    python ALGORITHMSMT5EA/bench_order_flow.py --window 200 --ticks 5000
+
+No terminal is needed; the ticks are a synthetic random walk.
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ALGORITHMSMT5EA.order_flow import OrderFlowWindow
+
+POINT = 0.01
+
+
+def random_ticks(count, seed=1):
+    """Tick dicts shaped like the scalper's get_current_prices() output"""
+    rng = np.random.default_rng(seed)
+    bid = 60000 + np.cumsum(rng.integers(-300, 301, count)) * POINT
+    spread = rng.integers(1, 9, count)
+    seconds = 1_700_000_000 + np.cumsum(rng.integers(0, 2, count))
+    volume = rng.integers(0, 50, count)
+    return [{'time': int(t), 'bid': float(b), 'ask': float(b + s * POINT), 'spread': float(s), 'volume': int(v)}
+            for t, b, s, v in zip(seconds, bid, spread, volume)]
+
+
+def _pandas_metrics(tick_data):
+    import pandas as pd
+    df = pd.DataFrame(list(tick_data))
+    bid_pressure = df['bid'].diff().sum()
+    ask_pressure = df['ask'].diff().sum()
+    if 'volume' in df.columns and df['volume'].sum() > 0:
+        volume_bias = (df['bid'].iloc[-1] - (df['bid'] * df['volume']).sum() / df['volume'].sum()) / POINT
+    else:
+        volume_bias = 0.0
+    time_diffs = df['time'].diff().dropna()
+    return {
+        'price_momentum': (df['bid'].iloc[-1] - df['bid'].iloc[0]) / POINT,
+        'pressure_ratio': ask_pressure / (bid_pressure + 1e-10),
+        'volume_bias': volume_bias,
+        'spread_pressure': df['spread'].iloc[-1] - df['spread'].mean(),
+        'tick_frequency': time_diffs.mean() if len(time_diffs) > 0 else 1.0,
+        'current_spread': df['spread'].iloc[-1],
+    }
+
+
+def _columns_metrics(tick_data):
+    ticks = {name: np.array([tick[name] for tick in tick_data], dtype=float)
+             for name in ('time', 'bid', 'ask', 'spread', 'volume')}
+    bid, ask, spread, volume = ticks['bid'], ticks['ask'], ticks['spread'], ticks['volume']
+    bid_pressure, ask_pressure = np.diff(bid).sum(), np.diff(ask).sum()
+    if volume.sum() > 0:
+        volume_bias = (bid[-1] - (bid * volume).sum() / volume.sum()) / POINT
+    else:
+        volume_bias = 0.0
+    time_diffs = np.diff(ticks['time'])
+    time_diffs = time_diffs[~np.isnan(time_diffs)]
+    return {
+        'price_momentum': (bid[-1] - bid[0]) / POINT,
+        'pressure_ratio': ask_pressure / (bid_pressure + 1e-10),
+        'volume_bias': volume_bias,
+        'spread_pressure': spread[-1] - spread.mean(),
+        'tick_frequency': time_diffs.mean() if len(time_diffs) > 0 else 1.0,
+        'current_spread': spread[-1],
+    }
+
+
+def _per_tick_us(ticks, window, step):
+    """Mean µs of ``step(tick)`` over the ticks after the first ``window`` (which fill the window)"""
+    for tick in ticks[:window]:
+        step(tick)
+    started = time.perf_counter()
+    for tick in ticks[window:]:
+        step(tick)
+    return (time.perf_counter() - started) / (len(ticks) - window) * 1e6
+
+
+def benchmark(window, count):
+    """{name: µs per tick}"""
+    ticks = random_ticks(window + count)
+    results = {}
+    for name, metrics in (('pandas', _pandas_metrics), ('columns', _columns_metrics)):
+        tick_data = deque(maxlen=window)
+
+        def step(tick):
+            tick_data.append(tick)
+            metrics(tick_data)
+        results[name] = _per_tick_us(ticks, window, step)
+
+    flow = OrderFlowWindow(window)
+
+    def step(tick):
+        flow.update(tick['time'], tick['bid'], tick['ask'], tick['spread'], tick['volume'])
+        flow.metrics(POINT)
+    results['window'] = _per_tick_us(ticks, window, step)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the scalper's order-flow metrics per tick")
+    parser.add_argument('--window', type=int, nargs='+', default=[20, 100, 500],
+                        help="ticks in the window (the scalper's TICK_ANALYSIS_PERIOD is 20)")
+    parser.add_argument('--ticks', type=int, default=2000, help="ticks timed per measurement")
+    args = parser.parse_args(argv)
+
+    print("Per tick (µs):")
+    print(f"{'window':>6} {'pandas':>10} {'columns':>10} {'window':>10} {'vs pandas':>10} {'vs columns':>10}")
+    for window in args.window:
+        us = benchmark(window, args.ticks)
+        print(f"{window:>6} {us['pandas']:>10.1f} {us['columns']:>10.1f} {us['window']:>10.1f} "
+              f"{us['pandas'] / us['window']:>9.0f}x {us['columns'] / us['window']:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,9 +11,7 @@ Date: July 31, 2025
 """
 
 import MetaTrader5 as mt5
-import pandas as pd
 import numpy as np
-import time
 import sys
 import os
 import logging
@@ -21,16 +19,20 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from global_config import get_account_credentials, get_risk_settings
 from risk_manager import RiskManager
 # Import common EA utilities
-from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, check_pause_flag
+from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, get_rates, market_data, indicator_feed, entries_allowed, position_book, EA
+from ALGORITHMSMT5EA.ea_logging import get_logger, setup_logging
+from ALGORITHMSMT5EA.indicators import RSI, SMA
 
-# Setup logging
-logging.basicConfig(
-    filename='candy_ea_debug.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Setup logging (written by a background thread)
+setup_logging('candy_ea_debug.log')
+
+class CandyEA(EA):
+    # H1/H4 trend on each closed H4/H1 bar (built from M1 by bar_aggregator), RSI signal on each closed M1 bar
+    timeframes = (mt5.TIMEFRAME_H4, mt5.TIMEFRAME_H1, mt5.TIMEFRAME_M1)
+    timer_interval = 60  # trailing stops and risk check
+    # Changeable through set_params
+    tunable_params = {'base_lot': float, 'trailing_enabled': bool, 'trailing_distance_points': int, 'max_risk_percent': float}
 
-class CandyEA:
     def __init__(self, symbol="EURUSD", base_lot=0.1, magic_number=20250731):
         credentials = get_account_credentials()
         self.symbol = credentials.get('symbol', symbol)
@@ -45,6 +47,16 @@ class CandyEA:
         self.trailing_distance_points = 50
         self.max_risk_percent = 10.0
         self.log_file = "candy_ea.log"
+        self.logger = get_logger('candy_ea', self.log_file)
+        # Streaming indicators on closed bars: M1 RSI for the signal, H1/H4 20-bar MAs for the trend
+        self.rsi = RSI(14, wilder=False)
+        self.h1_ma = SMA(20)
+        self.h4_ma = SMA(20)
+        self.m1_feed = indicator_feed(self.symbol, mt5.TIMEFRAME_M1, [self.rsi], warmup=50)
+        self.h1_feed = indicator_feed(self.symbol, mt5.TIMEFRAME_H1, [self.h1_ma], warmup=100)
+        self.h4_feed = indicator_feed(self.symbol, mt5.TIMEFRAME_H4, [self.h4_ma], warmup=100)
+        # BULLISH/BEARISH/None, recomputed when an H1 or H4 bar closes
+        self.trend = None
 
     def initialize_mt5(self):
         # Use shared utility
@@ -59,46 +71,30 @@ class CandyEA:
         return get_current_price(self.symbol)
 
     def get_market_data(self, timeframe, num_bars=100):
-        rates = mt5.copy_rates_from_pos(self.symbol, timeframe, 0, num_bars)
-        if rates is None:
-            return None
-        df = pd.DataFrame(rates)
-        df['time'] = pd.to_datetime(df['time'], unit='s')
-        return df
-
-    def calculate_rsi(self, close, period=14):
-        delta = close.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+        return market_data(get_rates(self.symbol, timeframe, num_bars))
 
     def get_trend(self):
-        # Use H1 and H4 for trend
-        h1 = self.get_market_data(mt5.TIMEFRAME_H1, 100)
-        h4 = self.get_market_data(mt5.TIMEFRAME_H4, 100)
-        if h1 is None or h4 is None:
+        # Use H1 and H4 for trend: last closed bar against its 20-bar MA
+        self.h1_feed.update()
+        self.h4_feed.update()
+        if not (self.h1_ma.ready and self.h4_ma.ready):
             return None
-        h1_ma = h1['close'].rolling(window=20).mean().iloc[-1]
-        h4_ma = h4['close'].rolling(window=20).mean().iloc[-1]
-        h1_last = h1['close'].iloc[-1]
-        h4_last = h4['close'].iloc[-1]
-        if h1_last > h1_ma and h4_last > h4_ma:
+        h1_last = self.h1_feed.last_bar['close']
+        h4_last = self.h4_feed.last_bar['close']
+        if h1_last > self.h1_ma.value and h4_last > self.h4_ma.value:
             return "BULLISH"
-        elif h1_last < h1_ma and h4_last < h4_ma:
+        elif h1_last < self.h1_ma.value and h4_last < self.h4_ma.value:
             return "BEARISH"
         else:
             return None
 
     def get_signal(self):
-        m1 = self.get_market_data(mt5.TIMEFRAME_M1, 50)
-        if m1 is None or len(m1) < 15:
+        self.m1_feed.update()
+        last_rsi = self.rsi.value
+        prev_rsi = self.rsi.previous
+        if last_rsi is None or prev_rsi is None:
             return None
-        rsi = self.calculate_rsi(m1['close'], 14)
-        last_rsi = rsi.iloc[-1]
-        prev_rsi = rsi.iloc[-2]
-        trend = self.get_trend()
+        trend = self.trend
         if trend == "BULLISH" and prev_rsi < 50 and last_rsi >= 50:
             return "BUY"
         elif trend == "BEARISH" and prev_rsi > 50 and last_rsi <= 50:
@@ -136,7 +132,7 @@ class CandyEA:
             "type_time": mt5.ORDER_TIME_GTC,
             "type_filling": mt5.ORDER_FILLING_IOC,
         }
-        result = mt5.order_send(request)
+        result = position_book.order_send(request)
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             self.log(f"Failed to open {direction} position: {result.retcode}")
             return None
@@ -149,7 +145,7 @@ class CandyEA:
         if account_risk > self.max_risk_percent:
             self.log("Max risk reached! No new trades.")
             return
-        positions = mt5.positions_get(symbol=self.symbol)
+        positions = position_book.positions(self.symbol, self.magic_number)
         if positions:
             for pos in positions:
                 self.update_trailing_stop(pos, pos.price_current)
@@ -179,7 +175,7 @@ class CandyEA:
             "sl": new_sl,
             "tp": position.tp,
         }
-        result = mt5.order_send(request)
+        result = position_book.order_send(request)
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             self.log(f"Failed to update trailing stop: {result.retcode}")
             return False
@@ -200,37 +196,31 @@ class CandyEA:
             "sl": tighter_sl,
             "tp": position.tp,
         }
-        result = mt5.order_send(request)
+        result = position_book.order_send(request)
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             self.log(f"Stop loss tightened to {tighter_sl:.5f} for position {position.ticket}")
         return True
 
     def log(self, message):
-        with open(self.log_file, "a") as f:
-            f.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}\n")
-        print(message)
+        # Queued; the file and console are written by the logging thread
+        self.logger.info(message)
 
-    def run(self):
-        if not self.initialize_mt5():
-            logging.error("Failed to initialize MT5. Exiting.")
-            return
-        self.is_running = True
+    def on_start(self):
         logging.info("Candy EA started...")
         print("Candy EA started...")
-        try:
-            while self.is_running:
-                # Use shared pause flag logic
-                check_pause_flag(os.path.dirname(os.path.abspath(__file__)))
-                self.manage_positions()
-                signal = self.get_signal()
-                if signal:
-                    self.open_position(signal)
-                time.sleep(60)
-        except KeyboardInterrupt:
-            logging.info("EA stopped by user")
-            print("EA stopped by user")
-        finally:
-            self.stop()
+        self.trend = self.get_trend()
+        return True
+
+    def on_bar_close(self, timeframe, bar):
+        if timeframe != mt5.TIMEFRAME_M1:
+            self.trend = self.get_trend()
+            return
+        signal = self.get_signal()
+        if signal and entries_allowed():
+            self.open_position(signal)
+
+    def on_timer(self):
+        self.manage_positions()
 
     def stop(self):
         self.is_running = False
@@ -1,7 +1,59 @@
 import MetaTrader5 as mt5
+import atexit
+import importlib.abc
 import os
+import sys
 import time
 import logging
+from ALGORITHMSMT5EA.bar_aggregator import BarAggregator
+from ALGORITHMSMT5EA.bar_cache import BarCache, timeframe_seconds
+from ALGORITHMSMT5EA.control_channel import ControlChannel
+from ALGORITHMSMT5EA.indicators import IndicatorFeed
+from ALGORITHMSMT5EA.order_pipeline import OrderPipeline
+from ALGORITHMSMT5EA.position_book import PositionBook
+from ALGORITHMSMT5EA.shm_store import SharedBars, SharedTicks
+from ALGORITHMSMT5EA.symbol_cache import SymbolCache
+from ALGORITHMSMT5EA.tick_stream import TickMultiplexer
+
+# EA_PANDAS_FREE=1 runs the EAs on NumPy arrays only: pandas is never imported in the process
+PANDAS_FREE = os.environ.get('EA_PANDAS_FREE', '').lower() in ('1', 'true', 'yes')
+
+class _PandasBlocker(importlib.abc.MetaPathFinder):
+    """Fails ``import pandas`` loudly instead of letting a stray import load it"""
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname == 'pandas' or fullname.startswith('pandas.'):
+            raise ModuleNotFoundError(f"{fullname} is not imported in pandas-free mode (EA_PANDAS_FREE is set)",
+                                      name=fullname)
+        return None
+
+if PANDAS_FREE:
+    if 'pandas' in sys.modules:
+        logging.warning("EA_PANDAS_FREE is set but pandas was imported before common_ea")
+    sys.meta_path.insert(0, _PandasBlocker())
+
+# Bars per (symbol, timeframe) for this EA process; only new bars are fetched each loop
+bar_cache = BarCache(mt5)
+
+# EA_SHM_DIR=<dir> reads bars and ticks from the shared store a shm_store writer process fills
+# (one terminal client for all EAs on the machine); anything it lacks still comes from the terminal
+SHM_DIR = os.environ.get('EA_SHM_DIR')
+
+# M5, M15, H1, H4 and D1 bars for this EA process, kept up to date from the cached M1 bars
+bar_aggregator = BarAggregator(SharedBars(bar_cache, SHM_DIR) if SHM_DIR else bar_cache)
+
+# Symbol metadata for this EA process; static fields are fetched once per symbol
+symbol_cache = SymbolCache(mt5)
+
+# Every tick of the subscribed symbols for this EA process; the EventLoop polls it once per pass
+tick_stream = TickMultiplexer(SharedTicks(mt5, SHM_DIR) if SHM_DIR else mt5)
+
+# Open positions and pending orders of the terminal, fetched at most every 0.5 s and indexed by
+# symbol and magic number; trades sent through it (or order_pipeline) are seen by the next lookup
+position_book = PositionBook(mt5)
+
+# Batched order_check/order_send for this EA process: a batch of N orders takes about one round-trip
+order_pipeline = OrderPipeline(position_book)
 
 def initialize_mt5(login, password, server):
     if not mt5.initialize():
@@ -16,12 +68,15 @@ def initialize_mt5(login, password, server):
             print("Login failed")
             print("Error code:", mt5.last_error())
             return False
+    # Contract specifications may differ on another account or server
+    symbol_cache.invalidate()
     logging.info("MetaTrader 5 initialized and logged in.")
     print("MetaTrader 5 initialized and logged in.")
     return True
 
 def get_symbol_info(symbol):
-    symbol_info = mt5.symbol_info(symbol)
+    """Symbol metadata from the process-wide symbol_cache; quote fields are still read live"""
+    symbol_info = symbol_cache.get(symbol)
     if symbol_info is None:
         print(f"Symbol {symbol} not found")
         return None
@@ -35,6 +90,30 @@ def get_current_price(symbol):
         return None, None
     return tick.bid, tick.ask
 
+def get_rates(symbol, timeframe, count):
+    """Latest ``count`` bars from the shared bar cache (a view; copy before keeping it)"""
+    return bar_aggregator.get(symbol, timeframe, count)
+
+def market_data(rates):
+    """Bars as the EAs' get_market_data returns them: a DataFrame with datetime times, or a copy of
+    the structured array in pandas-free mode"""
+    if rates is None:
+        return None
+    if PANDAS_FREE:
+        return rates.copy()
+    import pandas as pd
+    df = pd.DataFrame(rates)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return df
+
+def indicator_feed(symbol, timeframe, indicators, warmup=500):
+    """IndicatorFeed keeping ``indicators`` up to date with the closed bars from the shared bar cache"""
+    return IndicatorFeed(bar_aggregator, symbol, timeframe, indicators, warmup=warmup)
+
+def is_paused(ea_dir):
+    """True while pause.flag exists in the EA directory (check_pause_flag without the wait)"""
+    return os.path.exists(os.path.join(ea_dir, 'pause.flag'))
+
 def check_pause_flag(ea_dir):
     pause_flag_path = os.path.join(ea_dir, 'pause.flag')
     if os.path.exists(pause_flag_path):
@@ -44,3 +123,388 @@ def check_pause_flag(ea_dir):
             time.sleep(5)
         print("EA resumed.")
         logging.info("EA resumed.")
+
+# Control channel of this EA process (opened at import, or by EventLoop.run, when started for an execution)
+control = None
+
+def _env_flag(name):
+    return os.environ.get(name, '').lower() in ('1', 'true', 'yes')
+
+def open_control_channel(ea=None):
+    """
+    Serve the control channel when started for an AlgorithmExecution (EA_EXECUTION_ID set).
+    EA_START_PAUSED and EA_START_NO_NEW_ENTRIES carry the pause/stop_new_entries state of an
+    execution the supervisor restarts. The environment is read on each call until the channel is
+    open, so a process that imported this module before getting it (a fork server child) still opens it.
+    """
+    global control
+    execution_id = os.environ.get('EA_EXECUTION_ID')
+    if control is None and execution_id:
+        try:
+            control = ControlChannel(execution_id, paused=_env_flag('EA_START_PAUSED'),
+                                     new_entries=not _env_flag('EA_START_NO_NEW_ENTRIES')).start()
+            atexit.register(control.close)
+        except OSError as e:
+            logging.error(f"Could not open the control channel: {e}")
+    if control is not None and ea is not None:
+        control.target = ea
+    return control
+
+def entries_allowed():
+    """False after a stop_new_entries command; EAs check it before opening trades"""
+    return control is None or control.new_entries
+
+def close_all_trades(symbol, magic=0):
+    """Close the positions and delete the pending orders on ``symbol`` (of ``magic`` unless 0)"""
+    bid, ask = get_current_price(symbol)
+    closes, removes = [], []
+    for position in position_book.positions(symbol, magic or None):
+        if bid is None:
+            continue
+        buy = position.type == mt5.ORDER_TYPE_BUY
+        closes.append((position.ticket, {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": symbol,
+            "volume": position.volume,
+            "type": mt5.ORDER_TYPE_SELL if buy else mt5.ORDER_TYPE_BUY,
+            "position": position.ticket,
+            "price": bid if buy else ask,
+            "deviation": 20,
+            "magic": position.magic,
+            "comment": "Close all",
+            "type_time": mt5.ORDER_TIME_GTC,
+            "type_filling": mt5.ORDER_FILLING_IOC,
+        }))
+    for order in position_book.orders(symbol, magic or None):
+        removes.append((order.ticket, {"action": mt5.TRADE_ACTION_REMOVE, "order": order.ticket}))
+    if not closes and not removes:
+        return 0, 0
+
+    # One batch: flattening takes about one round-trip however many trades are open.
+    # No order_check, a close must not wait on a margin check.
+    results = order_pipeline.submit([request for _, request in closes + removes], validate=False)
+    closed = removed = 0
+    for (ticket, request), result in zip(closes + removes, results):
+        if result.retcode == mt5.TRADE_RETCODE_DONE:
+            if request["action"] == mt5.TRADE_ACTION_DEAL:
+                closed += 1
+            else:
+                removed += 1
+        elif request["action"] == mt5.TRADE_ACTION_DEAL:
+            logging.error(f"Failed to close position {ticket}: {result.retcode}")
+        else:
+            logging.error(f"Failed to delete order {ticket}: {result.retcode}")
+    return closed, removed
+
+PAUSE_POLL_SECONDS = 5   # pause.flag checks
+BAR_POLL_SECONDS = 1.0   # bar close checks
+
+class EA:
+    """
+    Base class of the EAs. Subclasses override the hooks they need and the
+    EventLoop only polls for those:
+
+        on_start()                      once before the first event; False cancels the start
+        on_tick(tick)                   new quote on ``symbol`` (checked every ``tick_interval`` s)
+        on_bar_close(timeframe, bar)    a bar of one of ``timeframes`` closed; ``bar`` is that bar
+        on_position_change(positions)   the EA's positions on ``symbol`` opened, closed or changed SL/TP/volume
+        on_timer()                      every ``timer_interval`` seconds, the first time right after on_start
+
+    Subclasses also provide ``symbol``, ``magic_number`` (0 = every position
+    on the symbol), ``initialize_mt5()`` and ``stop()``. ``tunable_params``
+    ({attribute: bool/int/float/str}) lists what the set_params control
+    command may change; nothing else can be set from outside.
+    """
+
+    symbol = None
+    magic_number = 0
+    timeframes = ()
+    timer_interval = None
+    tick_interval = 0.25
+    position_interval = 1.0
+    is_running = False
+    tunable_params = {}
+
+    @property
+    def ea_dir(self):
+        """Folder of the EA script, where pause.flag is looked for"""
+        return os.path.dirname(os.path.abspath(sys.modules[type(self).__module__].__file__))
+
+    def on_start(self):
+        return True
+
+    def on_tick(self, tick):
+        pass
+
+    def on_bar_close(self, timeframe, bar):
+        pass
+
+    def on_position_change(self, positions):
+        pass
+
+    def on_timer(self):
+        pass
+
+    def run(self):
+        """Connect, run the hooks on an event loop of its own until stopped, then stop()"""
+        if not self.initialize_mt5():
+            logging.error("Failed to initialize MT5. Exiting.")
+            return
+        try:
+            loop = EventLoop()
+            loop.add(self)
+            loop.run()
+        except KeyboardInterrupt:
+            logging.info("EA stopped by user")
+            print("EA stopped by user")
+        finally:
+            self.stop()
+
+class _Handle:
+    """Event state and run statistics of one EA in an EventLoop"""
+
+    def __init__(self, ea, name):
+        self.ea = ea
+        self.name = name
+        self.ea_dir = ea.ea_dir
+        ea_class = type(ea)
+        self.wants_ticks = ea_class.on_tick is not EA.on_tick
+        self.wants_positions = ea_class.on_position_change is not EA.on_position_change
+        self.timeframes = tuple(ea.timeframes) if ea_class.on_bar_close is not EA.on_bar_close else ()
+        self.next_tick = self.next_bars = self.next_positions = self.next_timer = 0.0
+        self.next_pause_check = 0.0
+        self.last_tick_msc = None
+        self.bars = {}            # timeframe -> [period of the last tick seen, open time of the forming bar]
+        self.positions = None     # fingerprint of the last positions seen
+        self.paused = False
+        self.suspended_until = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.slowest_call = 0.0
+
+    def next_due(self):
+        if self.paused:
+            return self.next_pause_check
+        due = [self.next_pause_check]
+        if self.wants_ticks:
+            due.append(self.next_tick)
+        if self.timeframes:
+            due.append(self.next_bars)
+        if self.wants_positions:
+            due.append(self.next_positions)
+        if self.ea.timer_interval:
+            due.append(self.next_timer)
+        return max(min(due), self.suspended_until)
+
+    def stats(self):
+        mean = self.busy_seconds / self.calls if self.calls else 0.0
+        return (f"{self.name}: {self.calls} calls, {self.errors} errors, "
+                f"mean {mean * 1000:.1f} ms, slowest {self.slowest_call * 1000:.1f} ms")
+
+class EventLoop:
+    """
+    Drives the hooks of one or more EAs from one thread.
+
+    The MT5 Python API has no callbacks, so events are found by polling, and
+    the polls are shared: one symbol_info_tick per symbol and pass, and one
+    positions_get for all symbols through ``position_book``, however many
+    EAs trade them. A new tick is told by its time_msc, a bar close by the
+    tick time entering a new period (confirmed from the bar cache) and a
+    position change by the ticket, volume, SL and TP of the positions.
+    Between passes the loop sleeps until the earliest poll or timer is due,
+    waking early for control commands. EAs that need every tick rather than
+    the latest quote subscribe to ``tick_stream``, which the loop polls once
+    per pass.
+
+    Args:
+        restart_on_error: keep an EA whose hook raised (suspended for
+            ``error_delay`` seconds) instead of dropping it.
+        stats_interval: seconds between per-EA statistics log lines; None for none.
+    """
+
+    def __init__(self, restart_on_error=True, error_delay=5.0, stats_interval=None):
+        self.restart_on_error = restart_on_error
+        self.error_delay = error_delay
+        self.stats_interval = stats_interval
+        self.handles = []
+        self.is_running = False
+        self._control_paused = False
+
+    def add(self, ea, name=None):
+        handle = _Handle(ea, name or f"{type(ea).__name__}:{ea.symbol}")
+        self.handles.append(handle)
+        if control is not None and control.target is None:
+            control.target = ea
+        return handle
+
+    def run(self):
+        """Start the EAs and dispatch their events until all have stopped or stop() is called"""
+        self.is_running = True
+        if open_control_channel() is not None and control.target is None and self.handles:
+            control.target = self.handles[0].ea
+        while control is not None and control.paused and self.is_running:
+            # Restart of a paused execution: nothing trades, on_start included, until resumed
+            self._apply_control()
+            control.wait_while_paused()
+        started = []
+        for handle in self.handles:
+            handle.ea.is_running = True
+            if not self._call(handle, handle.ea.on_start) or not handle.ea.is_running:
+                logging.error(f"{handle.name} did not start")
+                continue
+            started.append(handle)
+        self.handles = started
+
+        next_stats = time.time() + self.stats_interval if self.stats_interval else None
+        while self.is_running and self.handles:
+            now = time.time()
+            self._apply_control()
+            if tick_stream.symbols:
+                tick_stream.poll()
+            ticks = {}
+            for handle in self.handles:
+                self._dispatch(handle, now, ticks)
+            for handle in [handle for handle in self.handles if not handle.ea.is_running]:
+                logging.info(f"{handle.name} stopped")
+                logging.info(handle.stats())
+                self.handles.remove(handle)
+            if next_stats is not None and now >= next_stats:
+                next_stats = now + self.stats_interval
+                for handle in self.handles:
+                    logging.info(handle.stats())
+                for symbol, stats in tick_stream.stats().items():
+                    logging.info(f"Ticks {symbol}: {stats}")
+            if self.handles:
+                if self._control_paused:
+                    # resume wakes the wait
+                    wait = PAUSE_POLL_SECONDS
+                else:
+                    wait = min(handle.next_due() for handle in self.handles) - time.time()
+                if wait > 0:
+                    if control is None:
+                        time.sleep(wait)
+                    else:
+                        control.wait(wait)
+        self.is_running = False
+
+    def stop(self):
+        self.is_running = False
+
+    def _dispatch(self, handle, now, ticks):
+        ea = handle.ea
+        if now >= handle.next_pause_check:
+            handle.next_pause_check = now + PAUSE_POLL_SECONDS
+            paused = is_paused(handle.ea_dir)
+            if paused != handle.paused:
+                handle.paused = paused
+                message = "EA paused. Waiting for resume..." if paused else "EA resumed."
+                print(message)
+                logging.info(f"{handle.name}: {message}")
+        if handle.paused or self._control_paused or now < handle.suspended_until:
+            return
+
+        if handle.wants_ticks and now >= handle.next_tick:
+            handle.next_tick = now + ea.tick_interval
+            tick = self._tick(ea.symbol, ticks)
+            if tick is not None and tick.time_msc != handle.last_tick_msc:
+                handle.last_tick_msc = tick.time_msc
+                if not self._call(handle, ea.on_tick, tick):
+                    return
+
+        if handle.timeframes and now >= handle.next_bars:
+            handle.next_bars = now + BAR_POLL_SECONDS
+            tick = self._tick(ea.symbol, ticks)
+            if tick is not None:
+                for timeframe in handle.timeframes:
+                    bar = self._closed_bar(handle, timeframe, tick)
+                    if bar is not None and not self._call(handle, ea.on_bar_close, timeframe, bar):
+                        return
+
+        if handle.wants_positions and now >= handle.next_positions:
+            handle.next_positions = now + ea.position_interval
+            current = self._positions(ea)
+            fingerprint = frozenset((p.ticket, p.volume, p.sl, p.tp) for p in current)
+            changed = handle.positions is not None and fingerprint != handle.positions
+            handle.positions = fingerprint
+            if changed and not self._call(handle, ea.on_position_change, current):
+                return
+
+        interval = ea.timer_interval
+        if interval and now >= handle.next_timer:
+            handle.next_timer = now + interval
+            self._call(handle, ea.on_timer)
+
+    def _call(self, handle, hook, *args):
+        """Run one hook; False if it raised or stopped the EA"""
+        started = time.perf_counter()
+        try:
+            result = hook(*args)
+        except Exception as e:
+            handle.errors += 1
+            logging.exception(f"{handle.name} {hook.__name__} failed: {e}")
+            if self.restart_on_error:
+                handle.suspended_until = time.time() + self.error_delay
+            else:
+                handle.ea.is_running = False
+            return False
+        finally:
+            elapsed = time.perf_counter() - started
+            handle.calls += 1
+            handle.busy_seconds += elapsed
+            handle.slowest_call = max(handle.slowest_call, elapsed)
+        return result is not False and handle.ea.is_running
+
+    def _tick(self, symbol, ticks):
+        if symbol not in ticks:
+            ticks[symbol] = mt5.symbol_info_tick(symbol)
+        return ticks[symbol]
+
+    def _positions(self, ea):
+        return position_book.positions(ea.symbol, ea.magic_number or None)
+
+    def _closed_bar(self, handle, timeframe, tick):
+        """The bar of ``timeframe`` that closed since the last call, or None"""
+        seconds = timeframe_seconds(timeframe)
+        # Weeks and months do not start on a multiple of their length; look once a day
+        period = tick.time // min(seconds, 86400)
+        state = handle.bars.get(timeframe)
+        if state is not None and state[0] == period:
+            return None
+        rates = get_rates(handle.ea.symbol, timeframe, 2)
+        if rates is None or len(rates) < 2:
+            return None
+        opened = rates[-1]['time']
+        if state is None:
+            handle.bars[timeframe] = [period, opened]
+            return None
+        if opened == state[1]:
+            if seconds > 86400:
+                state[0] = period
+            # Otherwise the terminal has not formed the new bar yet; ask again on the next poll
+            return None
+        handle.bars[timeframe] = [period, opened]
+        return rates[-2].copy()
+
+    def _apply_control(self):
+        """Apply close_all and set_params to the EA of this execution and follow pause/resume"""
+        if control is None:
+            return
+        ea = control.target
+        close_all, params = control.take_pending()
+        if ea is not None:
+            for name, value in params.items():
+                setattr(ea, name, value)
+                logging.info(f"Parameter {name} set to {value!r}")
+            if close_all:
+                closed, removed = close_all_trades(ea.symbol, ea.magic_number)
+                print(f"Closed {closed} positions and deleted {removed} pending orders")
+                logging.info(f"Closed {closed} positions and deleted {removed} pending orders")
+        if control.paused != self._control_paused:
+            self._control_paused = control.paused
+            message = "EA paused. Waiting for resume..." if control.paused else "EA resumed."
+            print(message)
+            logging.info(message)
+
+# Opened at import so commands sent while the EA is still connecting are not refused
+open_control_channel()
@@ -0,0 +1,285 @@
+"""
+Per-execution control channel between the backend and one running EA.
+
+Pausing used to write pause.flag into the EA's folder, which paused every
+account running that EA, and the EAs noticed it only on their next 5-second
+poll. An EA started for an AlgorithmExecution (``EA_EXECUTION_ID`` set in
+its environment) now serves its own control socket, which only that
+execution's commands reach:
+
+    pause / resume          stop trading passes / continue them
+    stop_new_entries        keep managing open trades but open no new ones
+    allow_new_entries       undo stop_new_entries
+    close_all               close the EA's positions and delete its pending orders
+    set_params              change the EA's tunable parameters, e.g. {"base_lot": 0.05}
+    status                  current state
+
+Commands are acknowledged by the channel thread as soon as they arrive. The
+EA's loop waits on the channel instead of sleeping, so the next pass (and
+the close_all/set_params it applies) starts right away.
+
+Messages are length-prefixed JSON. The socket is
+``<tempdir>/mt5-ea-control/<execution_id>.sock``. Windows has no Unix
+sockets here, so the EA listens on a free localhost port and writes it to
+``<execution_id>.port`` in the same folder.
+"""
+
+import json
+import logging
+import math
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+
+CONTROL_DIR = os.path.join(tempfile.gettempdir(), 'mt5-ea-control')
+
+COMMANDS = ('pause', 'resume', 'stop_new_entries', 'allow_new_entries', 'close_all', 'set_params', 'status')
+
+_HEADER = struct.Struct('>I')
+_USE_TCP = not hasattr(socket, 'AF_UNIX') or os.name == 'nt'
+
+logger = logging.getLogger(__name__)
+
+
+class ControlError(OSError):
+    """The control channel of an execution cannot be reached"""
+
+
+def _socket_path(execution_id):
+    return os.path.join(CONTROL_DIR, f"{execution_id}.sock")
+
+
+def _port_path(execution_id):
+    return os.path.join(CONTROL_DIR, f"{execution_id}.port")
+
+
+def _send(sock, message):
+    data = json.dumps(message, default=str).encode()
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv(sock):
+    header = b''
+    while len(header) < _HEADER.size:
+        chunk = sock.recv(_HEADER.size - len(header))
+        if not chunk:
+            return None
+        header += chunk
+    (size,) = _HEADER.unpack(header)
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return json.loads(data)
+
+
+# Types a tunable parameter may have; set_params never replaces objects, lists or dicts
+PARAM_TYPES = (bool, int, float, str)
+
+
+def _coerce(kind, value):
+    """Convert the JSON ``value`` to ``kind`` (one of PARAM_TYPES); raises ValueError/TypeError"""
+    if not isinstance(value, PARAM_TYPES):
+        raise TypeError(f"{type(value).__name__} is not a parameter value")
+    if kind is bool:
+        if isinstance(value, str):
+            value = value.strip().lower()
+            if value not in ('1', 'true', 'yes', 'on', '0', 'false', 'no', 'off'):
+                raise ValueError(value)
+            return value in ('1', 'true', 'yes', 'on')
+        return bool(value)
+    if kind is str:
+        return str(value)
+    if isinstance(value, bool):
+        raise TypeError("a number is expected")
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(value)
+    if kind is int:
+        if number != int(number):
+            raise ValueError(value)
+        return int(number)
+    return number
+
+
+class ControlChannel:
+    """
+    EA side: listens for commands of one execution on a background thread.
+
+    ``target`` is the EA object. set_params only accepts the parameters it
+    declares in ``tunable_params`` ({name: bool/int/float/str}) whose current
+    value is such a scalar, and converts values to the declared type.
+    The EA applies pending close_all/set_params on its own thread through
+    ``take_pending()``. ``paused`` and ``new_entries`` are the state it starts in.
+    """
+
+    def __init__(self, execution_id, target=None, paused=False, new_entries=True):
+        self.execution_id = execution_id
+        self.target = target
+        self.paused = paused
+        self.new_entries = new_entries
+        self._close_all = False
+        self._params = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._listener = None
+        self._closed = False
+
+    def start(self):
+        os.makedirs(CONTROL_DIR, exist_ok=True)
+        if _USE_TCP:
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.bind(('127.0.0.1', 0))
+            with open(_port_path(self.execution_id), 'w') as f:
+                f.write(str(listener.getsockname()[1]))
+        else:
+            path = _socket_path(self.execution_id)
+            if os.path.exists(path):
+                # Left behind by an earlier run of this execution
+                os.unlink(path)
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            listener.bind(path)
+            os.chmod(path, 0o600)
+        listener.listen(8)
+        self._listener = listener
+        threading.Thread(target=self._serve, name='ea-control', daemon=True).start()
+        logger.info(f"Control channel open for execution {self.execution_id}")
+        return self
+
+    def close(self):
+        self._closed = True
+        if self._listener is not None:
+            self._listener.close()
+        for path in (_socket_path(self.execution_id), _port_path(self.execution_id)):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        with self._changed:
+            self._changed.notify_all()
+
+    def wait(self, seconds):
+        """Sleep up to ``seconds``; returns early when a command arrives"""
+        deadline = time.monotonic() + seconds
+        with self._changed:
+            while not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._close_all or self._params:
+                    return
+                # Bounded waits keep Ctrl+C/CTRL_BREAK responsive on Windows
+                if self._changed.wait(min(remaining, 1.0)):
+                    return
+
+    def wait_while_paused(self):
+        """Block while paused; returns early for close_all/set_params so they apply during a pause"""
+        with self._changed:
+            while self.paused and not self._closed and not (self._close_all or self._params):
+                self._changed.wait(1.0)
+
+    def take_pending(self):
+        """(close_all requested, parameters to apply) since the last call"""
+        with self._lock:
+            close_all, params = self._close_all, self._params
+            self._close_all, self._params = False, {}
+        return close_all, params
+
+    def status(self):
+        return {'paused': self.paused, 'new_entries': self.new_entries}
+
+    def handle(self, message):
+        command = message.get('command')
+        if command not in COMMANDS:
+            return {'status': 'error', 'message': f'Unsupported control command: {command}'}
+        with self._changed:
+            if command == 'pause':
+                self.paused = True
+            elif command == 'resume':
+                self.paused = False
+            elif command == 'stop_new_entries':
+                self.new_entries = False
+            elif command == 'allow_new_entries':
+                self.new_entries = True
+            elif command == 'close_all':
+                self._close_all = True
+            elif command == 'set_params':
+                params, error = self._validate(message.get('params') or {})
+                if error:
+                    return {'status': 'error', 'message': error}
+                self._params.update(params)
+            if command != 'status':
+                self._changed.notify_all()
+            return dict(self.status(), status='success', command=command)
+
+    def _validate(self, params):
+        if not isinstance(params, dict) or not params:
+            return None, 'set_params needs a non-empty params object'
+        if self.target is None:
+            return None, 'The EA is still starting; try again shortly'
+        tunable = getattr(self.target, 'tunable_params', None) or {}
+        accepted = {}
+        for name, value in params.items():
+            kind = tunable.get(name)
+            current = getattr(self.target, name, None)
+            if kind not in PARAM_TYPES or not isinstance(current, PARAM_TYPES):
+                return None, f'Unknown parameter: {name}'
+            try:
+                accepted[name] = _coerce(kind, value)
+            except (TypeError, ValueError, OverflowError):
+                return None, f'Invalid value for {name}: {value!r}'
+        return accepted, None
+
+    def _serve(self):
+        while not self._closed:
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                break
+            with conn:
+                try:
+                    message = _recv(conn)
+                    if message is not None:
+                        _send(conn, self.handle(message))
+                except (OSError, ValueError) as e:
+                    logger.debug(f"Control channel client error: {e}")
+
+
+class ControlClient:
+    """Backend side: sends one command to the control channel of an execution"""
+
+    def __init__(self, execution_id, timeout=2.0):
+        self.execution_id = execution_id
+        self.timeout = timeout
+
+    def send(self, command, **arguments):
+        """Returns the EA's reply with ``ack_ms`` added; raises ControlError when unreachable"""
+        started = time.perf_counter()
+        try:
+            sock = self._connect()
+            with sock:
+                _send(sock, dict(arguments, command=command))
+                reply = _recv(sock)
+        except (OSError, ValueError) as e:
+            raise ControlError(f"Control channel of execution {self.execution_id} unavailable: {e}")
+        if reply is None:
+            raise ControlError(f"Control channel of execution {self.execution_id} closed the connection")
+        reply['ack_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return reply
+
+    def _connect(self):
+        if _USE_TCP:
+            with open(_port_path(self.execution_id)) as f:
+                port = int(f.read().strip())
+            return socket.create_connection(('127.0.0.1', port), timeout=self.timeout)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(_socket_path(self.execution_id))
+        except OSError:
+            sock.close()
+            raise
+        return sock
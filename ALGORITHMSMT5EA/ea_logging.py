@@ -0,0 +1,281 @@
+"""
+Asynchronous, structured logging for the EAs.
+
+The EAs used to write their logs on the trading thread: ``log()`` opened and
+appended to a file for every message, logging.basicConfig put a FileHandler
+on the root logger, and the grid EA printed several lines per order. Every
+one of those is a disk write between two MT5 calls.
+
+``setup_logging()`` routes the process's logging through a bounded queue.
+The trading thread only formats the message and puts the record on the
+queue; a writer thread (logging.handlers.QueueListener) does all file and
+console output. If the writer falls behind and the queue fills up, records
+are dropped and counted rather than blocking a trade.
+
+Files get one JSON object per line (time, level, logger, message, and any
+``extra={'data': {...}}``) and rotate at ``MAX_LOG_FILE_SIZE_MB`` with
+``LOG_BACKUP_COUNT`` old files kept. The console gets the usual
+``time - LEVEL - message`` lines, which is what the backend's log collector
+shows.
+
+``LOG_SAMPLING`` keeps one in N records of a level per call site, e.g.
+``{'DEBUG': 100}``: the first record of each debug line is always written,
+then every 100th. Sampling happens before a record is queued.
+
+``get_logger(name, log_file)`` gives an EA its own file: records of that
+logger go there instead of the process log file. One pipeline serves the
+whole process; in the strategy host the first EA's ``setup_logging()``
+configures it and the others add their files.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+try:
+    from global_config import get_logging_config
+except ImportError:
+    def get_logging_config():
+        return {'enabled': True, 'level': 'INFO', 'to_file': True, 'to_console': True, 'max_file_size_mb': 50,
+                'backup_count': 5, 'sampling': {}}
+
+QUEUE_SIZE = 10000
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_TRACEBACKS = logging.Formatter()
+
+
+def _level(level):
+    return level if isinstance(level, int) else logging.getLevelName(str(level).upper())
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record):
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)) + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data = getattr(record, 'data', None)
+        if data is not None:
+            entry['data'] = data
+        sample = getattr(record, 'sample', None)
+        if sample:
+            entry['sample'] = sample
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        elif record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps one in ``rates[level]`` records per call site (file and line) for
+    the levels in ``rates``; other levels pass. Passed records carry
+    ``sample`` = the rate.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = {_level(level): int(rate) for level, rate in (rates or {}).items() if int(rate) > 1}
+        self._seen = {}
+        self.sampled_out = 0
+
+    def filter(self, record):
+        rate = self.rates.get(record.levelno)
+        if rate is None:
+            return True
+        site = (record.pathname, record.lineno)
+        seen = self._seen.get(site, 0)
+        self._seen[site] = seen + 1
+        if seen % rate:
+            self.sampled_out += 1
+            return False
+        record.sample = rate
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records when the queue is full instead of blocking"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Merge the arguments and render the traceback now; ``data`` stays a dict for the JSON formatter
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = _TRACEBACKS.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+class _FileRouter(logging.Handler):
+    """On the writer thread: records of loggers with their own file go there, the rest to the process file"""
+
+    def __init__(self, default, max_bytes, backups):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.formatter = JsonFormatter()
+        self.default = self._open(default) if default else None
+        self.routes = {}
+        self._routes_lock = threading.Lock()
+
+    def _open(self, path):
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=self.max_bytes, backupCount=self.backups,
+                                                       encoding='utf-8', delay=True)
+        handler.setFormatter(self.formatter)
+        return handler
+
+    def add(self, name, path):
+        with self._routes_lock:
+            if name not in self.routes:
+                self.routes[name] = self._open(path)
+
+    def emit(self, record):
+        handler = self.routes.get(record.name, self.default)
+        if handler is not None:
+            handler.handle(record)
+
+    def close(self):
+        for handler in [self.default] + list(self.routes.values()):
+            if handler is not None:
+                handler.close()
+        super().close()
+
+
+class LogPipeline:
+    """
+    The queue, the writer thread and its handlers; see setup_logging().
+
+    Args:
+        log_file: process log file (JSON lines), or None for none.
+        level: root logger level.
+        to_console: also write ``time - LEVEL - message`` lines to stdout.
+        max_bytes: rotation size of each file.
+        backups: rotated files kept per log file.
+        sampling: {level: N} to keep one in N records of that level per call site.
+    """
+
+    def __init__(self, log_file=None, level=logging.INFO, to_console=True, max_bytes=50 * 1024 * 1024,
+                 backups=5, sampling=None, queue_size=QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.handler = _QueueHandler(self.queue)
+        self.sampler = SamplingFilter(sampling)
+        self.handler.addFilter(self.sampler)
+        self.files = _FileRouter(log_file, max_bytes, backups) if log_file is not None or max_bytes else None
+        handlers = [self.files] if self.files is not None else []
+        if to_console:
+            console = logging.StreamHandler(sys.stdout)
+            console.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+            handlers.append(console)
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers)
+        self.level = level
+        self._running = False
+
+    def start(self):
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(self.level)
+        self.listener.start()
+        self._running = True
+        return self
+
+    def stop(self):
+        """Write out everything queued and stop the writer thread"""
+        logging.getLogger().removeHandler(self.handler)
+        if self._running:
+            self._running = False
+            self.listener.stop()
+        if self.files is not None:
+            self.files.close()
+
+    def add_file(self, name, path):
+        if self.files is not None:
+            self.files.add(name, path)
+
+    def stats(self):
+        return {'queued': self.queue.qsize(), 'dropped': self.handler.dropped,
+                'sampled_out': self.sampler.sampled_out}
+
+
+_pipeline = None
+_lock = threading.Lock()
+
+
+def setup_logging(log_file=None, level=None, to_console=None, max_file_size_mb=None, backups=None, sampling=None):
+    """
+    Route this process's logging through the queue-backed writer (first call
+    only; later calls return the running pipeline). Arguments default to
+    global_config's LOG_* settings; ``log_file`` is skipped when LOG_TO_FILE
+    or ENABLE_LOGGING is off.
+    """
+    global _pipeline
+    with _lock:
+        if _pipeline is not None:
+            return _pipeline
+        config = get_logging_config()
+        to_file = config.get('enabled', True) and config.get('to_file', True)
+        max_mb = max_file_size_mb if max_file_size_mb is not None else config.get('max_file_size_mb', 50)
+        _pipeline = LogPipeline(
+            log_file=log_file if to_file else None,
+            level=_level(level if level is not None else config.get('level', 'INFO')),
+            to_console=config.get('to_console', True) if to_console is None else to_console,
+            max_bytes=int(max_mb * 1024 * 1024) if to_file else 0,
+            backups=backups if backups is not None else config.get('backup_count', 5),
+            sampling=sampling if sampling is not None else config.get('sampling'),
+        ).start()
+        return _pipeline
+
+
+def get_logger(name, log_file=None):
+    """Logger ``name``; with ``log_file`` its records go to that file (sets up logging if needed)"""
+    pipeline = setup_logging()
+    if log_file:
+        pipeline.add_file(name, log_file)
+    return logging.getLogger(name)
+
+
+def shutdown_logging():
+    """Flush and stop the writer (also runs at exit)"""
+    global _pipeline
+    with _lock:
+        if _pipeline is not None:
+            _pipeline.stop()
+            _pipeline = None
+
+
+def _after_fork_in_child():
+    # The writer thread does not survive fork(); the child sets up its own pipeline
+    global _pipeline, _lock
+    _lock = threading.Lock()
+    if _pipeline is not None:
+        logging.getLogger().removeHandler(_pipeline.handler)
+        _pipeline = None
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
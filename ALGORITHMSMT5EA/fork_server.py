@@ -0,0 +1,449 @@
+"""
+Pre-warmed fork server for fast EA startup (POSIX only).
+
+Starting an EA as a fresh interpreter spends most of its startup importing
+pandas, numpy, MetaTrader5 and the shared ALGORITHMSMT5EA modules, and many
+simultaneous starts spike the CPU. The fork server imports all of that once
+and then forks one child per EA start. The child runs the EA script as
+``__main__`` with the imports already in memory, shared copy-on-write with
+the server.
+
+The EA supervisor starts it with ``run_ea_supervisor --fork-server`` and
+launches EAs through ``ForkServerClient``. A launch sends the command line,
+the working directory and the EA's output file descriptor (passed with
+SCM_RIGHTS) over a Unix socket. The reply carries the child's PID and the
+fork time. The same connection later reports the exit code, which is why
+``ForkedProcess`` can be used like ``subprocess.Popen``.
+
+    python ALGORITHMSMT5EA/fork_server.py --address /tmp/ea-fork.sock
+    python ALGORITHMSMT5EA/fork_server.py --benchmark 10
+
+The second form compares the time until an EA's imports are done for a cold
+start and a forked start.
+
+Only modules that read no environment at import are preloaded. common_ea
+(and risk_manager, which imports it) pick the shared-memory store
+(EA_SHM_DIR), the pandas blocker (EA_PANDAS_FREE) and the control channel
+(EA_EXECUTION_ID, EA_START_PAUSED, EA_START_NO_NEW_ENTRIES) when they are
+imported, so each child imports them itself after the launch request's
+``env`` has been applied, and all of that env is honoured. A child launched
+with EA_PANDAS_FREE also drops the pandas the server preloaded, so its
+blocker applies.
+"""
+
+import argparse
+import atexit
+import importlib
+import json
+import logging
+import os
+import runpy
+import select
+import selectors
+import shutil
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+# Imported once in the server and inherited by every child; none of them reads the environment at
+# import (common_ea and risk_manager do, so children import those after their env is applied)
+PRELOAD_MODULES = [
+    'numpy',
+    'pandas',
+    'MetaTrader5',
+    'global_config',
+    'ALGORITHMSMT5EA.bar_cache',
+    'ALGORITHMSMT5EA.bar_aggregator',
+    'ALGORITHMSMT5EA.indicators',
+    'ALGORITHMSMT5EA.indicator_kernels',
+    'ALGORITHMSMT5EA.order_pipeline',
+    'ALGORITHMSMT5EA.position_book',
+    'ALGORITHMSMT5EA.symbol_cache',
+    'ALGORITHMSMT5EA.tick_stream',
+]
+
+_HEADER = struct.Struct('>I')
+
+logger = logging.getLogger(__name__)
+
+
+def preload(modules=PRELOAD_MODULES):
+    """Import the shared EA dependencies; returns the seconds it took"""
+    # EAs import global_config/risk_manager from the ALGORITHMSMT5EA folder itself
+    algorithms_dir = os.path.dirname(os.path.abspath(__file__))
+    if algorithms_dir not in sys.path:
+        sys.path.append(algorithms_dir)
+    started = time.perf_counter()
+    for name in modules:
+        # Children of a pandas-free server must not inherit pandas (see common_ea.PANDAS_FREE)
+        if name == 'pandas' and os.environ.get('EA_PANDAS_FREE', '').lower() in ('1', 'true', 'yes'):
+            continue
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"Fork server could not preload {name}: {e}")
+    return time.perf_counter() - started
+
+
+def _send(sock, message, fds=()):
+    data = json.dumps(message).encode()
+    frame = _HEADER.pack(len(data)) + data
+    if fds:
+        socket.send_fds(sock, [frame], list(fds))
+    else:
+        sock.sendall(frame)
+
+
+def _recv_exact(sock, size):
+    buffer = b''
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ConnectionError('Fork server connection closed')
+        buffer += chunk
+    return buffer
+
+
+def _recv(sock, with_fds=False):
+    """Read one message (and any file descriptors sent with it); None on EOF"""
+    fds = []
+    if with_fds:
+        data, fds, _, _ = socket.recv_fds(sock, _HEADER.size, 4)
+    else:
+        data = sock.recv(_HEADER.size)
+    if not data:
+        return None, fds
+    if len(data) < _HEADER.size:
+        data += _recv_exact(sock, _HEADER.size - len(data))
+    (size,) = _HEADER.unpack(data)
+    return json.loads(_recv_exact(sock, size)), fds
+
+
+class ForkServer:
+    """Accepts launch requests and forks pre-warmed EA children"""
+
+    def __init__(self, address):
+        self.address = address
+        self._selector = selectors.DefaultSelector()
+        self._listener = None
+        self._children = {}     # pid -> connection that launched it
+        self._running = False
+
+    def serve_forever(self):
+        seconds = preload()
+        logger.info(f"Fork server preloaded EA dependencies in {seconds * 1000:.0f} ms")
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.address)
+        os.chmod(self.address, 0o600)
+        self._listener.listen(64)
+        self._selector.register(self._listener, selectors.EVENT_READ)
+        self._running = True
+        logger.info(f"Fork server listening on {self.address}")
+        try:
+            while self._running:
+                for key, _ in self._selector.select(timeout=0.2):
+                    if key.fileobj is self._listener:
+                        conn, _ = self._listener.accept()
+                        self._selector.register(conn, selectors.EVENT_READ)
+                    else:
+                        self._handle(key.fileobj)
+                self._reap()
+        finally:
+            self._selector.close()
+            self._listener.close()
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+
+    def shutdown(self):
+        self._running = False
+
+    def _handle(self, conn):
+        try:
+            request, fds = _recv(conn, with_fds=True)
+        except (OSError, ValueError):
+            request, fds = None, []
+        if request is None:
+            # Client went away; its children keep running but nobody hears their exit
+            self._selector.unregister(conn)
+            conn.close()
+            for pid, child_conn in list(self._children.items()):
+                if child_conn is conn:
+                    self._children[pid] = None
+            return
+        output = fds[0] if fds else os.open(os.devnull, os.O_WRONLY)
+        for extra in fds[1:]:
+            os.close(extra)
+        started = time.perf_counter()
+        # Buffered output would otherwise be written twice, once by each process
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            pid = os.fork()
+        except OSError as e:
+            os.close(output)
+            _send(conn, {'error': str(e)})
+            return
+        if pid == 0:
+            self._run_child(request, output)
+        os.close(output)
+        self._children[pid] = conn
+        _send(conn, {'pid': pid, 'fork_ms': round((time.perf_counter() - started) * 1000, 2)})
+
+    def _run_child(self, request, output):
+        """Runs in the forked child: become the EA script and never return"""
+        code = 1
+        try:
+            os.setsid()
+            # The child exits with os._exit(): run its own atexit handlers (e.g. closing the
+            # control channel), not the server's
+            atexit._clear()
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            for key in list(self._selector.get_map().values()):
+                key.fileobj.close()
+            devnull = os.open(os.devnull, os.O_RDONLY)
+            os.dup2(devnull, 0)
+            os.dup2(output, 1)
+            os.dup2(output, 2)
+            os.close(devnull)
+            os.close(output)
+            # Let the EA's own logging.basicConfig() take effect
+            for handler in list(logging.root.handlers):
+                logging.root.removeHandler(handler)
+            os.environ.update(request.get('env') or {})
+            if os.environ.get('EA_PANDAS_FREE', '').lower() in ('1', 'true', 'yes'):
+                # Forget the server's pandas so common_ea's blocker sees any import of it
+                for name in [name for name in sys.modules if name == 'pandas' or name.startswith('pandas.')]:
+                    del sys.modules[name]
+            os.chdir(request['cwd'])
+            script = request['argv'][0]
+            sys.argv = list(request['argv'])
+            # Same import path as ``python <script>``
+            sys.path[0] = os.path.dirname(os.path.abspath(script))
+            try:
+                runpy.run_path(script, run_name='__main__')
+                code = 0
+            except SystemExit as e:
+                if e.code is None or isinstance(e.code, int):
+                    code = e.code or 0
+                else:
+                    print(e.code, file=sys.stderr)
+            except BaseException:
+                traceback.print_exc()
+        finally:
+            try:
+                atexit._run_exitfuncs()
+                sys.stdout.flush()
+                sys.stderr.flush()
+            finally:
+                os._exit(code)
+
+    def _reap(self):
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            conn = self._children.pop(pid, None)
+            if conn is None:
+                continue
+            try:
+                _send(conn, {'pid': pid, 'exit': os.waitstatus_to_exitcode(status)})
+            except OSError:
+                pass
+
+
+class ForkedProcess:
+    """Popen-like handle for a child of the fork server"""
+
+    def __init__(self, sock, pid, fork_ms):
+        self._sock = sock
+        self.pid = pid
+        self.fork_ms = fork_ms
+        self.returncode = None
+        self._server_gone = False
+
+    def poll(self):
+        if self.returncode is None:
+            self._check(0)
+        return self.returncode
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.returncode is None:
+            remaining = 0.5 if deadline is None else deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(self.pid, timeout)
+            self._check(min(remaining, 0.5))
+        return self.returncode
+
+    def send_signal(self, sig):
+        if self.poll() is None:
+            os.kill(self.pid, sig)
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+    def _check(self, timeout):
+        if self._server_gone:
+            # The fork server died; all we can tell is whether the PID still exists
+            try:
+                os.kill(self.pid, 0)
+            except ProcessLookupError:
+                self.returncode = -1
+            except PermissionError:
+                pass
+            else:
+                time.sleep(timeout)
+            return
+        readable, _, _ = select.select([self._sock], [], [], timeout)
+        if not readable:
+            return
+        try:
+            message, _ = _recv(self._sock)
+        except (OSError, ValueError):
+            message = None
+        if message is None:
+            logger.warning(f"Lost the fork server connection of pid {self.pid}")
+            self._server_gone = True
+            self._sock.close()
+            return
+        self.returncode = message['exit']
+        self._sock.close()
+
+
+class ForkServerClient:
+    """Launches EAs through a running fork server"""
+
+    def __init__(self, address, timeout=10.0):
+        self.address = address
+        self.timeout = timeout
+
+    def launch(self, argv, cwd, stdout=None, env=None):
+        """
+        Fork ``argv`` (script path first) in the server. ``stdout`` is a file
+        descriptor or file object receiving the child's stdout and stderr
+        (discarded when None).
+        Raises OSError when the server is unreachable or cannot fork.
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.address)
+            request = {'argv': list(argv), 'cwd': cwd, 'env': env or {}}
+            fd = stdout.fileno() if hasattr(stdout, 'fileno') else stdout
+            # Without a descriptor (or with subprocess.DEVNULL) output is discarded
+            _send(sock, request, [fd] if isinstance(fd, int) and fd >= 0 else ())
+            reply, _ = _recv(sock)
+        except (OSError, ValueError):
+            sock.close()
+            raise
+        if reply is None or 'error' in reply:
+            sock.close()
+            raise OSError(f"Fork server could not start {argv[0]}: {(reply or {}).get('error', 'no reply')}")
+        return ForkedProcess(sock, reply['pid'], reply['fork_ms'])
+
+
+def start_server_process(address, project_root, timeout=60.0):
+    """Start the fork server as a subprocess and wait until it accepts launches"""
+    env = os.environ.copy()
+    existing_pp = env.get('PYTHONPATH', '')
+    env['PYTHONPATH'] = project_root + (os.pathsep + existing_pp if existing_pp else '')
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--address', address],
+        cwd=project_root,
+        env=env,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise OSError(f"Fork server exited with code {process.returncode}")
+        if os.path.exists(address):
+            try:
+                socket.socket(socket.AF_UNIX, socket.SOCK_STREAM).connect(address)
+                return process
+            except OSError:
+                pass
+        time.sleep(0.05)
+    process.kill()
+    raise OSError(f"Fork server did not start within {timeout:.0f}s")
+
+
+def benchmark(runs):
+    """Print the time until an EA's imports are done, cold vs forked"""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    workdir = tempfile.mkdtemp(prefix='ea-fork-bench-')
+    probe = os.path.join(workdir, 'probe_ea.py')
+    with open(probe, 'w') as f:
+        f.write(
+            "import sys, os\n"
+            f"sys.path.append({os.path.dirname(os.path.abspath(__file__))!r})\n"
+            + "".join(f"try:\n    import {name}\nexcept ImportError:\n    pass\n" for name in PRELOAD_MODULES)
+            + "os.write(1, b'ready')\n"
+        )
+    env = os.environ.copy()
+    env['PYTHONPATH'] = project_root + (os.pathsep + env['PYTHONPATH'] if env.get('PYTHONPATH') else '')
+
+    def timed(launch):
+        read_fd, write_fd = os.pipe()
+        started = time.perf_counter()
+        process = launch(write_fd)
+        os.close(write_fd)
+        os.read(read_fd, 5)
+        elapsed = time.perf_counter() - started
+        os.close(read_fd)
+        process.wait()
+        return elapsed * 1000
+
+    cold = [timed(lambda fd: subprocess.Popen([sys.executable, probe], stdout=fd, cwd=workdir, env=env, pass_fds=(fd,)))
+            for _ in range(runs)]
+    address = os.path.join(workdir, 'fork.sock')
+    server = start_server_process(address, project_root)
+    try:
+        client = ForkServerClient(address)
+        forked = [timed(lambda fd: client.launch([probe], workdir, fd)) for _ in range(runs)]
+    finally:
+        server.send_signal(signal.SIGINT)
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+    for label, samples in (('cold start', cold), ('fork server', forked)):
+        samples.sort()
+        print(f"{label:12s} median {samples[len(samples) // 2]:8.1f} ms   min {samples[0]:8.1f} ms   max {samples[-1]:8.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-warmed fork server for EA processes")
+    parser.add_argument('--address', help="Unix socket path to listen on")
+    parser.add_argument('--benchmark', type=int, metavar='RUNS',
+                        help="Compare cold and forked startup latency and exit")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if not hasattr(os, 'fork'):
+        parser.error("the fork server needs a POSIX system")
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+    if not args.address:
+        parser.error("--address is required")
+    server = ForkServer(args.address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
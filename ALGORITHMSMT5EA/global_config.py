@@ -64,7 +64,9 @@ ENABLE_LOGGING = True              # Enable logging for all EAs
 LOG_LEVEL = "INFO"                 # DEBUG, INFO, WARNING, ERROR
 LOG_TO_FILE = True                 # Save logs to files
 LOG_TO_CONSOLE = True              # Display logs in console
-MAX_LOG_FILE_SIZE_MB = 50          # Maximum log file size in MB
+MAX_LOG_FILE_SIZE_MB = 50          # Maximum log file size in MB (then rotated)
+LOG_BACKUP_COUNT = 5               # Rotated log files kept per log file
+LOG_SAMPLING = {"DEBUG": 100}      # Keep 1 in N records of a level per log line (hot-path debug output)
 
 # =============================================================================
 # VPS & CONNECTIVITY
@@ -147,7 +149,9 @@ def get_logging_config():
         'level': LOG_LEVEL,
         'to_file': LOG_TO_FILE,
         'to_console': LOG_TO_CONSOLE,
-        'max_file_size_mb': MAX_LOG_FILE_SIZE_MB
+        'max_file_size_mb': MAX_LOG_FILE_SIZE_MB,
+        'backup_count': LOG_BACKUP_COUNT,
+        'sampling': LOG_SAMPLING
     }
 
 # Quick validation
@@ -8,10 +8,8 @@ by placing buy and sell orders at regular intervals above and below current pric
 """
 
 import MetaTrader5 as mt5
-import pandas as pd
 import numpy as np
 from datetime import datetime
-import time
 import sys
 import os
 # Add root directory to path for global imports
@@ -19,9 +17,15 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from global_config import get_account_credentials, get_risk_settings
 from risk_manager import RiskManager
 # Import common EA utilities
-from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, check_pause_flag
+from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, entries_allowed, order_pipeline, position_book, EA
+from ALGORITHMSMT5EA.ea_logging import get_logger
+
+class GridTradingEA(EA):
+    timer_interval = 60  # Check every 1 minute for grid updates
+    # Changeable through set_params
+    tunable_params = {'grid_distance': int, 'max_levels': int, 'max_loss_usd': float,
+                      'trail_profit_start_usd': float, 'trail_profit_step_usd': float, 'max_orders': int}
 
-class GridTradingEA:
     def __init__(self, symbol="EURUSD", grid_distance=50, 
                  max_levels=5, magic_number=54321,
                  max_loss_usd=100, trail_profit_start_usd=100, trail_profit_step_usd=50,
@@ -43,6 +47,7 @@ class GridTradingEA:
         self.grid_distance = grid_distance
         self.max_levels = max_levels
         self.magic_number = magic_number
+        self.logger = get_logger('grid_trading_ea')
         self.max_loss_usd = max_loss_usd
         self.trail_profit_start_usd = trail_profit_start_usd
         self.trail_profit_step_usd = trail_profit_step_usd
@@ -92,12 +97,8 @@ class GridTradingEA:
         
         return buy_levels, sell_levels
     
-    def place_pending_order(self, order_type, price, tp=None):
-        """Place a pending order using global risk manager for lot size (no per-order SL)"""
-        symbol_info = self.get_symbol_info()
-        if symbol_info is None:
-            return False
-
+    def pending_order_request(self, order_type, price, tp=None, lot_size=None):
+        """Trade request of a grid pending order (no per-order SL), or None for an unknown order type"""
         # Determine order type and price
         if order_type == "BUY_LIMIT":
             action_type = mt5.ORDER_TYPE_BUY_LIMIT
@@ -105,14 +106,11 @@ class GridTradingEA:
             action_type = mt5.ORDER_TYPE_SELL_LIMIT
         else:
             print(f"Invalid order type: {order_type}")
-            return False
+            return None
 
-        # Use risk manager to calculate lot size (position size)
-        lot_size = self.risk_manager.calculate_position_size(self.symbol)
-        print(f"[Order Debug] Attempting {order_type} at {price} | lot_size={lot_size} | tp={tp} | type={action_type}")
-        symbol_info = self.get_symbol_info()
-        if symbol_info:
-            print(f"[Order Debug] Symbol info: min_lot={symbol_info.volume_min}, max_lot={symbol_info.volume_max}, step={symbol_info.volume_step}, point={symbol_info.point}, trade_tick_value={symbol_info.trade_tick_value}")
+        if lot_size is None:
+            # Use risk manager to calculate lot size (position size)
+            lot_size = self.risk_manager.calculate_position_size(self.symbol)
 
         # Build a safe comment (max 31 chars, ASCII only)
         comment_raw = f"Grid {order_type} {price:.2f}"
@@ -133,19 +131,49 @@ class GridTradingEA:
         }
         if tp is not None:
             request["tp"] = tp
+        return request
+
+    def place_pending_orders(self, orders):
+        """
+        Place grid pending orders as one batch through the order pipeline.
+
+        ``orders`` is a list of (order_type, price, tp); returns {price: ticket}
+        of the orders that were placed.
+        """
+        symbol_info = self.get_symbol_info()
+        if symbol_info is None or not orders:
+            return {}
+
+        # Same risk-based lot size for every level of the batch
+        lot_size = self.risk_manager.calculate_position_size(self.symbol)
+        self.logger.debug("Placing %d pending order(s)", len(orders), extra={'data': {
+            'lot_size': lot_size, 'min_lot': symbol_info.volume_min, 'max_lot': symbol_info.volume_max,
+            'step': symbol_info.volume_step, 'point': symbol_info.point,
+            'trade_tick_value': symbol_info.trade_tick_value}})
+
+        batch = []
+        for order_type, price, tp in orders:
+            request = self.pending_order_request(order_type, price, tp=tp, lot_size=lot_size)
+            if request is not None:
+                batch.append((order_type, price, request))
+        results = order_pipeline.submit([request for _, _, request in batch])
+
+        placed = {}
+        for (order_type, price, request), result in zip(batch, results):
+            if result.retcode != mt5.TRADE_RETCODE_DONE:
+                self.logger.warning("Failed to place %s order at %s: %s | comment: %s", order_type, price,
+                                    result.retcode, result.comment, extra={'data': request})
+                continue
+            self.logger.debug("%s order placed at %s: %s (%.0f ms)", order_type, price, result.order, result.send_ms,
+                              extra={'data': request})
+            placed[price] = result.order
+        self.logger.info("Batch of %d done in %.0f ms, %d placed", len(batch), order_pipeline.last_batch_ms, len(placed))
+        return placed
+
+    def place_pending_order(self, order_type, price, tp=None):
+        """Place a single pending order; returns its ticket or False"""
+        return self.place_pending_orders([(order_type, price, tp)]).get(price, False)
 
-        print(f"[Order Debug] Request: {request}")
-        result = mt5.order_send(request)
-        if result is None:
-            print(f"Order send failed for {order_type} at {price}: No result returned")
-            print(f"[Order Debug] mt5.last_error(): {mt5.last_error()}")
-            return False
-        print(f"[Order Debug] Result: retcode={getattr(result, 'retcode', None)}, comment={getattr(result, 'comment', None)}, request_id={getattr(result, 'request_id', None)}")
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            print(f"Failed to place {order_type} order at {price}: {result.retcode} | comment: {getattr(result, 'comment', None)}")
-            return False
-        print(f"{order_type} order placed at {price}: {result.order}")
-        return result.order
     def check_global_risk(self):
         """Check global floating P&L for stop loss or trailing take profit"""
         positions = self.get_existing_positions()
@@ -177,23 +205,11 @@ class GridTradingEA:
     
     def get_existing_orders(self):
         """Get all existing pending orders for this EA"""
-        orders = mt5.orders_get(symbol=self.symbol)
-        if orders is None:
-            return []
-        
-        # Filter orders by magic number
-        ea_orders = [order for order in orders if order.magic == self.magic_number]
-        return ea_orders
+        return position_book.orders(self.symbol, self.magic_number)
     
     def get_existing_positions(self):
         """Get all existing positions for this EA"""
-        positions = mt5.positions_get(symbol=self.symbol)
-        if positions is None:
-            return []
-        
-        # Filter positions by magic number
-        ea_positions = [pos for pos in positions if pos.magic == self.magic_number]
-        return ea_positions
+        return position_book.positions(self.symbol, self.magic_number)
     
     def setup_initial_grid(self):
         """Set up the initial grid of pending orders"""
@@ -221,28 +237,14 @@ class GridTradingEA:
         current_positions = self.get_existing_positions()
         total_active = len(current_orders) + len(current_positions)
 
-        # Place buy limit orders (below current price)
-        for price in buy_levels:
-            if total_active >= self.max_orders:
-                print(f"[Grid] Max orders ({self.max_orders}) reached, not placing more pending orders.")
-                break
-            tp = price + (self.grid_distance * point)
-            order_id = self.place_pending_order("BUY_LIMIT", price, tp=tp)
-            if order_id:
-                self.buy_orders[price] = order_id
-                total_active += 1
-
-        # Place sell limit orders (above current price)
-        for price in sell_levels:
-            if total_active >= self.max_orders:
-                print(f"[Grid] Max orders ({self.max_orders}) reached, not placing more pending orders.")
-                break
-            tp = price - (self.grid_distance * point)
-            order_id = self.place_pending_order("SELL_LIMIT", price, tp=tp)
-            if order_id:
-                self.sell_orders[price] = order_id
-                total_active += 1
-        
+        # Buy limit orders below the price, then sell limit orders above it, up to max_orders
+        orders = [("BUY_LIMIT", price, price + (self.grid_distance * point)) for price in buy_levels]
+        orders += [("SELL_LIMIT", price, price - (self.grid_distance * point)) for price in sell_levels]
+        orders = self.limit_to_max_orders(orders, total_active)
+
+        # One batch for the whole grid
+        self.track_placed_orders(orders, self.place_pending_orders(orders))
+
         return True
     
     def manage_grid(self):
@@ -278,43 +280,41 @@ class GridTradingEA:
         # Count current orders (pending + open positions)
         total_active = len(current_orders) + len(current_positions)
 
-        # Replace missing buy orders
-        for price in buy_levels:
-            if total_active >= self.max_orders:
-                print(f"[Grid] Max orders ({self.max_orders}) reached, not placing more pending orders.")
-                break
-            if price not in current_buy_prices and price < current_price:
-                tp = price + (self.grid_distance * point)
-                order_id = self.place_pending_order("BUY_LIMIT", price, tp=tp)
-                if order_id:
-                    self.buy_orders[price] = order_id
-                    total_active += 1
-
-        # Replace missing sell orders
-        for price in sell_levels:
-            if total_active >= self.max_orders:
-                print(f"[Grid] Max orders ({self.max_orders}) reached, not placing more pending orders.")
-                break
-            if price not in current_sell_prices and price > current_price:
-                tp = price - (self.grid_distance * point)
-                order_id = self.place_pending_order("SELL_LIMIT", price, tp=tp)
-                if order_id:
-                    self.sell_orders[price] = order_id
-                    total_active += 1
-    
+        # Replace missing buy orders below the price and sell orders above it, up to max_orders
+        orders = [("BUY_LIMIT", price, price + (self.grid_distance * point))
+                  for price in buy_levels if price not in current_buy_prices and price < current_price]
+        orders += [("SELL_LIMIT", price, price - (self.grid_distance * point))
+                   for price in sell_levels if price not in current_sell_prices and price > current_price]
+        orders = self.limit_to_max_orders(orders, total_active)
+        if orders:
+            self.track_placed_orders(orders, self.place_pending_orders(orders))
+
+    def limit_to_max_orders(self, orders, total_active):
+        """The first of ``orders`` that fit in max_orders next to ``total_active`` orders and positions"""
+        room = max(0, self.max_orders - total_active)
+        if len(orders) > room:
+            print(f"[Grid] Max orders ({self.max_orders}) reached, not placing more pending orders.")
+        return orders[:room]
+
+    def track_placed_orders(self, orders, placed):
+        """Record the tickets of placed grid orders by price level"""
+        for order_type, price, _ in orders:
+            if price in placed:
+                (self.buy_orders if order_type == "BUY_LIMIT" else self.sell_orders)[price] = placed[price]
+
     def close_all_positions(self):
-        """Close all open positions"""
+        """Close all open positions in one batch"""
         positions = self.get_existing_positions()
-        
+        bid, ask = self.get_current_price()
+        if not positions or bid is None or ask is None:
+            return
+
+        requests = []
         for position in positions:
-            bid, ask = self.get_current_price()
-            if bid is None or ask is None:
-                continue
-            
             # Determine close price based on position type
             close_price = bid if position.type == mt5.ORDER_TYPE_BUY else ask
             
-            close_request = {
+            requests.append({
                 "action": mt5.TRADE_ACTION_DEAL,
                 "symbol": self.symbol,
                 "volume": position.volume,
@@ -326,25 +326,23 @@ class GridTradingEA:
                 "comment": "Grid EA Close",
                 "type_time": mt5.ORDER_TIME_GTC,
                 "type_filling": mt5.ORDER_FILLING_IOC,
-            }
-            
-            result = mt5.order_send(close_request)
+            })
+
+        # Closing must not wait on order_check
+        results = order_pipeline.submit(requests, validate=False)
+        for position, result in zip(positions, results):
             if result.retcode == mt5.TRADE_RETCODE_DONE:
                 print(f"Position {position.ticket} closed successfully")
             else:
                 print(f"Failed to close position {position.ticket}: {result.retcode}")
     
     def cancel_all_orders(self):
-        """Cancel all pending orders"""
+        """Cancel all pending orders in one batch"""
         orders = self.get_existing_orders()
         
-        for order in orders:
-            request = {
-                "action": mt5.TRADE_ACTION_REMOVE,
-                "order": order.ticket,
-            }
-            
-            result = mt5.order_send(request)
+        requests = [{"action": mt5.TRADE_ACTION_REMOVE, "order": order.ticket} for order in orders]
+        results = order_pipeline.submit(requests, validate=False)
+        for order, result in zip(orders, results):
             if result.retcode == mt5.TRADE_RETCODE_DONE:
                 print(f"Order {order.ticket} cancelled successfully")
             else:
@@ -370,40 +368,41 @@ class GridTradingEA:
         print(f"   Buy Orders: {len(buy_orders)}")
         print(f"   Sell Orders: {len(sell_orders)}")
     
-    def run(self):
-        """Main EA loop"""
-        if not self.initialize_mt5():
-            return
+    def on_start(self):
+        """False if the initial grid could not be placed"""
         print("Grid Trading EA started...")
+        if not entries_allowed():
+            # Started (or restarted) after stop_new_entries: manage what is open, place no grid
+            print("New entries are stopped; not placing the initial grid")
+            return True
         # Set up initial grid
         if not self.setup_initial_grid():
             print("Failed to setup initial grid")
+            return False
+        return True
+
+    def on_timer(self):
+        # Manage grid (replace filled orders); no new grid orders after stop_new_entries
+        if entries_allowed():
+            self.manage_grid()
+        # Check global risk (accumulative SL/TP)
+        self.check_global_risk()
+        if not self.is_running:
             return
-        self.is_running = True
-        try:
-            while self.is_running:
-                # Pause logic: check for pause.flag in working directory
-                check_pause_flag(os.path.dirname(os.path.abspath(__file__)))
-                # Manage grid (replace filled orders)
-                self.manage_grid()
-                # Check global risk (accumulative SL/TP)
-                self.check_global_risk()
-                if not self.is_running:
-                    break
-                # Display status every 10 iterations (50 seconds)
-                if hasattr(self, 'iteration_count'):
-                    self.iteration_count += 1
-                else:
-                    self.iteration_count = 0
-                if self.iteration_count % 10 == 0:
-                    self.get_grid_status()
-                # Wait before next iteration
-                time.sleep(60)  # Check every 1 minute for grid updates
-        except KeyboardInterrupt:
-            print("EA stopped by user")
-        finally:
-            self.stop()
-    
+        # Display status every 10 iterations (50 seconds)
+        if hasattr(self, 'iteration_count'):
+            self.iteration_count += 1
+        else:
+            self.iteration_count = 0
+        if self.iteration_count % 10 == 0:
+            self.get_grid_status()
+
+    def on_position_change(self, positions):
+        """A grid order filled or a position closed: replace the level right away"""
+        if entries_allowed():
+            self.manage_grid()
+        self.check_global_risk()
+
     def stop(self):
         """Stop the EA and cleanup"""
         self.is_running = False
@@ -32,6 +32,7 @@ ENABLE_BREAKEVEN = True          # Enable breakeven functionality
 VOLUME_THRESHOLD = 100  # Minimum volume for signal
 TICK_ANALYSIS_PERIOD = 20  # Number of ticks to analyze
 BID_ASK_PRESSURE_PERIOD = 10  # Period for bid/ask pressure analysis
+TICK_INGESTION = "stream"  # "stream": every tick via copy_ticks_from, "quote": one quote per UPDATE_INTERVAL
 
 # Time Filters
 START_HOUR = 8          # Start trading hour (GMT)
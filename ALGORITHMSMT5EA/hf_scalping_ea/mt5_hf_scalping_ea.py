@@ -17,7 +17,6 @@ Key Features:
 """
 
 import MetaTrader5 as mt5
-import pandas as pd
 import numpy as np
 import time
 import logging
@@ -38,19 +37,14 @@ try:
 except ImportError:
     print("Local config not found, using global config only")
 # Import common EA utilities
-from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, check_pause_flag
+from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, entries_allowed, position_book, tick_stream, EA, EventLoop
+from ALGORITHMSMT5EA.ea_logging import setup_logging
+from ALGORITHMSMT5EA.order_flow import OrderFlowWindow
 
-# Setup logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('hf_scalping_ea.log'),
-        logging.StreamHandler()
-    ]
-)
+# Setup logging: records are queued and written (JSON lines, rotated) by a background thread
+setup_logging('hf_scalping_ea.log', level=LOG_LEVEL)
 
-class HighFrequencyScalpingEA:
+class HighFrequencyScalpingEA(EA):
     """
     High-frequency scalping EA with advanced order flow analysis and centralized risk management.
 
@@ -60,6 +54,12 @@ class HighFrequencyScalpingEA:
     - Daily trade and loss limits enforced
     - Advanced order flow metrics for signal generation
     """
+    # Changeable through set_params
+    tunable_params = {
+        'lot_size': float, 'scalp_target_percent': float, 'stop_loss_percent': float,
+        'trailing_stop_percent': float, 'min_spread': float, 'max_spread': float,
+        'breakeven_trigger_percent': float, 'enable_breakeven': bool,
+    }
     
     def __init__(self):
         # Use global configuration with local overrides
@@ -67,6 +67,8 @@ class HighFrequencyScalpingEA:
         self.magic_number = getattr(sys.modules.get('config', None), 'MAGIC_NUMBER', 54321)
         self.lot_size = DEFAULT_LOT_SIZE
         self.is_running = False
+        # Ticks before this time are skipped (off hours, daily trade limit)
+        self.idle_until = 0.0
         
         # Get global credentials
         credentials = get_account_credentials()
@@ -88,8 +90,16 @@ class HighFrequencyScalpingEA:
         self.breakeven_trigger_percent = BREAKEVEN_TRIGGER_PERCENT
         self.enable_breakeven = ENABLE_BREAKEVEN
         
-        # Order flow tracking
-        self.tick_data = deque(maxlen=getattr(sys.modules.get('config', None), 'TICK_ANALYSIS_PERIOD', 20))
+        # Order flow tracking: the tick window and its running sums
+        self.order_flow = OrderFlowWindow(getattr(sys.modules.get('config', None), 'TICK_ANALYSIS_PERIOD', 20))
+        # "stream": every tick since the last one (copy_ticks_from); "quote": one quote per pass
+        self.tick_ingestion = getattr(sys.modules.get('config', None), 'TICK_INGESTION', 'quote')
+        self.ticks = None  # tick_stream subscription in stream mode
+        self.ingest_started = None
+        self.ticks_ingested = 0
+        self.tick_batches = 0
+        self.largest_tick_batch = 0
+        self.ticks_rejected = 0
         self.volume_data = deque(maxlen=getattr(sys.modules.get('config', None), 'VOLUME_THRESHOLD', 100))
         self.bid_ask_data = deque(maxlen=getattr(sys.modules.get('config', None), 'BID_ASK_PRESSURE_PERIOD', 10))
         
@@ -184,21 +194,25 @@ class HighFrequencyScalpingEA:
     def analyze_order_flow(self) -> Dict:
         """Advanced order flow analysis for scalping signals"""
         try:
+            if self.ticks is not None:
+                # Stream mode: on_tick has fed the window every tick up to now
+                if not self.order_flow.ready:
+                    return {'signal': 'NONE', 'strength': 0.0}
+                return self.generate_scalping_signal(self.order_flow.metrics(self.point))
+                
             # Get recent tick data
             current_tick = self.get_current_prices()
             if current_tick is None:
                 return {'signal': 'NONE', 'strength': 0.0}
                 
-            self.tick_data.append(current_tick)
+            self.order_flow.update(current_tick['time'], current_tick['bid'], current_tick['ask'],
+                                   current_tick['spread'], current_tick['volume'])
             
-            if len(self.tick_data) < TICK_ANALYSIS_PERIOD:
+            if not self.order_flow.ready:
                 return {'signal': 'NONE', 'strength': 0.0}
                 
-            # Convert to DataFrame for analysis
-            df = pd.DataFrame(list(self.tick_data))
-            
-            # Calculate order flow metrics
-            metrics = self.calculate_flow_metrics(df)
+            # Order flow metrics, maintained incrementally by the window
+            metrics = self.order_flow.metrics(self.point)
             
             # Generate trading signal
             signal = self.generate_scalping_signal(metrics)
@@ -209,33 +223,77 @@ class HighFrequencyScalpingEA:
             logging.error(f"Error in order flow analysis: {e}")
             return {'signal': 'NONE', 'strength': 0.0}
             
-    def calculate_flow_metrics(self, df: pd.DataFrame) -> Dict:
-        """Calculate advanced order flow metrics"""
+    def ingest_ticks(self) -> int:
+        """Feed the ticks queued since the last call to the order flow window as one batch; returns how many"""
+        batch = self.ticks.drain()
+        if batch is None:
+            return 0
+        valid = (batch['bid'] > 0) & (batch['ask'] > 0)
+        if not valid.all():
+            self.ticks_rejected += len(batch) - int(valid.sum())
+            batch = batch[valid]
+        self.tick_batches += 1
+        self.ticks_ingested += len(batch)
+        self.largest_tick_batch = max(self.largest_tick_batch, len(batch))
+        if len(batch) == 0:
+            return 0
+        # Quote ticks repeat the last deal's volume; only ticks flagged with a new volume count
+        deal = (batch['flags'] & mt5.TICK_FLAG_VOLUME) != 0
+        volume = np.where(deal, np.where(batch['volume_real'] > 0, batch['volume_real'], batch['volume']), 0.0)
+        self.order_flow.extend(batch['time_msc'] / 1000.0, batch['bid'], batch['ask'],
+                               (batch['ask'] - batch['bid']) / self.point, volume)
+        return len(batch)
+    
+    def ingest_stats(self) -> Dict:
+        """Stream mode: ticks ingested, ticks/s, batches, and ticks rejected or dropped by a full queue"""
+        if self.ticks is None:
+            return {'mode': self.tick_ingestion}
+        elapsed = max(time.time() - self.ingest_started, 1.0)
+        return {
+            'mode': self.tick_ingestion,
+            'ticks': self.ticks_ingested,
+            'ticks_per_second': round(self.ticks_ingested / elapsed, 2),
+            'batches': self.tick_batches,
+            'avg_batch': round(self.ticks_ingested / max(self.tick_batches, 1), 1),
+            'largest_batch': self.largest_tick_batch,
+            'rejected': self.ticks_rejected,
+            'dropped': self.ticks.dropped,
+        }
+            
+    def calculate_flow_metrics(self, ticks) -> Dict:
+        """Calculate advanced order flow metrics from tick columns (OrderFlowWindow.metrics keeps the same ones per tick)"""
         try:
+            bid = np.asarray(ticks['bid'], dtype=float)
+            ask = np.asarray(ticks['ask'], dtype=float)
+            spread = np.asarray(ticks['spread'], dtype=float)
+            
             # Price momentum
-            price_change = df['bid'].iloc[-1] - df['bid'].iloc[0]
+            price_change = bid[-1] - bid[0]
             price_momentum = price_change / self.point
             
             # Bid-Ask pressure
-            bid_pressure = df['bid'].diff().sum()
-            ask_pressure = df['ask'].diff().sum()
+            bid_pressure = np.diff(bid).sum()
+            ask_pressure = np.diff(ask).sum()
             pressure_ratio = ask_pressure / (bid_pressure + 1e-10)
             
             # Volume analysis (if available)
-            if 'volume' in df.columns and df['volume'].sum() > 0:
-                volume_weighted_price = (df['bid'] * df['volume']).sum() / df['volume'].sum()
-                current_price = df['bid'].iloc[-1]
+            volume = ticks.get('volume')
+            volume = np.asarray(volume, dtype=float) if volume is not None else None
+            if volume is not None and volume.sum() > 0:
+                volume_weighted_price = (bid * volume).sum() / volume.sum()
+                current_price = bid[-1]
                 volume_bias = (current_price - volume_weighted_price) / self.point
             else:
                 volume_bias = 0.0
                 
             # Spread analysis
-            avg_spread = df['spread'].mean()
-            current_spread = df['spread'].iloc[-1]
+            avg_spread = spread.mean()
+            current_spread = spread[-1]
             spread_pressure = current_spread - avg_spread
             
             # Tick frequency analysis
-            time_diffs = df['time'].diff().dropna()
+            time_diffs = np.diff(np.asarray(ticks['time'], dtype=float))
+            time_diffs = time_diffs[~np.isnan(time_diffs)]
             avg_tick_frequency = time_diffs.mean() if len(time_diffs) > 0 else 1.0
             
             return {
@@ -355,8 +413,7 @@ class HighFrequencyScalpingEA:
                 logging.info("Daily loss limit reached")
                 return False
             # Check concurrent positions
-            positions = mt5.positions_get(symbol=self.symbol, magic=self.magic_number)
-            if positions is not None and len(positions) >= MAX_CONCURRENT_TRADES:
+            if position_book.position_count(self.symbol, self.magic_number) >= MAX_CONCURRENT_TRADES:
                 logging.info("Maximum concurrent trades reached")
                 return False
             # Calculate position size using centralized risk manager (percentage-based)
@@ -390,7 +447,7 @@ class HighFrequencyScalpingEA:
                 "type_filling": mt5.ORDER_FILLING_IOC,
             }
             # Send order
-            result = mt5.order_send(request)
+            result = position_book.order_send(request)
             if result.retcode != mt5.TRADE_RETCODE_DONE:
                 logging.warning(f"Order failed: {result.retcode} - {result.comment}")
                 return False
@@ -406,11 +463,8 @@ class HighFrequencyScalpingEA:
     def manage_positions(self):
         """Manage open positions with trailing stops"""
         try:
-            positions = mt5.positions_get(symbol=self.symbol, magic=self.magic_number)
-            
-            if positions is not None:
-                for position in positions:
-                    self.apply_trailing_stop(position)
+            for position in position_book.positions(self.symbol, self.magic_number):
+                self.apply_trailing_stop(position)
                 
         except Exception as e:
             logging.error(f"Error managing positions: {e}")
@@ -494,7 +548,7 @@ class HighFrequencyScalpingEA:
                 "tp": tp
             }
             
-            result = mt5.order_send(request)
+            result = position_book.order_send(request)
             if result.retcode == mt5.TRADE_RETCODE_DONE:
                 logging.debug(f"Position {ticket} modified - SL: {sl}, TP: {tp}")
             else:
@@ -566,13 +620,78 @@ class HighFrequencyScalpingEA:
                 'total_profit_percent': self.total_profit_percent,
                 'win_rate': win_rate,
                 'account_balance': account_info.balance,
-                'account_equity': account_info.equity
+                'account_equity': account_info.equity,
+                'tick_ingestion': self.ingest_stats()
             }
             
         except Exception as e:
             logging.error(f"Error getting performance stats: {e}")
             return {}
             
+    @property
+    def tick_interval(self):
+        return UPDATE_INTERVAL
+
+    @property
+    def timer_interval(self):
+        # Tick throughput report in stream mode
+        return 300 if self.ticks is not None else None
+
+    def on_start(self):
+        if not hasattr(self, 'point'):
+            # Started by the strategy host, which connects once and skips initialize_mt5()
+            symbol_info = get_symbol_info(self.symbol)
+            if symbol_info is None:
+                logging.error(f"Symbol {self.symbol} not found")
+                return False
+            self.symbol_info, self.point, self.digits = symbol_info, symbol_info.point, symbol_info.digits
+        if self.tick_ingestion == 'stream':
+            self.ticks = tick_stream.subscribe(self.symbol)
+            self.ingest_started = time.time()
+            logging.info(f"Tick ingestion: every tick of {self.symbol} via copy_ticks_from")
+        return True
+
+    def on_timer(self):
+        logging.info(f"Tick ingestion: {self.ingest_stats()}")
+
+    def on_tick(self, tick):
+        """Scalping pass on each new quote"""
+        if self.ticks is not None:
+            # Also while idle, so the queue does not overflow and the window is current when trading resumes
+            self.ingest_ticks()
+        if time.time() < self.idle_until:
+            return
+        # Check if it's trading time
+        if not self.is_trading_time():
+            self.idle_until = time.time() + 60  # Check every minute during off hours
+            return
+        # Update daily statistics
+        self.update_daily_stats()
+        # Check daily limits
+        if self.daily_trades >= MAX_DAILY_TRADES:
+            logging.info("Daily trade limit reached, waiting...")
+            self.idle_until = time.time() + 300  # Wait 5 minutes
+            return
+        # Check daily limits using global risk manager  
+        if not self.risk_manager.check_daily_limits():
+            logging.info("Daily loss limit reached, stopping trading")
+            self.is_running = False
+            return
+        # Manage existing positions
+        self.manage_positions()
+        # Analyze market for new opportunities
+        signal_data = self.analyze_order_flow()
+        if signal_data['signal'] in ['BUY', 'SELL'] and signal_data['strength'] >= 0.6 and entries_allowed():
+            current_prices = self.get_current_prices()
+            if current_prices:
+                success = self.place_scalping_order(signal_data['signal'], current_prices)
+                if success:
+                    logging.info(f"Signal executed: {signal_data['signal']} (Strength: {signal_data['strength']:.2f})")
+        # Log performance every 100 trades
+        if self.total_trades > 0 and self.total_trades % 100 == 0:
+            stats = self.get_performance_stats()
+            logging.info(f"Performance Update: {stats}")
+
     def run(self):
         """Main trading loop for high-frequency scalping"""
         try:
@@ -580,52 +699,11 @@ class HighFrequencyScalpingEA:
                 logging.error("Failed to initialize MT5")
                 return
             logging.info("Starting High-Frequency Scalping EA")
-            self.is_running = True
-            while self.is_running:
-                # Pause logic: check for pause.flag in working directory
-                check_pause_flag(os.path.dirname(os.path.abspath(__file__)))
-                try:
-                    # Check if it's trading time
-                    if not self.is_trading_time():
-                        time.sleep(60)  # Check every minute during off hours
-                        continue
-                    # Update daily statistics
-                    self.update_daily_stats()
-                    # Check daily limits
-                    if self.daily_trades >= MAX_DAILY_TRADES:
-                        logging.info("Daily trade limit reached, waiting...")
-                        time.sleep(300)  # Wait 5 minutes
-                        continue
-                    # Check daily limits using global risk manager  
-                    if not self.risk_manager.check_daily_limits():
-                        logging.info("Daily loss limit reached, stopping trading")
-                        break
-                    # Manage existing positions
-                    self.manage_positions()
-                    # Analyze market for new opportunities
-                    signal_data = self.analyze_order_flow()
-                    if signal_data['signal'] in ['BUY', 'SELL'] and signal_data['strength'] >= 0.6:
-                        current_prices = self.get_current_prices()
-                        if current_prices:
-                            success = self.place_scalping_order(signal_data['signal'], current_prices)
-                            if success:
-                                logging.info(f"Signal executed: {signal_data['signal']} (Strength: {signal_data['strength']:.2f})")
-                    # Log performance every 100 trades
-                    if self.total_trades > 0 and self.total_trades % 100 == 0:
-                        stats = self.get_performance_stats()
-                        logging.info(f"Performance Update: {stats}")
-                    # Short sleep for high-frequency operation
-                    time.sleep(UPDATE_INTERVAL)
-                except KeyboardInterrupt:
-                    logging.info("Received stop signal")
-                    break
-                except Exception as e:
-                    logging.error(f"Error in main loop: {e}")
-                    if RESTART_ON_ERROR:
-                        time.sleep(5)
-                        continue
-                    else:
-                        break
+            loop = EventLoop(restart_on_error=RESTART_ON_ERROR)
+            loop.add(self)
+            loop.run()
+        except KeyboardInterrupt:
+            logging.info("Received stop signal")
         except Exception as e:
             logging.error(f"Fatal error in EA: {e}")
         finally:
@@ -636,6 +714,10 @@ class HighFrequencyScalpingEA:
     def stop(self):
         """Stop the EA"""
         self.is_running = False
+        if self.ticks is not None:
+            logging.info(f"Tick ingestion: {self.ingest_stats()}")
+            tick_stream.unsubscribe(self.ticks)
+            self.ticks = None
         logging.info("Stop signal sent to EA")
 
 def main():
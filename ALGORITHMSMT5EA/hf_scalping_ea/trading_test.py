@@ -22,8 +22,13 @@ class TestScalpingEA(unittest.TestCase):
         
         with patch('mt5_hf_scalping_ea.mt5', self.mt5_mock):
             from mt5_hf_scalping_ea import HighFrequencyScalpingEA
+            from ALGORITHMSMT5EA.position_book import PositionBook
             self.ea = HighFrequencyScalpingEA()
             self._setup_symbol_info()
+        # Positions and orders go through the position book; point it at the mock, without caching
+        book = patch('mt5_hf_scalping_ea.position_book', PositionBook(self.mt5_mock, max_age=0))
+        book.start()
+        self.addCleanup(book.stop)
     
     def _setup_mt5_constants(self):
         """Configure MT5 mock constants and responses"""
@@ -122,7 +127,7 @@ class TestScalpingEA(unittest.TestCase):
         
         # Test concurrent position limit
         self.ea.daily_profit = 0.0
-        mock_positions = [Mock() for _ in range(3)]
+        mock_positions = [Mock(symbol=self.ea.symbol, magic=self.ea.magic_number) for _ in range(3)]
         self.mt5_mock.positions_get.return_value = mock_positions
         result = self.ea.place_scalping_order('BUY', self._get_mock_prices())
         self.assertFalse(result)
@@ -130,8 +135,8 @@ class TestScalpingEA(unittest.TestCase):
     def test_position_management(self):
         """Test position management and trailing stops"""
         mock_positions = [
-            Mock(symbol='BTCUSD', ticket=12345, type=0),  # BUY
-            Mock(symbol='BTCUSD', ticket=12346, type=1),  # SELL
+            Mock(symbol=self.ea.symbol, magic=self.ea.magic_number, ticket=12345, type=0),  # BUY
+            Mock(symbol=self.ea.symbol, magic=self.ea.magic_number, ticket=12346, type=1),  # SELL
         ]
         
         with patch('mt5_hf_scalping_ea.mt5', self.mt5_mock):
@@ -0,0 +1,193 @@
+"""
+Vectorized NumPy versions of the indicators in indicators.py.
+
+The streaming indicators give the latest value per bar; these kernels give
+the whole series at once, for code that looks at many bars (the liquidity
+EA's swing detection, the trend EA's calculate_* helpers, backtests).
+
+They work directly on the structured arrays copy_rates returns (or on a
+DataFrame, or a plain array for the single-series kernels), without building
+a DataFrame or converting times, and return float arrays of the input's
+length with NaN where the indicator is not defined yet. The values are the
+ones the streaming indicators produce, with the same ``wilder`` switch, and
+test_indicators.py checks both against pandas.
+
+The exponential smoothings (EMA, Wilder) are linear recurrences; they are
+computed in blocks with a cumulative sum of the inputs scaled by powers of
+the decay, so there is no Python loop over the bars.
+"""
+
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Largest power of 1/decay used within a block, to stay far from overflow
+_MAX_SCALE_LOG10 = 200
+
+
+def _column(data, field):
+    """``field`` of bars (structured array or DataFrame), or ``data`` itself if it is a plain array"""
+    if getattr(data, 'dtype', None) is not None and data.dtype.names is None:
+        return np.asarray(data, dtype=float)
+    return np.asarray(data[field], dtype=float)
+
+
+def _nan(length):
+    return np.full(length, np.nan)
+
+
+def _recurrence(x, decay, gain, initial=0.0):
+    """z[t] = decay * z[t-1] + gain * x[t] with z[-1] = initial, vectorized per block"""
+    out = np.empty(len(x))
+    if decay == 0:
+        out[:] = gain * x
+        return out
+    block = max(1, int(_MAX_SCALE_LOG10 / -math.log10(decay)))
+    carry = initial
+    for start in range(0, len(x), block):
+        chunk = x[start:start + block]
+        steps = np.arange(1, len(chunk) + 1)
+        # z[s+k] = decay**(k+1) * (carry + gain * sum_j x[s+j] / decay**(j+1))
+        scaled = np.cumsum(chunk * decay ** -steps.astype(float))
+        out[start:start + len(chunk)] = decay ** steps * (carry + gain * scaled)
+        carry = out[start + len(chunk) - 1]
+    return out
+
+
+def _wilder_mean(x, period, start=0):
+    """Wilder's smoothing of x[start:]: the mean of the first ``period`` values, then a 1/period EMA"""
+    out = _nan(len(x))
+    first = start + period - 1
+    if first >= len(x):
+        return out
+    seed = x[start:first + 1].mean()
+    out[first] = seed
+    out[first + 1:] = _recurrence(x[first + 1:], 1 - 1 / period, 1 / period, seed)
+    return out
+
+
+def _rolling(x, period, reduce):
+    out = _nan(len(x))
+    if len(x) >= period:
+        out[period - 1:] = reduce(sliding_window_view(x, period), axis=1)
+    return out
+
+
+def _mean(x, period, wilder, start=0):
+    if wilder:
+        return _wilder_mean(x, period, start)
+    return sma(x, period)
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return numerator / denominator
+
+
+def sma(data, period, field='close'):
+    """Simple moving average; a window with a NaN gives NaN, like pandas rolling().mean()"""
+    return _rolling(_column(data, field), period, np.sum) / period
+
+
+def ema(data, period, field='close', adjust=False):
+    """Exponential moving average, like pandas ewm(span=period, adjust=adjust).mean()"""
+    x = _column(data, field)
+    if not len(x):
+        return x.copy()
+    decay = 1 - 2 / (period + 1)
+    if adjust:
+        return _recurrence(x, decay, 1.0) / _recurrence(np.ones(len(x)), decay, 1.0)
+    out = np.empty(len(x))
+    out[0] = x[0]
+    out[1:] = _recurrence(x[1:], decay, 1 - decay, x[0])
+    return out
+
+
+def rsi(data, period=14, wilder=True, field='close'):
+    """Relative strength index; ``wilder=False`` is the simple-mean RSI of the EAs' pandas code"""
+    close = _column(data, field)
+    delta = np.diff(close, prepend=np.nan)
+    if wilder:
+        gain = _wilder_mean(np.maximum(delta, 0.0), period, start=1)
+        loss = _wilder_mean(np.maximum(-delta, 0.0), period, start=1)
+    else:
+        # pandas' where() counts the first bar as a zero gain and loss
+        delta[:1] = 0.0
+        gain = sma(np.maximum(delta, 0.0), period)
+        loss = sma(np.maximum(-delta, 0.0), period)
+    return 100 - 100 / (1 + _ratio(gain, loss))
+
+
+def true_range(data):
+    """True range per bar; the first bar's is its high - low"""
+    high, low, close = _column(data, 'high'), _column(data, 'low'), _column(data, 'close')
+    tr = high - low
+    if len(tr) > 1:
+        previous = close[:-1]
+        tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - previous), np.abs(low[1:] - previous)))
+    return tr
+
+
+def atr(data, period=14, wilder=True):
+    """Average true range"""
+    return _mean(true_range(data), period, wilder)
+
+
+def adx(data, period=14, wilder=True):
+    """(ADX, +DI, -DI); ``wilder=False`` is the trend following EA's pandas version"""
+    high, low = _column(data, 'high'), _column(data, 'low')
+    up = np.diff(high, prepend=np.nan)
+    down = -np.diff(low, prepend=np.nan)
+    tr = true_range(data)
+    if wilder:
+        plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+        minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+        tr_mean = _wilder_mean(tr, period, start=1)
+        plus_mean = _wilder_mean(plus_dm, period, start=1)
+        minus_mean = _wilder_mean(minus_dm, period, start=1)
+    else:
+        # NaN for the first bar, which has no directional movement
+        plus_dm, minus_dm = np.fmax(up, 0.0), np.fmax(down, 0.0)
+        plus_dm[:1] = minus_dm[:1] = np.nan
+        tr_mean, plus_mean, minus_mean = sma(tr, period), sma(plus_dm, period), sma(minus_dm, period)
+    plus_di = 100 * _ratio(plus_mean, tr_mean)
+    minus_di = 100 * _ratio(minus_mean, tr_mean)
+    dx = 100 * _ratio(np.abs(plus_di - minus_di), plus_di + minus_di)
+    if wilder:
+        return _wilder_mean(dx, period, start=period), plus_di, minus_di
+    return sma(dx, period), plus_di, minus_di
+
+
+def rolling_max(data, period, field='high'):
+    """Highest value of the last ``period`` bars"""
+    return _rolling(_column(data, field), period, np.max)
+
+
+def rolling_min(data, period, field='low'):
+    """Lowest value of the last ``period`` bars"""
+    return _rolling(_column(data, field), period, np.min)
+
+
+def channel(data, period):
+    """Highest high - lowest low of the last ``period`` bars"""
+    return rolling_max(data, period) - rolling_min(data, period)
+
+
+def vwap(data, session_seconds=86400, volume='tick_volume'):
+    """Volume-weighted average of the typical price, restarted every ``session_seconds`` of bar time"""
+    time = np.asarray(data['time']).astype(np.int64)
+    typical = (_column(data, 'high') + _column(data, 'low') + _column(data, 'close')) / 3
+    volumes = _column(data, volume)
+    if not len(time):
+        return typical
+    session = time // session_seconds
+    starts = np.flatnonzero(np.diff(session, prepend=session[0] - 1))
+    # Index of each bar's session start, then cumulative sums from that start
+    first = starts[np.searchsorted(starts, np.arange(len(time)), side='right') - 1]
+    price_volume = np.cumsum(typical * volumes)
+    total_volume = np.cumsum(volumes)
+    before = first - 1
+    price_volume -= np.where(before >= 0, price_volume[before], 0.0)
+    total_volume -= np.where(before >= 0, total_volume[before], 0.0)
+    return _ratio(price_volume, total_volume)
@@ -0,0 +1,501 @@
+"""
+Streaming technical indicators shared by the EAs.
+
+The EAs recomputed their indicators from scratch on every pass: pandas
+rolling() over 50-500 bars for an RSI, two moving averages or an ADX, of
+which only the last one or two values were used. RSI was copy-pasted between
+the candy and the trend following EA.
+
+Every indicator here keeps running state and takes one bar (or value) per
+``update()`` in O(1) time:
+
+    SMA, EMA                    moving averages of one field (close by default)
+    RSI                         Wilder's RSI, or the simple-mean RSI the EAs used
+    ATR                         average true range, Wilder or simple mean
+    ADX                         ADX with +DI/-DI, Wilder or the EAs' simple-mean variant
+    RollingMax, RollingMin      highest high / lowest low of a window
+    Channel                     highest high - lowest low of a window
+    VWAP                        volume-weighted average price per session
+
+``value`` is the latest value (None until enough bars were seen) and
+``previous`` the one before, for crossovers. ``warm_up()`` feeds a whole
+numpy array of bars as returned by copy_rates (or of plain values for the
+single-field indicators); ``series()`` does the same and returns every
+value, which is how they are checked against pandas in test_indicators.py.
+
+With ``wilder=False`` RSI, ATR and ADX give the same values as the pandas
+rolling-mean code they replace, so porting an EA does not change its signals.
+
+IndicatorFeed keeps a set of indicators up to date with the closed bars of
+one (symbol, timeframe) from the bar cache.
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+
+
+def _div(numerator, denominator):
+    """numerator / denominator with numpy's results for a zero denominator"""
+    if denominator == 0:
+        return math.nan if numerator == 0 or math.isnan(numerator) else math.copysign(math.inf, numerator)
+    return numerator / denominator
+
+
+class _RollingMean:
+    """Mean of the last ``period`` values with a running sum; NaN while the window holds a NaN"""
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque()
+        self.total = 0.0
+        self.nans = 0
+        self._since_sync = 0
+
+    def push(self, x):
+        if len(self.window) == self.period:
+            old = self.window.popleft()
+            if old != old:
+                self.nans -= 1
+            else:
+                self.total -= old
+        self.window.append(x)
+        if x != x:
+            self.nans += 1
+        else:
+            self.total += x
+        # Re-add the window once per period so rounding errors of the running sum cannot build up
+        self._since_sync += 1
+        if self._since_sync >= self.period:
+            self._since_sync = 0
+            self.total = math.fsum(v for v in self.window if v == v)
+        if len(self.window) < self.period:
+            return None
+        return math.nan if self.nans else self.total / self.period
+
+
+class _WilderMean:
+    """Wilder's smoothing: the simple mean of the first ``period`` values, then avg += (x - avg) / period"""
+
+    def __init__(self, period):
+        self.period = period
+        self.count = 0
+        self.total = 0.0
+        self.value = None
+
+    def push(self, x):
+        if self.value is not None:
+            self.value += (x - self.value) / self.period
+            return self.value
+        self.count += 1
+        self.total += x
+        if self.count == self.period:
+            self.value = self.total / self.period
+        return self.value
+
+
+def _mean(period, wilder):
+    return _WilderMean(period) if wilder else _RollingMean(period)
+
+
+class Indicator:
+    """
+    Base class: subclasses set ``fields`` (the bar fields ``update()`` takes,
+    in order) and implement ``_next()``.
+    """
+
+    fields = ('close',)
+
+    def __init__(self):
+        self.value = None
+        self.previous = None
+        self.count = 0
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+    def update(self, *values):
+        """Add the next bar (its ``fields``, in order); returns the new value"""
+        self.previous = self.value
+        self.value = self._next(*values)
+        self.count += 1
+        return self.value
+
+    def update_bar(self, bar):
+        """Add the next bar from a copy_rates record (or any mapping with the fields)"""
+        return self.update(*[bar[field] for field in self.fields])
+
+    def warm_up(self, data):
+        """Add every bar of ``data``; returns the latest value"""
+        for row in self._rows(data):
+            self.update(*row)
+        return self.value
+
+    def series(self, data):
+        """Add every bar of ``data``; returns the value after each as a float array (NaN while not ready)"""
+        values = [self.update(*row) for row in self._rows(data)]
+        return np.array([math.nan if v is None else v for v in values], dtype=float)
+
+    def reset(self):
+        self.__init__(**self._arguments())
+
+    def _next(self, *values):
+        raise NotImplementedError
+
+    def _arguments(self):
+        return {}
+
+    def _rows(self, data):
+        data = np.asarray(data)
+        if data.dtype.names is None:
+            if len(self.fields) != 1:
+                raise TypeError(f"{type(self).__name__} needs bars with the fields {', '.join(self.fields)}")
+            return ((v,) for v in data.astype(float).tolist())
+        return zip(*[data[field].tolist() for field in self.fields])
+
+
+class SMA(Indicator):
+    """
+    Simple moving average over ``period`` bars of ``field``, or of the values
+    of another indicator passed as ``field`` (which it then updates itself).
+    """
+
+    def __init__(self, period, field='close'):
+        self.period = period
+        self.source = field if isinstance(field, Indicator) else None
+        self.fields = field.fields if self.source is not None else (field,)
+        super().__init__()
+        self._mean = _RollingMean(period)
+
+    def update(self, *values):
+        if self.source is not None:
+            x = self.source.update(*values)
+            if x is None:
+                # Nothing to average yet
+                return self.value
+            values = (x,)
+        return super().update(*values)
+
+    def reset(self):
+        if self.source is not None:
+            self.source.reset()
+        super().reset()
+
+    def _next(self, x):
+        return self._mean.push(x)
+
+    def _arguments(self):
+        return {'period': self.period, 'field': self.source if self.source is not None else self.fields[0]}
+
+
+class EMA(Indicator):
+    """
+    Exponential moving average with alpha = 2 / (period + 1), like pandas
+    ``ewm(span=period, adjust=adjust).mean()``: a value from the first bar on.
+    """
+
+    def __init__(self, period, field='close', adjust=False):
+        self.period = period
+        self.adjust = adjust
+        self.fields = (field,)
+        super().__init__()
+        self._decay = 1 - 2 / (period + 1)
+        self._numerator = 0.0
+        self._weights = 0.0
+
+    def _next(self, x):
+        if self.adjust:
+            # Weighted mean of all values so far with weights decay**age
+            self._numerator = x + self._decay * self._numerator
+            self._weights = 1 + self._decay * self._weights
+            return self._numerator / self._weights
+        if self.value is None:
+            return x
+        return self.value + (1 - self._decay) * (x - self.value)
+
+    def _arguments(self):
+        return {'period': self.period, 'field': self.fields[0], 'adjust': self.adjust}
+
+
+class RSI(Indicator):
+    """
+    Relative strength index of the closes.
+
+    Args:
+        period: bars averaged.
+        wilder: Wilder's smoothing; False averages the last ``period`` gains
+            and losses with a simple mean, as the EAs' pandas code did.
+    """
+
+    def __init__(self, period=14, wilder=True):
+        self.period = period
+        self.wilder = wilder
+        super().__init__()
+        self._last = None
+        self._gain = _mean(period, wilder)
+        self._loss = _mean(period, wilder)
+
+    def _next(self, close):
+        last, self._last = self._last, close
+        if last is None:
+            if not self.wilder:
+                # The pandas version counts the first bar as a zero gain and loss
+                self._gain.push(0.0)
+                self._loss.push(0.0)
+            return None
+        delta = close - last
+        gain = self._gain.push(max(delta, 0.0))
+        loss = self._loss.push(max(-delta, 0.0))
+        if gain is None:
+            return None
+        # A running sum can end a hair below zero for a window of zeros
+        rs = _div(max(gain, 0.0), max(loss, 0.0))
+        return 100 - 100 / (1 + rs)
+
+    def _arguments(self):
+        return {'period': self.period, 'wilder': self.wilder}
+
+
+def _true_range(high, low, previous_close):
+    if previous_close is None:
+        return high - low
+    return max(high - low, abs(high - previous_close), abs(low - previous_close))
+
+
+class ATR(Indicator):
+    """Average true range; the first bar's true range is its high - low"""
+
+    fields = ('high', 'low', 'close')
+
+    def __init__(self, period=14, wilder=True):
+        self.period = period
+        self.wilder = wilder
+        super().__init__()
+        self._close = None
+        self._mean = _mean(period, wilder)
+
+    def _next(self, high, low, close):
+        tr = _true_range(high, low, self._close)
+        self._close = close
+        return self._mean.push(tr)
+
+    def _arguments(self):
+        return {'period': self.period, 'wilder': self.wilder}
+
+
+class ADX(Indicator):
+    """
+    Average directional index; ``plus_di`` and ``minus_di`` hold the
+    directional indicators of the last bar.
+
+    Args:
+        period: bars smoothed.
+        wilder: Welles Wilder's ADX. False reproduces the trend following EA's
+            pandas version: simple means over ``period`` bars, and +DM/-DM
+            each kept when positive instead of only the larger of the two.
+    """
+
+    fields = ('high', 'low', 'close')
+
+    def __init__(self, period=14, wilder=True):
+        self.period = period
+        self.wilder = wilder
+        super().__init__()
+        self.plus_di = None
+        self.minus_di = None
+        self._bar = None
+        self._tr = _mean(period, wilder)
+        self._plus_dm = _mean(period, wilder)
+        self._minus_dm = _mean(period, wilder)
+        self._dx = _mean(period, wilder)
+
+    def _next(self, high, low, close):
+        bar, self._bar = self._bar, (high, low, close)
+        if bar is None:
+            if not self.wilder:
+                # pandas has a true range for the first bar, but no directional movement
+                self._tr.push(high - low)
+            return None
+        previous_high, previous_low, previous_close = bar
+        up, down = high - previous_high, previous_low - low
+        if self.wilder:
+            plus_dm = up if up > down and up > 0 else 0.0
+            minus_dm = down if down > up and down > 0 else 0.0
+        else:
+            plus_dm, minus_dm = max(up, 0.0), max(down, 0.0)
+        tr = self._tr.push(_true_range(high, low, previous_close))
+        plus = self._plus_dm.push(plus_dm)
+        minus = self._minus_dm.push(minus_dm)
+        if plus is None or tr is None:
+            return None
+        self.plus_di = 100 * _div(plus, tr)
+        self.minus_di = 100 * _div(minus, tr)
+        dx = 100 * _div(abs(self.plus_di - self.minus_di), self.plus_di + self.minus_di)
+        return self._dx.push(dx)
+
+    def _arguments(self):
+        return {'period': self.period, 'wilder': self.wilder}
+
+
+class _RollingExtreme(Indicator):
+    """Extreme of ``field`` over ``period`` bars with a monotonic deque (amortized O(1))"""
+
+    def __init__(self, period, field):
+        self.period = period
+        self.fields = (field,)
+        super().__init__()
+        self._candidates = deque()  # (bar index, value), values strictly ordered
+        self._nans = deque()        # bar indexes of NaN values in the window
+
+    def _next(self, x):
+        index = self.count
+        while self._candidates and self._candidates[0][0] <= index - self.period:
+            self._candidates.popleft()
+        while self._nans and self._nans[0] <= index - self.period:
+            self._nans.popleft()
+        if x != x:
+            self._nans.append(index)
+        else:
+            while self._candidates and not self._better(self._candidates[-1][1], x):
+                self._candidates.pop()
+            self._candidates.append((index, x))
+        if index + 1 < self.period:
+            return None
+        return math.nan if self._nans or not self._candidates else self._candidates[0][1]
+
+    def _arguments(self):
+        return {'period': self.period, 'field': self.fields[0]}
+
+
+class RollingMax(_RollingExtreme):
+    """Highest ``field`` (high by default) of the last ``period`` bars"""
+
+    def __init__(self, period, field='high'):
+        super().__init__(period, field)
+
+    @staticmethod
+    def _better(kept, new):
+        return kept > new
+
+
+class RollingMin(_RollingExtreme):
+    """Lowest ``field`` (low by default) of the last ``period`` bars"""
+
+    def __init__(self, period, field='low'):
+        super().__init__(period, field)
+
+    @staticmethod
+    def _better(kept, new):
+        return kept < new
+
+
+class Channel(Indicator):
+    """
+    Width of the price channel of the last ``period`` bars: highest high -
+    lowest low (the hedging EAs' volatility measure); ``upper`` and
+    ``lower`` hold the two edges.
+    """
+
+    fields = ('high', 'low')
+
+    def __init__(self, period):
+        self.period = period
+        super().__init__()
+        self.upper = None
+        self.lower = None
+        self._high = RollingMax(period)
+        self._low = RollingMin(period)
+
+    def _next(self, high, low):
+        self.upper = self._high.update(high)
+        self.lower = self._low.update(low)
+        if self.upper is None:
+            return None
+        return self.upper - self.lower
+
+    def _arguments(self):
+        return {'period': self.period}
+
+
+class VWAP(Indicator):
+    """
+    Volume-weighted average of the typical price (high + low + close) / 3,
+    restarted every ``session_seconds`` of bar time (a day by default).
+    """
+
+    def __init__(self, session_seconds=86400, volume='tick_volume'):
+        self.session_seconds = session_seconds
+        self.fields = ('time', 'high', 'low', 'close', volume)
+        super().__init__()
+        self._session = None
+        self._price_volume = 0.0
+        self._volume = 0.0
+
+    def _next(self, time, high, low, close, volume):
+        session = int(time) // self.session_seconds
+        if session != self._session:
+            self._session = session
+            self._price_volume = self._volume = 0.0
+        self._price_volume += (high + low + close) / 3 * volume
+        self._volume += volume
+        return _div(self._price_volume, self._volume)
+
+    def _arguments(self):
+        return {'session_seconds': self.session_seconds, 'volume': self.fields[-1]}
+
+
+class IndicatorFeed:
+    """
+    Feeds the closed bars of one (symbol, timeframe) to a set of indicators.
+
+    Args:
+        source: anything with ``get(symbol, timeframe, count)`` returning the
+            latest bars, forming bar last (the BarCache).
+        indicators: the indicators to keep up to date.
+        warmup: bars the indicators start from.
+        lookback: bars fetched per ``update()``; if more bars than that closed
+            since the last update, the indicators start over from ``warmup`` bars.
+    """
+
+    def __init__(self, source, symbol, timeframe, indicators, warmup=500, lookback=64):
+        self.source = source
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.indicators = list(indicators)
+        self.warmup = warmup
+        self.lookback = lookback
+        self.last_bar = None
+
+    def update(self):
+        """Add the bars that closed since the last call; returns how many"""
+        if self.last_bar is None:
+            return self._warm_up()
+        rates = self.source.get(self.symbol, self.timeframe, self.lookback + 1)
+        if rates is None or len(rates) < 2:
+            return 0
+        closed = rates[:-1]
+        last_time = self.last_bar['time']
+        if closed['time'][0] > last_time:
+            # Bars were missed (e.g. the EA was paused): start over
+            for indicator in self.indicators:
+                indicator.reset()
+            return self._warm_up()
+        new = closed[closed['time'] > last_time]
+        for bar in new:
+            for indicator in self.indicators:
+                indicator.update_bar(bar)
+        if len(new):
+            self.last_bar = new[-1].copy()
+        return len(new)
+
+    def _warm_up(self):
+        rates = self.source.get(self.symbol, self.timeframe, self.warmup + 1)
+        if rates is None or len(rates) < 2:
+            return 0
+        closed = rates[:-1]
+        for indicator in self.indicators:
+            indicator.warm_up(closed)
+        self.last_bar = closed[-1].copy()
+        return len(closed)
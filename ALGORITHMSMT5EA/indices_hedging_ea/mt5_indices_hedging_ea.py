@@ -8,18 +8,24 @@ It uses dynamic partial hedging, volatility and trend filters, and robust risk c
 """
 
 import MetaTrader5 as mt5
-import pandas as pd
 import numpy as np
-import time
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from global_config import get_account_credentials, get_risk_settings
 from risk_manager import RiskManager
 # Import common EA utilities
-from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, check_pause_flag
+from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, get_rates, market_data, indicator_feed, entries_allowed, order_pipeline, position_book, EA
+from ALGORITHMSMT5EA.ea_logging import get_logger
+from ALGORITHMSMT5EA.indicators import SMA, Channel
+
+class IndicesHedgingEA(EA):
+    timeframes = (mt5.TIMEFRAME_M5,)  # volatility/MA hedge signal on each closed M5 bar
+    timer_interval = 60  # trailing stops and partial closes
+    # Changeable through set_params
+    tunable_params = {'base_lot': float, 'hedge_ratio': float, 'trailing_enabled': bool, 'trailing_distance_points': int,
+                      'max_drawdown_percent': float}
 
-class IndicesHedgingEA:
     def __init__(self, symbol="US500", base_lot=0.1, hedge_ratio=0.5, magic_number=54321):
         credentials = get_account_credentials()
         self.symbol = credentials.get('symbol', symbol)
@@ -35,6 +41,15 @@ class IndicesHedgingEA:
         self.trailing_distance_points = 100
         self.max_drawdown_percent = 20.0
         self.log_file = "hedging_ea.log"
+        self.logger = get_logger('indices_hedging_ea', self.log_file)
+        # Streaming indicators on closed M5 bars: 14-bar high-low range, its mean over
+        # the 487 complete ranges of 500 bars, and the 10/30 MAs
+        self.range = Channel(14)
+        self.range_average = SMA(500 - 13, field=self.range)
+        self.fast_ma = SMA(10)
+        self.slow_ma = SMA(30)
+        self.m5_feed = indicator_feed(self.symbol, mt5.TIMEFRAME_M5,
+                                      [self.range_average, self.fast_ma, self.slow_ma], warmup=500)
 
     def initialize_mt5(self):
         # Use shared utility
@@ -49,24 +64,16 @@ class IndicesHedgingEA:
         return get_current_price(self.symbol)
 
     def get_market_data(self, timeframe=mt5.TIMEFRAME_M5, num_bars=500):
-        rates = mt5.copy_rates_from_pos(self.symbol, timeframe, 0, num_bars)
-        if rates is None:
-            return None
-        df = pd.DataFrame(rates)
-        df['time'] = pd.to_datetime(df['time'], unit='s')
-        return df
+        return market_data(get_rates(self.symbol, timeframe, num_bars))
 
     def get_signal(self):
         # Use volatility spike or trend reversal to trigger hedge
-        data = self.get_market_data()
-        if data is None or len(data) < 50:
+        self.m5_feed.update()
+        if self.slow_ma.value is None:
             return None
-        atr = data['high'].rolling(window=14).max() - data['low'].rolling(window=14).min()
-        fast_ma = data['close'].rolling(window=10).mean()
-        slow_ma = data['close'].rolling(window=30).mean()
-        if atr.iloc[-1] > atr.mean() * 1.5:
+        if self.range_average.ready and self.range.value > self.range_average.value * 1.5:
             return "HEDGE"
-        if fast_ma.iloc[-1] < slow_ma.iloc[-1]:
+        if self.fast_ma.value < self.slow_ma.value:
             return "HEDGE"
         return None
 
@@ -87,7 +94,7 @@ class IndicesHedgingEA:
             "type_time": mt5.ORDER_TIME_GTC,
             "type_filling": mt5.ORDER_FILLING_IOC,
         }
-        result = mt5.order_send(request)
+        result = position_book.order_send(request)
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             self.log(f"Failed to open main {direction} position: {result.retcode}")
             return None
@@ -111,7 +118,7 @@ class IndicesHedgingEA:
             "type_time": mt5.ORDER_TIME_GTC,
             "type_filling": mt5.ORDER_FILLING_IOC,
         }
-        result = mt5.order_send(request)
+        result = position_book.order_send(request)
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             self.log(f"Failed to open hedge position: {result.retcode}")
             return None
@@ -130,7 +137,7 @@ class IndicesHedgingEA:
             self.log("Max drawdown reached! Closing all positions.")
             self.close_all_positions()
         # Trailing stop logic for all positions
-        positions = mt5.positions_get(symbol=self.symbol)
+        positions = position_book.positions(self.symbol, self.magic_number)
         if positions:
             for pos in positions:
                 self.update_trailing_stop(pos, pos.price_current)
@@ -159,7 +166,7 @@ class IndicesHedgingEA:
             "sl": new_sl,
             "tp": position.tp,
         }
-        result = mt5.order_send(request)
+        result = position_book.order_send(request)
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             self.log(f"Failed to update trailing stop: {result.retcode}")
             return False
@@ -184,18 +191,19 @@ class IndicesHedgingEA:
                 "type_time": mt5.ORDER_TIME_GTC,
                 "type_filling": mt5.ORDER_FILLING_IOC,
             }
-            result = mt5.order_send(request)
+            result = position_book.order_send(request)
             if result.retcode == mt5.TRADE_RETCODE_DONE:
                 self.log(f"Partial close executed for position {position.ticket}")
 
     def close_all_positions(self):
-        positions = mt5.positions_get(symbol=self.symbol)
+        positions = position_book.positions(self.symbol, self.magic_number)
         if not positions:
             return
+        requests = []
         for pos in positions:
             order_type = mt5.ORDER_TYPE_SELL if pos.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
             price = self.get_current_price()[0] if order_type == mt5.ORDER_TYPE_SELL else self.get_current_price()[1]
-            request = {
+            requests.append({
                 "action": mt5.TRADE_ACTION_DEAL,
                 "symbol": self.symbol,
                 "volume": pos.volume,
@@ -207,35 +215,29 @@ class IndicesHedgingEA:
                 "comment": "Hedging EA Close",
                 "type_time": mt5.ORDER_TIME_GTC,
                 "type_filling": mt5.ORDER_FILLING_IOC,
-            }
-            result = mt5.order_send(request)
+            })
+        # One batch, without order_check, so closing takes about one round-trip
+        results = order_pipeline.submit(requests, validate=False)
+        for pos, result in zip(positions, results):
             if result.retcode == mt5.TRADE_RETCODE_DONE:
                 self.log(f"Closed position {pos.ticket}")
 
     def log(self, message):
-        with open(self.log_file, "a") as f:
-            f.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}\n")
-        print(message)
+        # Queued; the file and console are written by the logging thread
+        self.logger.info(message)
 
-    def run(self):
-        if not self.initialize_mt5():
-            return
-        self.is_running = True
+    def on_start(self):
         print("Indices Hedging EA started...")
-        try:
-            while self.is_running:
-                # Pause logic: check for pause.flag in working directory
-                check_pause_flag(os.path.dirname(os.path.abspath(__file__)))
-                self.manage_positions()
-                signal = self.get_signal()
-                if signal == "HEDGE":
-                    print("Hedge signal detected. Opening hedge position.")
-                    self.open_hedge_position("BUY")  # Example: always hedge against BUY
-                time.sleep(60)
-        except KeyboardInterrupt:
-            print("EA stopped by user")
-        finally:
-            self.stop()
+        return True
+
+    def on_bar_close(self, timeframe, bar):
+        signal = self.get_signal()
+        if signal == "HEDGE" and entries_allowed():
+            print("Hedge signal detected. Opening hedge position.")
+            self.open_hedge_position("BUY")  # Example: always hedge against BUY
+
+    def on_timer(self):
+        self.manage_positions()
 
     def stop(self):
         self.is_running = False
@@ -8,7 +8,6 @@ It uses volatility-based grid spacing, adaptive lot sizing, and robust risk cont
 """
 
 import MetaTrader5 as mt5
-import pandas as pd
 import numpy as np
 import time
 import sys
@@ -17,9 +16,17 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from global_config import get_account_credentials, get_risk_settings
 from risk_manager import RiskManager
 # Import common EA utilities
-from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, check_pause_flag
+from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, get_rates, market_data, indicator_feed, entries_allowed, order_pipeline, position_book, EA
+from ALGORITHMSMT5EA.ea_logging import get_logger
+from ALGORITHMSMT5EA.indicators import SMA
+
+class IndicesMartingaleEA(EA):
+    timeframes = (mt5.TIMEFRAME_M5,)  # MA crossover signal on each closed M5 bar
+    timer_interval = 60  # trailing stops and partial closes
+    # Changeable through set_params
+    tunable_params = {'base_lot': float, 'grid_step_points': int, 'max_trades': int,
+                      'max_drawdown_percent': float, 'trailing_enabled': bool, 'trailing_distance_points': int}
 
-class IndicesMartingaleEA:
     def __init__(self, symbol="US500", base_lot=0.1, magic_number=12345, grid_step_points=100, max_trades=6):
         # Load config if available
         try:
@@ -53,6 +60,11 @@ class IndicesMartingaleEA:
         self.trailing_enabled = True
         self.trailing_distance_points = 100
         self.log_file = "martingale_ea.log"
+        self.logger = get_logger('indices_martingale_ea', self.log_file)
+        # Streaming 10/30 MAs of the closed M5 bars
+        self.fast_ma = SMA(10)
+        self.slow_ma = SMA(30)
+        self.m5_feed = indicator_feed(self.symbol, mt5.TIMEFRAME_M5, [self.fast_ma, self.slow_ma], warmup=500)
 
     def initialize_mt5(self):
         # Use shared utility
@@ -67,12 +79,7 @@ class IndicesMartingaleEA:
         return get_current_price(self.symbol)
 
     def get_market_data(self, timeframe=mt5.TIMEFRAME_M5, num_bars=500):
-        rates = mt5.copy_rates_from_pos(self.symbol, timeframe, 0, num_bars)
-        if rates is None:
-            return None
-        df = pd.DataFrame(rates)
-        df['time'] = pd.to_datetime(df['time'], unit='s')
-        return df
+        return market_data(get_rates(self.symbol, timeframe, num_bars))
 
     def get_signal(self):
         # Use moving average crossover as entry signal, skip if spread too high or news event
@@ -82,14 +89,12 @@ class IndicesMartingaleEA:
         if self.is_news_event():
             self.log("News event detected, pausing trading.")
             return None
-        data = self.get_market_data()
-        if data is None or len(data) < 50:
+        self.m5_feed.update()
+        if self.slow_ma.value is None:
             return None
-        fast_ma = data['close'].rolling(window=10).mean()
-        slow_ma = data['close'].rolling(window=30).mean()
-        if fast_ma.iloc[-1] > slow_ma.iloc[-1]:
+        if self.fast_ma.value > self.slow_ma.value:
             return "BUY"
-        elif fast_ma.iloc[-1] < slow_ma.iloc[-1]:
+        elif self.fast_ma.value < self.slow_ma.value:
             return "SELL"
         return None
     def is_spread_too_high(self, max_spread=10):
@@ -106,9 +111,8 @@ class IndicesMartingaleEA:
         return False
 
     def log(self, message):
-        with open(self.log_file, "a") as f:
-            f.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}\n")
-        print(message)
+        # Queued; the file and console are written by the logging thread
+        self.logger.info(message)
 
     def calculate_lot_size(self, trade_number):
         # Martingale: double lot after each loss, cap at max allowed
@@ -142,7 +146,7 @@ class IndicesMartingaleEA:
                 "type_time": mt5.ORDER_TIME_GTC,
                 "type_filling": mt5.ORDER_FILLING_IOC,
             }
-            result = mt5.order_send(request)
+            result = position_book.order_send(request)
             if result.retcode != mt5.TRADE_RETCODE_DONE:
                 self.log(f"Failed to open {direction} position: {result.retcode}")
                 break
@@ -175,7 +179,7 @@ class IndicesMartingaleEA:
             "sl": new_sl,
             "tp": getattr(position, "tp", None),
         }
-        result = mt5.order_send(request)
+        result = position_book.order_send(request)
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             self.log(f"Failed to update trailing stop: {result.retcode}")
             return False
@@ -193,7 +197,7 @@ class IndicesMartingaleEA:
         if drawdown > self.max_drawdown_percent:
             self.log("Max drawdown reached! Closing all positions.")
             self.close_all_positions()
-        positions = mt5.positions_get(symbol=self.symbol)
+        positions = position_book.positions(self.symbol, self.magic_number)
         if positions:
             for pos in positions:
                 # Trailing stop for each position
@@ -221,18 +225,19 @@ class IndicesMartingaleEA:
                 "type_time": mt5.ORDER_TIME_GTC,
                 "type_filling": mt5.ORDER_FILLING_IOC,
             }
-            result = mt5.order_send(request)
+            result = position_book.order_send(request)
             if result.retcode == mt5.TRADE_RETCODE_DONE:
                 self.log(f"Partial close executed for position {position.ticket}")
 
     def close_all_positions(self):
-        positions = mt5.positions_get(symbol=self.symbol)
+        positions = position_book.positions(self.symbol, self.magic_number)
         if not positions:
             return
+        requests = []
         for pos in positions:
             order_type = mt5.ORDER_TYPE_SELL if pos.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
             price = self.get_current_price()[0] if order_type == mt5.ORDER_TYPE_SELL else self.get_current_price()[1]
-            request = {
+            requests.append({
                 "action": mt5.TRADE_ACTION_DEAL,
                 "symbol": self.symbol,
                 "volume": pos.volume,
@@ -244,30 +249,25 @@ class IndicesMartingaleEA:
                 "comment": "Martingale EA Close",
                 "type_time": mt5.ORDER_TIME_GTC,
                 "type_filling": mt5.ORDER_FILLING_IOC,
-            }
-            result = mt5.order_send(request)
+            })
+        # One batch, without order_check, so closing takes about one round-trip
+        results = order_pipeline.submit(requests, validate=False)
+        for pos, result in zip(positions, results):
             if result.retcode == mt5.TRADE_RETCODE_DONE:
                 self.log(f"Closed position {pos.ticket}")
 
-    def run(self):
-        if not self.initialize_mt5():
-            return
-        self.is_running = True
+    def on_start(self):
         print("Indices Martingale EA started...")
-        try:
-            while self.is_running:
-                # Pause logic: check for pause.flag in working directory
-                check_pause_flag(os.path.dirname(os.path.abspath(__file__)))
-                self.manage_positions()
-                signal = self.get_signal()
-                if signal:
-                    print(f"Signal detected: {signal}. Starting Martingale sequence.")
-                    self.open_martingale_sequence(signal)
-                time.sleep(60)
-        except KeyboardInterrupt:
-            print("EA stopped by user")
-        finally:
-            self.stop()
+        return True
+
+    def on_bar_close(self, timeframe, bar):
+        signal = self.get_signal()
+        if signal and entries_allowed():
+            print(f"Signal detected: {signal}. Starting Martingale sequence.")
+            self.open_martingale_sequence(signal)
+
+    def on_timer(self):
+        self.manage_positions()
 
     def stop(self):
         self.is_running = False
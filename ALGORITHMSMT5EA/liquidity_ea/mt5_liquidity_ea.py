@@ -7,9 +7,7 @@ Date: July 31, 2025
 - Uses higher time frame trend, volume confirmation, and advanced risk management
 """
 import MetaTrader5 as mt5
-import pandas as pd
 import numpy as np
-import time
 import sys
 import os
 import datetime
@@ -18,9 +16,17 @@ from global_config import get_account_credentials, get_risk_settings
 from risk_manager import RiskManager
 from liquidity_ea.utils import detect_fvg, detect_liquidity_pools, get_session
 # Import common EA utilities
-from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, check_pause_flag
+from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, get_rates, market_data, indicator_feed, entries_allowed, position_book, EA
+from ALGORITHMSMT5EA.ea_logging import get_logger
+from ALGORITHMSMT5EA.indicators import SMA
+
+class LiquidityEA(EA):
+    # H1/H4 trend on each closed H4/H1 bar (built from M1 by bar_aggregator), sweep and reversal signal on each closed M5 bar
+    timeframes = (mt5.TIMEFRAME_H4, mt5.TIMEFRAME_H1, mt5.TIMEFRAME_M5)
+    timer_interval = 60  # trailing stops and risk check
+    # Changeable through set_params
+    tunable_params = {'base_lot': float, 'trailing_enabled': bool, 'trailing_distance_points': int, 'max_risk_percent': float}
 
-class LiquidityEA:
     def __init__(self, symbol="EURUSD", base_lot=0.1, magic_number=88888):
         credentials = get_account_credentials()
         self.symbol = credentials.get('symbol', symbol)
@@ -35,6 +41,14 @@ class LiquidityEA:
         self.trailing_distance_points = 50
         self.max_risk_percent = 5.0
         self.log_file = "liquidity_ea.log"
+        self.logger = get_logger('liquidity_ea', self.log_file)
+        # Streaming 20-bar MAs of the closed H1/H4 bars for the trend context
+        self.h1_ma = SMA(20)
+        self.h4_ma = SMA(20)
+        self.h1_feed = indicator_feed(self.symbol, mt5.TIMEFRAME_H1, [self.h1_ma], warmup=100)
+        self.h4_feed = indicator_feed(self.symbol, mt5.TIMEFRAME_H4, [self.h4_ma], warmup=100)
+        # BULLISH/BEARISH/None, recomputed when an H1 or H4 bar closes
+        self.trend = None
 
     def initialize_mt5(self):
         # Use shared utility
@@ -49,34 +63,29 @@ class LiquidityEA:
         return get_current_price(self.symbol)
 
     def get_market_data(self, timeframe, num_bars=200):
-        rates = mt5.copy_rates_from_pos(self.symbol, timeframe, 0, num_bars)
-        if rates is None:
-            return None
-        df = pd.DataFrame(rates)
-        df['time'] = pd.to_datetime(df['time'], unit='s')
-        return df
+        return market_data(get_rates(self.symbol, timeframe, num_bars))
 
     def get_trend(self):
-        # Use H1 and H4 for trend context
-        h1 = self.get_market_data(mt5.TIMEFRAME_H1, 100)
-        h4 = self.get_market_data(mt5.TIMEFRAME_H4, 100)
-        if h1 is None or h4 is None:
+        # Use H1 and H4 for trend context: last closed bar against its 20-bar MA
+        self.h1_feed.update()
+        self.h4_feed.update()
+        if not (self.h1_ma.ready and self.h4_ma.ready):
             return None
-        h1_ma = h1['close'].rolling(window=20).mean().iloc[-1]
-        h4_ma = h4['close'].rolling(window=20).mean().iloc[-1]
-        h1_last = h1['close'].iloc[-1]
-        h4_last = h4['close'].iloc[-1]
-        if h1_last > h1_ma and h4_last > h4_ma:
+        h1_last = self.h1_feed.last_bar['close']
+        h4_last = self.h4_feed.last_bar['close']
+        if h1_last > self.h1_ma.value and h4_last > self.h4_ma.value:
             return "BULLISH"
-        elif h1_last < h1_ma and h4_last < h4_ma:
+        elif h1_last < self.h1_ma.value and h4_last < self.h4_ma.value:
             return "BEARISH"
         else:
             return None
 
     def get_signal(self):
-        m5 = self.get_market_data(mt5.TIMEFRAME_M5, 100)
-        if m5 is None or len(m5) < 30:
+        m5 = get_rates(self.symbol, mt5.TIMEFRAME_M5, 101)
+        if m5 is None or len(m5) < 31:
             return None
+        # Called on each M5 bar close: judge the sweep and reversal on closed bars
+        m5 = m5[:-1]
         # --- Session filter ---
         now_utc = datetime.datetime.utcnow()
         session = get_session(now_utc)
@@ -84,18 +93,18 @@ class LiquidityEA:
             return None
         fvg_list = detect_fvg(m5)
         swing_highs, swing_lows = detect_liquidity_pools(m5)
-        trend = self.get_trend()
+        trend = self.trend
         # Example: Look for sweep of swing low, then bullish engulfing
         if trend == "BULLISH" and swing_lows:
             last_low_idx, last_low = swing_lows[-1]
-            if m5['low'].iloc[-1] < last_low:
+            if m5['low'][-1] < last_low:
                 # Price swept liquidity, now look for reversal
-                if m5['close'].iloc[-1] > m5['open'].iloc[-1]:
+                if m5['close'][-1] > m5['open'][-1]:
                     return "BUY"
         if trend == "BEARISH" and swing_highs:
             last_high_idx, last_high = swing_highs[-1]
-            if m5['high'].iloc[-1] > last_high:
-                if m5['close'].iloc[-1] < m5['open'].iloc[-1]:
+            if m5['high'][-1] > last_high:
+                if m5['close'][-1] < m5['open'][-1]:
                     return "SELL"
         return None
 
@@ -130,7 +139,7 @@ class LiquidityEA:
             "type_time": mt5.ORDER_TIME_GTC,
             "type_filling": mt5.ORDER_FILLING_IOC,
         }
-        result = mt5.order_send(request)
+        result = position_book.order_send(request)
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             self.log(f"Failed to open {direction} position: {result.retcode}")
             return None
@@ -143,7 +152,7 @@ class LiquidityEA:
         if account_risk > self.max_risk_percent:
             self.log("Max risk reached! No new trades.")
             return
-        positions = mt5.positions_get(symbol=self.symbol)
+        positions = position_book.positions(self.symbol, self.magic_number)
         if positions:
             for pos in positions:
                 self.update_trailing_stop(pos, pos.price_current)
@@ -173,7 +182,7 @@ class LiquidityEA:
             "sl": new_sl,
             "tp": position.tp,
         }
-        result = mt5.order_send(request)
+        result = position_book.order_send(request)
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             self.log(f"Failed to update trailing stop: {result.retcode}")
             return False
@@ -194,34 +203,30 @@ class LiquidityEA:
             "sl": tighter_sl,
             "tp": position.tp,
         }
-        result = mt5.order_send(request)
+        result = position_book.order_send(request)
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             self.log(f"Stop loss tightened to {tighter_sl:.5f} for position {position.ticket}")
         return True
 
     def log(self, message):
-        with open(self.log_file, "a") as f:
-            f.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}\n")
-        print(message)
+        # Queued; the file and console are written by the logging thread
+        self.logger.info(message)
 
-    def run(self):
-        if not self.initialize_mt5():
-            return
-        self.is_running = True
+    def on_start(self):
         print("Liquidity EA started...")
-        try:
-            while self.is_running:
-                # Pause logic: check for pause.flag in working directory
-                check_pause_flag(os.path.dirname(os.path.abspath(__file__)))
-                self.manage_positions()
-                signal = self.get_signal()
-                if signal:
-                    self.open_position(signal)
-                time.sleep(60)
-        except KeyboardInterrupt:
-            print("EA stopped by user")
-        finally:
-            self.stop()
+        self.trend = self.get_trend()
+        return True
+
+    def on_bar_close(self, timeframe, bar):
+        if timeframe != mt5.TIMEFRAME_M5:
+            self.trend = self.get_trend()
+            return
+        signal = self.get_signal()
+        if signal and entries_allowed():
+            self.open_position(signal)
+
+    def on_timer(self):
+        self.manage_positions()
 
     def stop(self):
         self.is_running = False
@@ -2,22 +2,31 @@
 # - Fair Value Gap (FVG) detection
 # - Liquidity pool (swing high/low) detection
 # - Order block detection (future extension)
+#
+# The detectors take bars as a structured array (get_rates) or a DataFrame.
 
-import pandas as pd
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 def detect_fvg(df, lookback=20):
     """
-    Detect bullish and bearish fair value gaps (FVG) in OHLCV DataFrame.
+    Detect bullish and bearish fair value gaps (FVG) in OHLCV bars.
     Returns a list of dicts: {'index': idx, 'type': 'bullish'|'bearish', 'low': low, 'high': high}
     """
+    high = np.asarray(df['high'], dtype=float)
+    low = np.asarray(df['low'], dtype=float)
+    # Candle 1 at len-i for i in 3..lookback-1 (newest first), candle 3 two bars later
+    first = len(high) - np.arange(3, min(len(high), lookback))
+    third = first + 2
     fvg_list = []
-    for i in range(2, min(len(df), lookback)):
-        # Bullish FVG: candle 1 high < candle 3 low
-        if df['high'].iloc[-i] < df['low'].iloc[-i+2]:
-            fvg_list.append({'index': len(df)-i, 'type': 'bullish', 'low': df['high'].iloc[-i], 'high': df['low'].iloc[-i+2]})
-        # Bearish FVG: candle 1 low > candle 3 high
-        if df['low'].iloc[-i] > df['high'].iloc[-i+2]:
-            fvg_list.append({'index': len(df)-i, 'type': 'bearish', 'low': df['high'].iloc[-i+2], 'high': df['low'].iloc[-i]})
+    # Bullish FVG: candle 1 high < candle 3 low; bearish FVG: candle 1 low > candle 3 high
+    bullish = high[first] < low[third]
+    bearish = low[first] > high[third]
+    for idx, is_bullish, is_bearish in zip(first.tolist(), bullish.tolist(), bearish.tolist()):
+        if is_bullish:
+            fvg_list.append({'index': idx, 'type': 'bullish', 'low': float(high[idx]), 'high': float(low[idx + 2])})
+        if is_bearish:
+            fvg_list.append({'index': idx, 'type': 'bearish', 'low': float(high[idx + 2]), 'high': float(low[idx])})
     return fvg_list
 
 def detect_liquidity_pools(df, window=20):
@@ -25,15 +34,16 @@ def detect_liquidity_pools(df, window=20):
     Detect swing highs/lows as liquidity pools.
     Returns two lists: swing_highs, swing_lows (each is a list of (index, price))
     """
-    swing_highs = []
-    swing_lows = []
-    for i in range(window, len(df)-window):
-        high = df['high'].iloc[i]
-        low = df['low'].iloc[i]
-        if high == max(df['high'].iloc[i-window:i+window+1]):
-            swing_highs.append((i, high))
-        if low == min(df['low'].iloc[i-window:i+window+1]):
-            swing_lows.append((i, low))
+    high = np.asarray(df['high'], dtype=float)
+    low = np.asarray(df['low'], dtype=float)
+    if len(high) < 2 * window + 1:
+        return [], []
+    # Bar i is a swing point if it is the extreme of bars i-window..i+window
+    centre = slice(window, len(high) - window)
+    is_high = high[centre] == sliding_window_view(high, 2 * window + 1).max(axis=1)
+    is_low = low[centre] == sliding_window_view(low, 2 * window + 1).min(axis=1)
+    swing_highs = [(int(i), float(high[i])) for i in np.flatnonzero(is_high) + window]
+    swing_lows = [(int(i), float(low[i])) for i in np.flatnonzero(is_low) + window]
     return swing_highs, swing_lows
 
 # --- Session Detection ---
@@ -8,7 +8,6 @@ It places buy/sell stop orders before critical news and manages risk dynamically
 """
 
 import MetaTrader5 as mt5
-import pandas as pd
 import numpy as np
 import time
 import sys
@@ -18,9 +17,13 @@ from global_config import get_account_credentials, get_risk_settings
 from risk_manager import RiskManager
 from news_api import get_upcoming_events, filter_critical_events
 # Import common EA utilities
-from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, check_pause_flag
+from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, entries_allowed, order_pipeline, EA
+
+class NewsEA(EA):
+    timer_interval = 300  # Check every 5 minutes
+    # Changeable through set_params
+    tunable_params = {'base_lot': float, 'days_ahead': int}
 
-class NewsEA:
     def __init__(self, symbol="EURUSD", base_lot=0.1, magic_number=67890):
         credentials = get_account_credentials()
         self.symbol = credentials.get('symbol', symbol)
@@ -50,7 +53,7 @@ class NewsEA:
             return
         # Place buy stop and sell stop above/below price
         stop_distance = 50  # points above/below
-        symbol_info = mt5.symbol_info(self.symbol)
+        symbol_info = get_symbol_info(self.symbol)
         point = symbol_info.point if symbol_info else 0.0001
         buy_stop = ask + stop_distance * point
         sell_stop = bid - stop_distance * point
@@ -81,31 +84,41 @@ class NewsEA:
             "type_time": mt5.ORDER_TIME_GTC,
             "type_filling": mt5.ORDER_FILLING_IOC,
         }
-        mt5.order_send(buy_request)
-        mt5.order_send(sell_request)
-        print(f"Placed buy stop at {buy_stop:.5f} and sell stop at {sell_stop:.5f} for event: {event['event']}")
-
-    def run(self):
-        if not self.initialize_mt5():
+        # Both legs in one round-trip. atomic only stops the batch when order_check rejects a leg;
+        # a leg the broker rejects on order_send leaves the other one placed, so that one is removed
+        buy_result, sell_result = order_pipeline.submit([buy_request, sell_request], atomic=True)
+        if not (buy_result.ok and sell_result.ok):
+            print(f"News orders for {event['event']} failed: buy {buy_result.retcode} ({buy_result.comment}), "
+                  f"sell {sell_result.retcode} ({sell_result.comment})")
+            placed = buy_result if buy_result.ok else sell_result if sell_result.ok else None
+            if placed is not None:
+                self.remove_pending_order(placed.order, event)
             return
-        self.is_running = True
+        print(f"Placed buy stop at {buy_stop:.5f} and sell stop at {sell_stop:.5f} for event: {event['event']} "
+              f"in {order_pipeline.last_batch_ms:.0f} ms")
+
+    def remove_pending_order(self, ticket, event):
+        """Roll back the one leg of a straddle that was placed"""
+        result, = order_pipeline.submit([{"action": mt5.TRADE_ACTION_REMOVE, "order": ticket}], validate=False)
+        if result.ok:
+            print(f"Rolled back one-sided straddle for {event['event']}: removed pending order {ticket}")
+        else:
+            print(f"Rollback of pending order {ticket} for {event['event']} failed: {result.retcode} ({result.comment}); "
+                  f"the one-sided straddle is still open")
+
+    def on_start(self):
         print("News EA started...")
-        try:
-            self.send_daily_news_events()  # Log daily news events on start
-            while self.is_running:
-                # Pause logic: check for pause.flag in working directory
-                check_pause_flag(os.path.dirname(os.path.abspath(__file__)))
-                # Get upcoming news events
-                events = get_upcoming_events(self.country, self.days_ahead)
-                critical_events = filter_critical_events(events)
-                for idx, event in critical_events.iterrows():
-                    print(f"Critical event: {event['date']} {event['time']} {event['event']}")
-                    self.place_news_orders(event)
-                time.sleep(300)  # Check every 5 minutes
-        except KeyboardInterrupt:
-            print("EA stopped by user")
-        finally:
-            self.stop()
+        self.send_daily_news_events()  # Log daily news events on start
+        return True
+
+    def on_timer(self):
+        # Get upcoming news events
+        events = get_upcoming_events(self.country, self.days_ahead)
+        critical_events = filter_critical_events(events)
+        for idx, event in critical_events.iterrows():
+            print(f"Critical event: {event['date']} {event['time']} {event['event']}")
+            if entries_allowed():
+                self.place_news_orders(event)
 
     def send_daily_news_events(self):
         events = get_upcoming_events(self.country, self.days_ahead)
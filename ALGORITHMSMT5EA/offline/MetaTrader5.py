@@ -0,0 +1,15 @@
+"""
+Drop-in MetaTrader5 for offline runs: put this directory first on PYTHONPATH
+and ``import MetaTrader5`` resolves to ALGORITHMSMT5EA/offline_mt5.py,
+configured from the MT5_OFFLINE_* environment variables.
+MT5_OFFLINE_PATCH_CLOCK=1 also makes time.sleep/time.time use the simulated clock.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import offline_mt5
+
+offline_mt5.configure_from_env()
+offline_mt5.install(patch_clock=os.environ.get('MT5_OFFLINE_PATCH_CLOCK', '') == '1')
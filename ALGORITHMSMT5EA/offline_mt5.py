@@ -0,0 +1,1326 @@
+"""
+Offline stand-in for the MetaTrader5 package.
+
+Implements the parts of the MetaTrader5 API used by the EAs and the backend
+(initialize/login, symbol and tick queries, bars and ticks, positions, orders,
+order_send/order_check, history) on top of recorded or synthetic tick data, so
+EAs and the API can be run, load-tested and benchmarked on Linux without a
+terminal.
+
+Usage from Python::
+
+    from ALGORITHMSMT5EA import offline_mt5
+    offline_mt5.install(patch_clock=True, data_dir='ticks/', latency=0.002)
+    import MetaTrader5 as mt5        # now the offline module
+
+Usage for unmodified processes (EA subprocesses, the Django server): put
+``ALGORITHMSMT5EA/offline`` first on PYTHONPATH; its MetaTrader5.py loads this
+module and configures it from MT5_OFFLINE_* environment variables (see
+``configure_from_env``).
+
+Market model:
+- Every symbol is a tick array (time_msc, bid, ask, ...). Ticks come from
+  ``<data_dir>/<SYMBOL>.npy`` or ``.csv`` when present, otherwise they are
+  generated deterministically from the symbol name and ``seed``.
+- Time is simulated. With ``speed=None`` the clock only moves when the
+  program sleeps (``patch_clock=True`` turns ``time.sleep`` into a clock
+  advance and ``time.time`` into the simulated time), so loops with
+  ``time.sleep(60)`` run as fast as the CPU allows. With ``speed=N`` the
+  clock runs N times faster than wall time.
+- Bars are built from the ticks (bid prices), including the forming bar.
+- Market orders fill at the current ask/bid plus ``slippage_points``. Pending
+  orders, stop losses and take profits are checked against every tick that
+  passed since the previous API call. Accounts are hedging accounts.
+- ``latency`` (seconds, or a dict of function name -> seconds) is added to
+  every call: on the simulated clock, or as a real sleep with
+  ``real_latency=True``.
+"""
+
+import fnmatch
+import itertools
+import os
+import sys
+import threading
+import time as _time
+import zlib
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+__version__ = '5.0.5120'
+__author__ = 'offline'
+
+_real_sleep = _time.sleep
+_real_time = _time.time
+
+# -- Constants (same values as the MetaTrader5 package) ---------------------
+
+TIMEFRAME_M1 = 1
+TIMEFRAME_M2 = 2
+TIMEFRAME_M3 = 3
+TIMEFRAME_M4 = 4
+TIMEFRAME_M5 = 5
+TIMEFRAME_M6 = 6
+TIMEFRAME_M10 = 10
+TIMEFRAME_M12 = 12
+TIMEFRAME_M15 = 15
+TIMEFRAME_M20 = 20
+TIMEFRAME_M30 = 30
+TIMEFRAME_H1 = 16385
+TIMEFRAME_H2 = 16386
+TIMEFRAME_H3 = 16387
+TIMEFRAME_H4 = 16388
+TIMEFRAME_H6 = 16390
+TIMEFRAME_H8 = 16392
+TIMEFRAME_H12 = 16396
+TIMEFRAME_D1 = 16408
+TIMEFRAME_W1 = 32769
+TIMEFRAME_MN1 = 49153
+
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+ORDER_TYPE_BUY_LIMIT = 2
+ORDER_TYPE_SELL_LIMIT = 3
+ORDER_TYPE_BUY_STOP = 4
+ORDER_TYPE_SELL_STOP = 5
+ORDER_TYPE_BUY_STOP_LIMIT = 6
+ORDER_TYPE_SELL_STOP_LIMIT = 7
+ORDER_TYPE_CLOSE_BY = 8
+
+ORDER_FILLING_FOK = 0
+ORDER_FILLING_IOC = 1
+ORDER_FILLING_RETURN = 2
+ORDER_FILLING_BOC = 3
+
+ORDER_TIME_GTC = 0
+ORDER_TIME_DAY = 1
+ORDER_TIME_SPECIFIED = 2
+ORDER_TIME_SPECIFIED_DAY = 3
+
+ORDER_STATE_STARTED = 0
+ORDER_STATE_PLACED = 1
+ORDER_STATE_CANCELED = 2
+ORDER_STATE_PARTIAL = 3
+ORDER_STATE_FILLED = 4
+
+ORDER_REASON_CLIENT = 0
+ORDER_REASON_EXPERT = 3
+ORDER_REASON_SL = 4
+ORDER_REASON_TP = 5
+
+TRADE_ACTION_DEAL = 1
+TRADE_ACTION_PENDING = 5
+TRADE_ACTION_SLTP = 6
+TRADE_ACTION_MODIFY = 7
+TRADE_ACTION_REMOVE = 8
+TRADE_ACTION_CLOSE_BY = 10
+
+POSITION_TYPE_BUY = 0
+POSITION_TYPE_SELL = 1
+
+POSITION_REASON_CLIENT = 0
+POSITION_REASON_EXPERT = 3
+
+DEAL_TYPE_BUY = 0
+DEAL_TYPE_SELL = 1
+DEAL_TYPE_BALANCE = 2
+
+DEAL_ENTRY_IN = 0
+DEAL_ENTRY_OUT = 1
+DEAL_ENTRY_INOUT = 2
+DEAL_ENTRY_OUT_BY = 3
+
+DEAL_REASON_CLIENT = 0
+DEAL_REASON_EXPERT = 3
+DEAL_REASON_SL = 4
+DEAL_REASON_TP = 5
+
+ACCOUNT_TRADE_MODE_DEMO = 0
+ACCOUNT_TRADE_MODE_CONTEST = 1
+ACCOUNT_TRADE_MODE_REAL = 2
+
+ACCOUNT_MARGIN_MODE_RETAIL_NETTING = 0
+ACCOUNT_MARGIN_MODE_EXCHANGE = 1
+ACCOUNT_MARGIN_MODE_RETAIL_HEDGING = 2
+
+SYMBOL_TRADE_MODE_DISABLED = 0
+SYMBOL_TRADE_MODE_FULL = 4
+
+COPY_TICKS_ALL = -1
+COPY_TICKS_INFO = 1
+COPY_TICKS_TRADE = 2
+
+TICK_FLAG_BID = 2
+TICK_FLAG_ASK = 4
+TICK_FLAG_LAST = 8
+TICK_FLAG_VOLUME = 16
+TICK_FLAG_BUY = 32
+TICK_FLAG_SELL = 64
+
+TRADE_RETCODE_REQUOTE = 10004
+TRADE_RETCODE_REJECT = 10006
+TRADE_RETCODE_CANCEL = 10007
+TRADE_RETCODE_PLACED = 10008
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_DONE_PARTIAL = 10010
+TRADE_RETCODE_ERROR = 10011
+TRADE_RETCODE_TIMEOUT = 10012
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_INVALID_PRICE = 10015
+TRADE_RETCODE_INVALID_STOPS = 10016
+TRADE_RETCODE_TRADE_DISABLED = 10017
+TRADE_RETCODE_MARKET_CLOSED = 10018
+TRADE_RETCODE_NO_MONEY = 10019
+TRADE_RETCODE_PRICE_CHANGED = 10020
+TRADE_RETCODE_PRICE_OFF = 10021
+TRADE_RETCODE_INVALID_FILL = 10030
+TRADE_RETCODE_CONNECTION = 10031
+TRADE_RETCODE_INVALID_ORDER = 10035
+TRADE_RETCODE_POSITION_CLOSED = 10036
+
+RES_S_OK = 1
+RES_E_FAIL = -1
+RES_E_INVALID_PARAMS = -2
+RES_E_NO_MEMORY = -3
+RES_E_NOT_FOUND = -4
+RES_E_INVALID_VERSION = -5
+RES_E_AUTH_FAILED = -6
+RES_E_UNSUPPORTED = -7
+RES_E_AUTO_TRADING_DISABLED = -8
+RES_E_INTERNAL_FAIL = -10000
+RES_E_INTERNAL_FAIL_INIT = -10005
+RES_E_INTERNAL_FAIL_CONNECT = -10003
+RES_E_INTERNAL_FAIL_TIMEOUT = -10004
+
+# -- Records -----------------------------------------------------------------
+
+Tick = namedtuple('Tick', 'time bid ask last volume time_msc flags volume_real')
+TerminalInfo = namedtuple('TerminalInfo', [
+    'community_account', 'community_connection', 'connected', 'dlls_allowed', 'trade_allowed',
+    'tradeapi_disabled', 'email_enabled', 'ftp_enabled', 'notifications_enabled', 'mqid', 'build',
+    'maxbars', 'codepage', 'ping_last', 'community_balance', 'retransmission', 'company', 'name',
+    'language', 'path', 'data_path', 'commondata_path',
+])
+AccountInfo = namedtuple('AccountInfo', [
+    'login', 'trade_mode', 'leverage', 'limit_orders', 'margin_so_mode', 'trade_allowed', 'trade_expert',
+    'margin_mode', 'currency_digits', 'fifo_close', 'balance', 'credit', 'profit', 'equity', 'margin',
+    'margin_free', 'margin_level', 'margin_so_call', 'margin_so_so', 'margin_initial', 'margin_maintenance',
+    'assets', 'liabilities', 'commission_blocked', 'name', 'server', 'currency', 'company',
+])
+SymbolInfo = namedtuple('SymbolInfo', [
+    'custom', 'select', 'visible', 'session_deals', 'time', 'digits', 'spread', 'spread_float',
+    'trade_stops_level', 'trade_freeze_level', 'trade_mode', 'filling_mode', 'bid', 'ask', 'last',
+    'point', 'trade_tick_value', 'trade_tick_size', 'trade_contract_size', 'volume_min', 'volume_max',
+    'volume_step', 'swap_long', 'swap_short', 'margin_initial', 'margin_maintenance',
+    'currency_base', 'currency_profit', 'currency_margin', 'description', 'path', 'name',
+])
+TradePosition = namedtuple('TradePosition', [
+    'ticket', 'time', 'time_msc', 'time_update', 'time_update_msc', 'type', 'magic', 'identifier',
+    'reason', 'volume', 'price_open', 'sl', 'tp', 'price_current', 'swap', 'profit', 'symbol',
+    'comment', 'external_id',
+])
+TradeOrder = namedtuple('TradeOrder', [
+    'ticket', 'time_setup', 'time_setup_msc', 'time_done', 'time_done_msc', 'time_expiration', 'type',
+    'type_time', 'type_filling', 'state', 'magic', 'position_id', 'position_by_id', 'reason',
+    'volume_initial', 'volume_current', 'price_open', 'sl', 'tp', 'price_current', 'price_stoplimit',
+    'symbol', 'comment', 'external_id',
+])
+TradeDeal = namedtuple('TradeDeal', [
+    'ticket', 'order', 'time', 'time_msc', 'type', 'entry', 'magic', 'position_id', 'reason', 'volume',
+    'price', 'commission', 'swap', 'profit', 'fee', 'symbol', 'comment', 'external_id',
+])
+TradeRequest = namedtuple('TradeRequest', [
+    'action', 'magic', 'order', 'symbol', 'volume', 'price', 'stoplimit', 'sl', 'tp', 'deviation',
+    'type', 'type_filling', 'type_time', 'expiration', 'comment', 'position', 'position_by',
+])
+OrderSendResult = namedtuple('OrderSendResult', [
+    'retcode', 'deal', 'order', 'volume', 'price', 'bid', 'ask', 'comment', 'request_id',
+    'retcode_external', 'request',
+])
+OrderCheckResult = namedtuple('OrderCheckResult', [
+    'retcode', 'balance', 'equity', 'profit', 'margin', 'margin_free', 'margin_level', 'comment', 'request',
+])
+
+TICK_DTYPE = np.dtype([
+    ('time', '<i8'), ('bid', '<f8'), ('ask', '<f8'), ('last', '<f8'), ('volume', '<u8'),
+    ('time_msc', '<i8'), ('flags', '<u4'), ('volume_real', '<f8'),
+])
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8'),
+])
+
+_MARKET_ORDERS = (ORDER_TYPE_BUY, ORDER_TYPE_SELL)
+_PENDING_ORDERS = (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_SELL_LIMIT, ORDER_TYPE_BUY_STOP, ORDER_TYPE_SELL_STOP)
+
+
+class ReplayFinished(KeyboardInterrupt):
+    """
+    Raised by the patched ``time.sleep`` once the clock passes the last tick
+    (with ``stop_at_end=True``). It subclasses KeyboardInterrupt so EA run
+    loops shut down through their normal Ctrl+C path.
+    """
+
+
+# -- Tick data ----------------------------------------------------------------
+
+def _to_seconds(value) -> int:
+    """MT5 date arguments: datetime (naive means UTC, like the terminal) or epoch seconds"""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return int(value)
+
+
+def bar_open_times(times: np.ndarray, timeframe: int) -> np.ndarray:
+    """Open time (epoch seconds) of the ``timeframe`` bar containing each time"""
+    unit, value = timeframe & 0xC000, timeframe & 0x3FFF
+    if unit == 0xC000:
+        months = times.astype('datetime64[s]').astype('datetime64[M]')
+        months = months - (months.astype(np.int64) % value).astype('timedelta64[M]')
+        return months.astype('datetime64[s]').astype(np.int64)
+    if unit == 0x8000:
+        # MT5 weeks start on Sunday; 1970-01-04 was a Sunday
+        span, offset = value * 7 * 86400, 3 * 86400
+        return (times - offset) // span * span + offset
+    span = value * 3600 if unit == 0x4000 else timeframe * 60
+    return times // span * span
+
+
+class SymbolSpec:
+    """Contract specification of an offline symbol"""
+
+    def __init__(self, name, digits=5, contract_size=100000.0, price=1.1, spread_points=10,
+                 volatility=0.00003, volume_min=0.01, volume_max=100.0, volume_step=0.01,
+                 stops_level=0, currency_base=None, currency_profit='USD', description=''):
+        self.name = name
+        self.digits = digits
+        self.point = 10.0 ** -digits
+        self.contract_size = contract_size
+        self.tick_size = self.point
+        # Profit currency is assumed to be the account currency
+        self.tick_value = contract_size * self.point
+        self.price = price
+        self.spread_points = spread_points
+        self.volatility = volatility
+        self.volume_min = volume_min
+        self.volume_max = volume_max
+        self.volume_step = volume_step
+        self.stops_level = stops_level
+        self.currency_base = currency_base or name[:3]
+        self.currency_profit = currency_profit
+        self.description = description or name
+
+    @classmethod
+    def guess(cls, name: str) -> 'SymbolSpec':
+        """Reasonable defaults from the symbol name (FX majors, JPY crosses, metals, indices)"""
+        upper = name.upper()
+        if upper.startswith(('XAU', 'GOLD')):
+            return cls(name, digits=2, contract_size=100.0, price=2000.0, spread_points=20,
+                       volatility=0.00006, currency_base='XAU')
+        if upper.startswith(('XAG', 'SILVER')):
+            return cls(name, digits=3, contract_size=5000.0, price=25.0, spread_points=20,
+                       volatility=0.0001, currency_base='XAG')
+        if any(char.isdigit() for char in upper) or upper in ('SPX', 'NDX', 'DAX', 'DJI'):
+            return cls(name, digits=1, contract_size=1.0, price=20000.0, spread_points=20,
+                       volatility=0.00005, volume_min=0.1, volume_step=0.1, currency_base=upper)
+        if 'JPY' in upper:
+            return cls(name, digits=3, price=150.0, spread_points=12,
+                       currency_profit='JPY' if upper.endswith('JPY') else 'USD')
+        return cls(name, currency_profit=upper[3:6] if len(upper) >= 6 else 'USD')
+
+
+def synthetic_ticks(spec: SymbolSpec, start: int, end: int, interval_ms: int = 1000, seed: int = 0,
+                    history_start: int = None, history_interval_ms: int = 60000) -> np.ndarray:
+    """
+    Deterministic random-walk ticks for ``spec`` between ``start`` and ``end``
+    (epoch seconds). ``history_start`` prepends sparser ticks so indicators
+    on higher timeframes have history to look back on.
+    """
+    segments = []
+    if history_start is not None and history_start < start:
+        segments.append(np.arange(history_start * 1000, start * 1000, history_interval_ms, dtype=np.int64))
+    segments.append(np.arange(start * 1000, end * 1000, interval_ms, dtype=np.int64))
+    times = np.concatenate(segments)
+
+    rng = np.random.default_rng([seed, zlib.crc32(spec.name.encode())])
+    steps = np.empty(len(times))
+    steps[0] = 0.0
+    # Volatility scales with the square root of the time between ticks
+    steps[1:] = rng.standard_normal(len(times) - 1) * spec.volatility * np.sqrt(np.diff(times) / 1000.0)
+    bid = np.round(spec.price * np.exp(np.cumsum(steps)), spec.digits)
+    spread = rng.integers(max(1, spec.spread_points // 2), spec.spread_points * 3 // 2 + 1, len(times))
+
+    ticks = np.zeros(len(times), dtype=TICK_DTYPE)
+    ticks['time_msc'] = times
+    ticks['time'] = times // 1000
+    ticks['bid'] = bid
+    ticks['ask'] = np.round(bid + spread * spec.point, spec.digits)
+    ticks['flags'] = TICK_FLAG_BID | TICK_FLAG_ASK
+    return ticks
+
+
+def load_ticks(path: str) -> np.ndarray:
+    """
+    Load recorded ticks from ``.npy`` (TICK_DTYPE, as written by
+    ``record_ticks``) or ``.csv`` with a header naming at least time_msc (or
+    time) and bid, ask.
+    """
+    if path.endswith('.npy'):
+        return np.load(path).astype(TICK_DTYPE, copy=False)
+    raw = np.genfromtxt(path, delimiter=',', names=True)
+    ticks = np.zeros(raw.shape[0], dtype=TICK_DTYPE)
+    for name in raw.dtype.names:
+        if name in TICK_DTYPE.names:
+            ticks[name] = raw[name]
+    if 'time_msc' not in raw.dtype.names:
+        ticks['time_msc'] = ticks['time'] * 1000
+    ticks['time'] = ticks['time_msc'] // 1000
+    if 'flags' not in raw.dtype.names:
+        ticks['flags'] = TICK_FLAG_BID | TICK_FLAG_ASK
+    return ticks[np.argsort(ticks['time_msc'], kind='stable')]
+
+
+def record_ticks(terminal, symbol: str, date_from, date_to, path: str) -> int:
+    """Save ticks from a live terminal (the real MetaTrader5 module) for offline replay"""
+    ticks = terminal.copy_ticks_range(symbol, date_from, date_to, COPY_TICKS_ALL)
+    if ticks is None:
+        raise RuntimeError(f"copy_ticks_range failed for {symbol}: {terminal.last_error()}")
+    np.save(path, np.asarray(ticks).astype(TICK_DTYPE))
+    return len(ticks)
+
+
+class _Feed:
+    """Ticks of one symbol plus lazily built bar boundaries per timeframe"""
+
+    def __init__(self, spec: SymbolSpec, ticks: np.ndarray):
+        self.spec = spec
+        self.ticks = ticks
+        # Contiguous copies: searchsorted and slicing on structured-array fields would copy per call
+        self.times = np.ascontiguousarray(ticks['time_msc'])
+        self.bid = np.ascontiguousarray(ticks['bid'])
+        self.ask = np.ascontiguousarray(ticks['ask'])
+        self._bars = {}
+
+    def index(self, now_ms: int) -> int:
+        """Number of ticks at or before ``now_ms``"""
+        return int(np.searchsorted(self.times, now_ms, side='right'))
+
+    def _table(self, timeframe: int):
+        cached = self._bars.get(timeframe)
+        if cached is None:
+            opens = bar_open_times(self.ticks['time'], timeframe)
+            starts = np.flatnonzero(np.r_[True, opens[1:] != opens[:-1]]) if len(opens) else opens
+            cached = self._bars[timeframe] = self._build(opens, starts, len(self.ticks)), starts
+        return cached
+
+    def bar_count(self, timeframe: int, available: int) -> int:
+        """Number of bars (including the forming one) built from the first ``available`` ticks"""
+        _, starts = self._table(timeframe)
+        return int(np.searchsorted(starts, available))
+
+    def bar_times(self, timeframe: int, available: int) -> np.ndarray:
+        rates, _ = self._table(timeframe)
+        return rates['time'][:self.bar_count(timeframe, available)]
+
+    def rates(self, timeframe: int, available: int, start: int, stop: int) -> np.ndarray:
+        """Copy of bars ``start:stop`` as seen after ``available`` ticks; the last bar may still be forming"""
+        rates, starts = self._table(timeframe)
+        count = self.bar_count(timeframe, available)
+        start, stop = max(0, start), min(stop, count)
+        if stop <= start:
+            return np.zeros(0, dtype=RATES_DTYPE)
+        result = rates[start:stop].copy()
+        bar_end = starts[count] if count < len(starts) else len(self.ticks)
+        if stop == count and available < bar_end:
+            # Forming bar: rebuild it from the ticks seen so far
+            first = starts[count - 1]
+            bid = self.bid[first:available]
+            last = result[-1:]
+            last['high'] = bid.max()
+            last['low'] = bid.min()
+            last['close'] = bid[-1]
+            last['tick_volume'] = available - first
+            last['spread'] = round((self.ask[available - 1] - bid[-1]) / self.spec.point)
+        return result
+
+    def _build(self, opens, starts, total) -> np.ndarray:
+        ends = np.r_[starts[1:], total]
+        rates = np.zeros(len(starts), dtype=RATES_DTYPE)
+        rates['time'] = opens[starts]
+        rates['open'] = self.bid[starts]
+        rates['high'] = np.maximum.reduceat(self.bid, starts)
+        rates['low'] = np.minimum.reduceat(self.bid, starts)
+        rates['close'] = self.bid[ends - 1]
+        rates['tick_volume'] = ends - starts
+        rates['spread'] = np.round((self.ask[ends - 1] - self.bid[ends - 1]) / self.spec.point)
+        return rates
+
+
+# -- Clock ------------------------------------------------------------------------
+
+class SimClock:
+    """
+    Simulated time in milliseconds. ``speed=None`` is manual (moves only on
+    ``advance``); otherwise it runs ``speed`` times faster than wall time.
+    """
+
+    def __init__(self, start_ms: int, speed: float = None):
+        self.speed = speed
+        self._start_ms = start_ms
+        self._offset_ms = 0.0
+        self._wall_start = _time.perf_counter()
+
+    def now_ms(self) -> int:
+        if self.speed is None:
+            return int(self._start_ms + self._offset_ms)
+        return int(self._start_ms + self._offset_ms + (_time.perf_counter() - self._wall_start) * 1000 * self.speed)
+
+    def advance(self, seconds: float):
+        if self.speed is None:
+            self._offset_ms += seconds * 1000
+        else:
+            _real_sleep(seconds / self.speed)
+
+    def skew(self, seconds: float):
+        """Move simulated time without sleeping (used for simulated latency)"""
+        self._offset_ms += seconds * 1000
+
+
+# -- Terminal -----------------------------------------------------------------------
+
+class _Position:
+    __slots__ = ('ticket', 'symbol', 'type', 'volume', 'price_open', 'sl', 'tp', 'magic', 'comment',
+                 'time_msc', 'time_update_msc', 'checked', 'reason')
+
+
+class _Order:
+    __slots__ = ('ticket', 'symbol', 'type', 'volume', 'price_open', 'sl', 'tp', 'magic', 'comment',
+                 'time_setup_msc', 'time_done_msc', 'state', 'type_time', 'type_filling', 'position_id',
+                 'checked', 'reason')
+
+
+def _api(method):
+    """Serialize the call, apply latency and catch the market up to the clock"""
+    name = method.__name__
+
+    def call(self, *args, **kwargs):
+        with self._lock:
+            if self._depth:
+                # Nested call from another API method: no extra latency or sync
+                return method(self, *args, **kwargs)
+            self._apply_latency(name)
+            if name not in ('initialize', 'login', 'last_error', 'version', 'shutdown'):
+                if not self._initialized:
+                    self._error = (RES_E_INTERNAL_FAIL_INIT, 'IPC initialize failed, MetaTrader 5 x64 not found')
+                    return None
+                self._sync()
+            self._depth += 1
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self._depth -= 1
+
+    call.__name__ = name
+    call.__doc__ = method.__doc__
+    return call
+
+
+class OfflineTerminal:
+    """
+    One simulated terminal with one hedging account.
+
+    Args:
+        start: simulated start time (datetime or epoch seconds).
+        speed: None for a manual clock, or a wall-time multiplier.
+        data_dir: directory with recorded ``<SYMBOL>.npy``/``.csv`` tick files.
+        symbols: SymbolSpec or name -> tick array mapping added up front.
+        seed: seed for synthetic ticks; same seed, same market.
+        tick_interval_ms: spacing of synthetic ticks from ``start`` on.
+        duration_days: length of synthetic data after ``start``.
+        history_days: synthetic history before ``start`` (one tick per minute).
+        latency: seconds added per call, or a dict of function name -> seconds.
+        real_latency: sleep for real instead of moving the simulated clock.
+        slippage_points: adverse slippage applied to market fills.
+        balance, leverage, currency, login, password, server: account setup.
+            ``password=None`` accepts any password.
+        stop_at_end: make the patched sleep raise ReplayFinished after the data ends.
+    """
+
+    def __init__(self, start=datetime(2025, 1, 6, tzinfo=timezone.utc), speed=None, data_dir=None,
+                 symbols=None, seed=0, tick_interval_ms=1000, duration_days=5, history_days=120,
+                 latency=0.0, real_latency=False, slippage_points=0, balance=10000.0, leverage=100,
+                 currency='USD', login=10000001, password=None, server='Offline-Demo',
+                 stop_at_end=False):
+        self.start = _to_seconds(start)
+        self.clock = SimClock(self.start * 1000, speed)
+        self.data_dir = data_dir
+        self.seed = seed
+        self.tick_interval_ms = tick_interval_ms
+        self.duration_days = duration_days
+        self.history_days = history_days
+        self.latency = latency
+        self.real_latency = real_latency
+        self.slippage_points = slippage_points
+        self.leverage = leverage
+        self.currency = currency
+        self.login_id = login
+        self.password = password
+        self.server = server
+        self.stop_at_end = stop_at_end
+
+        self.balance = float(balance)
+        self.positions = {}
+        self.orders = {}
+        self.history_orders = []
+        self.deals = []
+        self.feeds = {}
+        self.calls = {}
+        self._tickets = itertools.count(100000001)
+        self._lock = threading.RLock()
+        self._initialized = False
+        self._depth = 0
+        self._error = (RES_S_OK, 'Success')
+
+        for name, value in (symbols or {}).items():
+            if isinstance(value, SymbolSpec):
+                self.add_symbol(name, spec=value)
+            else:
+                self.add_symbol(name, ticks=value)
+        self._deal(None, DEAL_TYPE_BALANCE, DEAL_ENTRY_IN, 0.0, 0.0, self.balance,
+                   DEAL_REASON_CLIENT, 0, 0, 'Initial deposit', time_msc=self.start * 1000)
+
+    # -- setup -------------------------------------------------------------------
+
+    def add_symbol(self, name: str, ticks: np.ndarray = None, spec: SymbolSpec = None) -> _Feed:
+        """Register a symbol from ticks, a data file in ``data_dir`` or synthetic data"""
+        spec = spec or SymbolSpec.guess(name)
+        if ticks is None and self.data_dir:
+            for extension in ('.npy', '.csv'):
+                path = os.path.join(self.data_dir, name + extension)
+                if os.path.exists(path):
+                    ticks = load_ticks(path)
+                    break
+        if ticks is None:
+            ticks = synthetic_ticks(
+                spec, self.start, self.start + int(self.duration_days * 86400),
+                interval_ms=self.tick_interval_ms, seed=self.seed,
+                history_start=self.start - int(self.history_days * 86400),
+            )
+        feed = self.feeds[name] = _Feed(spec, np.ascontiguousarray(ticks, dtype=TICK_DTYPE))
+        return feed
+
+    def end_ms(self) -> int:
+        """Time of the last tick across all symbols"""
+        return max((int(feed.times[-1]) for feed in self.feeds.values() if len(feed.times)), default=0)
+
+    def sleep(self, seconds: float):
+        """Replacement for time.sleep installed by ``install(patch_clock=True)``"""
+        if seconds > 0:
+            self.clock.advance(seconds)
+        if self.stop_at_end and self.feeds and self.clock.now_ms() > self.end_ms():
+            raise ReplayFinished('Offline tick data exhausted')
+
+    def time(self) -> float:
+        """Replacement for time.time installed by ``install(patch_clock=True)``"""
+        return self.clock.now_ms() / 1000.0
+
+    # -- internals ---------------------------------------------------------------
+
+    def _apply_latency(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        latency = self.latency.get(name, 0.0) if isinstance(self.latency, dict) else self.latency
+        if latency:
+            if self.real_latency:
+                _real_sleep(latency)
+            else:
+                self.clock.skew(latency)
+
+    def _feed(self, symbol):
+        feed = self.feeds.get(symbol)
+        if feed is None and isinstance(symbol, str) and symbol:
+            feed = self.add_symbol(symbol)
+        return feed
+
+    def _quote(self, feed):
+        """(index of the current tick, bid, ask); index -1 before the first tick"""
+        index = feed.index(self.clock.now_ms()) - 1
+        if index < 0:
+            return -1, 0.0, 0.0
+        return index, float(feed.bid[index]), float(feed.ask[index])
+
+    def _profit(self, feed, position_type, volume, price_open, price_close) -> float:
+        direction = 1.0 if position_type == POSITION_TYPE_BUY else -1.0
+        spec = feed.spec
+        return round(direction * (price_close - price_open) / spec.tick_size * spec.tick_value * volume, 2)
+
+    def _margin(self, feed, volume, price) -> float:
+        return volume * feed.spec.contract_size * price / self.leverage
+
+    def _account_figures(self):
+        profit = margin = 0.0
+        for position in self.positions.values():
+            feed = self.feeds[position.symbol]
+            _, bid, ask = self._quote(feed)
+            current = bid if position.type == POSITION_TYPE_BUY else ask
+            profit += self._profit(feed, position.type, position.volume, position.price_open, current)
+            margin += self._margin(feed, position.volume, position.price_open)
+        equity = self.balance + profit
+        return round(profit, 2), round(equity, 2), round(margin, 2)
+
+    def _deal(self, position, deal_type, entry, volume, price, profit, reason, order, magic, comment,
+              time_msc=None, symbol=''):
+        time_msc = self.clock.now_ms() if time_msc is None else time_msc
+        deal = TradeDeal(
+            ticket=next(self._tickets), order=order, time=time_msc // 1000, time_msc=time_msc,
+            type=deal_type, entry=entry, magic=magic, position_id=position.ticket if position else 0,
+            reason=reason, volume=volume, price=price, commission=0.0, swap=0.0, profit=profit, fee=0.0,
+            symbol=position.symbol if position else symbol, comment=comment, external_id='',
+        )
+        self.deals.append(deal)
+        return deal
+
+    def _open(self, feed, position_type, volume, price, sl, tp, magic, comment, order_ticket,
+              time_msc, checked, reason=POSITION_REASON_EXPERT):
+        position = _Position()
+        position.ticket = order_ticket
+        position.symbol = feed.spec.name
+        position.type = position_type
+        position.volume = volume
+        position.price_open = price
+        position.sl = sl
+        position.tp = tp
+        position.magic = magic
+        position.comment = comment
+        position.time_msc = position.time_update_msc = time_msc
+        position.checked = checked
+        position.reason = reason
+        self.positions[position.ticket] = position
+        deal_type = DEAL_TYPE_BUY if position_type == POSITION_TYPE_BUY else DEAL_TYPE_SELL
+        return self._deal(position, deal_type, DEAL_ENTRY_IN, volume, price, 0.0, DEAL_REASON_EXPERT,
+                          order_ticket, magic, comment, time_msc=time_msc)
+
+    def _close(self, position, volume, price, reason, order_ticket, comment='', time_msc=None):
+        feed = self.feeds[position.symbol]
+        profit = self._profit(feed, position.type, volume, position.price_open, price)
+        self.balance = round(self.balance + profit, 2)
+        deal_type = DEAL_TYPE_SELL if position.type == POSITION_TYPE_BUY else DEAL_TYPE_BUY
+        deal = self._deal(position, deal_type, DEAL_ENTRY_OUT, volume, price, profit, reason,
+                          order_ticket, position.magic, comment, time_msc=time_msc)
+        position.volume = round(position.volume - volume, 8)
+        if position.volume <= 0:
+            del self.positions[position.ticket]
+        return deal
+
+    def _sync(self):
+        """Trigger pending orders and SL/TP on every tick since the previous call"""
+        if not self.orders and not self.positions:
+            return
+        now = self.clock.now_ms()
+        for order in list(self.orders.values()):
+            feed = self.feeds[order.symbol]
+            end = feed.index(now)
+            if end <= order.checked:
+                continue
+            bid, ask = feed.bid[order.checked:end], feed.ask[order.checked:end]
+            if order.type == ORDER_TYPE_BUY_LIMIT:
+                hits = np.flatnonzero(ask <= order.price_open)
+            elif order.type == ORDER_TYPE_SELL_LIMIT:
+                hits = np.flatnonzero(bid >= order.price_open)
+            elif order.type == ORDER_TYPE_BUY_STOP:
+                hits = np.flatnonzero(ask >= order.price_open)
+            else:
+                hits = np.flatnonzero(bid <= order.price_open)
+            if not len(hits):
+                order.checked = end
+                continue
+            index = order.checked + int(hits[0])
+            is_buy = order.type in (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_BUY_STOP)
+            if order.type in (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_SELL_LIMIT):
+                price = order.price_open
+            else:
+                price = float(feed.ask[index] if is_buy else feed.bid[index])
+            time_msc = int(feed.times[index])
+            del self.orders[order.ticket]
+            order.state = ORDER_STATE_FILLED
+            order.time_done_msc = time_msc
+            self.history_orders.append(order)
+            self._open(feed, POSITION_TYPE_BUY if is_buy else POSITION_TYPE_SELL, order.volume, price,
+                       order.sl, order.tp, order.magic, order.comment, order.ticket, time_msc, index + 1)
+
+        for position in list(self.positions.values()):
+            if not position.sl and not position.tp:
+                continue
+            feed = self.feeds[position.symbol]
+            end = feed.index(now)
+            if end <= position.checked:
+                continue
+            # Buys close at bid, sells at ask
+            prices = feed.bid[position.checked:end] if position.type == POSITION_TYPE_BUY \
+                else feed.ask[position.checked:end]
+            if position.type == POSITION_TYPE_BUY:
+                sl_hits = np.flatnonzero(prices <= position.sl) if position.sl else ()
+                tp_hits = np.flatnonzero(prices >= position.tp) if position.tp else ()
+            else:
+                sl_hits = np.flatnonzero(prices >= position.sl) if position.sl else ()
+                tp_hits = np.flatnonzero(prices <= position.tp) if position.tp else ()
+            sl_at = int(sl_hits[0]) if len(sl_hits) else None
+            tp_at = int(tp_hits[0]) if len(tp_hits) else None
+            if sl_at is None and tp_at is None:
+                position.checked = end
+                continue
+            if tp_at is None or (sl_at is not None and sl_at <= tp_at):
+                # Stops fill at the market price, which may be beyond the stop after a gap
+                index, price, reason, comment = sl_at, float(prices[sl_at]), DEAL_REASON_SL, f"[sl {position.sl}]"
+            else:
+                index, price, reason, comment = tp_at, position.tp, DEAL_REASON_TP, f"[tp {position.tp}]"
+            index += position.checked
+            self._close(position, position.volume, price, reason, next(self._tickets), comment,
+                        time_msc=int(feed.times[index]))
+
+    def _matches_group(self, symbol, group):
+        if not group:
+            return True
+        matched = False
+        for pattern in group.split(','):
+            pattern = pattern.strip()
+            if pattern.startswith('!'):
+                if fnmatch.fnmatchcase(symbol, pattern[1:]):
+                    return False
+            elif fnmatch.fnmatchcase(symbol, pattern):
+                matched = True
+        return matched
+
+    def _result(self, retcode, request, comment, deal=0, order=0, volume=0.0, price=0.0, bid=0.0, ask=0.0):
+        fields = {name: request.get(name, 0) for name in TradeRequest._fields}
+        fields['symbol'] = request.get('symbol', '')
+        fields['comment'] = request.get('comment', '')
+        return OrderSendResult(retcode, deal, order, volume, price, bid, ask, comment, 0, 0,
+                               TradeRequest(**fields))
+
+    def _validate_volume(self, feed, volume):
+        spec = feed.spec
+        if volume < spec.volume_min - 1e-9 or volume > spec.volume_max + 1e-9:
+            return False
+        steps = volume / spec.volume_step
+        return abs(steps - round(steps)) < 1e-6
+
+    def _validate_stops(self, feed, is_buy, price, sl, tp):
+        distance = feed.spec.stops_level * feed.spec.point
+        if is_buy:
+            return (not sl or sl < price - distance) and (not tp or tp > price + distance)
+        return (not sl or sl > price + distance) and (not tp or tp < price - distance)
+
+    # -- MetaTrader5 API -------------------------------------------------------------
+
+    @_api
+    def initialize(self, path=None, login=None, password=None, server=None, timeout=None, portable=False):
+        self._initialized = True
+        if login is not None:
+            return self.login(login, password=password, server=server)
+        self._error = (RES_S_OK, 'Success')
+        return True
+
+    @_api
+    def login(self, login, password=None, server=None, timeout=None):
+        if not self._initialized:
+            self._error = (RES_E_INTERNAL_FAIL_INIT, 'IPC initialize failed, MetaTrader 5 x64 not found')
+            return False
+        if self.password is not None and (int(login) != self.login_id or password != self.password):
+            self._error = (RES_E_AUTH_FAILED, 'Authorization failed')
+            return False
+        self.login_id = int(login)
+        if server:
+            self.server = server
+        self._error = (RES_S_OK, 'Success')
+        return True
+
+    @_api
+    def shutdown(self):
+        self._initialized = False
+        return True
+
+    @_api
+    def last_error(self):
+        return self._error
+
+    @_api
+    def version(self):
+        return (500, 5120, '01 Jul 2025')
+
+    @_api
+    def terminal_info(self):
+        return TerminalInfo(
+            community_account=False, community_connection=False, connected=True, dlls_allowed=True,
+            trade_allowed=True, tradeapi_disabled=False, email_enabled=False, ftp_enabled=False,
+            notifications_enabled=False, mqid=False, build=5120, maxbars=100000, codepage=0,
+            ping_last=0, community_balance=0.0, retransmission=0.0, company='Offline',
+            name='MetaTrader 5 (offline)', language='English', path='', data_path='', commondata_path='',
+        )
+
+    @_api
+    def account_info(self):
+        profit, equity, margin = self._account_figures()
+        return AccountInfo(
+            login=self.login_id, trade_mode=ACCOUNT_TRADE_MODE_DEMO, leverage=self.leverage,
+            limit_orders=200, margin_so_mode=0, trade_allowed=True, trade_expert=True,
+            margin_mode=ACCOUNT_MARGIN_MODE_RETAIL_HEDGING, currency_digits=2, fifo_close=False,
+            balance=self.balance, credit=0.0, profit=profit, equity=equity, margin=margin,
+            margin_free=round(equity - margin, 2),
+            margin_level=round(equity / margin * 100, 2) if margin else 0.0,
+            margin_so_call=50.0, margin_so_so=30.0, margin_initial=0.0, margin_maintenance=0.0,
+            assets=0.0, liabilities=0.0, commission_blocked=0.0, name='Offline Account',
+            server=self.server, currency=self.currency, company='Offline',
+        )
+
+    @_api
+    def symbols_total(self):
+        return len(self.feeds)
+
+    @_api
+    def symbols_get(self, group=None):
+        return tuple(self.symbol_info(name) for name in self.feeds if self._matches_group(name, group))
+
+    @_api
+    def symbol_select(self, symbol, enable=True):
+        return self._feed(symbol) is not None
+
+    @_api
+    def symbol_info(self, symbol):
+        feed = self._feed(symbol)
+        if feed is None:
+            self._error = (RES_E_NOT_FOUND, 'Symbol not found')
+            return None
+        spec = feed.spec
+        index, bid, ask = self._quote(feed)
+        return SymbolInfo(
+            custom=False, select=True, visible=True, session_deals=0,
+            time=int(feed.ticks['time'][index]) if index >= 0 else 0, digits=spec.digits,
+            spread=int(round((ask - bid) / spec.point)), spread_float=True,
+            trade_stops_level=spec.stops_level, trade_freeze_level=0, trade_mode=SYMBOL_TRADE_MODE_FULL,
+            filling_mode=ORDER_FILLING_FOK | ORDER_FILLING_IOC, bid=bid, ask=ask, last=0.0,
+            point=spec.point, trade_tick_value=spec.tick_value, trade_tick_size=spec.tick_size,
+            trade_contract_size=spec.contract_size, volume_min=spec.volume_min,
+            volume_max=spec.volume_max, volume_step=spec.volume_step, swap_long=0.0, swap_short=0.0,
+            margin_initial=0.0, margin_maintenance=0.0, currency_base=spec.currency_base,
+            currency_profit=spec.currency_profit, currency_margin=spec.currency_base,
+            description=spec.description, path=f"Offline\\{spec.name}", name=spec.name,
+        )
+
+    @_api
+    def symbol_info_tick(self, symbol):
+        feed = self._feed(symbol)
+        if feed is None:
+            self._error = (RES_E_NOT_FOUND, 'Symbol not found')
+            return None
+        index = feed.index(self.clock.now_ms()) - 1
+        if index < 0:
+            return None
+        return Tick(*feed.ticks[index].tolist())
+
+    @_api
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        feed = self._feed(symbol)
+        if feed is None:
+            self._error = (RES_E_NOT_FOUND, 'Symbol not found')
+            return None
+        available = feed.index(self.clock.now_ms())
+        end = feed.bar_count(timeframe, available) - int(start_pos)
+        return feed.rates(timeframe, available, end - int(count), end)
+
+    @_api
+    def copy_rates_from(self, symbol, timeframe, date_from, count):
+        feed = self._feed(symbol)
+        if feed is None:
+            self._error = (RES_E_NOT_FOUND, 'Symbol not found')
+            return None
+        available = feed.index(self.clock.now_ms())
+        times = feed.bar_times(timeframe, available)
+        end = int(np.searchsorted(times, _to_seconds(date_from), side='right'))
+        return feed.rates(timeframe, available, end - int(count), end)
+
+    @_api
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        feed = self._feed(symbol)
+        if feed is None:
+            self._error = (RES_E_NOT_FOUND, 'Symbol not found')
+            return None
+        available = feed.index(self.clock.now_ms())
+        times = feed.bar_times(timeframe, available)
+        return feed.rates(timeframe, available, int(np.searchsorted(times, _to_seconds(date_from))),
+                          int(np.searchsorted(times, _to_seconds(date_to), side='right')))
+
+    @_api
+    def copy_ticks_from(self, symbol, date_from, count, flags=COPY_TICKS_ALL):
+        feed = self._feed(symbol)
+        if feed is None:
+            self._error = (RES_E_NOT_FOUND, 'Symbol not found')
+            return None
+        start = int(np.searchsorted(feed.times, _to_seconds(date_from) * 1000))
+        end = min(feed.index(self.clock.now_ms()), start + int(count))
+        return feed.ticks[start:end].copy()
+
+    @_api
+    def copy_ticks_range(self, symbol, date_from, date_to, flags=COPY_TICKS_ALL):
+        feed = self._feed(symbol)
+        if feed is None:
+            self._error = (RES_E_NOT_FOUND, 'Symbol not found')
+            return None
+        start = int(np.searchsorted(feed.times, _to_seconds(date_from) * 1000))
+        end = min(feed.index(self.clock.now_ms()),
+                  int(np.searchsorted(feed.times, _to_seconds(date_to) * 1000, side='right')))
+        return feed.ticks[start:max(start, end)].copy()
+
+    @_api
+    def positions_total(self):
+        return len(self.positions)
+
+    @_api
+    def positions_get(self, symbol=None, group=None, ticket=None):
+        result = []
+        for position in self.positions.values():
+            if symbol is not None and position.symbol != symbol:
+                continue
+            if ticket is not None and position.ticket != ticket:
+                continue
+            if not self._matches_group(position.symbol, group):
+                continue
+            feed = self.feeds[position.symbol]
+            _, bid, ask = self._quote(feed)
+            current = bid if position.type == POSITION_TYPE_BUY else ask
+            result.append(TradePosition(
+                ticket=position.ticket, time=position.time_msc // 1000, time_msc=position.time_msc,
+                time_update=position.time_update_msc // 1000, time_update_msc=position.time_update_msc,
+                type=position.type, magic=position.magic, identifier=position.ticket, reason=position.reason,
+                volume=position.volume, price_open=position.price_open, sl=position.sl, tp=position.tp,
+                price_current=current, swap=0.0,
+                profit=self._profit(feed, position.type, position.volume, position.price_open, current),
+                symbol=position.symbol, comment=position.comment, external_id='',
+            ))
+        return tuple(result)
+
+    def _order_record(self, order):
+        feed = self.feeds[order.symbol]
+        _, bid, ask = self._quote(feed)
+        is_buy = order.type in (ORDER_TYPE_BUY, ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_BUY_STOP)
+        return TradeOrder(
+            ticket=order.ticket, time_setup=order.time_setup_msc // 1000, time_setup_msc=order.time_setup_msc,
+            time_done=order.time_done_msc // 1000, time_done_msc=order.time_done_msc, time_expiration=0,
+            type=order.type, type_time=order.type_time, type_filling=order.type_filling, state=order.state,
+            magic=order.magic, position_id=order.position_id, position_by_id=0, reason=order.reason,
+            volume_initial=order.volume, volume_current=order.volume if order.state == ORDER_STATE_PLACED else 0.0,
+            price_open=order.price_open, sl=order.sl, tp=order.tp, price_current=ask if is_buy else bid,
+            price_stoplimit=0.0, symbol=order.symbol, comment=order.comment, external_id='',
+        )
+
+    @_api
+    def orders_total(self):
+        return len(self.orders)
+
+    @_api
+    def orders_get(self, symbol=None, group=None, ticket=None):
+        return tuple(
+            self._order_record(order) for order in self.orders.values()
+            if (symbol is None or order.symbol == symbol) and (ticket is None or order.ticket == ticket)
+            and self._matches_group(order.symbol, group)
+        )
+
+    @_api
+    def history_deals_total(self, date_from, date_to):
+        return len(self.history_deals_get(date_from, date_to))
+
+    @_api
+    def history_deals_get(self, date_from=None, date_to=None, group=None, ticket=None, position=None):
+        if ticket is not None:
+            return tuple(deal for deal in self.deals if deal.order == ticket)
+        if position is not None:
+            return tuple(deal for deal in self.deals if deal.position_id == position)
+        start, end = _to_seconds(date_from or 0), _to_seconds(date_to or 2 ** 40)
+        return tuple(deal for deal in self.deals
+                     if start <= deal.time <= end and self._matches_group(deal.symbol, group))
+
+    @_api
+    def history_orders_total(self, date_from, date_to):
+        return len(self.history_orders_get(date_from, date_to))
+
+    @_api
+    def history_orders_get(self, date_from=None, date_to=None, group=None, ticket=None, position=None):
+        orders = self.history_orders
+        if ticket is not None:
+            return tuple(self._order_record(order) for order in orders if order.ticket == ticket)
+        if position is not None:
+            return tuple(self._order_record(order) for order in orders if order.position_id == position)
+        start, end = _to_seconds(date_from or 0) * 1000, _to_seconds(date_to or 2 ** 40) * 1000
+        return tuple(self._order_record(order) for order in orders
+                     if start <= order.time_setup_msc <= end and self._matches_group(order.symbol, group))
+
+    @_api
+    def order_calc_margin(self, action, symbol, volume, price):
+        feed = self._feed(symbol)
+        return round(self._margin(feed, volume, price), 2) if feed else None
+
+    @_api
+    def order_calc_profit(self, action, symbol, volume, price_open, price_close):
+        feed = self._feed(symbol)
+        position_type = POSITION_TYPE_BUY if action == ORDER_TYPE_BUY else POSITION_TYPE_SELL
+        return self._profit(feed, position_type, volume, price_open, price_close) if feed else None
+
+    @_api
+    def order_check(self, request):
+        request = dict(request)
+        profit, equity, margin = self._account_figures()
+        feed = self._feed(request.get('symbol'))
+        retcode, comment, required = 0, 'Done', 0.0
+        if feed is None:
+            retcode, comment = TRADE_RETCODE_INVALID, 'Invalid request'
+        elif request.get('action') in (TRADE_ACTION_DEAL, TRADE_ACTION_PENDING):
+            volume = float(request.get('volume', 0))
+            _, bid, ask = self._quote(feed)
+            price = request.get('price') or (ask if request.get('type') in (ORDER_TYPE_BUY, ORDER_TYPE_BUY_LIMIT,
+                                                                           ORDER_TYPE_BUY_STOP) else bid)
+            if not self._validate_volume(feed, volume):
+                retcode, comment = TRADE_RETCODE_INVALID_VOLUME, 'Invalid volume'
+            elif not request.get('position'):
+                required = self._margin(feed, volume, price)
+                if required > equity - margin:
+                    retcode, comment = TRADE_RETCODE_NO_MONEY, 'No money'
+        margin_after = margin + required
+        fields = {name: request.get(name, 0) for name in TradeRequest._fields}
+        return OrderCheckResult(
+            retcode=retcode, balance=self.balance, equity=equity, profit=profit, margin=round(margin_after, 2),
+            margin_free=round(equity - margin_after, 2),
+            margin_level=round(equity / margin_after * 100, 2) if margin_after else 0.0,
+            comment=comment, request=TradeRequest(**fields),
+        )
+
+    @_api
+    def order_send(self, request):
+        request = dict(request)
+        action = request.get('action')
+        if action == TRADE_ACTION_DEAL:
+            return self._send_deal(request)
+        if action == TRADE_ACTION_PENDING:
+            return self._send_pending(request)
+        if action == TRADE_ACTION_SLTP:
+            position = self.positions.get(request.get('position'))
+            if position is None:
+                return self._result(TRADE_RETCODE_POSITION_CLOSED, request, 'Position doesn\'t exist')
+            feed = self.feeds[position.symbol]
+            _, bid, ask = self._quote(feed)
+            sl, tp = float(request.get('sl', 0.0)), float(request.get('tp', 0.0))
+            is_buy = position.type == POSITION_TYPE_BUY
+            if not self._validate_stops(feed, is_buy, bid if is_buy else ask, sl, tp):
+                return self._result(TRADE_RETCODE_INVALID_STOPS, request, 'Invalid stops')
+            position.sl, position.tp = sl, tp
+            position.time_update_msc = self.clock.now_ms()
+            position.checked = feed.index(self.clock.now_ms())
+            return self._result(TRADE_RETCODE_DONE, request, 'Request executed', bid=bid, ask=ask)
+        if action == TRADE_ACTION_MODIFY:
+            order = self.orders.get(request.get('order'))
+            if order is None:
+                return self._result(TRADE_RETCODE_INVALID_ORDER, request, 'Invalid order')
+            order.price_open = float(request.get('price', order.price_open))
+            order.sl = float(request.get('sl', order.sl))
+            order.tp = float(request.get('tp', order.tp))
+            return self._result(TRADE_RETCODE_DONE, request, 'Request executed', order=order.ticket)
+        if action == TRADE_ACTION_REMOVE:
+            order = self.orders.pop(request.get('order'), None)
+            if order is None:
+                return self._result(TRADE_RETCODE_INVALID_ORDER, request, 'Invalid order')
+            order.state = ORDER_STATE_CANCELED
+            order.time_done_msc = self.clock.now_ms()
+            self.history_orders.append(order)
+            return self._result(TRADE_RETCODE_DONE, request, 'Request executed', order=order.ticket)
+        self._error = (RES_E_INVALID_PARAMS, 'Invalid arguments')
+        return None
+
+    def _send_deal(self, request):
+        feed = self._feed(request.get('symbol'))
+        if feed is None or request.get('type') not in _MARKET_ORDERS:
+            return self._result(TRADE_RETCODE_INVALID, request, 'Invalid request')
+        index, bid, ask = self._quote(feed)
+        if index < 0:
+            return self._result(TRADE_RETCODE_MARKET_CLOSED, request, 'Market closed')
+        volume = float(request.get('volume', 0))
+        if not self._validate_volume(feed, volume):
+            return self._result(TRADE_RETCODE_INVALID_VOLUME, request, 'Invalid volume')
+        is_buy = request['type'] == ORDER_TYPE_BUY
+        slippage = self.slippage_points * feed.spec.point
+        price = round(ask + slippage if is_buy else bid - slippage, feed.spec.digits)
+        order_ticket = next(self._tickets)
+        now = self.clock.now_ms()
+        magic = int(request.get('magic', 0))
+        comment = str(request.get('comment', ''))
+
+        closing = request.get('position')
+        if closing:
+            position = self.positions.get(closing)
+            if position is None:
+                return self._result(TRADE_RETCODE_POSITION_CLOSED, request, 'Position doesn\'t exist')
+            if is_buy == (position.type == POSITION_TYPE_BUY) or volume > position.volume + 1e-9:
+                return self._result(TRADE_RETCODE_INVALID, request, 'Invalid request')
+            deal = self._close(position, volume, price, DEAL_REASON_EXPERT, order_ticket, comment)
+        else:
+            sl, tp = float(request.get('sl', 0.0)), float(request.get('tp', 0.0))
+            if not self._validate_stops(feed, is_buy, price, sl, tp):
+                return self._result(TRADE_RETCODE_INVALID_STOPS, request, 'Invalid stops')
+            _, equity, margin = self._account_figures()
+            if self._margin(feed, volume, price) > equity - margin:
+                return self._result(TRADE_RETCODE_NO_MONEY, request, 'No money')
+            deal = self._open(feed, POSITION_TYPE_BUY if is_buy else POSITION_TYPE_SELL, volume, price, sl, tp,
+                              magic, comment, order_ticket, now, index + 1)
+
+        order = _Order()
+        order.ticket = order_ticket
+        order.symbol = feed.spec.name
+        order.type = request['type']
+        order.volume = volume
+        order.price_open = price
+        order.sl = float(request.get('sl', 0.0))
+        order.tp = float(request.get('tp', 0.0))
+        order.magic = magic
+        order.comment = comment
+        order.time_setup_msc = order.time_done_msc = now
+        order.state = ORDER_STATE_FILLED
+        order.type_time = request.get('type_time', ORDER_TIME_GTC)
+        order.type_filling = request.get('type_filling', ORDER_FILLING_FOK)
+        order.position_id = closing or order_ticket
+        order.checked = index + 1
+        order.reason = ORDER_REASON_EXPERT
+        self.history_orders.append(order)
+        return self._result(TRADE_RETCODE_DONE, request, 'Request executed', deal=deal.ticket,
+                            order=order_ticket, volume=volume, price=price, bid=bid, ask=ask)
+
+    def _send_pending(self, request):
+        feed = self._feed(request.get('symbol'))
+        if feed is None or request.get('type') not in _PENDING_ORDERS:
+            return self._result(TRADE_RETCODE_INVALID, request, 'Invalid request')
+        index, bid, ask = self._quote(feed)
+        volume = float(request.get('volume', 0))
+        if not self._validate_volume(feed, volume):
+            return self._result(TRADE_RETCODE_INVALID_VOLUME, request, 'Invalid volume')
+        price = float(request.get('price', 0.0))
+        order_type = request['type']
+        valid_price = {
+            ORDER_TYPE_BUY_LIMIT: price < ask,
+            ORDER_TYPE_SELL_LIMIT: price > bid,
+            ORDER_TYPE_BUY_STOP: price > ask,
+            ORDER_TYPE_SELL_STOP: price < bid,
+        }[order_type]
+        if price <= 0 or not valid_price:
+            return self._result(TRADE_RETCODE_INVALID_PRICE, request, 'Invalid price')
+        is_buy = order_type in (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_BUY_STOP)
+        sl, tp = float(request.get('sl', 0.0)), float(request.get('tp', 0.0))
+        if not self._validate_stops(feed, is_buy, price, sl, tp):
+            return self._result(TRADE_RETCODE_INVALID_STOPS, request, 'Invalid stops')
+
+        order = _Order()
+        order.ticket = next(self._tickets)
+        order.symbol = feed.spec.name
+        order.type = order_type
+        order.volume = volume
+        order.price_open = price
+        order.sl, order.tp = sl, tp
+        order.magic = int(request.get('magic', 0))
+        order.comment = str(request.get('comment', ''))
+        order.time_setup_msc = self.clock.now_ms()
+        order.time_done_msc = 0
+        order.state = ORDER_STATE_PLACED
+        order.type_time = request.get('type_time', ORDER_TIME_GTC)
+        order.type_filling = request.get('type_filling', ORDER_FILLING_RETURN)
+        order.position_id = 0
+        order.checked = max(index + 1, 0)
+        order.reason = ORDER_REASON_EXPERT
+        self.orders[order.ticket] = order
+        return self._result(TRADE_RETCODE_DONE, request, 'Request executed', order=order.ticket,
+                            volume=volume, price=price, bid=bid, ask=ask)
+
+
+# -- Module-level API (mirrors the MetaTrader5 package) ---------------------------
+
+_API_FUNCTIONS = (
+    'initialize', 'login', 'shutdown', 'last_error', 'version', 'terminal_info', 'account_info',
+    'symbols_total', 'symbols_get', 'symbol_select', 'symbol_info', 'symbol_info_tick',
+    'copy_rates_from_pos', 'copy_rates_from', 'copy_rates_range', 'copy_ticks_from', 'copy_ticks_range',
+    'positions_total', 'positions_get', 'orders_total', 'orders_get', 'history_deals_total',
+    'history_deals_get', 'history_orders_total', 'history_orders_get', 'order_calc_margin',
+    'order_calc_profit', 'order_check', 'order_send',
+)
+
+terminal = None
+
+
+def _delegate(name):
+    def call(*args, **kwargs):
+        return getattr(terminal, name)(*args, **kwargs)
+    call.__name__ = name
+    call.__doc__ = getattr(OfflineTerminal, name).__doc__
+    return call
+
+
+for _name in _API_FUNCTIONS:
+    globals()[_name] = _delegate(_name)
+
+
+def reset(**options) -> OfflineTerminal:
+    """Replace the module's terminal with a fresh one (see OfflineTerminal for options)"""
+    global terminal
+    terminal = OfflineTerminal(**options)
+    return terminal
+
+
+def configure_from_env() -> OfflineTerminal:
+    """
+    Build the terminal from environment variables:
+    MT5_OFFLINE_DATA (tick file directory), MT5_OFFLINE_SEED, MT5_OFFLINE_START
+    (ISO date), MT5_OFFLINE_SPEED, MT5_OFFLINE_LATENCY_MS,
+    MT5_OFFLINE_REAL_LATENCY, MT5_OFFLINE_SLIPPAGE, MT5_OFFLINE_BALANCE,
+    MT5_OFFLINE_DAYS and MT5_OFFLINE_STOP_AT_END.
+    """
+    env = os.environ
+    options = {
+        'data_dir': env.get('MT5_OFFLINE_DATA') or None,
+        'seed': int(env.get('MT5_OFFLINE_SEED', 0)),
+        'latency': float(env.get('MT5_OFFLINE_LATENCY_MS', 0)) / 1000.0,
+        'real_latency': env.get('MT5_OFFLINE_REAL_LATENCY', '') == '1',
+        'slippage_points': int(env.get('MT5_OFFLINE_SLIPPAGE', 0)),
+        'balance': float(env.get('MT5_OFFLINE_BALANCE', 10000)),
+        'duration_days': float(env.get('MT5_OFFLINE_DAYS', 5)),
+        'stop_at_end': env.get('MT5_OFFLINE_STOP_AT_END', '') == '1',
+    }
+    if env.get('MT5_OFFLINE_START'):
+        start = datetime.fromisoformat(env['MT5_OFFLINE_START'])
+        options['start'] = start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+    if env.get('MT5_OFFLINE_SPEED'):
+        options['speed'] = float(env['MT5_OFFLINE_SPEED'])
+    return reset(**options)
+
+
+def install(patch_clock: bool = False, **options) -> OfflineTerminal:
+    """
+    Make ``import MetaTrader5`` return this module. With ``patch_clock``,
+    ``time.sleep`` advances the simulated clock and ``time.time`` reads it.
+    Keyword options create a fresh terminal (see OfflineTerminal).
+    """
+    if options or terminal is None:
+        reset(**options)
+    sys.modules['MetaTrader5'] = sys.modules[__name__]
+    if patch_clock:
+        _time.sleep = lambda seconds: terminal.sleep(seconds)
+        _time.time = lambda: terminal.time()
+    return terminal
+
+
+def uninstall():
+    """Restore the real time functions and drop the MetaTrader5 alias"""
+    _time.sleep = _real_sleep
+    _time.time = _real_time
+    if sys.modules.get('MetaTrader5') is sys.modules[__name__]:
+        del sys.modules['MetaTrader5']
+
+
+reset()
@@ -0,0 +1,161 @@
+"""
+Order-flow metrics over a sliding window of ticks, updated in O(1) per tick.
+
+The scalper used to build the columns of its tick window on every tick
+(first a DataFrame, then NumPy arrays) and reduce them again: np.diff sums
+for bid/ask pressure, a volume-weighted price, the spread mean and the mean
+gap between tick times. OrderFlowWindow keeps the window in fixed-size NumPy
+ring buffers and maintains what those reductions need as it goes:
+
+- bid/ask pressure are sums of consecutive differences, which telescope to
+  newest minus oldest, so they need no sum at all;
+- the spread sum, the volume sum and the bid*volume sum lose the evicted
+  tick and gain the new one;
+- the tick-time gaps are summed the same way, skipping ticks without a time
+  (the mean is over the gaps between two timed ticks, as before).
+
+Adding and subtracting floats drifts, so each time the ring wraps the sums
+are recomputed from the buffers, which is O(size) every ``size`` ticks. The
+number of ticks with volume is kept as an integer, so "no volume in the
+window" is exact rather than a sum that came back to 1e-12.
+
+``metrics(point)`` returns the same dict as
+HighFrequencyScalpingEA.calculate_flow_metrics on the window's columns.
+``extend()`` adds a batch of ticks (e.g. from copy_ticks_from); a batch
+at least as long as the window replaces it with one copy.
+"""
+
+import numpy as np
+
+
+class OrderFlowWindow:
+    """
+    The last ``size`` ticks (time, bid, ask, spread in points, volume) and
+    their running sums.
+    """
+
+    def __init__(self, size: int):
+        if size < 2:
+            raise ValueError("an order-flow window needs at least 2 ticks")
+        self.size = int(size)
+        self.time = np.full(self.size, np.nan)
+        self.bid = np.zeros(self.size)
+        self.ask = np.zeros(self.size)
+        self.spread = np.zeros(self.size)
+        self.volume = np.zeros(self.size)
+        self.count = 0
+        self._next = 0  # slot of the next tick; the oldest tick once the window is full
+        self._spread_sum = 0.0
+        self._volume_sum = 0.0
+        self._bid_volume_sum = 0.0
+        self._volume_ticks = 0
+        self._gap_sum = 0.0
+        self._gaps = 0
+        self.updates = 0
+
+    @property
+    def ready(self) -> bool:
+        """The window is full"""
+        return self.count == self.size
+
+    def update(self, time, bid, ask, spread, volume=0.0):
+        """Add one tick, dropping the oldest when full; ``time`` may be None"""
+        size = self.size
+        slot = self._next
+        time = float('nan') if time is None else float(time)
+        volume = float(volume or 0.0)
+        times = self.time
+        if self.count == size:
+            # Evict the oldest tick (in this slot) and its gap to the next one
+            self._spread_sum -= self.spread[slot]
+            old_volume = self.volume[slot]
+            if old_volume:
+                self._volume_sum -= old_volume
+                self._bid_volume_sum -= self.bid[slot] * old_volume
+                self._volume_ticks -= 1
+            gap = times[slot + 1 if slot + 1 < size else 0] - times[slot]
+            if gap == gap:
+                self._gap_sum -= gap
+                self._gaps -= 1
+        else:
+            self.count += 1
+        if self.count > 1:
+            gap = time - times[slot - 1]  # slot -1 wraps to the newest tick in the last slot
+            if gap == gap:
+                self._gap_sum += gap
+                self._gaps += 1
+        times[slot] = time
+        self.bid[slot] = bid
+        self.ask[slot] = ask
+        self.spread[slot] = spread
+        self.volume[slot] = volume
+        self._spread_sum += spread
+        if volume:
+            self._volume_sum += volume
+            self._bid_volume_sum += bid * volume
+            self._volume_ticks += 1
+        self.updates += 1
+        slot += 1
+        if slot == size:
+            slot = 0
+            self._resync()
+        self._next = slot
+
+    def extend(self, times, bids, asks, spreads, volumes):
+        """Add a batch of ticks (arrays, oldest first; NaN for no time)"""
+        count = len(bids)
+        if count < self.size:
+            for tick in zip(times, bids, asks, spreads, volumes):
+                self.update(*tick)
+            return
+        # Only the last ``size`` ticks stay: copy them in time order and recompute the sums
+        last = slice(count - self.size, count)
+        self.time[:] = times[last]
+        self.bid[:] = bids[last]
+        self.ask[:] = asks[last]
+        self.spread[:] = spreads[last]
+        self.volume[:] = volumes[last]
+        self.count = self.size
+        self._next = 0
+        self._resync()
+        self.updates += count
+
+    def _resync(self):
+        """Recompute the running sums from the buffers (called when full and in time order)"""
+        self._spread_sum = float(self.spread.sum())
+        with_volume = self.volume != 0
+        self._volume_ticks = int(with_volume.sum())
+        self._volume_sum = float(self.volume.sum())
+        self._bid_volume_sum = float(self.bid @ self.volume)
+        gaps = np.diff(self.time)
+        gaps = gaps[~np.isnan(gaps)]
+        self._gaps = len(gaps)
+        self._gap_sum = float(gaps.sum())
+
+    def columns(self):
+        """The window as a dict of arrays, oldest tick first (copies)"""
+        order = np.arange(self._next - self.count, self._next) % self.size
+        return {name: getattr(self, name)[order] for name in ('time', 'bid', 'ask', 'spread', 'volume')}
+
+    def metrics(self, point: float) -> dict:
+        """Momentum, pressure, volume bias, spread and tick frequency of the window"""
+        if not self.count:
+            return {}
+        newest = self._next - 1
+        oldest = self._next if self.count == self.size else 0
+        bid_now = float(self.bid[newest])
+        bid_pressure = bid_now - float(self.bid[oldest])
+        ask_pressure = float(self.ask[newest]) - float(self.ask[oldest])
+        if self._volume_ticks and self._volume_sum > 0:
+            volume_bias = (bid_now - self._bid_volume_sum / self._volume_sum) / point
+        else:
+            volume_bias = 0.0
+        current_spread = float(self.spread[newest])
+        return {
+            'price_momentum': bid_pressure / point,
+            'pressure_ratio': ask_pressure / (bid_pressure + 1e-10),
+            'volume_bias': volume_bias,
+            'spread_pressure': current_spread - self._spread_sum / self.count,
+            'tick_frequency': self._gap_sum / self._gaps if self._gaps else 1.0,
+            'current_spread': current_spread,
+        }
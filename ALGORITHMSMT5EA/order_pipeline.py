@@ -0,0 +1,172 @@
+"""
+Batched order submission.
+
+The grid EA placed its up to 2 x GRID_MAX_LEVELS pending orders one
+order_send at a time, the news EA sent its buy stop and sell stop one after
+the other, and closing all positions looped over them. Each order_send waits
+for the broker's reply, so a batch of N orders took N round-trips.
+
+OrderPipeline takes the whole batch:
+
+1. every request is checked with order_check first, so a batch with a bad
+   volume or not enough margin is caught before anything is sent (with
+   ``atomic=True`` nothing is sent at all then; a request the broker still
+   rejects on order_send does not undo the others, the caller rolls back);
+2. the accepted requests are sent;
+3. the results come back in request order with per-order timings.
+
+The source is anything with order_check/order_send: the MetaTrader5 module
+in an EA process, or a backend terminal handle, whose ``order_batch``
+operation runs the whole pipeline inside the MT5 gateway in one IPC
+round-trip.
+
+The MetaTrader5 module is process-global and not safe to call from several
+threads, so checks and sends run one at a time unless the source declares
+``thread_safe = True``; only then are up to ``concurrency`` of them in
+flight.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_PLACED = 10008
+TRADE_RETCODE_DONE_PARTIAL = 10010
+
+# order_check reports an acceptable request with retcode 0
+CHECK_OK = 0
+# Requests in flight at once for a thread-safe source
+DEFAULT_CONCURRENCY = 4
+
+# Not a terminal retcode: the request was not sent because the batch was rejected
+NOT_SENT = -1
+
+
+class OrderResult(NamedTuple):
+    """Outcome of one request of a batch"""
+    index: int
+    ok: bool
+    retcode: Optional[int]
+    comment: str
+    order: int
+    deal: int
+    volume: float
+    price: float
+    check_retcode: Optional[int]
+    check_ms: float
+    send_ms: float
+
+
+class OrderPipeline:
+    """
+    Validates and submits batches of trade requests.
+
+    Args:
+        source: the MetaTrader5 module or a terminal handle.
+        concurrency: requests in flight at once; DEFAULT_CONCURRENCY by
+            default. Always 1 unless ``source.thread_safe`` is true.
+        validate: run order_check on every request before sending.
+    """
+
+    def __init__(self, source, concurrency: Optional[int] = None, validate: bool = True):
+        self.source = source
+        if getattr(source, 'thread_safe', False):
+            self.concurrency = max(1, DEFAULT_CONCURRENCY if concurrency is None else concurrency)
+        else:
+            self.concurrency = 1
+        self.validate = validate
+        self._executor = None
+        self._lock = threading.Lock()
+        self.last_batch_ms = 0.0
+
+    def submit(self, requests, atomic: bool = False, validate: Optional[bool] = None):
+        """
+        Check and send ``requests`` (trade request dicts); returns one
+        OrderResult per request, in order. Requests rejected by order_check
+        are not sent; with ``atomic`` a single rejection stops the whole batch.
+        ``atomic`` only covers the order_check pre-check: once sent, a request
+        that order_send rejects leaves the others executed.
+        ``validate`` overrides the pipeline's setting for this batch.
+        """
+        started = time.perf_counter()
+        requests = [dict(request) for request in requests]
+        checks = [None] * len(requests)
+        if (self.validate if validate is None else validate) and requests:
+            checks = self._map(self._check, requests)
+        rejected = [check for check in checks if check is not None and check[0] != CHECK_OK]
+
+        results = []
+        to_send = []
+        for index, (request, check) in enumerate(zip(requests, checks)):
+            check_retcode, check_comment, check_ms = check if check is not None else (None, '', 0.0)
+            if check_retcode not in (None, CHECK_OK) or (atomic and rejected):
+                comment = check_comment if check_retcode not in (None, CHECK_OK) else 'Batch rejected by order_check'
+                results.append(OrderResult(index, False, NOT_SENT, comment, 0, 0, 0.0, 0.0,
+                                           check_retcode, check_ms, 0.0))
+            else:
+                results.append(None)
+                to_send.append((index, request, check_retcode, check_ms))
+
+        for result in self._map(self._send, to_send):
+            results[result.index] = result
+        self.last_batch_ms = round((time.perf_counter() - started) * 1000, 2)
+        return results
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    # Internals
+
+    def _map(self, function, items):
+        if self.concurrency == 1 or len(items) <= 1:
+            return [function(item) for item in items]
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='order-pipeline')
+            executor = self._executor
+        return list(executor.map(function, items))
+
+    def _check(self, request):
+        started = time.perf_counter()
+        try:
+            check = self.source.order_check(request)
+        except Exception as e:
+            return (None, f'order_check failed: {e}', _elapsed_ms(started))
+        if check is None:
+            # No verdict (e.g. the terminal does not support the check): let order_send decide
+            return (None, '', _elapsed_ms(started))
+        return (check.retcode, check.comment, _elapsed_ms(started))
+
+    def _send(self, item):
+        index, request, check_retcode, check_ms = item
+        started = time.perf_counter()
+        try:
+            result = self.source.order_send(request)
+        except Exception as e:
+            return OrderResult(index, False, None, f'order_send failed: {e}', 0, 0, 0.0, 0.0,
+                               check_retcode, check_ms, _elapsed_ms(started))
+        send_ms = _elapsed_ms(started)
+        if result is None:
+            return OrderResult(index, False, None, 'order_send returned no result', 0, 0, 0.0, 0.0,
+                               check_retcode, check_ms, send_ms)
+        ok = result.retcode in (TRADE_RETCODE_DONE, TRADE_RETCODE_PLACED, TRADE_RETCODE_DONE_PARTIAL)
+        return OrderResult(index, ok, result.retcode, result.comment, result.order, result.deal,
+                           result.volume, result.price, check_retcode, check_ms, send_ms)
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def submit_orders(source, requests, concurrency: Optional[int] = None, validate: bool = True, atomic: bool = False):
+    """One-off batch: ``OrderPipeline(source, ...).submit(requests)`` without keeping the pipeline"""
+    pipeline = OrderPipeline(source, concurrency=concurrency, validate=validate)
+    try:
+        return pipeline.submit(requests, atomic=atomic)
+    finally:
+        pipeline.close()
@@ -0,0 +1,237 @@
+"""
+Position and order book of one terminal, reconciled by ticket.
+
+Every EA used to call positions_get(symbol=...) and orders_get(symbol=...)
+on every loop and filter the result by magic number in Python, and the
+RiskManager did the same for its concurrent-position check. PositionBook
+fetches all positions (and, separately, all pending orders) with a single
+call at most once per ``max_age`` seconds, matches them to the previous
+snapshot by ticket, and keeps indexes by symbol, by magic number and by
+both, so a lookup costs the size of its answer instead of a terminal
+round-trip plus a scan.
+
+Reconciling yields deltas: ``open`` for a new ticket, ``modify`` when a
+ticket's volume, price, SL or TP (or an order's state) changed, and
+``close`` for a ticket that is gone. Subscribers get them as they are found.
+Price and profit moves are not deltas, but lookups always return the
+latest records.
+
+Trades sent through the book (``order_send``, or an OrderPipeline built on
+the book) mark it stale, so the next lookup sees their result; changes made
+elsewhere (SL/TP hits, other processes, manual trades) show up within
+``max_age``. A failed fetch keeps the previous snapshot rather than
+reporting every ticket closed.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+OPEN = 'open'
+MODIFY = 'modify'
+CLOSE = 'close'
+
+POSITION = 'position'
+ORDER = 'order'
+
+# Fields whose change is a modify delta
+_TRACKED = {
+    POSITION: ('volume', 'price_open', 'sl', 'tp'),
+    ORDER: ('volume_current', 'price_open', 'sl', 'tp', 'state'),
+}
+
+
+class Delta(NamedTuple):
+    event: str                  # OPEN, MODIFY or CLOSE
+    kind: str                   # POSITION or ORDER
+    record: Any                 # the TradePosition/TradeOrder (the last one seen for CLOSE)
+    previous: Optional[Any]     # the record before a MODIFY; None otherwise
+
+
+class _Side:
+    """Records of one kind by ticket, and ticket indexes by symbol, magic and (symbol, magic)"""
+
+    def __init__(self, kind, fetch):
+        self.kind = kind
+        self.fetch = fetch
+        self.tracked = _TRACKED[kind]
+        self.records = {}
+        self.by_symbol = {}
+        self.by_magic = {}
+        self.by_pair = {}
+        self.last_refresh = None
+
+    def _keys(self, record):
+        return ((self.by_symbol, record.symbol), (self.by_magic, record.magic),
+                (self.by_pair, (record.symbol, record.magic)))
+
+    def reconcile(self, fetched):
+        deltas = []
+        records = self.records
+        seen = set()
+        for record in fetched:
+            ticket = record.ticket
+            seen.add(ticket)
+            previous = records.get(ticket)
+            records[ticket] = record
+            if previous is None:
+                for index, key in self._keys(record):
+                    index.setdefault(key, {})[ticket] = None
+                deltas.append(Delta(OPEN, self.kind, record, None))
+            elif any(getattr(record, field) != getattr(previous, field) for field in self.tracked):
+                deltas.append(Delta(MODIFY, self.kind, record, previous))
+        if len(seen) < len(records):
+            for ticket in [ticket for ticket in records if ticket not in seen]:
+                record = records.pop(ticket)
+                for index, key in self._keys(record):
+                    tickets = index[key]
+                    del tickets[ticket]
+                    if not tickets:
+                        del index[key]
+                deltas.append(Delta(CLOSE, self.kind, record, None))
+        return deltas
+
+    def tickets(self, symbol, magic):
+        if symbol is None and magic is None:
+            return self.records
+        if magic is None:
+            return self.by_symbol.get(symbol, ())
+        if symbol is None:
+            return self.by_magic.get(magic, ())
+        return self.by_pair.get((symbol, magic), ())
+
+
+class PositionBook:
+    """
+    Cached open positions and pending orders of one terminal.
+
+    Args:
+        source: anything with positions_get and orders_get (the MetaTrader5
+            module or a backend terminal handle); order_send and order_check
+            are passed through to it.
+        max_age: seconds a snapshot is used before a lookup fetches again.
+
+    ``magic=None`` in a lookup means any magic number (0 is the magic of
+    manual trades).
+    """
+
+    def __init__(self, source, max_age: float = 0.5):
+        self.source = source
+        self.max_age = max_age
+        self._sides = {
+            POSITION: _Side(POSITION, lambda: source.positions_get()),
+            ORDER: _Side(ORDER, lambda: source.orders_get()),
+        }
+        self._subscribers = []
+        self._lock = threading.RLock()
+        self.fetches = 0
+        self.failed_fetches = 0
+        self.deltas = 0
+
+    def subscribe(self, callback):
+        """Call ``callback(delta)`` for every open/modify/close found from now on"""
+        self._subscribers = self._subscribers + [callback]
+        return callback
+
+    def unsubscribe(self, callback):
+        self._subscribers = [s for s in self._subscribers if s is not callback]
+
+    # Lookups
+
+    def positions(self, symbol=None, magic=None):
+        """Open positions, optionally of one symbol and/or magic number, oldest first"""
+        return self._lookup(POSITION, symbol, magic)
+
+    def orders(self, symbol=None, magic=None):
+        """Pending orders, optionally of one symbol and/or magic number, oldest first"""
+        return self._lookup(ORDER, symbol, magic)
+
+    def position_count(self, symbol=None, magic=None):
+        with self._lock:
+            self._fresh(POSITION)
+            return len(self._sides[POSITION].tickets(symbol, magic))
+
+    def order_count(self, symbol=None, magic=None):
+        with self._lock:
+            self._fresh(ORDER)
+            return len(self._sides[ORDER].tickets(symbol, magic))
+
+    def position(self, ticket):
+        """The open position ``ticket``, or None"""
+        with self._lock:
+            self._fresh(POSITION)
+            return self._sides[POSITION].records.get(ticket)
+
+    def order(self, ticket):
+        """The pending order ``ticket``, or None"""
+        with self._lock:
+            self._fresh(ORDER)
+            return self._sides[ORDER].records.get(ticket)
+
+    # Updates
+
+    def refresh(self, kind=None):
+        """Fetch and reconcile now (positions, orders or both); returns the deltas found"""
+        with self._lock:
+            deltas = []
+            for side in self._sides.values():
+                if kind is None or side.kind == kind:
+                    deltas.extend(self._refresh(side))
+        return deltas
+
+    def invalidate(self):
+        """Fetch again on the next lookup"""
+        with self._lock:
+            for side in self._sides.values():
+                side.last_refresh = None
+
+    def order_send(self, request):
+        """``source.order_send`` that makes the next lookup see the trade"""
+        try:
+            return self.source.order_send(request)
+        finally:
+            self.invalidate()
+
+    def order_check(self, request):
+        return self.source.order_check(request)
+
+    # Internals
+
+    def _lookup(self, kind, symbol, magic):
+        with self._lock:
+            self._fresh(kind)
+            side = self._sides[kind]
+            records = side.records
+            return [records[ticket] for ticket in side.tickets(symbol, magic)]
+
+    def _fresh(self, kind):
+        side = self._sides[kind]
+        if side.last_refresh is None or time.time() - side.last_refresh >= self.max_age:
+            self._refresh(side)
+
+    def _refresh(self, side):
+        fetched_at = time.time()
+        self.fetches += 1
+        try:
+            fetched = side.fetch()
+        except Exception as e:
+            fetched = None
+            logger.error(f"Fetching {side.kind}s failed: {e}")
+        if fetched is None:
+            # Keep the last snapshot; try again on the next lookup
+            self.failed_fetches += 1
+            return []
+        side.last_refresh = fetched_at
+        deltas = side.reconcile(fetched)
+        self.deltas += len(deltas)
+        for delta in deltas:
+            for callback in self._subscribers:
+                try:
+                    callback(delta)
+                except Exception as e:
+                    logger.error(f"Position book subscriber failed on {delta.event} {delta.kind} "
+                                 f"{delta.record.ticket}: {e}")
+        return deltas
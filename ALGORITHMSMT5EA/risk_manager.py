@@ -7,9 +7,21 @@ Centralized risk management utilities used by all Expert Advisors.
 Provides percentage-based position sizing, risk calculations, and safety checks.
 """
 
-import MetaTrader5 as mt5
+try:
+    import MetaTrader5 as mt5
+except ImportError:  # The web backend reaches the terminal through the MT5 gateway instead
+    mt5 = None
 from global_config import *
 
+try:
+    # Inside an EA process: the process-wide symbol metadata cache and position book
+    from ALGORITHMSMT5EA.common_ea import get_symbol_info as _symbol_info, position_book as _position_book
+except ImportError:
+    _position_book = None
+
+    def _symbol_info(symbol):
+        return mt5.symbol_info(symbol)
+
 class RiskManager:
     """Centralized risk management for all EAs"""
     
@@ -50,7 +62,7 @@ class RiskManager:
             risk_amount = balance * (risk_percent / 100)
             
             # Get symbol info
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = _symbol_info(symbol)
             if symbol_info is None:
                 return DEFAULT_LOT_SIZE
                 
@@ -89,7 +101,7 @@ class RiskManager:
             
         try:
             # Get symbol info for pip calculation
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = _symbol_info(symbol)
             if symbol_info is None:
                 return entry_price, entry_price
                 
@@ -163,12 +175,14 @@ class RiskManager:
     def check_concurrent_positions(self, symbol, magic_number=None):
         """Check if maximum concurrent positions reached"""
         try:
-            if magic_number:
-                positions = mt5.positions_get(symbol=symbol, magic=magic_number)
+            if _position_book is not None:
+                position_count = _position_book.position_count(symbol, magic_number or None)
             else:
                 positions = mt5.positions_get(symbol=symbol)
-                
-            position_count = len(positions) if positions else 0
+                if positions and magic_number:
+                    # positions_get has no magic filter
+                    positions = [p for p in positions if p.magic == magic_number]
+                position_count = len(positions) if positions else 0
             
             if position_count >= MAX_CONCURRENT_POSITIONS:
                 return False, f"Max concurrent positions reached ({position_count})"
@@ -222,26 +236,35 @@ class RiskManager:
             'risk_amount_per_trade': self.calculate_amount_from_percent(ACCOUNT_RISK_PERCENT)
         }
     
-    def calculate_current_risk(self, account):
-        """Calculate the current risk dynamically based on the MT5 account setup."""
+    def calculate_current_risk(self, account, terminal=None):
+        """Calculate the current risk dynamically based on the MT5 account setup.
+
+        ``terminal`` is any object exposing the MetaTrader5 functions (e.g. an MT5
+        gateway handle); defaults to the MetaTrader5 module of this process,
+        whose positions come from the EA process's position book.
+        """
+        book = _position_book if terminal is None else None
+        terminal = terminal or mt5
         try:
             # Fetch account balance
-            balance = self.get_account_balance()
+            account_info = terminal.account_info()
+            balance = account_info.balance if account_info is not None else 10000.0
 
             # Fetch open positions for the account
-            positions = mt5.positions_get()
+            positions = book.positions() if book is not None else terminal.positions_get()
             if positions is None:
                 return 0.0  # No open positions, no risk
 
             # Calculate total risk from open positions
+            allowed_symbols = getattr(account, 'allowed_symbols', None)
             total_risk = 0.0
             for position in positions:
-                if position.symbol in account.allowed_symbols:
+                if allowed_symbols is None or position.symbol in allowed_symbols:
                     # Risk is calculated as volume * price * tick value
-                    symbol_info = mt5.symbol_info(position.symbol)
+                    symbol_info = terminal.symbol_info(position.symbol)
                     if symbol_info:
                         tick_value = symbol_info.trade_tick_value
-                        total_risk += position.volume * position.price * tick_value
+                        total_risk += position.volume * position.price_open * tick_value
 
             # Convert total risk to percentage of account balance
             current_risk_percent = (total_risk / balance) * 100
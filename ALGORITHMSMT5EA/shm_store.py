@@ -0,0 +1,523 @@
+"""
+Shared-memory bar and tick store for all EA processes on one machine.
+
+Ten EA processes trading EURUSD each used to keep their own copy of the same
+M1 bars and ticks and each pulled them from the terminal. Here one writer
+process (``python -m ALGORITHMSMT5EA.shm_store``) fetches them once and
+publishes them into memory-mapped ring buffers, one file per (symbol,
+timeframe) plus one per symbol for ticks, and every EA maps the files
+read-only as numpy arrays. The pages live once in the OS page cache however
+many EAs map them; the terminal sees a single client.
+
+File layout: a 64-byte header (HEADER_DTYPE) followed by ``capacity``
+records of RATES_DTYPE or TICK_DTYPE. Records are numbered from 0 as they
+are written; record ``n`` sits in slot ``n % capacity`` and the valid ones
+are ``max(first, count - capacity) .. count - 1``. For bars the writer
+overwrites the newest record while it is still forming and appends once a
+new bar opens; ticks are only appended.
+
+Readers take no lock. The header's ``sequence`` is a seqlock: the writer
+makes it odd, writes the records and ``count``, then makes it even again. A
+reader copies what it needs between two reads of ``sequence`` and retries if
+the value was odd or changed. This relies on the writer's stores becoming
+visible in program order, which x86/x64 guarantees (the MT5 terminal only
+runs there). An unchanged ``sequence`` also tells a reader that nothing new
+was written, without copying anything.
+
+The EAs use the store when ``EA_SHM_DIR`` points at the writer's directory
+(see common_ea): SharedBars stands in for BarCache under the bar
+aggregator and SharedTicks for the terminal under the tick multiplexer.
+Anything the store does not hold, or holds stale because the writer
+stopped, is fetched from the terminal as before.
+"""
+
+import argparse
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'EASHM001'
+VERSION = 1
+KIND_BARS = 0
+KIND_TICKS = 1
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'), ('version', '<u4'), ('kind', '<u4'), ('record_size', '<u4'), ('capacity', '<u4'),
+    ('sequence', '<u8'), ('count', '<u8'), ('first', '<u8'), ('updated', '<f8'), ('writer_pid', '<u4'),
+    ('reserved', 'V4'),
+])
+HEADER_SIZE = HEADER_DTYPE.itemsize
+
+# The record layouts MetaTrader5 returns from copy_rates_* and copy_ticks_*
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8'),
+])
+TICK_DTYPE = np.dtype([
+    ('time', '<i8'), ('bid', '<f8'), ('ask', '<f8'), ('last', '<f8'), ('volume', '<u8'),
+    ('time_msc', '<i8'), ('flags', '<u4'), ('volume_real', '<f8'),
+])
+_DTYPES = {KIND_BARS: RATES_DTYPE, KIND_TICKS: TICK_DTYPE}
+
+TIMEFRAMES = {'M1': 1, 'M5': 5, 'M15': 15, 'M30': 30, 'H1': 0x4000 | 1, 'H4': 0x4000 | 4, 'D1': 0x4000 | 24}
+COPY_TICKS_ALL = -1
+
+BAR_CAPACITY = 2048
+TICK_CAPACITY = 65536
+# Store data older than this (writer stopped or stuck) is not used
+STALE_AFTER = 5.0
+READ_RETRIES = 100
+
+
+def default_directory():
+    """``EA_SHM_DIR``, else /dev/shm (RAM-backed) where it exists, else the temp directory"""
+    directory = os.environ.get('EA_SHM_DIR')
+    if directory:
+        return directory
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, 'mt5_ea_store')
+
+
+def _safe(symbol):
+    return re.sub(r'[^A-Za-z0-9._-]', '_', symbol)
+
+
+def bars_path(directory, symbol, timeframe):
+    return os.path.join(directory, f"{_safe(symbol)}_{timeframe}.bars")
+
+
+def ticks_path(directory, symbol):
+    return os.path.join(directory, f"{_safe(symbol)}.ticks")
+
+
+class StoreWriter:
+    """
+    Owner of one ring file. Only one process may write a file; run one
+    writer per directory.
+
+    Args:
+        path: the file; created (or recreated if its layout differs) as needed.
+        kind: KIND_BARS or KIND_TICKS.
+        capacity: records kept.
+    """
+
+    def __init__(self, path, kind, capacity):
+        self.path = path
+        self.kind = kind
+        self.dtype = _DTYPES[kind]
+        self.capacity = capacity
+        self._map = self._open()
+        self.header = self._map[:HEADER_SIZE].view(HEADER_DTYPE)
+        self.records = self._map[HEADER_SIZE:].view(self.dtype)
+        self.header['writer_pid'] = os.getpid()
+        if self.header['sequence'][0] % 2:
+            # A previous writer died mid-write; the records it was writing are suspect
+            self.header['first'] = self.header['count']
+            self.header['sequence'] += 1
+
+    def _open(self):
+        size = HEADER_SIZE + self.capacity * self.dtype.itemsize
+        if os.path.exists(self.path) and os.path.getsize(self.path) == size:
+            existing = np.memmap(self.path, dtype=np.uint8, mode='r+')
+            header = existing[:HEADER_SIZE].view(HEADER_DTYPE)[0]
+            if (header['magic'] == MAGIC and header['version'] == VERSION and header['kind'] == self.kind
+                    and header['record_size'] == self.dtype.itemsize and header['capacity'] == self.capacity):
+                # Same layout: carry on where the previous writer stopped, readers keep their cursors
+                return existing
+            del existing
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header['magic'], header['version'], header['kind'] = MAGIC, VERSION, self.kind
+        header['record_size'], header['capacity'] = self.dtype.itemsize, self.capacity
+        # Build the file aside and move it in, so no reader ever maps a half-written header
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(header.tobytes())
+            f.truncate(size)
+        os.replace(temporary, self.path)
+        return np.memmap(self.path, dtype=np.uint8, mode='r+')
+
+    @property
+    def count(self):
+        return int(self.header['count'][0])
+
+    def heartbeat(self):
+        """Mark the data as current without writing records"""
+        self.header['updated'] = time.time()
+
+    def append(self, records):
+        """Append records (ticks, or bars newer than the stored ones)"""
+        self._write(records, overwrite_last=False)
+
+    def publish_bars(self, bars):
+        """
+        Merge the latest bars (oldest first, as copy_rates_from_pos returns
+        them): the stored forming bar is overwritten, newer bars appended. If
+        the bars do not continue the stored ones (history rebuilt), the store
+        restarts from them.
+        """
+        if bars is None or len(bars) == 0:
+            self.heartbeat()
+            return
+        count, first = self.count, int(self.header['first'][0])
+        if count > max(first, count - self.capacity):
+            last_time = self.records['time'][(count - 1) % self.capacity]
+            position = int(np.searchsorted(bars['time'], last_time))
+            if position < len(bars) and bars['time'][position] == last_time:
+                self._write(bars[position:], overwrite_last=True)
+                return
+            if position == 0:
+                # All newer than the store: a gap the store cannot fill, start over from these bars
+                self._write(bars, restart=True)
+                return
+            if position == len(bars):
+                # Nothing as new as the stored bars
+                self.heartbeat()
+                return
+            # The stored last bar is gone from the history
+            self._write(bars, restart=True)
+            return
+        self._write(bars)
+
+    def _write(self, records, overwrite_last=False, restart=False):
+        records = np.asarray(records)
+        if records.dtype != self.dtype:
+            records = records.astype(self.dtype)
+        if len(records) > self.capacity:
+            records = records[-self.capacity:]
+        header = self.header
+        count = int(header['count'][0])
+        start = count - 1 if overwrite_last else count
+        header['sequence'] += 1
+        slots = (start + np.arange(len(records))) % self.capacity
+        self.records[slots] = records
+        if restart:
+            header['first'] = start
+        header['count'] = start + len(records)
+        header['updated'] = time.time()
+        header['sequence'] += 1
+
+    def close(self):
+        self._map.flush()
+        self.header = self.records = self._map = None
+
+
+class StoreReader:
+    """
+    Read-only view of one ring file.
+
+    Raises FileNotFoundError if the file does not exist and ValueError if
+    it is not a store file of the expected kind.
+    """
+
+    def __init__(self, path, kind):
+        self.path = path
+        self.kind = kind
+        self._map = np.memmap(path, dtype=np.uint8, mode='r')
+        header = self._map[:HEADER_SIZE].view(HEADER_DTYPE)
+        if header['magic'][0] != MAGIC or header['version'][0] != VERSION or header['kind'][0] != kind:
+            raise ValueError(f"{path} is not a {('bar', 'tick')[kind]} store file")
+        self.dtype = _DTYPES[kind]
+        if header['record_size'][0] != self.dtype.itemsize:
+            raise ValueError(f"{path} has {header['record_size'][0]}-byte records, expected {self.dtype.itemsize}")
+        self.header = header
+        self.capacity = int(header['capacity'][0])
+        self.records = self._map[HEADER_SIZE:HEADER_SIZE + self.capacity * self.dtype.itemsize].view(self.dtype)
+        self._inode = os.stat(path).st_ino
+        self.retries = 0
+        self.records_skipped = 0
+
+    @property
+    def sequence(self):
+        """Changes whenever records are written; odd while a write is in progress"""
+        return int(self.header['sequence'][0])
+
+    @property
+    def updated(self):
+        return float(self.header['updated'][0])
+
+    def fresh(self, stale_after=STALE_AFTER):
+        return time.time() - self.updated <= stale_after
+
+    def replaced(self):
+        """True if the writer recreated the file since it was mapped (map it again)"""
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except OSError:
+            return True
+
+    def latest(self, count):
+        """Copy of the newest ``count`` records (fewer if the store has fewer), oldest first;
+        None if the writer kept it busy for every retry"""
+        return self._read(lambda low, high: (max(low, high - count), high))
+
+    def read_from(self, index, count=None):
+        """
+        Records numbered ``index`` onwards (at most ``count``) and the number
+        after the last one returned, for tailing the store: pass that back as
+        ``index`` next time. Records already overwritten are skipped; the
+        number skipped is ``first returned - index``, reported by
+        ``records_skipped``. Returns (None, index) if the read kept failing.
+        """
+        def window(low, high):
+            start = min(max(index, low), high)
+            return start, high if count is None else min(high, start + count)
+        result = self._read(window, with_range=True)
+        if result is None:
+            return None, index
+        records, start, end = result
+        self.records_skipped = start - index if start > index else 0
+        return records, end
+
+    def find(self, field, value):
+        """Number of the first record whose ``field`` is >= ``value`` (binary search over the ring)
+        and the number of the oldest record held; None if the read kept failing"""
+        for _ in range(READ_RETRIES):
+            before = self.sequence
+            if before % 2 == 0:
+                low, high = self._bounds()
+                lo, hi = low, high
+                column = self.records[field]
+                while lo < hi:
+                    middle = (lo + hi) // 2
+                    if column[middle % self.capacity] < value:
+                        lo = middle + 1
+                    else:
+                        hi = middle
+                if self.sequence == before:
+                    return lo, low
+            self.retries += 1
+            time.sleep(0)
+        return None
+
+    def _bounds(self):
+        count = int(self.header['count'][0])
+        return max(int(self.header['first'][0]), count - self.capacity), count
+
+    def _read(self, window, with_range=False):
+        for _ in range(READ_RETRIES):
+            before = self.sequence
+            if before % 2 == 0:
+                start, end = window(*self._bounds())
+                first, last = start % self.capacity, (end - 1) % self.capacity + 1
+                if end <= start:
+                    records = np.empty(0, dtype=self.dtype)
+                elif first < last:
+                    records = self.records[first:last].copy()
+                else:
+                    records = np.concatenate((self.records[first:], self.records[:last]))
+                if self.sequence == before:
+                    return (records, start, end) if with_range else records
+            self.retries += 1
+            time.sleep(0)
+        logger.warning(f"{self.path}: no consistent read after {READ_RETRIES} attempts")
+        return None
+
+    def close(self):
+        self.header = self.records = self._map = None
+
+
+class _Readers:
+    """Readers opened on demand per file; missing, foreign, stale or replaced files read as None"""
+
+    def __init__(self, directory, stale_after):
+        self.directory = directory
+        self.stale_after = stale_after
+        self._readers = {}
+
+    def get(self, path, kind):
+        reader = self._readers.get(path)
+        if reader is not None and reader.fresh(self.stale_after):
+            return reader
+        if reader is not None and reader.replaced():
+            reader = None
+        if reader is None:
+            try:
+                reader = StoreReader(path, kind)
+            except FileNotFoundError:
+                return None
+            except (ValueError, OSError) as e:
+                logger.warning(f"Ignoring store file {path}: {e}")
+                return None
+            self._readers[path] = reader
+        return reader if reader.fresh(self.stale_after) else None
+
+
+class SharedBars:
+    """
+    BarCache-compatible bar source reading the store, for BarAggregator and
+    IndicatorFeed. Requests the store cannot serve (no file, stale, or more
+    bars than it holds) go to ``fallback``, normally the process's BarCache.
+
+    Unlike BarCache.get the result is a private copy, but it is returned
+    again, without copying, as long as the writer has not written anything.
+    """
+
+    def __init__(self, fallback, directory=None, stale_after=STALE_AFTER):
+        self.fallback = fallback
+        self._readers = _Readers(directory or default_directory(), stale_after)
+        self._last = {}
+        self.store_reads = 0
+        self.fallback_reads = 0
+
+    def get(self, symbol, timeframe, count, max_age=0.0):
+        reader = self._readers.get(bars_path(self._readers.directory, symbol, timeframe), KIND_BARS)
+        if reader is not None:
+            key = (symbol, timeframe)
+            sequence = reader.sequence
+            last = self._last.get(key)
+            if last is not None and last[0] == sequence and last[1] == count:
+                return last[2]
+            bars = reader.latest(count)
+            if bars is not None and len(bars) == count:
+                self._last[key] = (sequence, count, bars)
+                self.store_reads += 1
+                return bars
+        self.fallback_reads += 1
+        return self.fallback.get(symbol, timeframe, count, max_age=max_age)
+
+    def invalidate(self, symbol=None, timeframe=None):
+        for key in list(self._last):
+            if (symbol is None or key[0] == symbol) and (timeframe is None or key[1] == timeframe):
+                del self._last[key]
+        self.fallback.invalidate(symbol, timeframe)
+
+
+class SharedTicks:
+    """
+    Tick source for TickMultiplexer: copy_ticks_from is served from the
+    store when it holds the requested span, otherwise by ``terminal``.
+    symbol_info_tick always goes to the terminal.
+    """
+
+    def __init__(self, terminal, directory=None, stale_after=STALE_AFTER):
+        self.terminal = terminal
+        self._readers = _Readers(directory or default_directory(), stale_after)
+        self.store_reads = 0
+        self.fallback_reads = 0
+
+    def symbol_info_tick(self, symbol):
+        return self.terminal.symbol_info_tick(symbol)
+
+    def copy_ticks_from(self, symbol, date_from, count, flags):
+        reader = self._readers.get(ticks_path(self._readers.directory, symbol), KIND_TICKS)
+        if reader is not None and flags == COPY_TICKS_ALL:
+            found = reader.find('time_msc', int(date_from * 1000))
+            if found is not None:
+                index, oldest = found
+                # The ring must reach back past date_from, else older ticks may be missing
+                if index > oldest:
+                    ticks, _ = reader.read_from(index, count)
+                    if ticks is not None and reader.records_skipped == 0:
+                        self.store_reads += 1
+                        return ticks
+        self.fallback_reads += 1
+        return self.terminal.copy_ticks_from(symbol, date_from, count, flags)
+
+
+class StoreFeeder:
+    """
+    The writer side: keeps the store files of ``symbols`` up to date from one
+    terminal connection.
+
+    Args:
+        bars: a BarCache (only new bars are fetched each pass).
+        ticks: a TickMultiplexer, or None to store no ticks.
+    """
+
+    def __init__(self, bars, ticks, symbols, timeframes=(TIMEFRAMES['M1'],), directory=None,
+                 bar_capacity=BAR_CAPACITY, tick_capacity=TICK_CAPACITY):
+        directory = directory or default_directory()
+        self.bars = bars
+        self.ticks = ticks
+        self.directory = directory
+        self.bar_capacity = bar_capacity
+        self._bar_writers = {(symbol, timeframe): StoreWriter(bars_path(directory, symbol, timeframe),
+                                                              KIND_BARS, bar_capacity)
+                             for symbol in symbols for timeframe in timeframes}
+        self._tick_writers = {}
+        if ticks is not None:
+            for symbol in symbols:
+                self._tick_writers[symbol] = (StoreWriter(ticks_path(directory, symbol), KIND_TICKS, tick_capacity),
+                                              ticks.subscribe(symbol))
+        self.passes = 0
+
+    def poll(self):
+        """One pass: new ticks, then the bars of every (symbol, timeframe)"""
+        if self.ticks is not None:
+            self.ticks.poll()
+        for writer, subscription in self._tick_writers.values():
+            ticks = subscription.drain()
+            if ticks is not None:
+                writer.append(ticks)
+            else:
+                writer.heartbeat()
+        for (symbol, timeframe), writer in self._bar_writers.items():
+            try:
+                writer.publish_bars(self.bars.get(symbol, timeframe, self.bar_capacity))
+            except Exception as e:
+                logger.error(f"Storing {symbol} {timeframe} bars failed: {e}")
+        self.passes += 1
+
+    def run(self, interval=0.1):
+        while True:
+            started = time.monotonic()
+            self.poll()
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    def close(self):
+        for writer in self._bar_writers.values():
+            writer.close()
+        for writer, subscription in self._tick_writers.values():
+            self.ticks.unsubscribe(subscription)
+            writer.close()
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Publish bars and ticks to the shared store for the EAs")
+    parser.add_argument('--symbols', nargs='+', required=True)
+    parser.add_argument('--timeframes', nargs='+', default=['M1', 'M5', 'M15', 'H1', 'H4', 'D1'],
+                        choices=sorted(TIMEFRAMES))
+    parser.add_argument('--no-ticks', action='store_true', help="store bars only")
+    parser.add_argument('--directory', default=None, help="store directory (default: EA_SHM_DIR or /dev/shm)")
+    parser.add_argument('--interval', type=float, default=0.1, help="seconds between passes")
+    parser.add_argument('--bar-capacity', type=int, default=BAR_CAPACITY)
+    parser.add_argument('--tick-capacity', type=int, default=TICK_CAPACITY)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from global_config import get_account_credentials
+    from ALGORITHMSMT5EA.bar_cache import BarCache
+    from ALGORITHMSMT5EA.common_ea import initialize_mt5, mt5
+    from ALGORITHMSMT5EA.tick_stream import TickMultiplexer
+
+    credentials = get_account_credentials()
+    if not initialize_mt5(credentials['login'], credentials['password'], credentials['server']):
+        logging.error("Failed to initialize MT5. Exiting.")
+        return
+    # Its own cache and multiplexer on the terminal: common_ea's read this store when EA_SHM_DIR is set
+    feeder = StoreFeeder(BarCache(mt5), None if args.no_ticks else TickMultiplexer(mt5), args.symbols,
+                         [TIMEFRAMES[name] for name in args.timeframes], args.directory,
+                         args.bar_capacity, args.tick_capacity)
+    print(f"Publishing {', '.join(args.symbols)} to {feeder.directory}")
+    try:
+        feeder.run(args.interval)
+    except KeyboardInterrupt:
+        print("Store writer stopped by user")
+    finally:
+        feeder.close()
+        mt5.shutdown()
+
+
+if __name__ == "__main__":
+    main()
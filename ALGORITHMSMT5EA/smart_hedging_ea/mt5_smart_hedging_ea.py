@@ -8,9 +8,7 @@ It uses dynamic partial hedging, volatility and trend filters, and robust risk c
 """
 
 import MetaTrader5 as mt5
-import pandas as pd
 import numpy as np
-import time
 import sys
 import os
 
@@ -18,9 +16,15 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from global_config import get_account_credentials, get_risk_settings
 from risk_manager import RiskManager
 # Import common EA utilities
-from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, check_pause_flag
+from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, entries_allowed, order_pipeline, position_book, EA
+from ALGORITHMSMT5EA import indicator_kernels as kernels
+
+class SmartHedgingEA(EA):
+    timer_interval = 60  # drawdown check and hedge signal
+    # Changeable through set_params
+    tunable_params = {'base_lot': float, 'hedge_ratio': float, 'trailing_enabled': bool, 'trailing_distance_points': int,
+                      'max_drawdown_percent': float}
 
-class SmartHedgingEA:
     def __init__(self, symbol="US500", base_lot=0.1, hedge_ratio=0.5, magic_number=54321):
         credentials = get_account_credentials()
         self.symbol = credentials.get('symbol', symbol)
@@ -53,20 +57,21 @@ class SmartHedgingEA:
             print("Max drawdown reached! Closing all positions.")
             self.close_all_positions()
         # Trailing stop logic for all positions
-        positions = mt5.positions_get(symbol=self.symbol)
+        positions = position_book.positions(self.symbol, self.magic_number)
         if positions:
             for pos in positions:
                 # Placeholder for trailing stop and partial close
                 pass
 
     def close_all_positions(self):
-        positions = mt5.positions_get(symbol=self.symbol)
+        positions = position_book.positions(self.symbol, self.magic_number)
         if not positions:
             return
+        requests = []
         for pos in positions:
             order_type = mt5.ORDER_TYPE_SELL if pos.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
             price = self.get_current_price()[0] if order_type == mt5.ORDER_TYPE_SELL else self.get_current_price()[1]
-            request = {
+            requests.append({
                 "action": mt5.TRADE_ACTION_DEAL,
                 "symbol": self.symbol,
                 "volume": pos.volume,
@@ -78,8 +83,10 @@ class SmartHedgingEA:
                 "comment": "Smart Hedging EA Close",
                 "type_time": mt5.ORDER_TIME_GTC,
                 "type_filling": mt5.ORDER_FILLING_IOC,
-            }
-            result = mt5.order_send(request)
+            })
+        # One batch, without order_check, so closing takes about one round-trip
+        results = order_pipeline.submit(requests, validate=False)
+        for pos, result in zip(positions, results):
             if result.retcode == mt5.TRADE_RETCODE_DONE:
                 print(f"Closed position {pos.ticket}")
 
@@ -88,34 +95,25 @@ class SmartHedgingEA:
         data = self.get_market_data() if hasattr(self, 'get_market_data') else None
         if data is None or len(data) < 50:
             return None
-        atr = data['high'].rolling(window=14).max() - data['low'].rolling(window=14).min()
-        fast_ma = data['close'].rolling(window=10).mean()
-        slow_ma = data['close'].rolling(window=30).mean()
-        if atr.iloc[-1] > atr.mean() * 1.5:
+        atr = kernels.channel(data, 14)
+        fast_ma = kernels.sma(data, 10)
+        slow_ma = kernels.sma(data, 30)
+        if atr[-1] > np.nanmean(atr) * 1.5:
             return "HEDGE"
-        if fast_ma.iloc[-1] < slow_ma.iloc[-1]:
+        if fast_ma[-1] < slow_ma[-1]:
             return "HEDGE"
         return None
 
-    def run(self):
-        if not self.initialize_mt5():
-            return
-        self.is_running = True
+    def on_start(self):
         print("Smart Hedging EA started...")
-        try:
-            while self.is_running:
-                # Pause logic: check for pause.flag in working directory
-                check_pause_flag(os.path.dirname(os.path.abspath(__file__)))
-                self.manage_positions()
-                signal = self.get_signal()
-                if signal == "HEDGE":
-                    print("Hedge signal detected. Opening hedge position.")
-                    self.open_hedge_position("BUY")  # Example: always hedge against BUY
-                time.sleep(60)
-        except KeyboardInterrupt:
-            print("EA stopped by user")
-        finally:
-            self.stop()
+        return True
+
+    def on_timer(self):
+        self.manage_positions()
+        signal = self.get_signal()
+        if signal == "HEDGE" and entries_allowed():
+            print("Hedge signal detected. Opening hedge position.")
+            self.open_hedge_position("BUY")  # Example: always hedge against BUY
 
     def stop(self):
         self.is_running = False
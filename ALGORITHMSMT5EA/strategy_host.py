@@ -0,0 +1,162 @@
+"""
+Strategy host: many EA instances in one Python process.
+
+Running each EA script as its own process costs 80-150 MB RSS and several
+seconds of pandas/numpy/MetaTrader5 imports per instance. The host imports
+them once, initializes the terminal once and drives any number of EA
+instances (e.g. CandyEA on EURUSD, LiquidityEA on GBPUSD and GridTradingEA on
+ETHUSD) from one event loop.
+
+Every EA is an ``EA`` subclass (common_ea), and the host adds all instances
+to one ``EventLoop``: their tick, bar-close, position and timer hooks run on
+one thread, and instances trading the same symbol share its tick and
+position polls. MT5 calls are process-global and serialized anyway, so a
+single thread costs nothing against one process per EA.
+
+Usage (from the project root):
+    python -m ALGORITHMSMT5EA.strategy_host candy_ea:EURUSD liquidity_ea:GBPUSD grid_trading_ea:ETHUSD
+    python -m ALGORITHMSMT5EA.strategy_host --config instances.json
+
+``instances.json`` is a list of ``{"algorithm": "candy_ea", "symbol": "EURUSD",
+"options": {...}}`` objects. ``options`` are passed to the EA constructor.
+All instances trade the account from global_config.
+"""
+
+import argparse
+import importlib
+import inspect
+import json
+import logging
+import os
+import sys
+
+import MetaTrader5 as mt5
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from global_config import HEARTBEAT_INTERVAL, RESTART_ON_ERROR, get_account_credentials
+from ALGORITHMSMT5EA.common_ea import EventLoop, initialize_mt5
+
+
+ALGORITHMS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# EA folder -> class in its mt5_<folder>.py
+EA_CLASSES = {
+    'candy_ea': 'CandyEA',
+    'grid_trading_ea': 'GridTradingEA',
+    'hf_scalping_ea': 'HighFrequencyScalpingEA',
+    'indices_hedging_ea': 'IndicesHedgingEA',
+    'indices_martingale_ea': 'IndicesMartingaleEA',
+    'liquidity_ea': 'LiquidityEA',
+    'news_ea': 'NewsEA',
+    'smart_hedging_ea': 'SmartHedgingEA',
+    'trailing_stop_ea': 'TrailingStopManager',
+    'trend_following_ea': 'TrendFollowingEA',
+}
+
+logger = logging.getLogger(__name__)
+
+
+def load_ea_class(algorithm):
+    """Import ``<algorithm>/mt5_<algorithm>.py`` and return its EA class"""
+    class_name = EA_CLASSES.get(algorithm)
+    if class_name is None:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    ea_dir = os.path.join(ALGORITHMS_DIR, algorithm)
+    # Some EAs import their own config.py as ``config``, as when run as a script
+    sys.path.insert(0, ea_dir)
+    sys.modules.pop('config', None)
+    try:
+        module = importlib.import_module(f"ALGORITHMSMT5EA.{algorithm}.mt5_{algorithm}")
+    finally:
+        sys.path.remove(ea_dir)
+    return getattr(module, class_name)
+
+
+class StrategyHost:
+    """
+    Runs EA instances side by side on one terminal connection.
+
+    Args:
+        restart_on_error: keep an instance whose hook raised (suspended for
+            ``error_delay`` seconds) instead of dropping it.
+        stats_interval: seconds between per-instance statistics log lines.
+    """
+
+    def __init__(self, login=None, password=None, server=None,
+                 restart_on_error=RESTART_ON_ERROR, error_delay=5.0,
+                 stats_interval=HEARTBEAT_INTERVAL):
+        if login is None:
+            credentials = get_account_credentials()
+            login, password, server = credentials['login'], credentials['password'], credentials['server']
+        self.login = login
+        self.password = password
+        self.server = server
+        self.loop = EventLoop(restart_on_error=restart_on_error, error_delay=error_delay,
+                              stats_interval=stats_interval)
+        self.instances = []
+
+    def add(self, algorithm, symbol=None, **options):
+        """Create an EA instance; ``options`` go to its constructor"""
+        ea_class = load_ea_class(algorithm)
+        if symbol and 'symbol' in inspect.signature(ea_class).parameters:
+            options['symbol'] = symbol
+        ea = ea_class(**options)
+        if symbol:
+            # Also covers EAs that pick their symbol from global or local config
+            ea.symbol = symbol
+        hosted = self.loop.add(ea, name=f"{algorithm}:{getattr(ea, 'symbol', '')}")
+        self.instances.append(hosted)
+        return hosted
+
+    def run(self):
+        if not self.instances:
+            print("No EA instances to run")
+            return
+        if not initialize_mt5(self.login, self.password, self.server):
+            logging.error("Failed to initialize MT5. Exiting.")
+            return
+        print(f"Strategy host starting {len(self.instances)} EA instances")
+        logging.info(f"Strategy host starting {len(self.instances)} EA instances")
+        try:
+            self.loop.run()
+        except KeyboardInterrupt:
+            print("Strategy host stopped by user")
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Stop the loop and close the terminal connection; positions and orders are kept"""
+        self.loop.stop()
+        for hosted in self.instances:
+            hosted.ea.is_running = False
+            logging.info(hosted.stats())
+        mt5.shutdown()
+        print("Strategy host stopped and MT5 connection closed")
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run several EA instances in one process")
+    parser.add_argument('instances', nargs='*', metavar='ALGORITHM[:SYMBOL]',
+                        help="e.g. candy_ea:EURUSD (algorithm = EA folder name)")
+    parser.add_argument('--config', help="JSON list of {algorithm, symbol, options} objects")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    specs = []
+    if args.config:
+        with open(args.config) as f:
+            specs.extend(json.load(f))
+    for instance in args.instances:
+        algorithm, _, symbol = instance.partition(':')
+        specs.append({'algorithm': algorithm, 'symbol': symbol or None})
+
+    host = StrategyHost()
+    for spec in specs:
+        host.add(spec['algorithm'], spec.get('symbol'), **spec.get('options', {}))
+    host.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Process-wide cache of symbol metadata.
+
+symbol_info is called in the hot paths of the EAs: twice per order in the
+grid EA, in every trailing-stop update and in every RiskManager sizing call.
+Each call is a terminal round-trip, mostly for data that does not change
+while the EA runs (point, digits, volume limits, contract size).
+
+SymbolCache fetches symbol_info once per symbol and hands out a
+CachedSymbolInfo that reads like the terminal's SymbolInfo:
+
+- static fields come from the cached copy until ``invalidate()``;
+- fields that drift, like trade_tick_value of a cross pair or the swaps, are
+  refreshed when read and older than ``refresh_seconds``;
+- quote fields (bid, ask, spread, last, session_*, price_*) are always read
+  from the terminal, as before.
+"""
+
+import threading
+import time
+
+# Refreshed when older than refresh_seconds
+VOLATILE_FIELDS = frozenset({
+    'trade_tick_value', 'trade_tick_value_profit', 'trade_tick_value_loss',
+    'swap_long', 'swap_short', 'margin_initial', 'margin_maintenance',
+    'trade_mode', 'visible', 'select',
+})
+
+# Always read from the terminal
+QUOTE_FIELDS = frozenset({
+    'bid', 'bidhigh', 'bidlow', 'ask', 'askhigh', 'asklow', 'last', 'lasthigh', 'lastlow',
+    'volume', 'volumehigh', 'volumelow', 'volume_real', 'volumehigh_real', 'volumelow_real',
+    'time', 'time_msc', 'spread',
+})
+QUOTE_PREFIXES = ('session_', 'price_')
+
+
+class CachedSymbolInfo:
+    """Attribute access like the terminal's SymbolInfo, served from the cache where possible"""
+
+    def __init__(self, cache, symbol, info):
+        self._cache = cache
+        self._symbol = symbol
+        self._info = info
+        self._fetched = time.time()
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name in QUOTE_FIELDS or name.startswith(QUOTE_PREFIXES):
+            info = self._cache._fetch(self._symbol)
+            return getattr(info if info is not None else self._info, name)
+        if name in VOLATILE_FIELDS and time.time() - self._fetched > self._cache.refresh_seconds:
+            self._cache._refresh(self)
+        return getattr(self._info, name)
+
+    def _asdict(self):
+        return self._info._asdict()
+
+    def __repr__(self):
+        return repr(self._info)
+
+
+class SymbolCache:
+    """
+    Symbol metadata per symbol for one terminal connection.
+
+    Args:
+        source: anything with symbol_info (the MetaTrader5 module or a
+            backend terminal handle).
+        refresh_seconds: age after which volatile fields are fetched again.
+    """
+
+    def __init__(self, source, refresh_seconds=60.0):
+        self.source = source
+        self.refresh_seconds = refresh_seconds
+        self._symbols = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fetches = 0
+
+    def get(self, symbol):
+        """CachedSymbolInfo of ``symbol``, or None if the terminal does not know it"""
+        cached = self._symbols.get(symbol)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        info = self._fetch(symbol)
+        if info is None:
+            return None
+        with self._lock:
+            cached = self._symbols.get(symbol)
+            if cached is None:
+                cached = self._symbols[symbol] = CachedSymbolInfo(self, symbol, info)
+        return cached
+
+    def invalidate(self, symbol=None):
+        """Forget one symbol, or all of them (e.g. after logging in to another account)"""
+        with self._lock:
+            if symbol is None:
+                self._symbols.clear()
+            else:
+                self._symbols.pop(symbol, None)
+
+    def _fetch(self, symbol):
+        self.fetches += 1
+        return self.source.symbol_info(symbol)
+
+    def _refresh(self, cached):
+        info = self._fetch(cached._symbol)
+        if info is not None:
+            cached._info = info
+        # Also on failure, so a disconnected terminal is not asked on every access
+        cached._fetched = time.time()
@@ -0,0 +1,118 @@
+# Locally aggregated bars vs. the terminal's own bars, on the offline terminal (runs without a terminal)
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ALGORITHMSMT5EA import offline_mt5
+from ALGORITHMSMT5EA.bar_aggregator import DEFAULT_TIMEFRAMES, TIMEFRAME_H1, TIMEFRAME_M1, BarAggregator
+from ALGORITHMSMT5EA.bar_cache import BarCache
+
+# Steps of the simulated clock: within a bar, across bar closes, and gaps longer than an H4 bar
+STEPS = [1, 3, 45, 61, 600, 5000, 20000]
+
+
+def assert_same_bars(name, got, expected):
+    assert got is not None, f"{name}: no bars"
+    assert len(got) == len(expected), f"{name}: {len(got)} bars, terminal has {len(expected)}"
+    for field in expected.dtype.names:
+        assert np.array_equal(got[field], expected[field]), \
+            f"{name}: {field} differs, {got[field][-3:]} != {expected[field][-3:]}"
+
+
+def replay(check, days=3, steps=1000, seed=5):
+    """Run ``check(terminal, step)`` after each random clock step of an offline replay"""
+    terminal = offline_mt5.install(patch_clock=True, duration_days=days, history_days=30)
+    try:
+        terminal.initialize()
+        rng = random.Random(seed)
+        for step in range(steps):
+            time.sleep(rng.choice(STEPS))
+            check(terminal, step)
+    finally:
+        offline_mt5.uninstall()
+
+
+def test_aggregated_from_m1():
+    bars = {}
+    closed = []
+
+    def check(terminal, step):
+        if 'aggregator' not in bars:
+            bars['cache'] = BarCache(terminal)
+            bars['aggregator'] = BarAggregator(bars['cache'], max_age=0)
+            bars['aggregator'].subscribe(lambda symbol, timeframe, bar: closed.append((timeframe, bar)))
+        for timeframe in DEFAULT_TIMEFRAMES:
+            got = bars['aggregator'].get("EURUSD", timeframe, 40).copy()
+            assert_same_bars(f"step {step} timeframe {timeframe}", got,
+                             terminal.copy_rates_from_pos("EURUSD", timeframe, 0, 40))
+
+    replay(check)
+    aggregator = bars['aggregator']
+    assert aggregator.seeds == len(DEFAULT_TIMEFRAMES), f"{aggregator.seeds} seeds"
+    # Every H1 close event carries the bar the terminal shows for that hour
+    hours = [bar for timeframe, bar in closed if timeframe == TIMEFRAME_H1]
+    assert hours and all(bar['time'] % 3600 == 0 for bar in hours)
+    assert len({int(bar['time']) for bar in hours}) == len(hours), "an H1 bar closed twice"
+    print(f"✅ M1 aggregation matches the terminal: {len(closed)} bar closes, {aggregator.seeds} history fetches")
+
+
+def test_aggregated_from_ticks():
+    timeframes = (TIMEFRAME_M1,) + DEFAULT_TIMEFRAMES
+    state = {}
+
+    def check(terminal, step):
+        now_ms = int(time.time() * 1000)
+        if 'aggregator' not in state:
+            state['aggregator'] = BarAggregator(BarCache(terminal), timeframes=timeframes, max_age=0)
+            state['point'] = terminal.symbol_info("GBPUSD").point
+            ticks = np.zeros(0, dtype=offline_mt5.TICK_DTYPE)
+        else:
+            last_ms = state['last_ms']
+            ticks = terminal.copy_ticks_range("GBPUSD", last_ms / 1000, now_ms / 1000, offline_mt5.COPY_TICKS_ALL)
+            ticks = ticks[(ticks['time_msc'] > last_ms) & (ticks['time_msc'] <= now_ms)]
+        state['last_ms'] = now_ms
+        state['aggregator'].update_ticks("GBPUSD", ticks, state['point'])
+        for timeframe in timeframes:
+            got = state['aggregator'].get("GBPUSD", timeframe, 40).copy()
+            assert_same_bars(f"step {step} timeframe {timeframe}", got,
+                             terminal.copy_rates_from_pos("GBPUSD", timeframe, 0, 40))
+
+    replay(check, steps=500)
+    print(f"✅ Tick aggregation matches the terminal: {state['aggregator'].bars_closed} bar closes")
+
+
+def test_cache_copy_is_detached():
+    terminal = offline_mt5.install(patch_clock=True, duration_days=1, history_days=2)
+    try:
+        terminal.initialize()
+        cache = BarCache(terminal)
+        view = cache.get("EURUSD", TIMEFRAME_M1, 50)
+        copy = cache.get("EURUSD", TIMEFRAME_M1, 50, copy=True)
+        buffer = cache._series[("EURUSD", TIMEFRAME_M1)].buffer
+        assert np.shares_memory(view, buffer) and not np.shares_memory(copy, buffer)
+        assert_same_bars("copy", copy, view)
+    finally:
+        offline_mt5.uninstall()
+    print("✅ copy=True returns bars detached from the cache buffer")
+
+
+def test_unsupported_timeframe():
+    weekly = 0x8000 | 1
+    try:
+        BarAggregator(None, timeframes=(weekly,))
+    except ValueError:
+        print("✅ Weeks are refused")
+    else:
+        raise AssertionError("W1 was accepted")
+
+
+if __name__ == "__main__":
+    test_aggregated_from_m1()
+    test_aggregated_from_ticks()
+    test_cache_copy_is_detached()
+    test_unsupported_timeframe()
+    print("All bar aggregator checks passed.")
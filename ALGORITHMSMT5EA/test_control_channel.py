@@ -0,0 +1,97 @@
+# Control channel state and commands as the EAs see them, on the offline terminal (runs without a terminal)
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ALGORITHMSMT5EA.control_channel import ControlChannel
+
+ALGORITHMS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(ALGORITHMS_DIR)
+
+# Starts the grid EA as the supervisor would and counts the pending orders on_start placed
+GRID_PROBE = """
+import sys
+sys.path.insert(0, {grid_dir!r})
+import MetaTrader5 as mt5
+from mt5_grid_trading_ea import GridTradingEA
+
+mt5.initialize()
+ea = GridTradingEA(symbol='EURUSD')
+print('started', ea.on_start())
+print('orders', len(mt5.orders_get(symbol='EURUSD')))
+"""
+
+
+def _run_grid_ea(env):
+    """Output lines of the grid probe run with ``env`` added"""
+    workdir = tempfile.mkdtemp(prefix='ea-control-test-')
+    probe = os.path.join(workdir, 'grid_probe.py')
+    with open(probe, 'w') as f:
+        f.write(GRID_PROBE.format(grid_dir=os.path.join(ALGORITHMS_DIR, 'grid_trading_ea')))
+    pythonpath = [os.path.join(ALGORITHMS_DIR, 'offline'), PROJECT_ROOT, os.environ.get('PYTHONPATH')]
+    run_env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, pythonpath)), **env)
+    result = subprocess.run([sys.executable, probe], cwd=workdir, env=run_env, capture_output=True,
+                            text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.splitlines()
+
+
+def test_grid_ea_places_no_grid_with_new_entries_stopped():
+    execution_id = f"control-test-{os.getpid()}"
+    lines = _run_grid_ea({'EA_EXECUTION_ID': execution_id})
+    assert 'started True' in lines and 'orders 0' not in lines, lines
+    # Restarted by the supervisor after stop_new_entries
+    lines = _run_grid_ea({'EA_EXECUTION_ID': execution_id + '-stopped', 'EA_START_NO_NEW_ENTRIES': '1'})
+    assert 'started True' in lines and 'orders 0' in lines, lines
+    print("✅ The grid EA places its initial grid only while new entries are allowed")
+
+
+class _TunedEA:
+    tunable_params = {'base_lot': float, 'max_trades': int, 'trailing_enabled': bool, 'comment': str,
+                      'risk_manager': object, 'levels': float}
+
+    def __init__(self):
+        self.symbol = 'EURUSD'
+        self.magic_number = 1234
+        self.is_running = True
+        self.base_lot = 0.1
+        self.max_trades = 6
+        self.trailing_enabled = True
+        self.comment = 'ea'
+        self.risk_manager = object()
+        self.levels = [1.0, 2.0]
+
+
+def _set_params(channel, params):
+    return channel.handle({'command': 'set_params', 'params': params})
+
+
+def test_set_params_only_changes_tunable_scalars():
+    channel = ControlChannel('set-params-test', target=_TunedEA())
+    reply = _set_params(channel, {'base_lot': '0.05', 'max_trades': 4.0, 'trailing_enabled': 'off', 'comment': 7})
+    assert reply['status'] == 'success', reply
+    _, params = channel.take_pending()
+    assert params == {'base_lot': 0.05, 'max_trades': 4, 'trailing_enabled': False, 'comment': '7'}, params
+    assert type(params['max_trades']) is int
+    # Not declared, or declared but not a scalar (an object, a list)
+    for name in ('symbol', 'magic_number', 'is_running', 'risk_manager', 'levels', 'take_pending', '_secret'):
+        reply = _set_params(channel, {name: 1})
+        assert reply['status'] == 'error' and 'Unknown parameter' in reply['message'], (name, reply)
+    # Values that are not of the declared type
+    for name, value in (('base_lot', {'x': 1}), ('base_lot', [0.1]), ('base_lot', None), ('base_lot', 'nan'),
+                        ('base_lot', 'inf'), ('base_lot', True), ('max_trades', 2.5), ('max_trades', 'many'),
+                        ('trailing_enabled', 'maybe'), ('comment', {'text': 'x'})):
+        reply = _set_params(channel, {name: value})
+        assert reply['status'] == 'error' and 'Invalid value' in reply['message'], (name, value, reply)
+    # A rejected name rejects the whole command
+    assert _set_params(channel, {'base_lot': 0.2, 'symbol': 'GBPUSD'})['status'] == 'error'
+    assert channel.take_pending() == (False, {})
+    print("✅ set_params only changes declared scalar parameters, converted to their type")
+
+
+if __name__ == "__main__":
+    test_grid_ea_places_no_grid_with_new_entries_stopped()
+    test_set_params_only_changes_tunable_scalars()
+    print("All control channel checks passed.")
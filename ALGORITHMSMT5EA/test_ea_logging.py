@@ -0,0 +1,105 @@
+# Queue-backed EA logging: JSON records, per-site sampling, size-capped rotation and a non-blocking queue
+import glob
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ALGORITHMSMT5EA.ea_logging import LogPipeline
+
+
+def _records(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_json_records_and_routes():
+    directory = tempfile.mkdtemp()
+    process_file, ea_file = os.path.join(directory, 'process.log'), os.path.join(directory, 'candy_ea.log')
+    pipeline = LogPipeline(process_file, to_console=False).start()
+    try:
+        pipeline.add_file('candy_ea', ea_file)
+        logging.getLogger('candy_ea').info("BUY position opened: Volume=%s", 0.1, extra={'data': {'ticket': 7}})
+        try:
+            raise ValueError("no price")
+        except ValueError:
+            logging.exception("Tick failed")
+    finally:
+        pipeline.stop()
+    (opened,), (failed,) = _records(ea_file), _records(process_file)
+    assert opened['message'] == "BUY position opened: Volume=0.1" and opened['data'] == {'ticket': 7}
+    assert opened['logger'] == 'candy_ea' and opened['level'] == 'INFO'
+    assert failed['level'] == 'ERROR' and 'ValueError: no price' in failed['exception']
+    print("✅ JSON records go to the process file and per-EA files")
+
+
+def test_sampling_per_call_site():
+    path = os.path.join(tempfile.mkdtemp(), 'ea.log')
+    pipeline = LogPipeline(path, level=logging.DEBUG, to_console=False, sampling={'DEBUG': 10}).start()
+    try:
+        for i in range(95):
+            logging.debug("hot line %d", i)
+            logging.debug("other hot line %d", i)
+            logging.info("info %d", i)
+    finally:
+        pipeline.stop()
+    records = _records(path)
+    hot = [r['message'] for r in records if r['message'].startswith('hot')]
+    assert hot == [f"hot line {i}" for i in range(0, 95, 10)], hot
+    assert sum(r['message'].startswith('other') for r in records) == 10
+    assert sum(r['level'] == 'INFO' for r in records) == 95, "INFO was sampled"
+    assert all(r.get('sample') == 10 for r in records if r['level'] == 'DEBUG')
+    assert pipeline.stats()['sampled_out'] == 2 * 85
+    print("✅ DEBUG sampled 1 in 10 per call site, INFO kept")
+
+
+def test_rotation_caps_size():
+    path = os.path.join(tempfile.mkdtemp(), 'ea.log')
+    max_bytes = 20000
+    pipeline = LogPipeline(path, to_console=False, max_bytes=max_bytes, backups=3).start()
+    try:
+        for i in range(5000):
+            logging.info("order %d placed", i)
+    finally:
+        pipeline.stop()
+    files = sorted(glob.glob(path + '*'))
+    assert len(files) == 4, files
+    assert all(os.path.getsize(f) <= max_bytes for f in files), [os.path.getsize(f) for f in files]
+    print(f"✅ Rotation keeps {len(files)} files of at most {max_bytes} bytes")
+
+
+def test_full_queue_drops_instead_of_blocking():
+    path = os.path.join(tempfile.mkdtemp(), 'ea.log')
+    pipeline = LogPipeline(path, to_console=False, queue_size=100)
+    root = logging.getLogger()
+    saved = root.handlers[:], root.level
+    # Writer not running: the queue fills and the caller must not wait
+    root.handlers[:] = [pipeline.handler]
+    root.setLevel(logging.INFO)
+    try:
+        done = threading.Event()
+
+        def flood():
+            for i in range(1000):
+                logging.info("line %d", i)
+            done.set()
+
+        threading.Thread(target=flood, daemon=True).start()
+        assert done.wait(5), "logging blocked on a full queue"
+        assert pipeline.stats()['dropped'] == 900 and pipeline.stats()['queued'] == 100
+        assert not os.path.exists(path), "the calling thread wrote the file"
+    finally:
+        root.handlers[:], level = saved
+        root.setLevel(level)
+    print("✅ A full queue drops records without blocking or writing on the caller's thread")
+
+
+if __name__ == "__main__":
+    test_json_records_and_routes()
+    test_sampling_per_call_site()
+    test_rotation_caps_size()
+    test_full_queue_drops_instead_of_blocking()
+    print("All logging checks passed.")
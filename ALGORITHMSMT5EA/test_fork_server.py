@@ -0,0 +1,145 @@
+# EAs launched through the fork server open their control channel (runs without a terminal, POSIX only)
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ALGORITHMSMT5EA.control_channel import CONTROL_DIR, ControlClient, ControlError
+
+if not hasattr(os, 'fork'):
+    pytest.skip("the fork server needs a POSIX system", allow_module_level=True)
+
+from ALGORITHMSMT5EA.fork_server import ForkServerClient, start_server_process
+
+ALGORITHMS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(ALGORITHMS_DIR)
+
+# A minimal EA on the offline terminal that runs until it is stopped
+PROBE_EA = """
+from ALGORITHMSMT5EA.common_ea import EA, EventLoop
+
+class ProbeEA(EA):
+    symbol = 'EURUSD'
+    timer_interval = 0.2
+
+    def on_timer(self):
+        pass
+
+    def stop(self):
+        pass
+
+loop = EventLoop()
+loop.add(ProbeEA())
+loop.run()
+"""
+
+# Reports what common_ea made of the launch environment
+ENV_PROBE = """
+import sys
+from ALGORITHMSMT5EA import common_ea
+
+print('shm_dir', common_ea.SHM_DIR, type(common_ea.tick_stream.source).__name__)
+print('pandas_free', common_ea.PANDAS_FREE, 'pandas' in sys.modules)
+try:
+    import pandas
+    print('pandas imported')
+except ModuleNotFoundError:
+    print('pandas blocked')
+"""
+
+
+def _start_server(workdir):
+    """A fork server whose children import the offline MetaTrader5"""
+    saved_pythonpath = os.environ.get('PYTHONPATH')
+    os.environ['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.join(ALGORITHMS_DIR, 'offline'), saved_pythonpath]))
+    try:
+        return start_server_process(os.path.join(workdir, 'fork.sock'), PROJECT_ROOT)
+    finally:
+        if saved_pythonpath is None:
+            del os.environ['PYTHONPATH']
+        else:
+            os.environ['PYTHONPATH'] = saved_pythonpath
+
+
+def _status(execution_id, timeout=30.0):
+    """The EA's reply to ``status`` once its channel is up"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return ControlClient(execution_id).send('status')
+        except ControlError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def test_forked_ea_serves_control_channel():
+    workdir = tempfile.mkdtemp(prefix='ea-fork-test-')
+    probe = os.path.join(workdir, 'mt5_probe_ea.py')
+    with open(probe, 'w') as f:
+        f.write(PROBE_EA)
+    server = _start_server(workdir)
+    children = []
+    try:
+        client = ForkServerClient(os.path.join(workdir, 'fork.sock'))
+        execution_id = f"fork-test-{os.getpid()}"
+        with open(os.path.join(workdir, 'ea.log'), 'wb') as output:
+            children.append(client.launch([probe], workdir, output, env={'EA_EXECUTION_ID': execution_id}))
+            # A restarted paused execution comes back paused
+            paused_id = execution_id + '-paused'
+            children.append(client.launch([probe], workdir, output, env={
+                'EA_EXECUTION_ID': paused_id, 'EA_START_PAUSED': '1', 'EA_START_NO_NEW_ENTRIES': '1'}))
+        reply = _status(execution_id)
+        assert reply['status'] == 'success' and reply['paused'] is False and reply['new_entries'] is True, reply
+        assert ControlClient(execution_id).send('pause')['paused'] is True
+        reply = _status(paused_id)
+        assert reply['paused'] is True and reply['new_entries'] is False, reply
+        for child in children:
+            assert child.poll() is None, "the EA exited"
+    finally:
+        for child in children:
+            # Ctrl+C lets the EA close its channel
+            child.send_signal(signal.SIGINT)
+            try:
+                child.wait(10)
+            except subprocess.TimeoutExpired:
+                child.kill()
+                child.wait(10)
+        server.send_signal(signal.SIGINT)
+        server.wait(10)
+    assert not os.path.exists(os.path.join(CONTROL_DIR, f"{execution_id}.sock")), "the channel was not closed"
+    print("✅ Fork-launched EAs open their control channel with the state they were started in")
+
+
+def test_forked_ea_honours_launch_env():
+    workdir = tempfile.mkdtemp(prefix='ea-fork-test-')
+    probe = os.path.join(workdir, 'mt5_env_probe.py')
+    with open(probe, 'w') as f:
+        f.write(ENV_PROBE)
+    shm_dir = os.path.join(workdir, 'shm')
+    server = _start_server(workdir)
+    try:
+        client = ForkServerClient(os.path.join(workdir, 'fork.sock'))
+        with open(os.path.join(workdir, 'ea.log'), 'wb') as output:
+            child = client.launch([probe], workdir, output, env={'EA_SHM_DIR': shm_dir, 'EA_PANDAS_FREE': '1'})
+            assert child.wait(60) == 0
+        with open(os.path.join(workdir, 'ea.log')) as f:
+            lines = f.read().splitlines()
+    finally:
+        server.send_signal(signal.SIGINT)
+        server.wait(10)
+    assert f"shm_dir {shm_dir} SharedTicks" in lines, lines
+    assert "pandas_free True False" in lines, lines
+    assert "pandas blocked" in lines, lines
+    print("✅ Fork-launched EAs read EA_SHM_DIR and EA_PANDAS_FREE from their launch env")
+
+
+if __name__ == "__main__":
+    test_forked_ea_serves_control_channel()
+    test_forked_ea_honours_launch_env()
+    print("All fork server checks passed.")
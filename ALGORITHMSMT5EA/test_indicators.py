@@ -0,0 +1,250 @@
+# Streaming indicators and NumPy kernels vs. the pandas code they replace (runs without a terminal)
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ALGORITHMSMT5EA import indicator_kernels as kernels
+from ALGORITHMSMT5EA.indicators import ADX, ATR, EMA, RSI, SMA, VWAP, Channel, IndicatorFeed, RollingMax, RollingMin
+
+RATES_DTYPE = [('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+               ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8')]
+
+
+def make_rates(count=2000, seed=7, start=1_700_000_000, step=300):
+    """Random-walk M5 bars shaped like copy_rates_from_pos output"""
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0004, count))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    rates = np.zeros(count, dtype=RATES_DTYPE)
+    rates['time'] = start + np.arange(count) * step
+    rates['open'] = open_
+    rates['close'] = close
+    rates['high'] = np.maximum(open_, close) + rng.uniform(0, 0.0005, count)
+    rates['low'] = np.minimum(open_, close) - rng.uniform(0, 0.0005, count)
+    rates['tick_volume'] = rng.integers(1, 500, count)
+    # A flat stretch: zero gains and losses, zero ranges
+    rates['open'][500:540] = rates['high'][500:540] = rates['low'][500:540] = rates['close'][500:540] = close[499]
+    return rates
+
+
+# pandas versions as they are in the EAs
+
+def pandas_rsi(close, period=14):
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+def pandas_adx(data, period=14):
+    high, low, close = data['high'], data['low'], data['close']
+    plus_dm = high.diff()
+    minus_dm = low.diff()
+    plus_dm[plus_dm < 0] = 0
+    minus_dm[minus_dm > 0] = 0
+    minus_dm = minus_dm.abs()
+    tr1 = high - low
+    tr2 = abs(high - close.shift())
+    tr3 = abs(low - close.shift())
+    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    atr = tr.rolling(window=period).mean()
+    plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
+    minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
+    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+    return dx.rolling(window=period).mean(), plus_di, minus_di, atr
+
+
+# Textbook Wilder versions
+
+def wilder_mean(series, period):
+    """Simple mean of the first ``period`` values, then ewm(alpha=1/period)"""
+    series = series.dropna()
+    seeded = series.iloc[period - 1:].copy()
+    seeded.iloc[0] = series.iloc[:period].mean()
+    return seeded.ewm(alpha=1 / period, adjust=False).mean()
+
+
+def wilder_rsi(close, period=14):
+    delta = close.diff()
+    gain = wilder_mean(delta.clip(lower=0), period)
+    loss = wilder_mean(-delta.clip(upper=0), period)
+    return 100 - 100 / (1 + gain / loss)
+
+
+def wilder_adx(data, period=14):
+    high, low, close = data['high'], data['low'], data['close']
+    up, down = high.diff(), -low.diff()
+    plus_dm = up.where((up > down) & (up > 0), 0.0).iloc[1:]
+    minus_dm = down.where((down > up) & (down > 0), 0.0).iloc[1:]
+    tr = pd.concat([high - low, (high - close.shift()).abs(), (low - close.shift()).abs()], axis=1).max(axis=1).iloc[1:]
+    atr = wilder_mean(tr, period)
+    plus_di = 100 * wilder_mean(plus_dm, period) / atr
+    minus_di = 100 * wilder_mean(minus_dm, period) / atr
+    dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di)
+    return wilder_mean(dx, period), plus_di, minus_di
+
+
+def assert_matches(name, streamed, expected):
+    expected = np.asarray(expected, dtype=float)
+    streamed = np.asarray(streamed, dtype=float)
+    assert streamed.shape == expected.shape, f"{name}: {streamed.shape} != {expected.shape}"
+    assert np.array_equal(np.isnan(streamed), np.isnan(expected)), f"{name}: NaN positions differ"
+    ok = ~np.isnan(expected)
+    error = np.max(np.abs(streamed[ok] - expected[ok])) if ok.any() else 0.0
+    assert error < 1e-8, f"{name}: max difference {error}"
+    print(f"✅ {name}: {ok.sum()} values, max difference {error:.2e}")
+
+
+def aligned(series, length):
+    """A Wilder series (which starts late) padded with NaN to ``length``"""
+    return series.reindex(range(length)).to_numpy()
+
+
+def test_moving_averages():
+    rates = make_rates()
+    close = pd.Series(rates['close'])
+    for period in (10, 20, 30):
+        assert_matches(f"SMA({period})", SMA(period).series(rates), close.rolling(window=period).mean())
+    for period in (9, 21, 200):
+        assert_matches(f"EMA({period})", EMA(period).series(rates), close.ewm(span=period, adjust=False).mean())
+        assert_matches(f"EMA({period}, adjust)", EMA(period, adjust=True).series(rates),
+                       close.ewm(span=period).mean())
+    # Plain arrays work as well as bars
+    assert_matches("SMA(20) of an array", SMA(20).series(rates['close']), close.rolling(window=20).mean())
+
+
+def test_rsi():
+    rates = make_rates()
+    close = pd.Series(rates['close'])
+    assert_matches("RSI(14) simple mean", RSI(14, wilder=False).series(rates), pandas_rsi(close, 14))
+    assert_matches("RSI(14) Wilder", RSI(14).series(rates), aligned(wilder_rsi(close, 14), len(close)))
+
+
+def test_atr_adx():
+    rates = make_rates()
+    data = pd.DataFrame(rates)
+    adx, plus_di, minus_di, atr = pandas_adx(data, 14)
+    assert_matches("ATR(14) simple mean", ATR(14, wilder=False).series(rates), atr)
+
+    streamed = ADX(14, wilder=False)
+    values, plus, minus = [], [], []
+    for bar in rates:
+        values.append(streamed.update_bar(bar))
+        plus.append(streamed.plus_di)
+        minus.append(streamed.minus_di)
+    as_float = lambda items: [np.nan if v is None else v for v in items]
+    assert_matches("ADX(14) simple mean", as_float(values), adx)
+    assert_matches("+DI(14) simple mean", as_float(plus), plus_di)
+    assert_matches("-DI(14) simple mean", as_float(minus), minus_di)
+
+    tr = pd.concat([data['high'] - data['low'], (data['high'] - data['close'].shift()).abs(),
+                    (data['low'] - data['close'].shift()).abs()], axis=1).max(axis=1)
+    assert_matches("ATR(14) Wilder", ATR(14).series(rates), aligned(wilder_mean(tr, 14), len(tr)))
+    adx, _, _ = wilder_adx(data, 14)
+    assert_matches("ADX(14) Wilder", ADX(14).series(rates), aligned(adx, len(data)))
+
+
+def test_rolling_extremes():
+    rates = make_rates()
+    data = pd.DataFrame(rates)
+    assert_matches("RollingMax(14)", RollingMax(14).series(rates), data['high'].rolling(window=14).max())
+    assert_matches("RollingMin(14)", RollingMin(14).series(rates), data['low'].rolling(window=14).min())
+    # The hedging EAs' range signal
+    hedge_range = data['high'].rolling(window=14).max() - data['low'].rolling(window=14).min()
+    high, low = RollingMax(14), RollingMin(14)
+    streamed = []
+    for bar in rates:
+        high.update_bar(bar)
+        low.update_bar(bar)
+        streamed.append(high.value - low.value if high.ready else np.nan)
+    assert_matches("high-low range(14)", streamed, hedge_range)
+    assert_matches("Channel(14)", Channel(14).series(rates), hedge_range)
+    # atr.mean() over the 500 bars the hedging EAs load: the 487 complete ranges
+    average = SMA(500 - 13, field=Channel(14))
+    streamed = [average.update_bar(bar) for bar in rates]
+    expected = [pd.DataFrame(rates[end - 500:end])
+                .pipe(lambda d: d['high'].rolling(window=14).max() - d['low'].rolling(window=14).min()).mean()
+                for end in range(500, len(rates) + 1)]
+    assert_matches("mean of Channel(14) over 500 bars", streamed[499:], expected)
+
+
+def test_vwap():
+    rates = make_rates()
+    data = pd.DataFrame(rates)
+    day = data['time'] // 86400
+    price_volume = (data['high'] + data['low'] + data['close']) / 3 * data['tick_volume']
+    expected = price_volume.groupby(day).cumsum() / data['tick_volume'].groupby(day).cumsum()
+    assert_matches("VWAP daily", VWAP().series(rates), expected)
+
+
+def test_kernels():
+    """The NumPy kernels give the streaming indicators' series (checked against pandas above)"""
+    rates = make_rates()
+    data = pd.DataFrame(rates)
+    close = pd.Series(rates['close'])
+    for period in (10, 20):
+        assert_matches(f"kernels.sma({period})", kernels.sma(rates, period), SMA(period).series(rates))
+    for period in (9, 21, 200):
+        assert_matches(f"kernels.ema({period})", kernels.ema(rates, period), EMA(period).series(rates))
+        assert_matches(f"kernels.ema({period}, adjust)", kernels.ema(rates, period, adjust=True),
+                       close.ewm(span=period).mean())
+    for wilder in (False, True):
+        label = "Wilder" if wilder else "simple mean"
+        assert_matches(f"kernels.rsi(14) {label}", kernels.rsi(rates, 14, wilder), RSI(14, wilder).series(rates))
+        assert_matches(f"kernels.atr(14) {label}", kernels.atr(rates, 14, wilder), ATR(14, wilder).series(rates))
+        adx, plus_di, minus_di = kernels.adx(rates, 14, wilder)
+        assert_matches(f"kernels.adx(14) {label}", adx, ADX(14, wilder).series(rates))
+    adx, plus_di, minus_di, _ = pandas_adx(data, 14)
+    assert_matches("kernels.adx(14) +DI", kernels.adx(rates, 14, wilder=False)[1], plus_di)
+    assert_matches("kernels.adx(14) -DI", kernels.adx(rates, 14, wilder=False)[2], minus_di)
+    assert_matches("kernels.rolling_max(14)", kernels.rolling_max(rates, 14), RollingMax(14).series(rates))
+    assert_matches("kernels.rolling_min(14)", kernels.rolling_min(rates, 14), RollingMin(14).series(rates))
+    assert_matches("kernels.channel(14)", kernels.channel(rates, 14), Channel(14).series(rates))
+    assert_matches("kernels.vwap daily", kernels.vwap(rates), VWAP().series(rates))
+    # DataFrames, plain arrays and short inputs
+    assert_matches("kernels.rsi(14) of a DataFrame", kernels.rsi(data, 14, wilder=False), pandas_rsi(close, 14))
+    assert_matches("kernels.ema(21) of an array", kernels.ema(rates['close'], 21), EMA(21).series(rates))
+    assert_matches("kernels.atr(14) of 10 bars", kernels.atr(rates[:10], 14), [np.nan] * 10)
+
+
+class _Bars:
+    """BarCache stand-in serving a growing slice of prepared bars"""
+
+    def __init__(self, rates, available):
+        self.rates = rates
+        self.available = available
+
+    def get(self, symbol, timeframe, count):
+        return self.rates[max(0, self.available - count):self.available]
+
+
+def test_indicator_feed():
+    rates = make_rates()
+    bars = _Bars(rates, 600)
+    rsi = RSI(14, wilder=False)
+    feed = IndicatorFeed(bars, "EURUSD", 5, [rsi], warmup=100)
+    expected = pandas_rsi(pd.Series(rates['close']), 14)
+    feed.update()
+    # One bar at a time, several at once, then a gap longer than the lookback
+    for available in list(range(601, 650)) + [655, 700, 900]:
+        bars.available = available
+        feed.update()
+        closed = available - 2  # the last bar is still forming
+        assert abs(rsi.value - expected.iloc[closed]) < 1e-8, f"feed at {available}: {rsi.value} != {expected.iloc[closed]}"
+        assert feed.last_bar['time'] == rates['time'][closed]
+    print("✅ IndicatorFeed follows the closed bars, also across gaps")
+
+
+if __name__ == "__main__":
+    test_moving_averages()
+    test_rsi()
+    test_atr_adx()
+    test_rolling_extremes()
+    test_vwap()
+    test_kernels()
+    test_indicator_feed()
+    print("All indicator checks passed.")
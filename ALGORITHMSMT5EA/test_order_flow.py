@@ -0,0 +1,100 @@
+# Incremental order-flow window vs. the same metrics computed over the window's columns (runs without a terminal)
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ALGORITHMSMT5EA.order_flow import OrderFlowWindow
+
+POINT = 0.00001
+
+
+def window_metrics(columns, point):
+    """The scalper's calculate_flow_metrics on a dict of columns"""
+    bid, ask, spread, volume = columns['bid'], columns['ask'], columns['spread'], columns['volume']
+    bid_pressure, ask_pressure = np.diff(bid).sum(), np.diff(ask).sum()
+    if volume.sum() > 0:
+        volume_bias = (bid[-1] - (bid * volume).sum() / volume.sum()) / point
+    else:
+        volume_bias = 0.0
+    gaps = np.diff(columns['time'])
+    gaps = gaps[~np.isnan(gaps)]
+    return {
+        'price_momentum': (bid[-1] - bid[0]) / point,
+        'pressure_ratio': ask_pressure / (bid_pressure + 1e-10),
+        'volume_bias': volume_bias,
+        'spread_pressure': spread[-1] - spread.mean(),
+        'tick_frequency': gaps.mean() if len(gaps) else 1.0,
+        'current_spread': spread[-1],
+    }
+
+
+def random_ticks(count, seed=3):
+    rng = np.random.default_rng(seed)
+    bid = 1.1 + np.cumsum(rng.integers(-3, 4, count)) * POINT
+    spread = rng.integers(1, 9, count).astype(float)
+    time = 1_700_000_000 + np.cumsum(rng.integers(0, 3, count)).astype(float)
+    time[rng.random(count) < 0.05] = np.nan          # ticks without a time
+    volume = rng.integers(1, 500, count).astype(float)
+    volume[rng.random(count) < 0.3] = 0.0           # and without volume
+    volume[count // 2:count // 2 + 60] = 0.0        # a stretch longer than the window
+    return time, bid, bid + spread * POINT, spread, volume
+
+
+def test_matches_window_metrics():
+    for size in (2, 5, 20):
+        window = OrderFlowWindow(size)
+        for step, tick in enumerate(zip(*random_ticks(3000))):
+            tick_time, bid, ask, spread, volume = tick
+            window.update(None if math.isnan(tick_time) else tick_time, bid, ask, spread, volume)
+            assert window.ready == (step + 1 >= size)
+            columns = window.columns()
+            assert len(columns['bid']) == min(step + 1, size)
+            got, expected = window.metrics(POINT), window_metrics(columns, POINT)
+            for name, value in expected.items():
+                if name == 'pressure_ratio' and abs(columns['bid'][-1] - columns['bid'][0]) < POINT / 2:
+                    continue  # 1e-10 / rounding noise
+                assert math.isclose(got[name], value, rel_tol=1e-6, abs_tol=1e-6), (size, step, name, got[name], value)
+    print("✅ Window metrics match the column metrics for sizes 2, 5 and 20 over 3000 ticks")
+
+
+def test_sums_do_not_drift():
+    window = OrderFlowWindow(20)
+    rng = np.random.default_rng(5)
+    for i in range(200_000):
+        bid = 60000 + rng.normal(0, 50)
+        window.update(i, bid, bid + 10, rng.uniform(0, 1000), rng.uniform(0, 10) if i < 199_990 else 0.0)
+    # The last 10 ticks have no volume; the others still weigh in
+    expected = window_metrics(window.columns(), 0.01)
+    assert math.isclose(window.metrics(0.01)['volume_bias'], expected['volume_bias'], rel_tol=1e-9)
+    assert math.isclose(window.metrics(0.01)['spread_pressure'], expected['spread_pressure'], rel_tol=1e-9, abs_tol=1e-9)
+    for i in range(200_000, 200_020):
+        window.update(i, 60000.0, 60010.0, 1.0, 0.0)
+    assert window.metrics(0.01)['volume_bias'] == 0.0, "volume left over from evicted ticks"
+    print("✅ Running sums stay exact over 200k ticks")
+
+
+def test_extend_matches_updates():
+    ticks = random_ticks(2000, seed=9)
+    one_by_one, batched = OrderFlowWindow(20), OrderFlowWindow(20)
+    rng = np.random.default_rng(11)
+    start = 0
+    while start < len(ticks[0]):
+        end = start + int(rng.choice((1, 3, 19, 20, 21, 150)))
+        batched.extend(*(column[start:end] for column in ticks))
+        for tick in zip(*(column[start:end] for column in ticks)):
+            one_by_one.update(*tick)
+        start = end
+        for name, value in one_by_one.metrics(POINT).items():
+            assert math.isclose(batched.metrics(POINT)[name], value, rel_tol=1e-9, abs_tol=1e-9), (start, name)
+    assert batched.updates == one_by_one.updates == len(ticks[0])
+    print("✅ Batches give the same metrics as tick-by-tick updates")
+
+
+if __name__ == "__main__":
+    test_matches_window_metrics()
+    test_sums_do_not_drift()
+    test_extend_matches_updates()
+    print("All order flow checks passed.")
@@ -0,0 +1,60 @@
+# Order pipeline call concurrency against a terminal that records overlapping calls (runs without a terminal)
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ALGORITHMSMT5EA.order_pipeline import TRADE_RETCODE_DONE, OrderPipeline, submit_orders
+
+
+class _Terminal:
+    """order_check/order_send that take a while and count how many run at once"""
+
+    def __init__(self, thread_safe=False):
+        if thread_safe:
+            self.thread_safe = True
+        self._lock = threading.Lock()
+        self.active = 0
+        self.most_active = 0
+        self.sent = 0
+
+    def _call(self, retcode):
+        with self._lock:
+            self.active += 1
+            self.most_active = max(self.most_active, self.active)
+        time.sleep(0.01)
+        with self._lock:
+            self.active -= 1
+        return SimpleNamespace(retcode=retcode, comment='', order=0, deal=0, volume=0.01, price=1.0)
+
+    def order_check(self, request):
+        return self._call(0)
+
+    def order_send(self, request):
+        self.sent += 1
+        return self._call(TRADE_RETCODE_DONE)
+
+
+def test_one_call_at_a_time_unless_thread_safe():
+    requests = [{'symbol': 'EURUSD', 'volume': 0.01}] * 8
+    terminal = _Terminal()
+    pipeline = OrderPipeline(terminal, concurrency=8)
+    assert all(result.ok for result in pipeline.submit(requests))
+    assert terminal.sent == 8 and terminal.most_active == 1, terminal.most_active
+    terminal = _Terminal()
+    assert all(result.ok for result in submit_orders(terminal, requests, concurrency=8))
+    assert terminal.most_active == 1, "the gateway's order_batch overlapped terminal calls"
+
+    terminal = _Terminal(thread_safe=True)
+    pipeline = OrderPipeline(terminal)
+    assert all(result.ok for result in pipeline.submit(requests))
+    pipeline.close()
+    assert terminal.most_active > 1
+    print("✅ Terminal calls overlap only for a source that declares itself thread-safe")
+
+
+if __name__ == "__main__":
+    test_one_call_at_a_time_unless_thread_safe()
+    print("All order pipeline checks passed.")
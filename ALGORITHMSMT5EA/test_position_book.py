@@ -0,0 +1,120 @@
+# Position book vs. the terminal's own positions and orders, on the offline terminal (runs without a terminal)
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ALGORITHMSMT5EA import offline_mt5 as mt5
+from ALGORITHMSMT5EA.position_book import CLOSE, MODIFY, OPEN, ORDER, POSITION, PositionBook
+
+SYMBOLS = ("EURUSD", "GBPUSD")
+MAGICS = (0, 111, 222)
+
+
+def _random_request(terminal, rng):
+    """A random trade: open, pending order, SL/TP change, partial or full close, order removal"""
+    symbol, magic = rng.choice(SYMBOLS), rng.choice(MAGICS)
+    tick = terminal.symbol_info_tick(symbol)
+    point = terminal.symbol_info(symbol).point
+    positions, orders = terminal.positions_get(symbol=symbol), terminal.orders_get(symbol=symbol)
+    action = rng.choice(('open', 'open', 'pending', 'sltp', 'partial', 'close', 'remove'))
+    if action == 'sltp' and positions:
+        position = rng.choice(positions)
+        distance = rng.randint(100, 300) * point
+        sl = tick.bid - distance if position.type == mt5.POSITION_TYPE_BUY else tick.ask + distance
+        return {"action": mt5.TRADE_ACTION_SLTP, "symbol": symbol, "position": position.ticket, "sl": sl, "tp": 0.0}
+    if action in ('partial', 'close') and positions:
+        position = rng.choice(positions)
+        buy = position.type == mt5.POSITION_TYPE_BUY
+        volume = 0.01 if action == 'partial' and position.volume > 0.01 else position.volume
+        return {"action": mt5.TRADE_ACTION_DEAL, "symbol": symbol, "volume": volume, "position": position.ticket,
+                "type": mt5.ORDER_TYPE_SELL if buy else mt5.ORDER_TYPE_BUY, "price": tick.bid if buy else tick.ask,
+                "magic": position.magic, "type_filling": mt5.ORDER_FILLING_IOC}
+    if action == 'remove' and orders:
+        return {"action": mt5.TRADE_ACTION_REMOVE, "order": rng.choice(orders).ticket}
+    if action == 'pending':
+        return {"action": mt5.TRADE_ACTION_PENDING, "symbol": symbol, "volume": 0.01, "type": mt5.ORDER_TYPE_BUY_LIMIT,
+                "price": tick.bid - 500 * point, "magic": magic, "type_time": mt5.ORDER_TIME_GTC}
+    buy = rng.random() < 0.5
+    return {"action": mt5.TRADE_ACTION_DEAL, "symbol": symbol, "volume": rng.choice((0.01, 0.02, 0.03)),
+            "type": mt5.ORDER_TYPE_BUY if buy else mt5.ORDER_TYPE_SELL, "price": tick.ask if buy else tick.bid,
+            "sl": 0.0, "magic": magic, "type_filling": mt5.ORDER_FILLING_IOC}
+
+
+def test_book_matches_terminal():
+    terminal = mt5.install(patch_clock=True, duration_days=2, history_days=1)
+    try:
+        terminal.initialize()
+        book = PositionBook(terminal, max_age=0.5)
+        deltas = []
+        book.subscribe(deltas.append)
+        live = {POSITION: {}, ORDER: {}}
+        rng = random.Random(7)
+        for step in range(400):
+            time.sleep(rng.choice((0.1, 1, 5, 60)))
+            book.order_send(_random_request(terminal, rng))
+            for symbol in (None,) + SYMBOLS:
+                for magic in (None,) + MAGICS:
+                    expected = [p for p in terminal.positions_get(**({'symbol': symbol} if symbol else {}))
+                                if magic is None or p.magic == magic]
+                    got = book.positions(symbol, magic)
+                    assert [p.ticket for p in got] == [p.ticket for p in expected], f"step {step} {symbol} {magic}"
+                    assert [(p.volume, p.sl) for p in got] == [(p.volume, p.sl) for p in expected]
+                    assert book.position_count(symbol, magic) == len(expected)
+                    assert book.order_count(symbol, magic) == len(
+                        [o for o in terminal.orders_get(**({'symbol': symbol} if symbol else {}))
+                         if magic is None or o.magic == magic])
+            # Replaying the deltas gives the current book
+            for delta in deltas:
+                if delta.event == CLOSE:
+                    del live[delta.kind][delta.record.ticket]
+                else:
+                    assert (delta.record.ticket in live[delta.kind]) == (delta.event == MODIFY)
+                    live[delta.kind][delta.record.ticket] = delta.record
+            deltas.clear()
+            assert sorted(live[POSITION]) == sorted(p.ticket for p in terminal.positions_get())
+            assert sorted(live[ORDER]) == sorted(o.ticket for o in terminal.orders_get())
+
+        # Lookups within max_age of each other share one fetch
+        book.invalidate()
+        fetches = book.fetches
+        for _ in range(50):
+            book.positions("EURUSD", 111)
+            book.position_count("GBPUSD")
+        assert book.fetches == fetches + 1, f"{book.fetches - fetches} fetches for 100 lookups"
+    finally:
+        mt5.uninstall()
+    print(f"✅ Position book matches the terminal over 400 trades ({book.deltas} deltas, {book.fetches} fetches)")
+
+
+class _FlakyTerminal:
+    def __init__(self, positions):
+        self.positions = positions
+
+    def positions_get(self):
+        return self.positions
+
+    def orders_get(self):
+        return ()
+
+
+def test_failed_fetch_keeps_snapshot():
+    position = mt5.TradePosition(*([0] * len(mt5.TradePosition._fields)))._replace(ticket=1, symbol="EURUSD",
+                                                                                    magic=5, volume=0.1)
+    terminal = _FlakyTerminal((position,))
+    book = PositionBook(terminal, max_age=0)
+    assert [delta.event for delta in book.refresh(POSITION)] == [OPEN]
+    terminal.positions = None
+    assert book.refresh(POSITION) == [] and book.position_count("EURUSD", 5) == 1, "a failed fetch closed positions"
+    assert book.failed_fetches == 2
+    terminal.positions = ()
+    assert [delta.event for delta in book.refresh(POSITION)] == [CLOSE]
+    assert book.positions("EURUSD") == [] and book.position_count(magic=5) == 0
+    print("✅ A failed fetch keeps the last snapshot")
+
+
+if __name__ == "__main__":
+    test_book_matches_terminal()
+    test_failed_fetch_keeps_snapshot()
+    print("All position book checks passed.")
@@ -0,0 +1,126 @@
+# Shared bar/tick store: writer -> reader round trips on the offline terminal, and lock-free reads across processes
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ALGORITHMSMT5EA import shm_store
+from ALGORITHMSMT5EA.bar_cache import BarCache
+from ALGORITHMSMT5EA.shm_store import (KIND_TICKS, TIMEFRAMES, SharedBars, SharedTicks, StoreFeeder, StoreReader,
+                                       StoreWriter)
+from ALGORITHMSMT5EA.test_bar_aggregator import assert_same_bars, replay
+from ALGORITHMSMT5EA.tick_stream import TickMultiplexer
+
+
+def test_bars_and_ticks_round_trip():
+    directory = tempfile.mkdtemp()
+    timeframes = (TIMEFRAMES['M1'], TIMEFRAMES['H1'])
+    state = {}
+
+    def check(terminal, step):
+        if 'feeder' not in state:
+            # A small ring so the bars wrap around it many times
+            state['feeder'] = StoreFeeder(BarCache(terminal), TickMultiplexer(terminal), ["EURUSD"], timeframes,
+                                          directory, bar_capacity=64, tick_capacity=4096)
+            state['bars'] = SharedBars(BarCache(terminal), directory)
+            direct, shared = TickMultiplexer(terminal), TickMultiplexer(SharedTicks(terminal, directory))
+            state['ticks'] = (direct.subscribe("EURUSD"), shared.subscribe("EURUSD"), direct, shared)
+            state['received'] = ([], [])
+        state['feeder'].poll()
+        for timeframe in timeframes:
+            assert_same_bars(f"step {step} timeframe {timeframe}", state['bars'].get("EURUSD", timeframe, 40),
+                             terminal.copy_rates_from_pos("EURUSD", timeframe, 0, 40))
+        direct_subscription, shared_subscription, direct, shared = state['ticks']
+        direct.poll()
+        shared.poll()
+        for received, subscription in zip(state['received'], (direct_subscription, shared_subscription)):
+            ticks = subscription.drain()
+            if ticks is not None:
+                received.append(ticks)
+
+    replay(check, days=1, steps=300)
+    bars, ticks = state['bars'], state['ticks'][3].source
+    assert bars.fallback_reads == 0, f"{bars.fallback_reads} bar requests went to the terminal"
+    direct, shared = (np.concatenate(batches) for batches in state['received'])
+    # The shared multiplexer starts from the quote once the store has ticks, so compare from its first tick
+    direct = direct[np.searchsorted(direct['time_msc'], shared['time_msc'][0]):]
+    assert_same_bars("ticks", shared[:len(direct)], direct[:len(shared)])
+    assert ticks.store_reads > ticks.fallback_reads, f"{ticks.store_reads} store, {ticks.fallback_reads} terminal reads"
+    print(f"✅ Store serves the terminal's bars and {len(shared)} ticks "
+          f"({ticks.store_reads} tick reads from the store, {ticks.fallback_reads} from the terminal)")
+
+
+def test_stale_store_falls_back():
+    directory = tempfile.mkdtemp()
+    writer = StoreWriter(shm_store.bars_path(directory, "EURUSD", 1), shm_store.KIND_BARS, 16)
+    bars = np.zeros(8, dtype=shm_store.RATES_DTYPE)
+    bars['time'] = np.arange(8) * 60
+    writer.publish_bars(bars)
+
+    class Terminal:
+        def get(self, symbol, timeframe, count, max_age=0.0):
+            return 'terminal'
+
+    source = SharedBars(Terminal(), directory, stale_after=60)
+    assert source.get("EURUSD", 1, 8)['time'][-1] == 420
+    assert source.get("EURUSD", 1, 9) == 'terminal', "more bars than the store holds"
+    writer.header['updated'] = time.time() - 120
+    assert source.get("EURUSD", 1, 8) == 'terminal', "a stale store was used"
+    print("✅ Missing and stale data comes from the terminal")
+
+
+# Run in a child process: read while the parent writes, check every read is consistent
+_READER = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+from ALGORITHMSMT5EA.shm_store import KIND_TICKS, StoreReader
+reader = StoreReader(sys.argv[2], KIND_TICKS)
+reads, cursor, seen = 0, 0, 0
+deadline = time.time() + float(sys.argv[3])
+while time.time() < deadline:
+    ticks, cursor = reader.read_from(cursor)
+    if ticks is None or not len(ticks):
+        continue
+    # Record n carries n in every field: a torn read shows up as a mismatch
+    number = ticks['time_msc']
+    assert (number == ticks['volume']).all() and (number == ticks['bid']).all(), "torn read"
+    assert (number[1:] - number[:-1] == 1).all(), "records out of order"
+    assert number[0] == cursor - len(ticks), "cursor out of step"
+    reads += 1
+    seen += len(ticks)
+print(reads, seen, reader.retries)
+"""
+
+
+def test_lock_free_reads_across_processes(seconds=1.5):
+    path = os.path.join(tempfile.mkdtemp(), "EURUSD.ticks")
+    writer = StoreWriter(path, KIND_TICKS, 1024)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    child = subprocess.Popen([sys.executable, '-c', _READER, root, path, str(seconds)],
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    written = 0
+    deadline = time.time() + seconds + 0.5
+    while time.time() < deadline:
+        ticks = np.zeros(np.random.randint(1, 300), dtype=shm_store.TICK_DTYPE)
+        number = written + np.arange(len(ticks))
+        ticks['time_msc'], ticks['volume'], ticks['bid'] = number, number, number
+        writer.append(ticks)
+        written += len(ticks)
+    output, errors = child.communicate()
+    assert child.returncode == 0, errors
+    reads, seen, retries = map(int, output.split())
+    assert reads > 0
+    assert StoreReader(path, KIND_TICKS).latest(1)['time_msc'][0] == written - 1
+    print(f"✅ {reads} consistent reads of {seen} ticks in another process while {written} were written "
+          f"({retries} retries)")
+
+
+if __name__ == "__main__":
+    test_bars_and_ticks_round_trip()
+    test_stale_store_falls_back()
+    test_lock_free_reads_across_processes()
+    print("All shared store checks passed.")
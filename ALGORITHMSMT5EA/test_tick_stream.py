@@ -0,0 +1,134 @@
+# Tick multiplexer delivery against the offline terminal's tick history (runs without a terminal)
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ALGORITHMSMT5EA import offline_mt5
+from ALGORITHMSMT5EA.tick_stream import TickMultiplexer
+
+START = 1736150400  # 2025-01-06 00:00 UTC, the offline terminal's default start
+
+
+def make_ticks():
+    """
+    Ticks from START on, in milliseconds after it: bursts sharing one time_msc,
+    more ticks in one second than a small batch holds, and a ten minute gap
+    """
+    offsets = [0, 100, 200] + [500] * 5 + [600, 700, 800, 900]
+    offsets += [1000, 1000, 1000, 1500, 1999, 2000]
+    offsets += [600000 + 250 * k for k in range(8)] + [602000] * 4 + [602001]
+    times = START * 1000 + np.array(offsets, dtype=np.int64)
+    ticks = np.zeros(len(times), dtype=offline_mt5.TICK_DTYPE)
+    ticks['time_msc'] = times
+    ticks['time'] = times // 1000
+    # A distinct bid per tick, so a repeated or missing tick shows up
+    ticks['bid'] = 1.1 + np.arange(len(times)) * 0.00001
+    ticks['ask'] = ticks['bid'] + 0.0001
+    ticks['flags'] = offline_mt5.TICK_FLAG_BID | offline_mt5.TICK_FLAG_ASK
+    return ticks
+
+
+def make_terminal(ticks):
+    terminal = offline_mt5.OfflineTerminal(start=START, symbols={'EURUSD': ticks})
+    terminal.initialize()
+    return terminal
+
+
+def drained(subscription):
+    ticks = subscription.drain()
+    return ticks['bid'].tolist() if ticks is not None else []
+
+
+class _Recorder:
+    """The terminal, noting the count of every copy_ticks_from call"""
+
+    def __init__(self, terminal):
+        self.terminal = terminal
+        self.counts = []
+
+    def symbol_info_tick(self, symbol):
+        return self.terminal.symbol_info_tick(symbol)
+
+    def copy_ticks_from(self, symbol, date_from, count, flags):
+        self.counts.append(count)
+        return self.terminal.copy_ticks_from(symbol, date_from, count, flags)
+
+
+def follow(terminal, multiplexer, steps):
+    """After each clock step, poll until a pass finds nothing new"""
+    for seconds in steps:
+        terminal.clock.advance(seconds)
+        for _ in range(100):
+            if not multiplexer.poll():
+                break
+        else:
+            raise AssertionError(f"still finding ticks after 100 passes at +{seconds}s")
+
+
+def test_every_tick_once_through_bursts_and_gaps():
+    ticks = make_ticks()
+    terminal = make_terminal(ticks)
+    # A batch smaller than the bursts: the multiplexer has to skip what it
+    # delivered at one millisecond and double the batch to get past a full one
+    multiplexer = TickMultiplexer(terminal, batch_size=3)
+    first, second = multiplexer.subscribe('EURUSD'), multiplexer.subscribe('EURUSD')
+    got_first, got_second = [], []
+    steps = [0.05, 0.15, 0.3, 0.3, 0.3, 0.5, 0.5, 0.5] + [60] * 10 + [0.5] * 8
+    for seconds in steps:
+        follow(terminal, multiplexer, [seconds])
+        got_first += drained(first)
+        got_second += drained(second)
+
+    assert got_first == ticks['bid'].tolist(), "ticks repeated, missing or out of order"
+    assert got_second == got_first, "subscribers of one symbol saw different ticks"
+    assert first.received == second.received == len(ticks)
+    assert first.dropped == second.dropped == 0
+    stats = multiplexer.stats()['EURUSD']
+    assert stats['ticks'] == len(ticks) and stats['subscribers'] == 2
+    print(f"✅ {len(ticks)} ticks delivered once each through same-millisecond bursts and a gap")
+
+
+def test_late_subscriber_and_batch_doubling():
+    ticks = make_ticks()
+    source = _Recorder(make_terminal(ticks))
+    multiplexer = TickMultiplexer(source, batch_size=2)
+    early = multiplexer.subscribe('EURUSD')
+    follow(source.terminal, multiplexer, [0])
+    assert drained(early) == ticks['bid'][:1].tolist(), "the first pass starts at the current quote"
+    # The first second holds five ticks at +500 ms: batches of two that only
+    # hold ticks already delivered have to grow to get past them
+    source.counts.clear()
+    follow(source.terminal, multiplexer, [0.95])
+    assert drained(early) == ticks['bid'][1:12].tolist()
+    assert max(source.counts) >= 8, source.counts
+
+    late = multiplexer.subscribe('EURUSD')
+    follow(source.terminal, multiplexer, [1.5, 700])
+    rest = ticks['bid'][12:].tolist()
+    assert drained(early) == rest and drained(late) == rest, "a late subscriber gets the ticks from then on"
+    print("✅ A later subscriber joins the running feed; full batches of seen ticks double the batch")
+
+
+def test_lagging_subscriber_drops_oldest_batches():
+    ticks = make_ticks()
+    terminal = make_terminal(ticks)
+    multiplexer = TickMultiplexer(terminal)
+    slow = multiplexer.subscribe('EURUSD', max_batches=2)
+    fast = multiplexer.subscribe('EURUSD')
+    follow(terminal, multiplexer, [0, 0.15, 0.5, 1.5, 700])
+    # Five batches for a queue of two: the first three are dropped and counted
+    assert len(drained(fast)) == len(ticks)
+    kept = drained(slow)
+    assert slow.dropped + len(kept) == len(ticks) and slow.dropped > 0
+    assert kept == ticks['bid'][-len(kept):].tolist()
+    assert multiplexer.stats()['EURUSD']['dropped'] == slow.dropped
+    print(f"✅ A lagging subscriber loses its {slow.dropped} oldest ticks without holding up the others")
+
+
+if __name__ == "__main__":
+    test_every_tick_once_through_bursts_and_gaps()
+    test_late_subscriber_and_batch_doubling()
+    test_lagging_subscriber_drops_oldest_batches()
+    print("All tick stream checks passed.")
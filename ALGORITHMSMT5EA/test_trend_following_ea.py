@@ -0,0 +1,55 @@
+# Trend following EA signals and entries on the offline terminal (runs without a terminal)
+import os
+import subprocess
+import sys
+import tempfile
+
+ALGORITHMS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(ALGORITHMS_DIR)
+
+# Runs the EA's bar-close hook for a few hours of M1 bars and reports what it did
+TREND_PROBE = """
+import sys
+import time
+sys.path.insert(0, {trend_dir!r})
+import MetaTrader5 as mt5
+from mt5_trend_following_ea import TrendFollowingEA
+
+mt5.initialize()
+ea = TrendFollowingEA(symbol='EURUSD')
+signals = set()
+for _ in range(600):
+    time.sleep(60)
+    ea.on_bar_close(ea.primary_timeframe, None)
+    signal_data = ea.generate_signal()
+    signals.add(signal_data and signal_data['signal'])
+positions = mt5.positions_get(symbol='EURUSD') or ()
+print('signals', ' '.join(sorted(str(signal) for signal in signals)))
+print('positions', len(positions), ' '.join(str(p.volume) for p in positions))
+"""
+
+
+def test_trend_ea_trades_on_bar_close():
+    workdir = tempfile.mkdtemp(prefix='ea-trend-test-')
+    probe = os.path.join(workdir, 'trend_probe.py')
+    with open(probe, 'w') as f:
+        f.write(TREND_PROBE.format(trend_dir=os.path.join(ALGORITHMS_DIR, 'trend_following_ea')))
+    pythonpath = [os.path.join(ALGORITHMS_DIR, 'offline'), PROJECT_ROOT, os.environ.get('PYTHONPATH')]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, pythonpath)), MT5_OFFLINE_PATCH_CLOCK='1',
+               EA_EXECUTION_ID=f"trend-test-{os.getpid()}")
+    result = subprocess.run([sys.executable, probe], cwd=workdir, env=env, capture_output=True, text=True,
+                            timeout=300)
+    assert result.returncode == 0, result.stderr
+    lines = dict(line.split(' ', 1) for line in result.stdout.splitlines()
+                 if line.startswith(('signals ', 'positions ')))
+    signals = lines['signals'].split()
+    assert 'None' in signals and ('BUY' in signals or 'SELL' in signals), signals
+    count, *volumes = lines['positions'].split()
+    # max_positions is 1; the volume comes from the ATR stop loss
+    assert int(count) == 1 and all(float(volume) > 0 for volume in volumes), lines['positions']
+    print(f"✅ The trend EA generates signals on closed bars and opened {count} position(s)")
+
+
+if __name__ == "__main__":
+    test_trend_ea_trades_on_bar_close()
+    print("All trend following EA checks passed.")
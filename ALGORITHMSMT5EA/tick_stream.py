@@ -0,0 +1,238 @@
+"""
+Tick stream multiplexer: one tick ingest per terminal, fanned out to any
+number of consumers.
+
+Every EA used to poll symbol_info_tick for its own symbol, so ten EAs on a
+terminal made ten IPC round-trips per loop for mostly the same symbols, and
+each only ever saw the latest quote. TickMultiplexer pulls every new tick of
+every subscribed symbol with copy_ticks_from in one pass and appends the
+batch to each subscriber's queue.
+
+copy_ticks_from only takes a start time in whole seconds, so each pass asks
+from the second of the last tick seen and drops what was already delivered:
+ticks older than the last one, and as many ticks with the same time_msc as
+were delivered at that millisecond.
+
+Subscriber queues are collections.deque: append on the ingest side and
+popleft on the consumer side are atomic in CPython, so neither side takes a
+lock. A queue holds at most ``max_batches`` batches; when a consumer falls
+behind, the oldest batches are dropped and counted.
+
+Ingest lag is the time between a tick's timestamp and the pass that picked it
+up. Tick times are broker server time, so the server's offset from UTC is
+estimated as the smallest difference seen and subtracted.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+COPY_TICKS_ALL = -1
+RATE_WINDOW_SECONDS = 10.0
+
+logger = logging.getLogger(__name__)
+
+
+class TickSubscription:
+    """Queue of tick batches (numpy structured arrays) of one symbol for one consumer"""
+
+    def __init__(self, symbol, max_batches):
+        self.symbol = symbol
+        self._queue = deque(maxlen=max_batches)
+        self._ready = threading.Event()
+        self.received = 0
+        self.dropped = 0
+
+    def drain(self):
+        """All queued ticks as one array, or None when there are none"""
+        self._ready.clear()
+        batches = []
+        while True:
+            try:
+                batches.append(self._queue.popleft())
+            except IndexError:
+                break
+        if not batches:
+            return None
+        return batches[0] if len(batches) == 1 else np.concatenate(batches)
+
+    def wait(self, timeout=None):
+        """Block until ticks are queued; False on timeout"""
+        return bool(self._queue) or self._ready.wait(timeout)
+
+    def _put(self, ticks):
+        if len(self._queue) == self._queue.maxlen:
+            # The consumer fell behind: the oldest batch goes
+            try:
+                self.dropped += len(self._queue[0])
+            except IndexError:
+                pass
+        self._queue.append(ticks)
+        self.received += len(ticks)
+        self._ready.set()
+
+
+class _SymbolFeed:
+    """Cursor and statistics of one symbol"""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.subscribers = []
+        self.last_msc = None      # time_msc of the last tick delivered
+        self.seen_at_last = 0     # ticks delivered with exactly that time_msc
+        self.ticks = 0
+        self.window = deque()     # (poll time, ticks) within RATE_WINDOW_SECONDS
+        self.lag_ms = None
+        self.max_lag_ms = 0.0
+        self.polls = 0
+        self.poll_seconds = 0.0
+
+
+class TickMultiplexer:
+    """
+    Pulls the ticks of all subscribed symbols from one terminal and fans them out.
+
+    Args:
+        source: anything with copy_ticks_from and symbol_info_tick (the
+            MetaTrader5 module or a backend terminal handle).
+        batch_size: most ticks fetched per symbol and pass; a symbol that has
+            more waiting catches up on the following passes.
+
+    Call ``poll()`` from an existing loop (the EventLoop does, once per pass)
+    or ``start()`` a background ingest thread, not both.
+    """
+
+    def __init__(self, source, batch_size=5000):
+        self.source = source
+        self.batch_size = batch_size
+        self._feeds = {}
+        self._lock = threading.Lock()
+        self._server_offset_ms = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def subscribe(self, symbol, max_batches=1000):
+        """Queue for the ticks of ``symbol`` that arrive from now on"""
+        subscription = TickSubscription(symbol, max_batches)
+        with self._lock:
+            feed = self._feeds.get(symbol)
+            if feed is None:
+                feed = self._feeds[symbol] = _SymbolFeed(symbol)
+            feed.subscribers = feed.subscribers + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            feed = self._feeds.get(subscription.symbol)
+            if feed is None:
+                return
+            feed.subscribers = [s for s in feed.subscribers if s is not subscription]
+            if not feed.subscribers:
+                del self._feeds[subscription.symbol]
+
+    @property
+    def symbols(self):
+        return list(self._feeds)
+
+    def poll(self):
+        """One ingest pass over all subscribed symbols; returns the number of new ticks"""
+        total = 0
+        for feed in list(self._feeds.values()):
+            try:
+                total += self._poll_symbol(feed)
+            except Exception as e:
+                logger.error(f"Tick ingest failed for {feed.symbol}: {e}")
+        return total
+
+    def start(self, interval=0.05):
+        """Poll every ``interval`` seconds on a background thread"""
+        if self._thread is not None:
+            return self
+        self._stop.clear()
+
+        def ingest():
+            while not self._stop.is_set():
+                if not self.poll():
+                    self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=ingest, name='tick-stream', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        """Per symbol: ticks, ticks/s over the last 10 s, ingest lag and subscriber drops"""
+        now = time.time()
+        result = {}
+        for symbol, feed in list(self._feeds.items()):
+            recent = sum(count for at, count in feed.window if now - at <= RATE_WINDOW_SECONDS)
+            result[symbol] = {
+                'ticks': feed.ticks,
+                'rate': round(recent / RATE_WINDOW_SECONDS, 2),
+                'lag_ms': feed.lag_ms,
+                'max_lag_ms': round(feed.max_lag_ms, 1),
+                'poll_ms': round(feed.poll_seconds / feed.polls * 1000, 2) if feed.polls else None,
+                'subscribers': len(feed.subscribers),
+                'dropped': sum(s.dropped for s in feed.subscribers),
+            }
+        return result
+
+    # Internals
+
+    def _poll_symbol(self, feed):
+        if feed.last_msc is None:
+            # Start at the current quote rather than replaying history
+            tick = self.source.symbol_info_tick(feed.symbol)
+            if tick is None:
+                return 0
+            feed.last_msc, feed.seen_at_last = tick.time_msc, 0
+
+        count = self.batch_size
+        while True:
+            started = time.perf_counter()
+            ticks = self.source.copy_ticks_from(feed.symbol, feed.last_msc // 1000, count, COPY_TICKS_ALL)
+            now = time.time()
+            feed.polls += 1
+            feed.poll_seconds += time.perf_counter() - started
+            if ticks is None or len(ticks) == 0:
+                return 0
+            times = ticks['time_msc']
+            first = int(np.searchsorted(times, feed.last_msc, side='left'))
+            at_last = int(np.searchsorted(times, feed.last_msc, side='right')) - first
+            new = ticks[first + min(feed.seen_at_last, at_last):]
+            if len(new) or len(ticks) < count:
+                break
+            # A full batch of ticks already delivered: more than batch_size ticks share this second
+            count *= 2
+        if len(new) == 0:
+            return 0
+
+        last_msc = int(new['time_msc'][-1])
+        same = int(np.count_nonzero(new['time_msc'] == last_msc))
+        feed.seen_at_last = feed.seen_at_last + same if last_msc == feed.last_msc else same
+        feed.last_msc = last_msc
+
+        self._record(feed, new, now)
+        for subscription in feed.subscribers:
+            subscription._put(new)
+        return len(new)
+
+    def _record(self, feed, new, now):
+        feed.ticks += len(new)
+        feed.window.append((now, len(new)))
+        while feed.window and now - feed.window[0][0] > RATE_WINDOW_SECONDS:
+            feed.window.popleft()
+        # Delay of the oldest new tick, less the server's UTC offset (the smallest delay seen)
+        delay_ms = now * 1000 - int(new['time_msc'][0])
+        if self._server_offset_ms is None or delay_ms < self._server_offset_ms:
+            self._server_offset_ms = delay_ms
+        feed.lag_ms = round(delay_ms - self._server_offset_ms, 1)
+        feed.max_lag_ms = max(feed.max_lag_ms, feed.lag_ms)
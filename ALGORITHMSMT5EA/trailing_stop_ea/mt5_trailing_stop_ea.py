@@ -10,7 +10,6 @@ It does not open new trades - it only trails stop losses for existing trades.
 
 import MetaTrader5 as mt5
 from datetime import datetime
-import time
 import sys
 import os
 # Add root directory to path for imports
@@ -19,9 +18,13 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from global_config import *
 from risk_manager import RiskManager
 # Import common EA utilities
-from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, check_pause_flag
+from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, position_book, EA
+
+class TrailingStopManager(EA):
+    tick_interval = 3  # Check every 3 seconds for more responsive trailing
+    # Changeable through set_params
+    tunable_params = {'risk_percentage': float}
 
-class TrailingStopManager:
     def __init__(self, symbol="EURUSD", risk_percentage=None, 
                  magic_number=0):
         """
@@ -102,17 +105,8 @@ class TrailingStopManager:
         return sl_price
 
     def get_open_positions(self):
-        """Get all open positions for the symbol"""
-        if self.magic_number == 0:
-            # Get all positions for the symbol regardless of magic number
-            positions = mt5.positions_get(symbol=self.symbol)
-        else:
-            # Get positions with specific magic number
-            positions = mt5.positions_get(symbol=self.symbol, magic=self.magic_number)
-        
-        if positions is None:
-            return []
-        return list(positions)
+        """Get all open positions for the symbol (of magic_number unless it is 0)"""
+        return position_book.positions(self.symbol, self.magic_number or None)
     
     def modify_position_sl(self, position, new_sl):
         """Modify the stop loss of a position"""
@@ -124,7 +118,7 @@ class TrailingStopManager:
             "tp": position.tp,
         }
         
-        result = mt5.order_send(request)
+        result = position_book.order_send(request)
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             print(f"Failed to modify SL: {result.retcode}")
             return False
@@ -163,34 +157,26 @@ class TrailingStopManager:
                 else:
                     print(f"SELL Position #{position.ticket}: SL {position.sl:.5f} already better than calculated {new_sl:.5f}")
     
-    def run(self):
-        """Main trailing stop manager loop"""
-        if not self.initialize_mt5():
-            return
-        self.is_running = True
+    def on_start(self):
         print("Risk-Based Trailing Stop Manager started...")
         print(f"Managing positions for symbol: {self.symbol}")
         print(f"Risk per trade: {self.risk_percentage}% of account balance")
         print(f"Magic number filter: {'All trades' if self.magic_number == 0 else self.magic_number}")
         print("Will calculate stop loss based on risking 10% of balance!")
-        try:
-            while self.is_running:
-                # Pause logic: check for pause.flag in working directory
-                check_pause_flag(os.path.dirname(os.path.abspath(__file__)))
-                # Update trailing stops for existing positions
-                positions = self.get_open_positions()
-                if len(positions) > 0:
-                    print(f"\nManaging {len(positions)} open position(s)...")
-                    self.update_trailing_stops()
-                else:
-                    print("No open positions to manage.")
-                # Wait before next iteration
-                time.sleep(3)  # Check every 3 seconds for more responsive trailing
-        except KeyboardInterrupt:
-            print("Trailing Stop Manager stopped by user")
-        finally:
-            self.stop()
-    
+        return True
+
+    def on_tick(self, tick):
+        """Trail the stops as the price moves"""
+        self.update_trailing_stops()
+
+    def on_position_change(self, positions):
+        """New positions get their risk-based stop without waiting for the next tick"""
+        if positions:
+            print(f"\nManaging {len(positions)} open position(s)...")
+            self.update_trailing_stops()
+        else:
+            print("No open positions to manage.")
+
     def stop(self):
         """Stop the trailing stop manager and cleanup"""
         self.is_running = False
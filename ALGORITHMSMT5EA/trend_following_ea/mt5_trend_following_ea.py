@@ -9,10 +9,8 @@ major market trends using multiple timeframe analysis and trend confirmation ind
 
 
 import MetaTrader5 as mt5
-import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import time
 import sys
 import os
 # Add root directory to path for global imports
@@ -20,9 +18,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from global_config import get_account_credentials, get_risk_settings
 from risk_manager import RiskManager
 # Import common EA utilities
-from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, check_pause_flag
+from ALGORITHMSMT5EA.common_ea import initialize_mt5, get_symbol_info, get_current_price, get_rates, market_data, indicator_feed, entries_allowed, position_book, EA
+from ALGORITHMSMT5EA import indicator_kernels as kernels
+from ALGORITHMSMT5EA.indicators import ADX, ATR, EMA, RSI
+
+class TrendFollowingEA(EA):
 
-class TrendFollowingEA:
     def __init__(self, symbol="EURUSD", lot_size=0.1, magic_number=98765,
                  primary_timeframe=mt5.TIMEFRAME_M1, secondary_timeframe=mt5.TIMEFRAME_M5,
                  login=None, password=None, server=None):
@@ -43,98 +44,161 @@ class TrendFollowingEA:
         self.magic_number = magic_number
         self.primary_timeframe = primary_timeframe
         self.secondary_timeframe = secondary_timeframe
-    # ...existing attribute initializations...
+        # Signals and position management run on each closed primary bar
+        self.timeframes = (primary_timeframe,)
+        # Streaming indicators and their bar feed per timeframe, see trend_indicators()
+        self._indicators = {}
+        self._feeds = {}
+        self.lot_size = lot_size
+        self.is_running = False
+
+        # Account from the arguments, else the global configuration
+        credentials = get_account_credentials()
+        self.login = login or credentials['login']
+        self.password = password or credentials['password']
+        self.server = server or credentials['server']
+        self.risk_manager = RiskManager('trend_following_ea')
+
+        # Trend indicators (see config.py)
+        self.ema_fast = 21
+        self.ema_slow = 50
+        self.ema_filter = 200
+        self.adx_period = 14
+        self.adx_threshold = 25
+        self.atr_period = 14
+
+        # Risk and position management
+        self.atr_multiplier = 2.5     # stop loss and trailing distance in ATRs
+        self.risk_percent = 1.0       # balance risked at the stop loss, per trade
+        self.max_positions = 1
+        self.trailing_enabled = True
+
+    def initialize_mt5(self):
+        # Use shared utility
+        return initialize_mt5(self.login, self.password, self.server)
+
+    def get_symbol_info(self):
+        # Use shared utility
+        return get_symbol_info(self.symbol)
+
+    def get_current_price(self):
+        # Use shared utility
+        return get_current_price(self.symbol)
+
+    def get_market_data(self, timeframe, num_bars=500):
+        """Latest bars for the symbol as a DataFrame, or a structured array when pandas-free (served from the shared bar cache)"""
+        return market_data(get_rates(self.symbol, timeframe, num_bars))
     
+    def calculate_ema(self, data, period):
+        """EMA of the closes of ``data`` (bars as a structured array or DataFrame), as an array"""
+        return kernels.ema(data, period)
+
+    def calculate_atr(self, data, period=14):
+        """Average True Range (simple mean of the true range)"""
+        return kernels.atr(data, period, wilder=False)
+
     def calculate_adx(self, data, period=14):
-        """Calculate Average Directional Index (ADX)"""
-        high = data['high']
-        low = data['low']
-        close = data['close']
-        
-        # Calculate directional movement
-        plus_dm = high.diff()
-        minus_dm = low.diff()
-        plus_dm[plus_dm < 0] = 0
-        minus_dm[minus_dm > 0] = 0
-        minus_dm = minus_dm.abs()
-        
-        # Calculate True Range
-        tr1 = high - low
-        tr2 = abs(high - close.shift())
-        tr3 = abs(low - close.shift())
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        
-        # Calculate smoothed averages
-        atr = tr.rolling(window=period).mean()
-        plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
-        minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
-        
-        # Calculate ADX
-        dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-        adx = dx.rolling(window=period).mean()
-        
-        return adx, plus_di, minus_di
-    
+        """Calculate Average Directional Index (ADX); returns (adx, +DI, -DI)"""
+        return kernels.adx(data, period, wilder=False)
+
     def calculate_rsi(self, data, period=14):
         """Calculate RSI indicator"""
-        delta = data['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+        return kernels.rsi(data, period, wilder=False)
+
+    def trend_indicators(self, timeframe):
+        """Streaming indicators of ``timeframe``, brought up to date with its closed bars"""
+        indicators = self._indicators.get(timeframe)
+        if indicators is None:
+            indicators = self._indicators[timeframe] = {
+                'ema_fast': EMA(self.ema_fast),
+                'ema_slow': EMA(self.ema_slow),
+                'ema_filter': EMA(self.ema_filter),
+                'atr': ATR(self.atr_period, wilder=False),
+                'adx': ADX(self.adx_period, wilder=False),
+                'rsi': RSI(14, wilder=False),
+            }
+            self._feeds[timeframe] = indicator_feed(self.symbol, timeframe, indicators.values(), warmup=500)
+        self._feeds[timeframe].update()
+        return indicators
     
     def analyze_trend(self, timeframe):
-        """Comprehensive trend analysis.
+        """Comprehensive trend analysis on the closed bars of ``timeframe``.
         Returns a dict with key metrics used by signal generation and risk.
         """
-        data = self.get_market_data(timeframe, 500)
-        if data is None or len(data) < 250:
+        indicators = self.trend_indicators(timeframe)
+        last_bar = self._feeds[timeframe].last_bar
+        if last_bar is None or indicators['ema_filter'].count < 250 or not indicators['adx'].ready:
             return None
 
-        # Calculate indicators
-        ema_fast = self.calculate_ema(data, self.ema_fast)
-        ema_slow = self.calculate_ema(data, self.ema_slow)
-        ema_filter = self.calculate_ema(data, self.ema_filter)
-        atr = self.calculate_atr(data, self.atr_period)
-        adx, plus_di, minus_di = self.calculate_adx(data, self.adx_period)
-        rsi = self.calculate_rsi(data)
+        ema_fast = indicators['ema_fast']
+        ema_slow = indicators['ema_slow']
+        adx = indicators['adx']
 
         # Current values
-        current_price = data['close'].iloc[-1]
-        current_ema_fast = ema_fast.iloc[-1]
-        current_ema_slow = ema_slow.iloc[-1]
-        current_ema_filter = ema_filter.iloc[-1]
-        current_atr = atr.iloc[-1]
-        current_adx = adx.iloc[-1]
-        current_plus_di = plus_di.iloc[-1]
-        current_minus_di = minus_di.iloc[-1]
-        current_rsi = rsi.iloc[-1]
-
-        # Previous values for crossover detection
-        prev_ema_fast = ema_fast.iloc[-2]
-        prev_ema_slow = ema_slow.iloc[-2]
+        current_price = last_bar['close']
+        current_ema_filter = indicators['ema_filter'].value
+        current_adx = adx.value
 
         # Derived booleans for convenience
         above_filter = current_price > current_ema_filter
-        strong_trend = bool(current_adx > 20)
+        below_filter = current_price < current_ema_filter
+        strong_trend = bool(current_adx > self.adx_threshold)
 
         analysis = {
             'price': current_price,
-            'ema_fast': current_ema_fast,
-            'ema_slow': current_ema_slow,
+            'ema_fast': ema_fast.value,
+            'ema_slow': ema_slow.value,
             'ema_filter': current_ema_filter,
-            'atr': current_atr,
+            'atr': indicators['atr'].value,
             'adx': current_adx,
-            'plus_di': current_plus_di,
-            'minus_di': current_minus_di,
-            'rsi': current_rsi,
-            'prev_ema_fast': prev_ema_fast,
-            'prev_ema_slow': prev_ema_slow,
+            'plus_di': adx.plus_di,
+            'minus_di': adx.minus_di,
+            'rsi': indicators['rsi'].value,
+            # Previous values for crossover detection
+            'prev_ema_fast': ema_fast.previous,
+            'prev_ema_slow': ema_slow.previous,
             'above_filter': above_filter,
+            'below_filter': below_filter,
             'strong_trend': strong_trend,
+            # +DI over -DI: the directional movement is up
+            'uptrend_strength': bool(adx.plus_di > adx.minus_di),
         }
         return analysis
+
+    def generate_signal(self):
+        """
+        BUY or SELL when the primary timeframe trends strongly (fast EMA past
+        the slow one, price on the same side of the filter EMA, ADX above the
+        threshold, RSI past 50) and the secondary timeframe agrees. Returns
+        {'signal', 'primary_analysis', 'secondary_analysis'}, or None while
+        the indicators are still warming up.
+        """
+        primary = self.analyze_trend(self.primary_timeframe)
+        secondary = self.analyze_trend(self.secondary_timeframe)
+        if primary is None or secondary is None:
+            return None
+
+        signal = None
+        if primary['strong_trend']:
+            if (primary['ema_fast'] > primary['ema_slow'] and primary['above_filter']
+                    and secondary['above_filter'] and secondary['uptrend_strength'] and primary['rsi'] > 50):
+                signal = "BUY"
+            elif (primary['ema_fast'] < primary['ema_slow'] and primary['below_filter']
+                    and secondary['below_filter'] and not secondary['uptrend_strength'] and primary['rsi'] < 50):
+                signal = "SELL"
+        return {'signal': signal, 'primary_analysis': primary, 'secondary_analysis': secondary}
+
+    def calculate_position_size(self, atr_value, balance):
+        """Lots that lose ``risk_percent`` of ``balance`` at the ATR stop loss; lot_size when that cannot be worked out"""
+        symbol_info = self.get_symbol_info()
+        stop_distance = atr_value * self.atr_multiplier
+        if symbol_info is None or stop_distance <= 0 or not symbol_info.trade_tick_size or not symbol_info.trade_tick_value:
+            return self.lot_size
+        loss_per_lot = stop_distance / symbol_info.trade_tick_size * symbol_info.trade_tick_value
+        lots = balance * self.risk_percent / 100 / loss_per_lot
+        step = symbol_info.volume_step
+        lots = max(symbol_info.volume_min, min(symbol_info.volume_max, lots))
+        return round(round(lots / step) * step, 2)
     
     def open_position(self, direction, analysis):
         """Open a new position"""
@@ -189,7 +253,7 @@ class TrendFollowingEA:
             "type_filling": mt5.ORDER_FILLING_IOC,
         }
         
-        result = mt5.order_send(request)
+        result = position_book.order_send(request)
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             print(f"Failed to open {direction} position: {result.retcode}")
             return False
@@ -199,13 +263,7 @@ class TrendFollowingEA:
     
     def get_open_positions(self):
         """Get all open positions for this EA"""
-        positions = mt5.positions_get(symbol=self.symbol)
-        if positions is None:
-            return []
-        
-        # Filter positions by magic number
-        ea_positions = [pos for pos in positions if pos.magic == self.magic_number]
-        return ea_positions
+        return position_book.positions(self.symbol, self.magic_number)
     
     def update_trailing_stop(self, position, current_price, atr_value):
         """Update trailing stop for a position"""
@@ -246,7 +304,7 @@ class TrendFollowingEA:
             "tp": position.tp,
         }
         
-        result = mt5.order_send(request)
+        result = position_book.order_send(request)
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             print(f"Failed to update trailing stop: {result.retcode}")
             return False
@@ -305,7 +363,7 @@ class TrendFollowingEA:
             "type_filling": mt5.ORDER_FILLING_IOC,
         }
         
-        result = mt5.order_send(request)
+        result = position_book.order_send(request)
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             print(f"Failed to close position {position.ticket}: {result.retcode}")
             return False
@@ -361,55 +419,41 @@ class TrendFollowingEA:
                 pos_type = "BUY" if pos.type == mt5.ORDER_TYPE_BUY else "SELL"
                 print(f"   {pos_type} {pos.volume} lots at {pos.price_open:.5f}, P&L: ${pos.profit:.2f}")
     
-    def run(self):
-        """Main EA loop"""
-        if not self.initialize_mt5():
-            return
-        
-        self.is_running = True
+    def on_start(self):
         print("Trend Following EA started...")
         print("Monitoring for long-term trend signals...")
+        return True
+
+    def on_bar_close(self, timeframe, bar):
+        # Manage existing positions
+        self.manage_positions()
         
-        try:
-            iteration_count = 0
-            while self.is_running:
-                # Manage existing positions
-                self.manage_positions()
-                
-                # Check for new signals
-                signal_data = self.generate_signal()
-                if signal_data and signal_data['signal']:
-                    positions = self.get_open_positions()
-                    
-                    # Check if we can open new positions
-                    if len(positions) < self.max_positions:
-                        if signal_data['signal'] == "BUY":
-                            # Check if we don't already have a buy position
-                            buy_positions = [p for p in positions if p.type == mt5.ORDER_TYPE_BUY]
-                            if len(buy_positions) == 0:
-                                print("🚀 Strong uptrend signal detected!")
-                                self.open_position("BUY", signal_data['primary_analysis'])
-                        
-                        elif signal_data['signal'] == "SELL":
-                            # Check if we don't already have a sell position
-                            sell_positions = [p for p in positions if p.type == mt5.ORDER_TYPE_SELL]
-                            if len(sell_positions) == 0:
-                                print("🔻 Strong downtrend signal detected!")
-                                self.open_position("SELL", signal_data['primary_analysis'])
-                
-                # Display status every 20 iterations (for M1 timeframe = ~20 minutes)
-                iteration_count += 1
-                if iteration_count % 20 == 0:
-                    self.get_trend_status()
-                
-                # Wait before next iteration (M1 timeframe = check every 1 minute)
-                time.sleep(60)  # 1 minute
+        # Check for new signals
+        signal_data = self.generate_signal()
+        if signal_data and signal_data['signal'] and entries_allowed():
+            positions = self.get_open_positions()
+            
+            # Check if we can open new positions
+            if len(positions) < self.max_positions:
+                if signal_data['signal'] == "BUY":
+                    # Check if we don't already have a buy position
+                    buy_positions = [p for p in positions if p.type == mt5.ORDER_TYPE_BUY]
+                    if len(buy_positions) == 0:
+                        print("🚀 Strong uptrend signal detected!")
+                        self.open_position("BUY", signal_data['primary_analysis'])
                 
-        except KeyboardInterrupt:
-            print("EA stopped by user")
-        finally:
-            self.stop()
-    
+                elif signal_data['signal'] == "SELL":
+                    # Check if we don't already have a sell position
+                    sell_positions = [p for p in positions if p.type == mt5.ORDER_TYPE_SELL]
+                    if len(sell_positions) == 0:
+                        print("🔻 Strong downtrend signal detected!")
+                        self.open_position("SELL", signal_data['primary_analysis'])
+        
+        # Display status every 20 iterations (for M1 timeframe = ~20 minutes)
+        self.iteration_count = getattr(self, 'iteration_count', 0) + 1
+        if self.iteration_count % 20 == 0:
+            self.get_trend_status()
+
     def stop(self):
         """Stop the EA and cleanup"""
         self.is_running = False
@@ -73,24 +73,24 @@ def run_tests():
             ema_filter = ea.calculate_ema(h4_data, ea.ema_filter)
             
             print(f"✅ EMAs calculated:")
-            print(f"   - Fast EMA ({ea.ema_fast}): {ema_fast.iloc[-1]:.5f}")
-            print(f"   - Slow EMA ({ea.ema_slow}): {ema_slow.iloc[-1]:.5f}")
-            print(f"   - Filter EMA ({ea.ema_filter}): {ema_filter.iloc[-1]:.5f}")
+            print(f"   - Fast EMA ({ea.ema_fast}): {ema_fast[-1]:.5f}")
+            print(f"   - Slow EMA ({ea.ema_slow}): {ema_slow[-1]:.5f}")
+            print(f"   - Filter EMA ({ea.ema_filter}): {ema_filter[-1]:.5f}")
             
             # Test ATR calculation
             atr = ea.calculate_atr(h4_data, ea.atr_period)
-            print(f"✅ ATR calculated: {atr.iloc[-1]:.5f}")
+            print(f"✅ ATR calculated: {atr[-1]:.5f}")
             
             # Test ADX calculation
             adx, plus_di, minus_di = ea.calculate_adx(h4_data, ea.adx_period)
             print(f"✅ ADX calculated:")
-            print(f"   - ADX: {adx.iloc[-1]:.2f}")
-            print(f"   - +DI: {plus_di.iloc[-1]:.2f}")
-            print(f"   - -DI: {minus_di.iloc[-1]:.2f}")
+            print(f"   - ADX: {adx[-1]:.2f}")
+            print(f"   - +DI: {plus_di[-1]:.2f}")
+            print(f"   - -DI: {minus_di[-1]:.2f}")
             
             # Test RSI calculation
             rsi = ea.calculate_rsi(h4_data)
-            print(f"✅ RSI calculated: {rsi.iloc[-1]:.2f}")
+            print(f"✅ RSI calculated: {rsi[-1]:.2f}")
         
         # Test 6: Trend analysis
         print("\n6. Testing trend analysis...")
@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'adrf',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
@@ -186,3 +187,35 @@ PAYSTACK_WEBHOOK_SECRET = config('PAYSTACK_WEBHOOK_SECRET', default='')
 # Currency settings for South Africa
 DEFAULT_CURRENCY = 'ZAR'
 PAYSTACK_CURRENCY = 'ZAR'
+
+# MetaTrader 5 terminal sessions
+# Comma-separated terminal64.exe paths; each terminal keeps one account logged in between requests
+MT5_TERMINAL_PATHS = [path for path in config('MT5_TERMINAL_PATHS', default='').split(',') if path]
+MT5_SESSION_IDLE_TIMEOUT = config('MT5_SESSION_IDLE_TIMEOUT', default=300, cast=int)  # seconds
+MT5_CONNECTION_TIMEOUT_MS = config('MT5_CONNECTION_TIMEOUT_MS', default=10000, cast=int)
+
+# MT5 gateway (manage.py run_mt5_gateway); when set, web workers never call the terminal directly.
+# Comma-separated Unix socket paths or host:port pairs, one per gateway process.
+MT5_GATEWAY_ADDRESSES = [address for address in config('MT5_GATEWAY_ADDRESSES', default='').split(',') if address]
+MT5_GATEWAY_TIMEOUT = config('MT5_GATEWAY_TIMEOUT', default=30, cast=int)  # seconds
+# Shared secret sent with every gateway request; required for a gateway on a non-loopback host:port
+MT5_GATEWAY_TOKEN = config('MT5_GATEWAY_TOKEN', default='')
+
+# Account snapshots served to the dashboard polls (balance/equity/margin)
+MT5_ACCOUNT_SNAPSHOT_TTL = config('MT5_ACCOUNT_SNAPSHOT_TTL', default=5, cast=float)  # seconds
+# Expired snapshots younger than TTL + this are returned immediately while a background refresh runs
+MT5_ACCOUNT_SNAPSHOT_STALE_TTL = config('MT5_ACCOUNT_SNAPSHOT_STALE_TTL', default=30, cast=float)  # seconds
+
+# Async MT5 views (api/mt5/async/...): calls queued per terminal before new requests get a 503
+MT5_EXECUTOR_MAX_PENDING = config('MT5_EXECUTOR_MAX_PENDING', default=64, cast=int)
+
+# EA supervisor (manage.py run_ea_supervisor); when set, EAs are started and stopped through it
+MT5_SUPERVISOR_ADDRESS = config('MT5_SUPERVISOR_ADDRESS', default='')
+MT5_SUPERVISOR_TIMEOUT = config('MT5_SUPERVISOR_TIMEOUT', default=10, cast=int)  # seconds
+
+# EA output: last MT5_EA_LOG_LINES lines per execution in memory (api/mt5/algorithm-logs/<id>/),
+# all of it in MT5_EA_LOG_DIR/<id>.log, gzip-rotated at MT5_EA_LOG_MAX_BYTES
+MT5_EA_LOG_DIR = config('MT5_EA_LOG_DIR', default=str(BASE_DIR / 'logs' / 'ea'))
+MT5_EA_LOG_LINES = config('MT5_EA_LOG_LINES', default=2000, cast=int)
+MT5_EA_LOG_MAX_BYTES = config('MT5_EA_LOG_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+MT5_EA_LOG_BACKUPS = config('MT5_EA_LOG_BACKUPS', default=5, cast=int)
@@ -0,0 +1,184 @@
+"""
+Cached MT5 account snapshots for the status and account endpoints.
+
+The frontend polls balance/equity/margin far more often than they are worth
+re-reading from the terminal. AccountSnapshotCache keeps the last snapshot per
+MT5Account in memory: fresh entries are returned directly, entries inside the
+stale window are returned immediately while one background thread refreshes
+them, and only expired entries make the caller wait for the terminal. At most
+one MT5 round-trip per account is in flight at any time.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional
+
+from django.utils import timezone
+
+from .session_pool import MT5Credentials, MT5SessionError
+
+
+logger = logging.getLogger(__name__)
+
+
+class AccountSnapshot(NamedTuple):
+    """Balance and exposure of one MT5 account at ``fetched_at``"""
+    login: int
+    currency: str
+    balance: float
+    equity: float
+    margin: float
+    free_margin: float
+    positions_count: int
+    fetched_at: object          # aware datetime, for display and persistence
+    fetched_monotonic: float    # for age calculations
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_monotonic
+
+    def as_dict(self) -> Dict:
+        return {
+            'login': self.login,
+            'currency': self.currency,
+            'balance': self.balance,
+            'equity': self.equity,
+            'margin': self.margin,
+            'free_margin': self.free_margin,
+            'positions_count': self.positions_count,
+            'fetched_at': self.fetched_at.isoformat(),
+            'age_seconds': round(self.age, 3),
+        }
+
+
+class _Entry:
+    __slots__ = ('snapshot', 'fingerprint', 'lock', 'refreshing')
+
+    def __init__(self):
+        self.snapshot: Optional[AccountSnapshot] = None
+        self.fingerprint: Optional[str] = None
+        self.lock = threading.Lock()
+        self.refreshing = False
+
+
+def _fingerprint(credentials: MT5Credentials) -> str:
+    # A changed password or server must not be answered from the old login's snapshot
+    raw = f"{credentials.login}:{credentials.server}:{credentials.password}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class AccountSnapshotCache:
+    """
+    In-memory, per-account snapshot cache with stale-while-revalidate refresh.
+
+    Args:
+        fetch: callable taking MT5Credentials and returning an AccountSnapshot.
+        ttl: seconds a snapshot is served without contacting the terminal.
+        stale_ttl: extra seconds an expired snapshot is still served while a
+            background refresh runs.
+    """
+
+    def __init__(self, fetch: Callable[[MT5Credentials], AccountSnapshot],
+                 ttl: float = 5.0, stale_ttl: float = 30.0):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: Dict[int, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, account_id: int, credentials: MT5Credentials, force: bool = False) -> AccountSnapshot:
+        """Return a snapshot for ``account_id``, fetching it only when needed"""
+        if not force:
+            snapshot = self.peek(account_id, credentials)
+            if snapshot is not None:
+                return snapshot
+
+        entry = self._entry(account_id)
+        fingerprint = _fingerprint(credentials)
+        with entry.lock:
+            # Another request may have refreshed the entry while we waited
+            snapshot = entry.snapshot
+            if (snapshot is not None and entry.fingerprint == fingerprint and not force
+                    and snapshot.age < self.ttl):
+                return snapshot
+            return self._refresh(entry, credentials, fingerprint)
+
+    def peek(self, account_id: int, credentials: MT5Credentials) -> Optional[AccountSnapshot]:
+        """
+        The snapshot ``get`` would return without waiting for the terminal
+        (starting the background refresh of a stale one), or None when a fetch
+        is needed. Never blocks, so async views can call it on the event loop.
+        """
+        entry = self._entries.get(account_id)
+        if entry is None:
+            return None
+        fingerprint = _fingerprint(credentials)
+        snapshot = entry.snapshot
+        if snapshot is None or entry.fingerprint != fingerprint:
+            return None
+        if snapshot.age < self.ttl:
+            return snapshot
+        if snapshot.age < self.ttl + self.stale_ttl:
+            self._refresh_in_background(entry, credentials, fingerprint)
+            return snapshot
+        return None
+
+    def invalidate(self, account_id: int):
+        with self._lock:
+            self._entries.pop(account_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _entry(self, account_id: int) -> _Entry:
+        entry = self._entries.get(account_id)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.setdefault(account_id, _Entry())
+        return entry
+
+    def _refresh(self, entry: _Entry, credentials: MT5Credentials, fingerprint: str) -> AccountSnapshot:
+        snapshot = self.fetch(credentials)
+        entry.snapshot = snapshot
+        entry.fingerprint = fingerprint
+        return snapshot
+
+    def _refresh_in_background(self, entry: _Entry, credentials: MT5Credentials, fingerprint: str):
+        with self._lock:
+            if entry.refreshing:
+                return
+            entry.refreshing = True
+
+        def run():
+            try:
+                with entry.lock:
+                    self._refresh(entry, credentials, fingerprint)
+            except Exception as e:
+                # The stale snapshot keeps being served until it expires
+                logger.warning(f"Background refresh of MT5 account {credentials.login} failed: {e}")
+            finally:
+                entry.refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+def fetch_account_snapshot(terminal) -> AccountSnapshot:
+    """Read an AccountSnapshot through a terminal handle (one account_info and one positions_total call)"""
+    account_info = terminal.account_info()
+    if account_info is None:
+        raise MT5SessionError('Failed to retrieve account information', terminal.last_error())
+    positions_count = terminal.positions_total()
+    return AccountSnapshot(
+        login=account_info.login,
+        currency=account_info.currency,
+        balance=account_info.balance,
+        equity=account_info.equity,
+        margin=account_info.margin,
+        free_margin=account_info.margin_free,
+        positions_count=positions_count or 0,
+        fetched_at=timezone.now(),
+        fetched_monotonic=time.monotonic(),
+    )
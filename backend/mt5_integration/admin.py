@@ -36,7 +36,8 @@ class MT5TradingSessionAdmin(admin.ModelAdmin):
 
 @admin.register(AlgorithmExecution)
 class AlgorithmExecutionAdmin(admin.ModelAdmin):
-    list_display = ['algorithm_name', 'mt5_account', 'execution_status', 'started_at', 'profit_loss', 'trades_count']
+    list_display = ['algorithm_name', 'mt5_account', 'execution_status', 'started_at', 'profit_loss', 'trades_count',
+                    'restart_count', 'last_heartbeat']
     list_filter = ['execution_status', 'algorithm_name', 'started_at']
     search_fields = ['algorithm_name', 'mt5_account__user__email', 'mt5_account__account_number']
     readonly_fields = ['started_at']
@@ -0,0 +1,185 @@
+"""
+Async (ASGI) versions of the views that wait on MT5.
+
+The MT5 part of each request runs on the executor of the account's terminal
+(see terminal_executor), so a slow broker login holds a thread of that
+terminal rather than a whole server worker. Database access goes through the
+async ORM or sync_to_async. Responses match the synchronous views; when a
+terminal has too many queued calls the request gets a 503.
+
+``algorithm_logs`` follows EA output without holding a thread: it polls the
+log tail without waiting and sleeps on the event loop in between.
+"""
+
+import asyncio
+import time
+
+from adrf.decorators import api_view
+from asgiref.sync import sync_to_async
+from rest_framework.decorators import permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from ..models import AlgorithmExecution, MT5Account
+from ..mt5_service import MT5AlgorithmManager, MT5ConnectionManager, account_credentials
+from ..serializers import AlgorithmExecutionSerializer, MT5AccountConnectionSerializer, MT5AccountStatusSerializer
+from ..session_pool import MT5Credentials, MT5LoginError, MT5SessionError
+from ..terminal_executor import TerminalBusy, run_on_terminal
+from .ea_trading_views import ASYNC_MAX_FOLLOW_WAIT, log_query, log_query_error, log_response
+from .manual_trading_views import fetch_manual_deals, manual_statistics_payload
+from .mt5_authentication_views import get_mt5_account
+from .mt5_verification_views import connection_test_response
+from .trade_execution_views import risk_details
+
+
+FOLLOW_POLL_INTERVAL = 0.25  # seconds between log polls of a follow request
+
+
+def terminal_busy_response(e):
+    return Response({'error': 'MT5 terminal busy, please retry', 'details': str(e)}, status=503)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+async def manual_statistics(request):
+    """Return live manual trading statistics for the authenticated user's MT5 account."""
+    try:
+        account = await MT5Account.objects.aget(user=request.user)
+        credentials = account_credentials(account)
+        manual_deals = await run_on_terminal(credentials, fetch_manual_deals, credentials)
+        return Response(manual_statistics_payload(account, manual_deals), status=200)
+    except MT5Account.DoesNotExist:
+        return Response({"error": "No MT5 account found"}, status=404)
+    except TerminalBusy as e:
+        return terminal_busy_response(e)
+    except MT5LoginError as e:
+        return Response({"error": "MT5 login failed", "details": e.error}, status=401)
+    except MT5SessionError as e:
+        return Response({"error": e.message, "details": e.error}, status=500)
+    except Exception as e:
+        return Response({"error": str(e)}, status=500)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+async def test_mt5_connection(request):
+    """Test MT5 connection with provided credentials"""
+    serializer = MT5AccountConnectionSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=400)
+    data = serializer.validated_data
+    try:
+        credentials = MT5Credentials(int(data['account_number']), data['password'], data['server'])
+    except ValueError:
+        # Let test_connection report the bad account number as usual
+        credentials = None
+    try:
+        success, result = await run_on_terminal(
+            credentials,
+            MT5ConnectionManager.test_connection,
+            data['account_number'],
+            data['password'],
+            data['server']
+        )
+    except TerminalBusy as e:
+        return terminal_busy_response(e)
+    return connection_test_response(success, result)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+async def refresh_account_status(request):
+    """Refresh MT5 account status and balance"""
+    try:
+        account = await MT5Account.objects.aget(user=request.user)
+    except MT5Account.DoesNotExist:
+        return Response({
+            'error': 'No MT5 account found',
+            'message': 'Please set up your MT5 account first.'
+        }, status=404)
+    # A cached snapshot needs no terminal call, so it does not queue behind (or 503 on) the executor
+    snapshot, error = MT5ConnectionManager.cached_account_snapshot(account), None
+    if snapshot is None:
+        try:
+            snapshot, error = await run_on_terminal(
+                account_credentials(account), MT5ConnectionManager.read_account_snapshot, account
+            )
+        except TerminalBusy as e:
+            return terminal_busy_response(e)
+    result = await sync_to_async(MT5ConnectionManager.save_account_status)(account, snapshot, error)
+    return Response({
+        'message': 'Account status refreshed',
+        'account': MT5AccountStatusSerializer(account).data,
+        'connection': result
+    }, status=200)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+async def start_algorithm(request):
+    """Start an algorithm on user's MT5 account"""
+    algorithm_name = request.data.get('algorithm_name')
+    symbol = request.data.get('symbol', '')
+    if not algorithm_name:
+        return Response({'error': 'Algorithm name is required'}, status=400)
+    account, error = await sync_to_async(get_mt5_account)(request.user)
+    if error:
+        return Response(error, status=400)
+    try:
+        # The execution row comes first so the EA supervisor can report on it
+        execution = await AlgorithmExecution.objects.acreate(
+            mt5_account=account,
+            algorithm_name=algorithm_name,
+            execution_status='running'
+        )
+        # Start the EA script as a subprocess
+        result = await sync_to_async(MT5AlgorithmManager.start_algorithm, thread_sensitive=False)(
+            account, algorithm_name, symbol, execution_id=execution.id
+        )
+        if result['status'] != 'success':
+            await execution.adelete()
+            return Response(result, status=400)
+        execution.pid = result.get('pid')
+        await execution.asave(update_fields=['pid'])
+        try:
+            risk = await run_on_terminal(account_credentials(account), risk_details, account)
+        except TerminalBusy:
+            # The EA is already running; report the risk as unknown rather than failing the start
+            risk = None
+        return Response({
+            'message': result['message'],
+            'execution': AlgorithmExecutionSerializer(execution).data,
+            'risk_management': risk
+        }, status=201)
+    except Exception as e:
+        return Response({'error': str(e)}, status=500)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+async def algorithm_logs(request, execution_id):
+    """Tail or follow an execution's EA output; same query and response as the synchronous view"""
+    try:
+        account = await MT5Account.objects.aget(user=request.user)
+    except MT5Account.DoesNotExist:
+        return Response({
+            'error': 'No MT5 account found',
+            'message': 'Please set up your MT5 account first.'
+        }, status=404)
+    execution_status = await AlgorithmExecution.objects.filter(
+        id=execution_id, mt5_account=account
+    ).values_list('execution_status', flat=True).afirst()
+    if execution_status is None:
+        return Response({'detail': 'Not found.'}, status=404)
+    try:
+        lines, after, wait = log_query(request, ASYNC_MAX_FOLLOW_WAIT)
+    except ValueError:
+        return log_query_error()
+    tail = sync_to_async(MT5AlgorithmManager.algorithm_logs, thread_sensitive=False)
+    deadline = time.monotonic() + wait
+    while True:
+        result = await tail(execution_id, lines=lines, after=after)
+        remaining = deadline - time.monotonic()
+        if (result.get('status') != 'success' or after is None or result.get('lines')
+                or not result.get('running') or remaining <= 0):
+            return log_response(result, execution_status)
+        await asyncio.sleep(min(FOLLOW_POLL_INTERVAL, remaining))
@@ -1,7 +1,11 @@
+import math
+
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.shortcuts import get_object_or_404
 from ..models import AlgorithmExecution, MT5Account
+from ..mt5_service import MT5AlgorithmManager
 from ..serializers import AlgorithmExecutionSerializer
 
 @api_view(['GET'])
@@ -18,3 +22,59 @@ def algorithm_executions(request):
             'error': 'No MT5 account found',
             'message': 'Please set up your MT5 account first.'
         }, status=404)
+
+MAX_LOG_LINES = 2000
+# Seconds a follow request may hold a synchronous worker; the async view (async/algorithm-logs/)
+# waits up to ASYNC_MAX_FOLLOW_WAIT without holding one
+MAX_FOLLOW_WAIT = 2
+ASYNC_MAX_FOLLOW_WAIT = 25
+
+
+def log_query(request, max_wait):
+    """``(lines, after, wait)`` from the query string; raises ValueError on bad values"""
+    lines = min(max(int(request.query_params.get('lines', 100)), 0), MAX_LOG_LINES)
+    after = request.query_params.get('after')
+    after = int(after) if after not in (None, '') else None
+    wait = float(request.query_params.get('wait', 0))
+    if not math.isfinite(wait):
+        raise ValueError(f"wait must be finite, got {wait}")
+    wait = min(max(wait, 0.0), max_wait)
+    return lines, after, wait
+
+
+def log_query_error():
+    return Response({'error': 'lines and after must be integers and wait a number of seconds'}, status=400)
+
+
+def log_response(result, execution_status):
+    """Response for a log tail; output read back from file gets ``running`` from the execution"""
+    if result.get('status') != 'success':
+        return Response(result, status=400)
+    if result.get('running') is None:
+        result['running'] = execution_status in ('running', 'paused')
+    return Response(result, status=200)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def algorithm_logs(request, execution_id):
+    """
+    Tail an execution's EA output: ?lines=N (default 100). To follow, pass
+    ?after=<next from the previous response>&wait=<seconds>; the request
+    returns as soon as new lines arrive or the wait (at most MAX_FOLLOW_WAIT
+    here, longer from the async view) is over.
+    """
+    try:
+        account = MT5Account.objects.get(user=request.user)
+    except MT5Account.DoesNotExist:
+        return Response({
+            'error': 'No MT5 account found',
+            'message': 'Please set up your MT5 account first.'
+        }, status=404)
+    execution = get_object_or_404(AlgorithmExecution, id=execution_id, mt5_account=account)
+    try:
+        lines, after, wait = log_query(request, MAX_FOLLOW_WAIT)
+    except ValueError:
+        return log_query_error()
+    result = MT5AlgorithmManager.algorithm_logs(execution.id, lines=lines, after=after, wait=wait)
+    return log_response(result, execution.execution_status)
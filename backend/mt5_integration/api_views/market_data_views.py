@@ -0,0 +1,32 @@
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from ..mt5_service import MT5ConnectionManager, TIMEFRAME_M1
+from ..renderers import MARKET_DATA_RENDERERS
+
+MAX_BARS = 100000
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes(MARKET_DATA_RENDERERS)
+def market_data(request):
+    """
+    Return OHLC bars for ?symbol=&timeframe=&count= as columns.
+    JSON by default; msgpack or Arrow IPC via Accept or ?format=msgpack|arrow.
+    """
+    symbol = request.query_params.get('symbol')
+    if not symbol:
+        return Response({'error': 'symbol is required'}, status=400)
+    try:
+        timeframe = int(request.query_params.get('timeframe', TIMEFRAME_M1))
+        count = int(request.query_params.get('count', 100))
+    except ValueError:
+        return Response({'error': 'timeframe and count must be integers'}, status=400)
+    if not 0 < count <= MAX_BARS:
+        return Response({'error': f'count must be between 1 and {MAX_BARS}'}, status=400)
+
+    data = MT5ConnectionManager.get_market_data(symbol, timeframe, count)
+    if data is None:
+        return Response({'error': 'Failed to get market data'}, status=500)
+    return Response(data, status=200)
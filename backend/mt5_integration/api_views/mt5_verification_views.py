@@ -5,6 +5,20 @@ from ..models import MT5Account
 from ..mt5_service import MT5ConnectionManager
 from ..serializers import MT5AccountConnectionSerializer, MT5AccountStatusSerializer
 
+def connection_test_response(success, result):
+    """Response for a MT5ConnectionManager.test_connection result"""
+    if success:
+        return Response({
+            'status': 'success',
+            'message': 'Connection test successful',
+            'data': result
+        }, status=200)
+    return Response({
+        'status': 'error',
+        'message': 'Connection test failed',
+        'error': result
+    }, status=400)
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def test_mt5_connection(request):
@@ -17,18 +31,7 @@ def test_mt5_connection(request):
             data['password'],
             data['server']
         )
-        if success:
-            return Response({
-                'status': 'success',
-                'message': 'Connection test successful',
-                'data': result
-            }, status=200)
-        else:
-            return Response({
-                'status': 'error',
-                'message': 'Connection test failed',
-                'error': result
-            }, status=400)
+        return connection_test_response(success, result)
     return Response(serializer.errors, status=400)
 
 @api_view(['POST'])
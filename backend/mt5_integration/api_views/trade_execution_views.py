@@ -4,13 +4,23 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from ..models import AlgorithmExecution, MT5Account
 from ..serializers import AlgorithmExecutionSerializer
-from ..mt5_service import MT5AlgorithmManager
+from ..mt5_service import MT5AlgorithmManager, account_credentials, get_terminal
 from ..api_views.mt5_authentication_views import get_mt5_account
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../ALGORITHMSMT5EA')))
 from risk_manager import RiskManager
 
+def risk_details(account):
+    """Risk management summary included in the start_algorithm response"""
+    risk_manager = RiskManager()
+    return {
+        'max_risk_percent': risk_manager.max_risk_percent,
+        'current_risk': risk_manager.calculate_current_risk(
+            account, terminal=get_terminal(account_credentials(account))
+        )
+    }
+
 # API to start an algorithm on the user's MT5 account
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -24,29 +34,25 @@ def start_algorithm(request):
     if error:
         return Response(error, status=400)
     try:
+        # The execution row comes first so the EA supervisor can report on it
+        execution = AlgorithmExecution.objects.create(
+            mt5_account=account,
+            algorithm_name=algorithm_name,
+            execution_status='running'
+        )
         # Start the EA script as a subprocess
-        result = MT5AlgorithmManager.start_algorithm(account, algorithm_name, symbol)
+        result = MT5AlgorithmManager.start_algorithm(account, algorithm_name, symbol, execution_id=execution.id)
         if result['status'] == 'success':
-            execution = AlgorithmExecution.objects.create(
-                mt5_account=account,
-                algorithm_name=algorithm_name,
-                execution_status='running',
-                pid=result.get('pid')
-            )
-
-            # Fetch risk management details
-            risk_manager = RiskManager()
-            risk_details = {
-                'max_risk_percent': risk_manager.max_risk_percent,
-                'current_risk': risk_manager.calculate_current_risk(account)
-            }
+            execution.pid = result.get('pid')
+            execution.save(update_fields=['pid'])
 
             return Response({
                 'message': result['message'],
                 'execution': AlgorithmExecutionSerializer(execution).data,
-                'risk_management': risk_details
+                'risk_management': risk_details(account)
             }, status=201)
         else:
+            execution.delete()
             return Response(result, status=400)
     except Exception as e:
         return Response({'error': str(e)}, status=500)
@@ -63,10 +69,10 @@ def stop_algorithm(request, execution_id):
         execution = get_object_or_404(AlgorithmExecution, id=execution_id, mt5_account=account)
         if execution.pid is None:
             return Response({'error': 'No PID found for this execution.'}, status=400)
-        result = MT5AlgorithmManager.stop_algorithm(execution.pid)
+        result = MT5AlgorithmManager.stop_algorithm(execution.pid, execution_id=execution.id)
         if result['status'] == 'success':
             execution.execution_status = 'stopped'
-            execution.save()
+            execution.save(update_fields=['execution_status'])
             return Response({'message': result['message'], 'execution': AlgorithmExecutionSerializer(execution).data}, status=200)
         else:
             return Response(result, status=400)
@@ -88,10 +94,12 @@ def pause_algorithm(request, execution_id):
         if execution.pid is None:
             return Response({'error': 'No PID found for this execution.'}, status=400)
         algorithm_name = request.data.get('algorithm_name', execution.algorithm_name)
-        result = MT5AlgorithmManager.pause_algorithm(execution.pid, algorithm_name=algorithm_name)
+        result = MT5AlgorithmManager.pause_algorithm(
+            execution.pid, algorithm_name=algorithm_name, execution_id=execution.id
+        )
         if result['status'] == 'success':
             execution.execution_status = 'paused'
-            execution.save()
+            execution.save(update_fields=['execution_status'])
             return Response({'message': 'Algorithm paused successfully.', 'execution': execution.id}, status=200)
         else:
             return Response(result, status=400)
@@ -113,12 +121,43 @@ def resume_algorithm(request, execution_id):
         if execution.pid is None:
             return Response({'error': 'No PID found for this execution.'}, status=400)
         algorithm_name = request.data.get('algorithm_name', execution.algorithm_name)
-        result = MT5AlgorithmManager.resume_algorithm(execution.pid, algorithm_name=algorithm_name)
+        result = MT5AlgorithmManager.resume_algorithm(
+            execution.pid, algorithm_name=algorithm_name, execution_id=execution.id
+        )
         if result['status'] == 'success':
             execution.execution_status = 'running'
-            execution.save()
+            execution.save(update_fields=['execution_status'])
             return Response({'message': 'Algorithm resumed successfully.', 'execution': execution.id}, status=200)
         else:
             return Response(result, status=400)
     except Exception as e:
         return Response({'error': str(e)}, status=500)
+
+# Control commands that do not change the execution status; pause/resume have their own endpoints
+CONTROL_COMMANDS = ('stop_new_entries', 'allow_new_entries', 'close_all', 'set_params', 'status')
+
+# API to send a control command to one running algorithm
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def control_algorithm(request, execution_id):
+    """Send stop_new_entries, allow_new_entries, close_all, set_params or status to a running algorithm"""
+    try:
+        account, error = get_mt5_account(request.user)
+        if error:
+            return Response(error, status=400)
+        execution = get_object_or_404(AlgorithmExecution, id=execution_id, mt5_account=account)
+        if execution.execution_status not in ('running', 'paused'):
+            return Response({'error': 'Algorithm is not running.'}, status=400)
+        command = request.data.get('command')
+        if command not in CONTROL_COMMANDS:
+            return Response({'error': f"command must be one of: {', '.join(CONTROL_COMMANDS)}"}, status=400)
+        params = request.data.get('params')
+        if command == 'set_params' and not isinstance(params, dict):
+            return Response({'error': 'set_params needs a params object'}, status=400)
+        result = MT5AlgorithmManager.control_algorithm(execution.id, command, params=params)
+        if result['status'] == 'success':
+            return Response(result, status=200)
+        else:
+            return Response(result, status=400)
+    except Exception as e:
+        return Response({'error': str(e)}, status=500)
@@ -0,0 +1,74 @@
+"""
+Worker side of ``manage.py refresh_mt5_accounts``.
+
+Each worker process owns one terminal (the MetaTrader5 package attaches to a
+single terminal per process) and refreshes its share of the accounts through
+an MT5SessionPool. Like session_pool, this module does not import Django, so
+spawned worker processes only receive plain credentials and return plain
+dicts.
+"""
+
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .session_pool import MT5Credentials, MT5LoginError, MT5SessionError, MT5SessionPool
+
+
+def refresh_accounts(terminal_path: Optional[str], accounts: Sequence[Tuple[int, MT5Credentials]],
+                     timeout: Optional[int] = None) -> List[Dict]:
+    """
+    Read balance information for ``accounts`` on one terminal.
+
+    Returns one dict per account: ``{'id', 'ok', ...}`` with the account
+    figures on success or ``message``/``details`` on failure. If the terminal
+    itself cannot be started every account is reported with ``terminal_error``
+    so the caller can leave those rows untouched.
+    """
+    try:
+        pool = MT5SessionPool([terminal_path] if terminal_path else None, timeout=timeout)
+    except MT5SessionError as e:
+        return [_failure(account_id, e, terminal_error=True) for account_id, _ in accounts]
+
+    results = []
+    try:
+        for account_id, credentials in accounts:
+            started = time.monotonic()
+            try:
+                with pool.lease(credentials) as terminal:
+                    account_info = terminal.account_info()
+                    if account_info is None:
+                        raise MT5LoginError('Failed to retrieve account information', terminal.last_error())
+                    positions_count = terminal.positions_total()
+            except MT5LoginError as e:
+                results.append(_failure(account_id, e))
+                continue
+            except MT5SessionError as e:
+                # Terminal failed to initialize; the next lease tries to attach again
+                results.append(_failure(account_id, e, terminal_error=True))
+                continue
+            results.append({
+                'id': account_id,
+                'ok': True,
+                'balance': account_info.balance,
+                'equity': account_info.equity,
+                'margin': account_info.margin,
+                'free_margin': account_info.margin_free,
+                'currency': account_info.currency,
+                'positions_count': positions_count or 0,
+                'fetched_at': datetime.now(timezone.utc),
+                'elapsed': time.monotonic() - started,
+            })
+    finally:
+        pool.shutdown()
+    return results
+
+
+def _failure(account_id: int, error: MT5SessionError, terminal_error: bool = False) -> Dict:
+    return {
+        'id': account_id,
+        'ok': False,
+        'terminal_error': terminal_error,
+        'message': error.message,
+        'details': error.details,
+    }
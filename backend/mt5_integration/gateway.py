@@ -0,0 +1,298 @@
+"""
+MT5 gateway: a dedicated process that owns the terminal connection(s).
+
+The MetaTrader5 package is process-global and must not be called from
+concurrent Django worker threads. The gateway daemon (``manage.py
+run_mt5_gateway``) holds the warm terminal sessions, serializes every call
+through its MT5SessionPool and answers any number of web workers over the
+local IPC protocol in ``ipc.py``.
+
+Operations on an account (orders, positions, history, account_info) must name
+the account; only market data may run on whichever session is warm. A gateway
+on TCP checks a shared token (MT5_GATEWAY_TOKEN) on every request and refuses
+to listen beyond the loopback interface without one.
+
+Web code talks to it through ``MT5GatewayClient``. ``LocalTerminal`` exposes
+the same interface on top of an in-process session pool for deployments that
+run without a gateway.
+"""
+
+import functools
+import hmac
+import logging
+import os
+import sys
+import threading
+from typing import Optional
+
+from . import ipc
+from .session_pool import MT5Credentials, MT5LoginError, MT5SessionError, MT5SessionPool
+
+
+logger = logging.getLogger(__name__)
+
+# MT5 functions the gateway is allowed to run on behalf of a client
+GATEWAY_OPERATIONS = frozenset({
+    'account_info',
+    'terminal_info',
+    'last_error',
+    'positions_get',
+    'positions_total',
+    'orders_get',
+    'orders_total',
+    'history_deals_get',
+    'history_orders_get',
+    'symbol_info',
+    'symbol_info_tick',
+    'symbol_select',
+    'copy_rates_from_pos',
+    'copy_rates_from',
+    'copy_rates_range',
+    'copy_ticks_from',
+    'order_check',
+    'order_send',
+    # Not an MT5 function: order_check + order_send of a whole batch (order_pipeline.py)
+    'order_batch',
+})
+
+# Answer the same for any account, so they may run on whichever session is warm
+MARKET_DATA_OPERATIONS = frozenset({
+    'terminal_info',
+    'last_error',
+    'symbol_info',
+    'symbol_info_tick',
+    'symbol_select',
+    'copy_rates_from_pos',
+    'copy_rates_from',
+    'copy_rates_range',
+    'copy_ticks_from',
+})
+
+# Trade on or read one account: never run without its credentials
+ACCOUNT_OPERATIONS = GATEWAY_OPERATIONS - MARKET_DATA_OPERATIONS
+
+# Safe to resend after a broken connection; order_send may already have executed
+_RETRYABLE_OPERATIONS = GATEWAY_OPERATIONS - {'order_send', 'order_batch'}
+
+ALGORITHMS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../ALGORITHMSMT5EA'))
+
+
+class MT5GatewayError(MT5SessionError):
+    """Raised when the gateway cannot be reached or rejects a request"""
+
+
+def _submit_orders():
+    """order_pipeline.submit_orders from ALGORITHMSMT5EA (also on sys.path once mt5_service is imported)"""
+    if ALGORITHMS_DIR not in sys.path:
+        sys.path.append(ALGORITHMS_DIR)
+    from order_pipeline import submit_orders
+    return submit_orders
+
+
+def execute(pool: MT5SessionPool, operation: str, credentials: Optional[MT5Credentials],
+            args=(), kwargs=None):
+    """
+    Run one MT5 call on a session leased from ``pool``.
+
+    Returns ``(result, last_error)``; ``last_error`` is only filled in when the
+    terminal returned ``None``.
+
+    ``order_batch(requests, atomic=False, validate=True)`` runs the order
+    pipeline under a single lease and returns one OrderResult per request, so
+    a batch costs one gateway round-trip.
+
+    Account operations need ``credentials``: a ``None`` lease gets whichever
+    account the terminal is logged in to, which is only fine for market data.
+    """
+    if operation not in GATEWAY_OPERATIONS:
+        raise MT5GatewayError(f"Unsupported MT5 operation: {operation}")
+    if credentials is None and operation in ACCOUNT_OPERATIONS:
+        raise MT5GatewayError(f"MT5 operation {operation} needs account credentials")
+    with pool.lease(credentials) as terminal:
+        if operation == 'order_batch':
+            return _submit_orders()(terminal, *args, **(kwargs or {})), None
+        result = getattr(terminal, operation)(*args, **(kwargs or {}))
+        error = terminal.last_error() if result is None else None
+    return result, error
+
+
+class TerminalHandle:
+    """
+    MT5 operations bound to one account.
+
+    Methods mirror the MetaTrader5 module (``handle.positions_get(symbol=...)``)
+    so code written against the module works unchanged.
+    """
+
+    def __init__(self, credentials: Optional[MT5Credentials] = None):
+        self.credentials = credentials
+
+    def call(self, operation: str, *args, **kwargs):
+        raise NotImplementedError
+
+    def __getattr__(self, name):
+        if name in GATEWAY_OPERATIONS:
+            return functools.partial(self.call, name)
+        raise AttributeError(name)
+
+
+class LocalTerminal(TerminalHandle):
+    """Runs MT5 calls in this process through a session pool"""
+
+    def __init__(self, pool: MT5SessionPool, credentials: Optional[MT5Credentials] = None):
+        super().__init__(credentials)
+        self.pool = pool
+
+    def call(self, operation: str, *args, **kwargs):
+        result, _ = execute(self.pool, operation, self.credentials, args, kwargs)
+        return result
+
+
+class GatewayTerminal(TerminalHandle):
+    """Runs MT5 calls in the gateway process"""
+
+    def __init__(self, client: 'MT5GatewayClient', credentials: Optional[MT5Credentials] = None):
+        super().__init__(credentials)
+        self.client = client
+
+    def call(self, operation: str, *args, **kwargs):
+        return self.client.request(operation, self.credentials, args, kwargs)
+
+
+class MT5GatewayClient:
+    """Thin client for the MT5 gateway; keeps one connection per thread"""
+
+    _ERROR_TYPES = {
+        'login': MT5LoginError,
+        'session': MT5SessionError,
+    }
+
+    def __init__(self, address: str, timeout: float = 30.0, token: Optional[str] = None):
+        self.address = address
+        self.timeout = timeout
+        self.token = token
+        self._local = threading.local()
+
+    def terminal(self, credentials: Optional[MT5Credentials] = None) -> GatewayTerminal:
+        return GatewayTerminal(self, credentials)
+
+    def request(self, operation: str, credentials: Optional[MT5Credentials] = None, args=(), kwargs=None):
+        message = {
+            'op': operation,
+            'account': list(credentials) if credentials else None,
+            'args': list(args),
+            'kwargs': kwargs or {},
+        }
+        if self.token:
+            message['token'] = self.token
+        attempts = 2 if operation in _RETRYABLE_OPERATIONS else 1
+        for attempt in range(attempts):
+            try:
+                sock = self._connection()
+                ipc.send_message(sock, message)
+                response = ipc.recv_message(sock)
+                if response is None:
+                    raise ipc.IPCConnectionClosed('Gateway closed the connection')
+                break
+            except OSError as e:
+                # The gateway may have restarted since this thread last used its connection
+                self.close()
+                if attempt == attempts - 1:
+                    logger.error(f"MT5 gateway request {operation} failed: {e}")
+                    raise MT5GatewayError('MT5 gateway unavailable', (-10004, str(e)))
+
+        if response.get('ok'):
+            return response.get('result')
+        error = response.get('error') or {}
+        error_type = self._ERROR_TYPES.get(error.get('kind'), MT5GatewayError)
+        details = error.get('error')
+        raise error_type(error.get('message', 'MT5 gateway request failed'), tuple(details) if details else None)
+
+    def close(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    def _connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = ipc.connect(self.address, timeout=self.timeout)
+            self._local.sock = sock
+        return sock
+
+
+class MT5GatewayServer:
+    """
+    Serves gateway requests; every terminal call goes through one session pool.
+
+    With a ``token``, requests that do not carry it are rejected. Requests
+    carry broker passwords, so a TCP address other than loopback needs one.
+    """
+
+    def __init__(self, address: str, pool: MT5SessionPool, token: Optional[str] = None):
+        self.address = address
+        self.pool = pool
+        self.token = token
+        self._socket = None
+        self._running = False
+
+    def serve_forever(self):
+        if not self.token and not ipc.is_local(self.address):
+            raise MT5GatewayError(f"Refusing to serve {self.address} without MT5_GATEWAY_TOKEN: "
+                                  "only loopback and Unix socket addresses may run without a token")
+        self._socket = ipc.listen(self.address)
+        self._running = True
+        logger.info(f"MT5 gateway listening on {self.address}")
+        try:
+            while self._running:
+                try:
+                    conn, _ = self._socket.accept()
+                except OSError:
+                    if not self._running:
+                        break
+                    raise
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self.pool.shutdown()
+
+    def shutdown(self):
+        self._running = False
+        if self._socket is not None:
+            self._socket.close()
+
+    def _handle(self, conn):
+        with conn:
+            while self._running:
+                try:
+                    message = ipc.recv_message(conn)
+                    if message is None:
+                        break
+                    ipc.send_message(conn, self.dispatch(message))
+                except (OSError, ValueError) as e:
+                    logger.debug(f"MT5 gateway client disconnected: {e}")
+                    break
+
+    def dispatch(self, message: dict) -> dict:
+        if self.token and not hmac.compare_digest(str(message.get('token') or '').encode(), self.token.encode()):
+            logger.warning(f"MT5 gateway request {message.get('op')} rejected: bad or missing token")
+            return {'ok': False, 'error': {'kind': 'gateway', 'message': 'MT5 gateway token rejected', 'error': None}}
+        try:
+            account = message.get('account')
+            credentials = MT5Credentials(*account) if account else None
+            result, error = execute(self.pool, message['op'], credentials,
+                                    message.get('args', ()), message.get('kwargs'))
+            return {'ok': True, 'result': result, 'last_error': error}
+        except MT5SessionError as e:
+            if isinstance(e, MT5LoginError):
+                kind = 'login'
+            else:
+                kind = 'gateway' if isinstance(e, MT5GatewayError) else 'session'
+            return {'ok': False, 'error': {'kind': kind, 'message': e.message, 'error': e.error}}
+        except Exception as e:
+            logger.exception(f"MT5 gateway request failed: {message.get('op')}")
+            return {'ok': False, 'error': {'kind': 'gateway', 'message': 'MT5 gateway request failed',
+                                           'error': (-1, str(e))}}
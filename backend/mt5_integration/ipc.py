@@ -0,0 +1,159 @@
+"""
+Local IPC helpers shared by the MT5 background services.
+
+Messages are msgpack documents framed with a 4-byte big-endian length prefix
+and exchanged over a Unix socket (or ``host:port`` TCP on platforms without
+AF_UNIX, such as Windows where the terminal runs). Numpy arrays travel as raw
+buffers and MT5 result records (namedtuples) as maps, so neither side has to
+build per-row Python objects. Records come back as namedtuples with the same
+fields, so attribute access, indexing and ``_asdict()`` work as they do on
+what the MetaTrader5 module returns.
+"""
+
+import ipaddress
+import os
+import socket
+import struct
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+from types import SimpleNamespace
+
+import msgpack
+import numpy as np
+
+
+_HEADER = struct.Struct('>I')
+MAX_FRAME_SIZE = 256 * 1024 * 1024
+
+EXT_NDARRAY = 1
+EXT_RECORD = 2
+EXT_DATETIME = 3
+
+
+class IPCConnectionClosed(ConnectionError):
+    """Raised when the peer closes the socket in the middle of a frame"""
+
+
+def parse_address(address: str):
+    """Return ``(family, sockaddr)`` for a ``host:port`` or Unix socket path"""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and os.path.sep not in host:
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    return socket.AF_UNIX, address
+
+
+def is_local(address: str) -> bool:
+    """True for a Unix socket path or a TCP address on the loopback interface"""
+    family, sockaddr = parse_address(address)
+    if family == socket.AF_UNIX:
+        return True
+    try:
+        return ipaddress.ip_address(sockaddr[0]).is_loopback
+    except ValueError:
+        return sockaddr[0] == 'localhost'
+
+
+def connect(address: str, timeout: float = None) -> socket.socket:
+    family, sockaddr = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(sockaddr)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def listen(address: str, backlog: int = 128) -> socket.socket:
+    family, sockaddr = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    if family == socket.AF_UNIX:
+        # A previous run may have left its socket file behind
+        if os.path.exists(sockaddr):
+            os.unlink(sockaddr)
+        sock.bind(sockaddr)
+        # Requests carry broker passwords; only the owning user may connect
+        os.chmod(sockaddr, 0o600)
+    else:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(sockaddr)
+    sock.listen(backlog)
+    return sock
+
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        dtype = obj.dtype.descr if obj.dtype.names else obj.dtype.str
+        data = np.ascontiguousarray(obj)
+        return msgpack.ExtType(EXT_NDARRAY, pack([dtype, list(obj.shape), memoryview(data).cast('B')]))
+    if isinstance(obj, tuple) and hasattr(obj, '_asdict'):
+        # MT5 returns namedtuples (AccountInfo, TradePosition, ...)
+        return msgpack.ExtType(EXT_RECORD, pack(obj._asdict()))
+    if isinstance(obj, SimpleNamespace):
+        return msgpack.ExtType(EXT_RECORD, pack(vars(obj)))
+    if isinstance(obj, tuple):
+        return list(obj)
+    if isinstance(obj, datetime):
+        return msgpack.ExtType(EXT_DATETIME, obj.isoformat().encode())
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+@lru_cache(maxsize=256)
+def _record_type(fields):
+    """One namedtuple class per field list; MT5 has a handful of record types"""
+    return namedtuple('Record', fields)
+
+
+def _ext_hook(code, data):
+    if code == EXT_NDARRAY:
+        dtype, shape, buffer = unpack(data)
+        dtype = np.dtype([tuple(field) for field in dtype]) if isinstance(dtype, list) else np.dtype(dtype)
+        return np.frombuffer(buffer, dtype=dtype).reshape(shape)
+    if code == EXT_RECORD:
+        fields = unpack(data)
+        return _record_type(tuple(fields))(*fields.values())
+    if code == EXT_DATETIME:
+        return datetime.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+def pack(obj) -> bytes:
+    return msgpack.packb(obj, default=_default, strict_types=True, use_bin_type=True)
+
+
+def unpack(data: bytes):
+    return msgpack.unpackb(data, ext_hook=_ext_hook, raw=False, strict_map_key=False)
+
+
+def send_message(sock: socket.socket, obj):
+    payload = pack(obj)
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise IPCConnectionClosed('Connection closed by peer')
+        received += count
+    return buffer
+
+
+def recv_message(sock: socket.socket):
+    """Read one framed message; returns ``None`` on a clean EOF between frames"""
+    header = sock.recv(_HEADER.size)
+    if not header:
+        return None
+    if len(header) < _HEADER.size:
+        header += _recv_exact(sock, _HEADER.size - len(header))
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame of {size} bytes exceeds the {MAX_FRAME_SIZE} byte limit")
+    return unpack(_recv_exact(sock, size))
@@ -0,0 +1,252 @@
+"""
+Collects EA output without ever blocking the EA.
+
+EAs used to be started with ``stdout=PIPE, stderr=PIPE`` and nobody read the
+pipes. Once a chatty EA (the grid EA prints a line for every order) had
+written a pipe buffer's worth, its next print blocked, mid-trade. The
+collector gives every EA one pipe (stderr merged into stdout) and a reader
+thread that drains it as fast as the EA writes.
+
+Each line goes to a bounded in-memory ring buffer per execution, for the
+tail/follow endpoint. It is also appended to ``<log_dir>/<execution_id>.log``,
+which is rotated to gzip-compressed ``<execution_id>.log.1.gz``,
+``.2.gz``, ... once it reaches ``max_bytes``. Compression runs on its own
+thread so the reader keeps draining the pipe meanwhile.
+"""
+
+import gzip
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_LINE_BYTES = 8192   # longer lines are split
+
+
+def _line(seq: int, timestamp: Optional[float], text: str) -> Dict:
+    return {
+        'seq': seq,
+        'time': datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp else None,
+        'text': text,
+    }
+
+
+class _ExecutionLog:
+    """Ring buffer and log file of one execution"""
+
+    def __init__(self, execution_id, max_lines: int):
+        self.execution_id = execution_id
+        self.lines = deque(maxlen=max_lines)    # (seq, timestamp, text)
+        self.next_seq = 1
+        self.readers = 0
+        self.write_lock = threading.Lock()
+        self.file = None
+        self.file_size = 0
+        self.compressing = None
+
+
+class EALogCollector:
+    """
+    Drains EA output into per-execution ring buffers and rotating files.
+
+    Args:
+        log_dir: directory for ``<execution_id>.log`` files; memory only when None.
+        max_lines: lines kept in memory per execution.
+        max_bytes: size at which the log file is rotated and compressed.
+        backup_count: compressed files kept per execution.
+        keep_finished: executions whose output has ended that stay in memory.
+    """
+
+    def __init__(self, log_dir: Optional[str] = None, max_lines: int = 2000,
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                 keep_finished: int = 100):
+        self.log_dir = log_dir
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.keep_finished = keep_finished
+        self._logs: Dict[object, _ExecutionLog] = {}
+        self._finished = OrderedDict()
+        self._changed = threading.Condition()
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+
+    def attach(self, execution_id, stream, on_close: Optional[Callable[[], None]] = None) -> threading.Thread:
+        """
+        Start draining ``stream`` (the read end of the EA's output pipe, in
+        binary mode) into the log of ``execution_id``. Restarts of the same
+        execution keep appending to the same log. ``on_close`` runs once the
+        EA closes its end, e.g. ``process.wait`` to reap it.
+        """
+        with self._changed:
+            log = self._logs.get(execution_id)
+            if log is None:
+                log = self._logs[execution_id] = _ExecutionLog(execution_id, self.max_lines)
+            log.readers += 1
+            self._finished.pop(execution_id, None)
+        reader = threading.Thread(
+            target=self._drain, args=(log, stream, on_close),
+            name=f'ea-log-{execution_id}', daemon=True
+        )
+        reader.start()
+        return reader
+
+    def tail(self, execution_id, lines: int = 100, after: Optional[int] = None, wait: float = 0.0) -> Dict:
+        """
+        The last ``lines`` lines, or with ``after`` the lines following that
+        sequence number (``next`` of the previous call). With ``wait`` the call
+        blocks up to that many seconds for new output, so clients can follow
+        the log by long polling. Executions no longer in memory are read back
+        from their log file; those lines carry no sequence number, so they can
+        be tailed but not followed, and whether the EA still runs is unknown
+        here (``running`` is None).
+        """
+        with self._changed:
+            log = self._logs.get(execution_id)
+        if log is None:
+            if after is not None:
+                return {
+                    'status': 'error',
+                    'message': f'Output of execution {execution_id} is not in memory here and cannot be followed; '
+                               'tail it without after'
+                }
+            return self._tail_file(execution_id, lines)
+        with self._changed:
+            if after is not None and wait > 0:
+                self._changed.wait_for(lambda: log.next_seq - 1 > after or not log.readers, timeout=wait)
+            entries = list(log.lines)
+            next_seq = log.next_seq - 1
+            running = bool(log.readers)
+        if after is None:
+            selected = entries[-lines:] if lines > 0 else []
+        else:
+            selected = [entry for entry in entries if entry[0] > after][:lines]
+            next_seq = selected[-1][0] if selected else min(after, next_seq)
+        first_seq = entries[0][0] if entries else next_seq + 1
+        return {
+            'status': 'success',
+            'execution_id': execution_id,
+            'lines': [_line(*entry) for entry in selected],
+            'next': next_seq,
+            # Lines between ``after`` and the oldest buffered one were dropped from memory
+            'truncated': after is not None and after + 1 < first_seq,
+            'running': running,
+            'source': 'memory',
+        }
+
+    def log_path(self, execution_id) -> Optional[str]:
+        return os.path.join(self.log_dir, f"{execution_id}.log") if self.log_dir else None
+
+    # Internals
+
+    def _drain(self, log: _ExecutionLog, stream, on_close):
+        try:
+            while True:
+                raw = stream.readline(MAX_LINE_BYTES)
+                if not raw:
+                    break
+                self._append(log, raw)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Stopped reading output of execution {log.execution_id}: {e}")
+        finally:
+            try:
+                stream.close()
+            except OSError:
+                pass
+            if on_close is not None:
+                try:
+                    on_close()
+                except Exception:
+                    logger.exception(f"Output close callback failed for execution {log.execution_id}")
+            with log.write_lock:
+                if log.file is not None and log.readers == 1:
+                    log.file.close()
+                    log.file = None
+            with self._changed:
+                log.readers -= 1
+                if not log.readers:
+                    self._finished[log.execution_id] = True
+                    while len(self._finished) > self.keep_finished:
+                        old_id, _ = self._finished.popitem(last=False)
+                        self._logs.pop(old_id, None)
+                self._changed.notify_all()
+
+    def _append(self, log: _ExecutionLog, raw: bytes):
+        text = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+        with self._changed:
+            log.lines.append((log.next_seq, time.time(), text))
+            log.next_seq += 1
+            self._changed.notify_all()
+        if self.log_dir:
+            with log.write_lock:
+                self._write(log, raw)
+
+    def _write(self, log: _ExecutionLog, raw: bytes):
+        try:
+            if log.file is None:
+                path = self.log_path(log.execution_id)
+                log.file = open(path, 'ab', buffering=0)
+                log.file_size = log.file.tell()
+            log.file.write(raw)
+            log.file_size += len(raw)
+            if log.file_size >= self.max_bytes:
+                self._rotate(log)
+        except OSError as e:
+            logger.error(f"Failed to write EA log of execution {log.execution_id}: {e}")
+
+    def _rotate(self, log: _ExecutionLog):
+        path = self.log_path(log.execution_id)
+        log.file.close()
+        log.file = None
+        if log.compressing is not None:
+            log.compressing.join()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{path}.{index}.gz"
+            if os.path.exists(source):
+                os.replace(source, f"{path}.{index + 1}.gz")
+        os.replace(path, f"{path}.1")
+        log.compressing = threading.Thread(target=self._compress, args=(f"{path}.1",), daemon=True)
+        log.compressing.start()
+
+    def _compress(self, path: str):
+        try:
+            with open(path, 'rb') as source, gzip.open(f"{path}.gz", 'wb') as target:
+                shutil.copyfileobj(source, target)
+            os.remove(path)
+        except OSError as e:
+            logger.error(f"Failed to compress {path}: {e}")
+
+    def _tail_file(self, execution_id, lines: int) -> Dict:
+        path = self.log_path(execution_id)
+        if not path or not os.path.exists(path):
+            return {'status': 'error', 'message': f'No output recorded for execution {execution_id}'}
+        try:
+            with open(path, 'rb') as f:
+                # Read backwards in blocks until enough lines are in hand
+                f.seek(0, os.SEEK_END)
+                end = f.tell()
+                data = b''
+                while end > 0 and data.count(b'\n') <= lines:
+                    start = max(0, end - 64 * 1024)
+                    f.seek(start)
+                    data = f.read(end - start) + data
+                    end = start
+        except OSError as e:
+            return {'status': 'error', 'message': 'Failed to read EA log', 'details': str(e)}
+        text = data.decode('utf-8', errors='replace').splitlines()
+        selected = text[-lines:] if lines > 0 else []
+        return {
+            'status': 'success',
+            'execution_id': execution_id,
+            'lines': [_line(None, None, line) for line in selected],
+            'next': None,
+            'truncated': False,
+            'running': None,
+            'source': 'file',
+        }
@@ -0,0 +1,107 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from mt5_integration.bulk_refresh import refresh_accounts
+from mt5_integration.models import MT5Account
+from mt5_integration.mt5_service import account_credentials
+
+
+UPDATE_FIELDS = ['connection_status', 'last_connected', 'balance', 'equity', 'margin', 'currency', 'updated_at']
+
+
+def _money(value):
+    return Decimal(str(value)).quantize(Decimal('0.01'))
+
+
+class Command(BaseCommand):
+    help = 'Refresh balance, equity and margin of every active MT5 account, one worker process per terminal'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--terminal-path', action='append', dest='terminal_paths',
+            help='terminal64.exe to use; repeat for several terminals (default: MT5_TERMINAL_PATHS)'
+        )
+        parser.add_argument(
+            '--workers', type=int,
+            help='Maximum number of terminals to use in parallel (default: all configured terminals)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Rows per UPDATE statement when writing results back'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        # The MetaTrader5 package attaches to one terminal per process, so every
+        # worker gets its own terminal; sharing one would make logins race.
+        terminal_paths = options['terminal_paths'] or getattr(settings, 'MT5_TERMINAL_PATHS', None) or [None]
+        if options['workers'] is not None:
+            if options['workers'] < 1:
+                raise CommandError('--workers must be at least 1')
+            terminal_paths = terminal_paths[:options['workers']]
+
+        accounts = {account.pk: account for account in MT5Account.objects.filter(is_active=True)}
+        if not accounts:
+            self.stdout.write('No active MT5 accounts to refresh')
+            return
+
+        # Round-robin so every terminal gets the same share of the fleet
+        chunks = [[] for _ in terminal_paths]
+        for index, account in enumerate(accounts.values()):
+            try:
+                credentials = account_credentials(account)
+            except Exception as e:
+                self.stderr.write(f'Skipping account {account.pk}: cannot read credentials ({e})')
+                continue
+            chunks[index % len(chunks)].append((account.pk, credentials))
+
+        self.stdout.write(f'Refreshing {len(accounts)} MT5 accounts on {len(terminal_paths)} terminal(s)...')
+        timeout = getattr(settings, 'MT5_CONNECTION_TIMEOUT_MS', None)
+        results = []
+        with ProcessPoolExecutor(max_workers=len(terminal_paths)) as executor:
+            futures = [
+                executor.submit(refresh_accounts, path, chunk, timeout)
+                for path, chunk in zip(terminal_paths, chunks) if chunk
+            ]
+            for future in as_completed(futures):
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    self.stderr.write(f'Terminal worker failed: {e}')
+
+        now = timezone.now()
+        updated = []
+        failed = 0
+        skipped = 0
+        for result in results:
+            account = accounts[result['id']]
+            if result['ok']:
+                account.connection_status = 'connected'
+                account.last_connected = result['fetched_at']
+                account.balance = _money(result['balance'])
+                account.equity = _money(result['equity'])
+                account.margin = _money(result['margin'])
+                account.currency = result['currency'] or account.currency
+            elif result['terminal_error']:
+                # Not the account's fault; keep its last known state
+                skipped += 1
+                continue
+            else:
+                failed += 1
+                account.connection_status = 'error'
+                self.stderr.write(f"Account {account.pk}: {result['message']} ({result['details']})")
+            # bulk_update bypasses auto_now
+            account.updated_at = now
+            updated.append(account)
+
+        MT5Account.objects.bulk_update(updated, UPDATE_FIELDS, batch_size=options['batch_size'])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {len(updated) - failed} accounts, {failed} failed, '
+            f'{skipped + len(accounts) - len(results)} skipped in {elapsed:.1f}s'
+        ))
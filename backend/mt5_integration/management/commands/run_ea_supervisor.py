@@ -0,0 +1,96 @@
+import os
+import signal
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+from mt5_integration.models import AlgorithmExecution
+from mt5_integration.mt5_service import MT5AlgorithmManager, ea_log_collector
+from mt5_integration.supervisor import EASupervisor, EASupervisorServer
+# Importable once mt5_service has put ALGORITHMSMT5EA on sys.path
+from global_config import HEARTBEAT_INTERVAL, RESTART_ON_ERROR
+import fork_server
+from control_channel import ControlClient
+
+
+def record_status(execution_id, fields):
+    """Write supervisor reports to the AlgorithmExecution row"""
+    # Runs on the supervisor's monitor thread, which outlives any request
+    close_old_connections()
+    AlgorithmExecution.objects.filter(pk=execution_id).update(**fields)
+
+
+class Command(BaseCommand):
+    help = 'Run the EA supervisor that starts, restarts and monitors the EA processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--address',
+            help='Unix socket path or host:port to listen on (default: MT5_SUPERVISOR_ADDRESS)'
+        )
+        parser.add_argument(
+            '--max-restarts', type=int, default=5,
+            help='Consecutive crashes after which an EA is left in error (default: 5)'
+        )
+        parser.add_argument(
+            '--log-dir', default=getattr(settings, 'MT5_EA_LOG_DIR', os.path.join(settings.BASE_DIR, 'logs', 'ea')),
+            help='Directory for EA output, one <execution id>.log per execution (default: MT5_EA_LOG_DIR)'
+        )
+        parser.add_argument(
+            '--fork-server', action='store_true',
+            help='Launch EAs by forking a parent with their imports preloaded (POSIX only)'
+        )
+
+    def handle(self, *args, **options):
+        address = options['address'] or getattr(settings, 'MT5_SUPERVISOR_ADDRESS', '')
+        if not address:
+            raise CommandError('No supervisor address given and MT5_SUPERVISOR_ADDRESS is empty')
+
+        # Processes of a previous supervisor cannot be adopted safely (their PIDs may be reused)
+        orphaned = AlgorithmExecution.objects.filter(execution_status__in=['running', 'paused']).update(
+            execution_status='error',
+            error_message='EA supervisor restarted; start the algorithm again',
+            stopped_at=timezone.now()
+        )
+        if orphaned:
+            self.stdout.write(self.style.WARNING(f'Marked {orphaned} executions from a previous run as error'))
+
+        project_root = MT5AlgorithmManager._get_project_root()
+        forker = None
+        forker_process = None
+        if options['fork_server']:
+            if not hasattr(os, 'fork'):
+                raise CommandError('--fork-server needs a POSIX system')
+            forker_address = os.path.join(tempfile.gettempdir(), f'ea-fork-server-{os.getpid()}.sock')
+            try:
+                forker_process = fork_server.start_server_process(forker_address, project_root)
+            except OSError as e:
+                raise CommandError(f'Could not start the fork server: {e}')
+            forker = fork_server.ForkServerClient(forker_address)
+            self.stdout.write(f'Fork server running on {forker_address}')
+
+        supervisor = EASupervisor(
+            algorithms_dir=MT5AlgorithmManager._get_algorithms_dir(),
+            project_root=project_root,
+            on_status=record_status,
+            restart_on_error=RESTART_ON_ERROR,
+            max_restarts=options['max_restarts'],
+            heartbeat_interval=HEARTBEAT_INTERVAL,
+            log_dir=options['log_dir'],
+            fork_server=forker,
+            log_collector=ea_log_collector(options['log_dir']),
+            control_client=ControlClient,
+        )
+        server = EASupervisorServer(address, supervisor)
+        self.stdout.write(self.style.SUCCESS(f'EA supervisor listening on {address}'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
+            self.stdout.write('EA supervisor stopped')
+        finally:
+            if forker_process is not None:
+                forker_process.send_signal(signal.SIGINT)
+                forker_process.wait()
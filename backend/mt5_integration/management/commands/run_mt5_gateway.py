@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from mt5_integration import ipc
+from mt5_integration.gateway import MT5GatewayServer
+from mt5_integration.session_pool import MT5SessionError, MT5SessionPool
+
+
+class Command(BaseCommand):
+    help = 'Run the MT5 gateway that owns the terminal connections for the web workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--address',
+            help='Unix socket path or host:port to listen on (default: first MT5_GATEWAY_ADDRESSES entry)'
+        )
+        parser.add_argument(
+            '--terminal-path', action='append', dest='terminal_paths',
+            help='terminal64.exe to serve; repeat for several terminals (default: MT5_TERMINAL_PATHS)'
+        )
+
+    def handle(self, *args, **options):
+        addresses = getattr(settings, 'MT5_GATEWAY_ADDRESSES', None) or []
+        address = options['address'] or (addresses[0] if addresses else None)
+        if not address:
+            raise CommandError('No gateway address given and MT5_GATEWAY_ADDRESSES is empty')
+
+        try:
+            pool = MT5SessionPool(
+                terminal_paths=options['terminal_paths'] or getattr(settings, 'MT5_TERMINAL_PATHS', None),
+                idle_timeout=getattr(settings, 'MT5_SESSION_IDLE_TIMEOUT', 300),
+                timeout=getattr(settings, 'MT5_CONNECTION_TIMEOUT_MS', None),
+            )
+        except MT5SessionError as e:
+            raise CommandError(e.message)
+
+        server = MT5GatewayServer(address, pool, token=getattr(settings, 'MT5_GATEWAY_TOKEN', None) or None)
+        if not server.token and not ipc.is_local(address):
+            raise CommandError(f'Set MT5_GATEWAY_TOKEN to serve {address}: requests carry broker passwords')
+        self.stdout.write(self.style.SUCCESS(f'MT5 gateway listening on {address}'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
+            self.stdout.write('MT5 gateway stopped')
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mt5_integration', '0002_algorithmexecution_pid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='algorithmexecution',
+            name='restart_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='algorithmexecution',
+            name='cpu_percent',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='algorithmexecution',
+            name='memory_mb',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -126,6 +126,11 @@ class AlgorithmExecution(models.Model):
     # Error tracking
     error_message = models.TextField(null=True, blank=True)
     last_heartbeat = models.DateTimeField(null=True, blank=True)
+
+    # Reported by the EA supervisor
+    restart_count = models.IntegerField(default=0)
+    cpu_percent = models.FloatField(null=True, blank=True)
+    memory_mb = models.FloatField(null=True, blank=True)
     
     class Meta:
         db_table = 'algorithm_executions'
@@ -1,17 +1,154 @@
-import MetaTrader5 as mt5
 from django.conf import settings
 import logging
+import threading
 from datetime import datetime
+from decimal import Decimal
 from typing import Dict, Optional, Tuple
 from .models import MT5Account
+from .account_cache import AccountSnapshotCache, fetch_account_snapshot
+from .gateway import LocalTerminal, MT5GatewayClient, TerminalHandle
+from .log_collector import EALogCollector
+from .session_pool import MT5Credentials, MT5SessionError, MT5SessionPool
+from .supervisor import EASupervisorClient
 import subprocess
 import signal
 import os
 import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../ALGORITHMSMT5EA')))
+from bar_cache import BarCache
+from control_channel import ControlClient
 
 
 logger = logging.getLogger(__name__)
 
+# Same value as mt5.TIMEFRAME_M1; kept here so the web process needs no MetaTrader5 import
+TIMEFRAME_M1 = 1
+
+_session_pool = None
+_account_snapshots = None
+_bar_cache = None
+_supervisor_client = None
+_log_collector = None
+_gateway_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_session_pool() -> MT5SessionPool:
+    """Warm terminal sessions owned by this process (created on first use)"""
+    global _session_pool
+    with _clients_lock:
+        if _session_pool is None:
+            _session_pool = MT5SessionPool(
+                terminal_paths=getattr(settings, 'MT5_TERMINAL_PATHS', None),
+                idle_timeout=getattr(settings, 'MT5_SESSION_IDLE_TIMEOUT', 300),
+                timeout=getattr(settings, 'MT5_CONNECTION_TIMEOUT_MS', None),
+            )
+        return _session_pool
+
+
+def terminal_address(credentials: Optional[MT5Credentials] = None) -> Optional[str]:
+    """
+    Gateway address serving ``credentials``, or None when MT5 calls run in this
+    process. Each account is pinned to one gateway so its session stays warm.
+    """
+    addresses = getattr(settings, 'MT5_GATEWAY_ADDRESSES', None)
+    if not addresses:
+        return None
+    return addresses[int(credentials.login) % len(addresses)] if credentials else addresses[0]
+
+
+def get_terminal(credentials: Optional[MT5Credentials] = None) -> TerminalHandle:
+    """
+    Return a handle for MT5 calls made on behalf of ``credentials``.
+    Uses the MT5 gateway when MT5_GATEWAY_ADDRESSES is configured, so the web
+    process never touches the terminal; otherwise falls back to the in-process
+    session pool.
+    """
+    address = terminal_address(credentials)
+    if address is None:
+        return LocalTerminal(get_session_pool(), credentials)
+    with _clients_lock:
+        client = _gateway_clients.get(address)
+        if client is None:
+            client = MT5GatewayClient(address, timeout=getattr(settings, 'MT5_GATEWAY_TIMEOUT', 30),
+                                      token=getattr(settings, 'MT5_GATEWAY_TOKEN', None) or None)
+            _gateway_clients[address] = client
+    return client.terminal(credentials)
+
+
+def account_credentials(mt5_account: MT5Account) -> MT5Credentials:
+    """Decrypted login details for a stored MT5 account"""
+    return MT5Credentials(int(mt5_account.account_number), mt5_account.get_password(), mt5_account.server)
+
+
+def get_account_snapshots() -> AccountSnapshotCache:
+    """Process-wide account snapshot cache (created on first use)"""
+    global _account_snapshots
+    with _clients_lock:
+        if _account_snapshots is None:
+            _account_snapshots = AccountSnapshotCache(
+                lambda credentials: fetch_account_snapshot(get_terminal(credentials)),
+                ttl=getattr(settings, 'MT5_ACCOUNT_SNAPSHOT_TTL', 5),
+                stale_ttl=getattr(settings, 'MT5_ACCOUNT_SNAPSHOT_STALE_TTL', 30),
+            )
+        return _account_snapshots
+
+
+def get_bar_cache() -> BarCache:
+    """Process-wide bar cache; repeated chart requests only fetch the newest bars"""
+    global _bar_cache
+    terminal = get_terminal() if _bar_cache is None else None
+    with _clients_lock:
+        if _bar_cache is None:
+            _bar_cache = BarCache(terminal)
+        return _bar_cache
+
+
+def get_supervisor() -> Optional[EASupervisorClient]:
+    """Client for the EA supervisor (manage.py run_ea_supervisor), or None when not configured"""
+    global _supervisor_client
+    address = getattr(settings, 'MT5_SUPERVISOR_ADDRESS', '')
+    if not address:
+        return None
+    with _clients_lock:
+        if _supervisor_client is None:
+            _supervisor_client = EASupervisorClient(address, timeout=getattr(settings, 'MT5_SUPERVISOR_TIMEOUT', 10))
+        return _supervisor_client
+
+
+def get_log_collector() -> EALogCollector:
+    """Collector for the output of EAs started by this process (without the supervisor)"""
+    global _log_collector
+    with _clients_lock:
+        if _log_collector is None:
+            _log_collector = ea_log_collector(getattr(settings, 'MT5_EA_LOG_DIR', None))
+        return _log_collector
+
+
+def ea_log_collector(log_dir: Optional[str]) -> EALogCollector:
+    """EALogCollector configured from the MT5_EA_LOG_* settings"""
+    return EALogCollector(
+        log_dir,
+        max_lines=getattr(settings, 'MT5_EA_LOG_LINES', 2000),
+        max_bytes=getattr(settings, 'MT5_EA_LOG_MAX_BYTES', 10 * 1024 * 1024),
+        backup_count=getattr(settings, 'MT5_EA_LOG_BACKUPS', 5),
+    )
+
+
+def _money(value) -> Optional[Decimal]:
+    # Match the DecimalField(decimal_places=2) representation so unchanged values compare equal
+    return None if value is None else Decimal(str(value)).quantize(Decimal('0.01'))
+
+
+def _save_changed(mt5_account: MT5Account, **fields):
+    """Assign ``fields`` and write only the columns whose value actually changed"""
+    changed = [name for name, value in fields.items() if getattr(mt5_account, name) != value]
+    if not changed:
+        return
+    for name in changed:
+        setattr(mt5_account, name, fields[name])
+    mt5_account.save(update_fields=changed + ['updated_at'])
+
 
 class MT5ConnectionManager:
     """Manages MetaTrader 5 connections and operations"""
@@ -23,42 +160,15 @@ class MT5ConnectionManager:
         Returns: (success: bool, data: dict)
         """
         try:
-            # Initialize MT5
-            if not mt5.initialize():
-                error = mt5.last_error()
-                logger.error(f"MT5 initialization failed: {error}")
-                return False, {
-                    'error': 'Failed to initialize MetaTrader 5',
-                    'details': f"Error code: {error[0]}, Description: {error[1]}" if error else "Unknown error"
-                }
-            
-            # Attempt login
-            authorized = mt5.login(
-                login=int(account_number),
-                password=password,
-                server=server
-            )
-            
-            if not authorized:
-                error = mt5.last_error()
-                mt5.shutdown()
-                logger.error(f"MT5 login failed for account {account_number}: {error}")
-                return False, {
-                    'error': 'Login failed',
-                    'details': f"Error code: {error[0]}, Description: {error[1]}" if error else "Invalid credentials"
-                }
+            terminal = get_terminal(MT5Credentials(int(account_number), password, server))
             
             # Get account info
-            account_info = mt5.account_info()
+            account_info = terminal.account_info()
             if account_info is None:
-                mt5.shutdown()
                 return False, {'error': 'Failed to retrieve account information'}
             
             # Get terminal info
-            terminal_info = mt5.terminal_info()
-            
-            # Logout and shutdown
-            mt5.shutdown()
+            terminal_info = terminal.terminal_info()
             
             return True, {
                 'account_info': {
@@ -78,93 +188,105 @@ class MT5ConnectionManager:
                 'connection_time': datetime.now().isoformat()
             }
             
+        except MT5SessionError as e:
+            return False, {
+                'error': e.message,
+                'details': e.details
+            }
         except Exception as e:
             logger.error(f"MT5 connection test failed: {str(e)}")
-            try:
-                mt5.shutdown()
-            except:
-                pass
             return False, {
                 'error': 'Connection test failed',
                 'details': str(e)
             }
     
     @staticmethod
-    def update_account_status(mt5_account: MT5Account) -> Dict:
+    def update_account_status(mt5_account: MT5Account, force_refresh: bool = False) -> Dict:
         """
-        Update MT5 account status and balance information
+        Update MT5 account status and balance information.
+        Served from the account snapshot cache; ``force_refresh`` skips it (e.g.
+        right after the credentials changed). Only changed columns are saved.
         Returns: dict with updated information
         """
+        snapshot, error = MT5ConnectionManager.read_account_snapshot(mt5_account, force_refresh)
+        return MT5ConnectionManager.save_account_status(mt5_account, snapshot, error)
+
+    @staticmethod
+    def read_account_snapshot(mt5_account: MT5Account, force_refresh: bool = False):
+        """
+        MT5 half of update_account_status (no database access).
+        Returns: (snapshot, None) or (None, error dict)
+        """
         try:
-            password = mt5_account.get_password()
-            success, data = MT5ConnectionManager.test_connection(
-                mt5_account.account_number,
-                password,
-                mt5_account.server
+            snapshot = get_account_snapshots().get(
+                mt5_account.pk,
+                account_credentials(mt5_account),
+                force=force_refresh
             )
-            
-            if success:
-                account_info = data.get('account_info', {})
-                mt5_account.connection_status = 'connected'
-                mt5_account.last_connected = datetime.now()
-                mt5_account.balance = account_info.get('balance')
-                mt5_account.equity = account_info.get('equity')
-                mt5_account.margin = account_info.get('margin')
-                mt5_account.currency = account_info.get('currency', mt5_account.currency)
-                mt5_account.save()
-                
-                return {
-                    'status': 'connected',
-                    'message': 'Account connected successfully',
-                    'data': account_info
-                }
-            else:
-                mt5_account.connection_status = 'error'
-                mt5_account.save()
-                
-                return {
-                    'status': 'error',
-                    'message': data.get('error', 'Connection failed'),
-                    'details': data.get('details')
-                }
-                
+            return snapshot, None
+        except MT5SessionError as e:
+            return None, {
+                'status': 'error',
+                'message': e.message,
+                'details': e.details
+            }
         except Exception as e:
             logger.error(f"Failed to update account status: {str(e)}")
-            mt5_account.connection_status = 'error'
-            mt5_account.save()
-            
-            return {
+            return None, {
                 'status': 'error',
                 'message': 'Failed to check account status',
                 'details': str(e)
             }
+
+    @staticmethod
+    def cached_account_snapshot(mt5_account: MT5Account):
+        """The cached snapshot read_account_snapshot would return without contacting the terminal, or None"""
+        return get_account_snapshots().peek(mt5_account.pk, account_credentials(mt5_account))
+
+    @staticmethod
+    def save_account_status(mt5_account: MT5Account, snapshot, error: Optional[Dict] = None) -> Dict:
+        """Database half of update_account_status"""
+        if error is not None:
+            _save_changed(mt5_account, connection_status='error')
+            return error
+
+        _save_changed(
+            mt5_account,
+            connection_status='connected',
+            last_connected=snapshot.fetched_at,
+            balance=_money(snapshot.balance),
+            equity=_money(snapshot.equity),
+            margin=_money(snapshot.margin),
+            currency=snapshot.currency or mt5_account.currency,
+        )
+        return {
+            'status': 'connected',
+            'message': 'Account connected successfully',
+            'data': snapshot.as_dict()
+        }
     
     @staticmethod
-    def get_market_data(symbol: str, timeframe: int = mt5.TIMEFRAME_M1, count: int = 100) -> Optional[Dict]:
+    def get_market_data(symbol: str, timeframe: int = TIMEFRAME_M1, count: int = 100) -> Optional[Dict]:
         """
         Get market data for a specific symbol
+        ``rates`` is the numpy structured array returned by MT5; the renderers in
+        renderers.py serialize it column by column.
         """
         try:
-            if not mt5.initialize():
-                return None
-            
-            rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, count)
-            mt5.shutdown()
+            # Copied under the cache lock: another worker thread may refill or compact the buffer
+            rates = get_bar_cache().get(symbol, timeframe, count, copy=True)
             
             if rates is not None:
                 return {
                     'symbol': symbol,
                     'timeframe': timeframe,
-                    'rates': rates.tolist() if hasattr(rates, 'tolist') else list(rates)
+                    'count': len(rates),
+                    'rates': rates
                 }
             return None
             
         except Exception as e:
             logger.error(f"Failed to get market data: {str(e)}")
-            try:
-                mt5.shutdown()
-            except:
-                pass
             return None
 
 
@@ -193,10 +315,21 @@ class MT5AlgorithmManager:
         script = f"mt5_{algorithm_name}.py"
         return os.path.join(ea_dir, script)
     @staticmethod
-    def start_algorithm(mt5_account: MT5Account, algorithm_name: str, symbol: str) -> Dict:
+    def start_algorithm(mt5_account: MT5Account, algorithm_name: str, symbol: str,
+                        execution_id: int = None) -> Dict:
         """
         Actually launch the EA script as a subprocess and store its PID.
+        With MT5_SUPERVISOR_ADDRESS set the EA supervisor starts and owns the
+        process (``execution_id`` is required); otherwise it is spawned here.
         """
+        supervisor = get_supervisor()
+        if supervisor is not None:
+            if execution_id is None:
+                return {'status': 'error', 'message': 'Execution id required to start through the EA supervisor'}
+            result = supervisor.start(execution_id, algorithm_name, symbol)
+            if result.get('status') == 'success':
+                result['algorithm_id'] = f"{algorithm_name}_{symbol}_{mt5_account.id}_{datetime.now().timestamp()}"
+            return result
         try:
             ea_script_path = MT5AlgorithmManager._get_ea_script_path(algorithm_name)
             if not os.path.isfile(ea_script_path):
@@ -211,6 +344,9 @@ class MT5AlgorithmManager:
             env = os.environ.copy()
             existing_pp = env.get('PYTHONPATH', '')
             env['PYTHONPATH'] = (project_root + (os.pathsep + existing_pp if existing_pp else ''))
+            if execution_id is not None:
+                # The EA serves the control channel of this execution
+                env['EA_EXECUTION_ID'] = str(execution_id)
 
             # Prefer current interpreter
             python_exec = sys.executable or 'python'
@@ -221,13 +357,20 @@ class MT5AlgorithmManager:
                 cmd.append(symbol)
             process = subprocess.Popen(
                 cmd,
+                stdin=subprocess.DEVNULL,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
                 cwd=project_root,
                 env=env,
                 creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if hasattr(subprocess, 'CREATE_NEW_PROCESS_GROUP') else 0
             )
             pid = process.pid
+            # Drain the output so a chatty EA never blocks on a full pipe; also reaps the process
+            get_log_collector().attach(
+                execution_id if execution_id is not None else f"pid-{pid}",
+                process.stdout,
+                on_close=process.wait
+            )
             return {
                 'status': 'success',
                 'message': f'Algorithm {algorithm_name} started successfully',
@@ -245,10 +388,46 @@ class MT5AlgorithmManager:
     
 
     @staticmethod
-    def pause_algorithm(pid: int, algorithm_name: str = None) -> dict:
+    def algorithm_logs(execution_id: int, lines: int = 100, after: Optional[int] = None,
+                       wait: float = 0.0) -> Dict:
+        """Recent output of an EA, from the supervisor when configured"""
+        supervisor = get_supervisor()
+        if supervisor is not None:
+            return supervisor.logs_tail(execution_id, lines=lines, after=after, wait=wait)
+        return get_log_collector().tail(execution_id, lines=lines, after=after, wait=wait)
+
+    @staticmethod
+    def control_algorithm(execution_id: int, command: str, params: Optional[Dict] = None) -> Dict:
+        """
+        Send a command to the control channel of one execution: pause, resume,
+        stop_new_entries, allow_new_entries, close_all, set_params (with
+        ``params``) or status. Through the EA supervisor when configured.
+        """
+        supervisor = get_supervisor()
+        if supervisor is not None:
+            return supervisor.control(execution_id, command, params=params)
+        try:
+            return ControlClient(execution_id).send(command, params=params)
+        except OSError as e:
+            logger.error(f"Control command {command} for execution {execution_id} failed: {e}")
+            return {
+                'status': 'error',
+                'message': 'EA control channel unavailable',
+                'details': str(e)
+            }
+
+    @staticmethod
+    def pause_algorithm(pid: int, algorithm_name: str = None, execution_id: int = None) -> dict:
         """
-        Pause a running EA subprocess by creating a pause.flag file in the EA directory.
+        Pause a running EA. With an execution id only that execution is paused,
+        through its control channel; otherwise a pause.flag file in the EA
+        directory pauses every instance of the EA.
         """
+        if execution_id is not None:
+            result = MT5AlgorithmManager.control_algorithm(execution_id, 'pause')
+            if result.get('status') == 'success':
+                result['message'] = 'Algorithm paused successfully'
+            return result
         try:
             if algorithm_name:
                 # Use the EA folder name (e.g., candy_ea, grid_trading_ea)
@@ -274,10 +453,16 @@ class MT5AlgorithmManager:
             }
 
     @staticmethod
-    def resume_algorithm(pid: int, algorithm_name: str = None) -> Dict:
+    def resume_algorithm(pid: int, algorithm_name: str = None, execution_id: int = None) -> Dict:
         """
-        Resume a paused EA subprocess by deleting the pause.flag file in the EA directory.
+        Resume a paused EA, through its control channel when an execution id
+        is given; otherwise by deleting the pause.flag file in the EA directory.
         """
+        if execution_id is not None:
+            result = MT5AlgorithmManager.control_algorithm(execution_id, 'resume')
+            if result.get('status') == 'success':
+                result['message'] = 'Algorithm resumed successfully'
+            return result
         try:
             if algorithm_name:
                 ea_dir = os.path.join(MT5AlgorithmManager._get_algorithms_dir(), algorithm_name)
@@ -302,10 +487,15 @@ class MT5AlgorithmManager:
             }
 
     @staticmethod
-    def stop_algorithm(pid: int) -> Dict:
+    def stop_algorithm(pid: int, execution_id: int = None) -> Dict:
         """
         Stop a running EA subprocess by terminating the process. Windows-friendly.
+        Through the EA supervisor when configured, which signals the process it
+        started rather than whatever now has that PID.
         """
+        supervisor = get_supervisor()
+        if supervisor is not None and execution_id is not None:
+            return supervisor.stop(execution_id)
         try:
             if os.name == 'nt':
                 try:
@@ -0,0 +1,105 @@
+"""
+Renderers for numpy-backed market data responses.
+
+MT5 returns bars as numpy structured arrays. Instead of building one Python
+tuple per bar (``rates.tolist()``), views pass the array straight to the
+response and these renderers emit it column by column: JSON arrays per field,
+raw little-endian column buffers in msgpack, or an Arrow IPC stream when
+pyarrow is installed. Clients pick the format with ``Accept`` or ``?format=``.
+"""
+
+import json
+
+import msgpack
+import numpy as np
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow output is optional
+    pa = None
+
+
+def _is_columnar(value) -> bool:
+    return isinstance(value, np.ndarray) and value.dtype.names is not None
+
+
+def _columns_to_lists(data):
+    if _is_columnar(data):
+        # One C-level tolist() per column instead of one tuple per row
+        return {name: data[name].tolist() for name in data.dtype.names}
+    if isinstance(data, dict):
+        return {key: _columns_to_lists(value) for key, value in data.items()}
+    return data
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """JSON renderer that writes structured arrays as ``{field: [values...]}``"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(_columns_to_lists(data), accepted_media_type, renderer_context)
+
+
+class MsgpackColumnarRenderer(BaseRenderer):
+    """
+    msgpack renderer; each field of a structured array becomes
+    ``{'dtype': '<f8', 'data': <bin>}`` which clients can wrap in a typed array
+    without parsing.
+    """
+    media_type = 'application/x-msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=self._default, use_bin_type=True)
+
+    @staticmethod
+    def _default(obj):
+        if _is_columnar(obj):
+            columns = {}
+            for name in obj.dtype.names:
+                column = np.ascontiguousarray(obj[name])
+                if column.dtype.byteorder == '>':
+                    column = column.astype(column.dtype.newbyteorder('<'))
+                columns[name] = {'dtype': column.dtype.str, 'data': memoryview(column).cast('B')}
+            return columns
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, np.generic):
+            return obj.item()
+        raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+class ArrowStreamRenderer(BaseRenderer):
+    """
+    Arrow IPC stream renderer for payloads carrying a structured array under
+    ``rates``; the other top-level keys go into the schema metadata. Responses
+    without one (errors) are sent as JSON.
+    """
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rates = data.get('rates') if isinstance(data, dict) else None
+        if not _is_columnar(rates):
+            response = (renderer_context or {}).get('response')
+            if response is not None:
+                response['Content-Type'] = 'application/json'
+            return json.dumps(data).encode()
+
+        metadata = {key: json.dumps(value) for key, value in data.items() if key != 'rates'}
+        table = pa.table({name: rates[name] for name in rates.dtype.names}).replace_schema_metadata(metadata)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+
+MARKET_DATA_RENDERERS = [ColumnarJSONRenderer, MsgpackColumnarRenderer]
+if pa is not None:
+    MARKET_DATA_RENDERERS.append(ArrowStreamRenderer)
@@ -0,0 +1,226 @@
+"""
+Persistent MetaTrader 5 terminal sessions.
+
+Every MT5 operation used to run a full initialize() -> login() -> shutdown()
+cycle, paying terminal startup and broker login on each request. The
+MetaTrader5 package can only attach to one terminal per process at a time, so
+MT5SessionPool keeps one warm session per configured terminal, leases the
+attached terminal to one caller at a time and only logs in again when the
+requested account differs from the one the terminal holds or the session has
+gone stale.
+
+This module deliberately does not depend on Django so it can also be used from
+worker processes that only receive plain credentials. The MetaTrader5 package
+is optional at import time: web processes that reach the terminal through the
+MT5 gateway only need the credential and error types defined here.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, NamedTuple, Optional, Sequence
+
+try:
+    import MetaTrader5 as mt5
+except ImportError:  # Only the process that owns a terminal needs the package
+    mt5 = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class MT5Credentials(NamedTuple):
+    """Login details identifying one MT5 trading account"""
+    login: int
+    password: str
+    server: str
+
+
+class MT5SessionError(Exception):
+    """Raised when a terminal session cannot be initialized or logged in"""
+
+    def __init__(self, message: str, error: Optional[tuple] = None):
+        super().__init__(message)
+        self.message = message
+        self.error = error
+
+    @property
+    def details(self) -> str:
+        if self.error:
+            return f"Error code: {self.error[0]}, Description: {self.error[1]}"
+        return "Unknown error"
+
+
+class MT5LoginError(MT5SessionError):
+    """Raised when the broker rejects the account credentials"""
+
+
+class _TerminalSession:
+    """Bookkeeping for one terminal installation"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.credentials: Optional[MT5Credentials] = None
+        self.initialized = False
+        self.last_used = 0.0
+        self.last_checked = 0.0
+
+
+class MT5SessionPool:
+    """
+    Keeps initialized, logged-in terminal sessions alive between requests.
+
+    Args:
+        terminal_paths: terminal64.exe paths to use, one session each. ``None``
+            or an empty list uses the default terminal.
+        idle_timeout: seconds after which an unused session is considered stale
+            and is re-validated (and re-logged in if needed) on the next lease.
+        health_check_interval: seconds between cheap connectivity checks on a
+            warm session.
+        timeout: terminal connection timeout in milliseconds passed to
+            ``mt5.initialize``.
+    """
+
+    def __init__(self, terminal_paths: Optional[Sequence[str]] = None,
+                 idle_timeout: float = 300, health_check_interval: float = 30,
+                 timeout: Optional[int] = None):
+        if mt5 is None:
+            raise MT5SessionError('The MetaTrader5 package is not installed in this process')
+        paths = list(terminal_paths) if terminal_paths else [None]
+        self._sessions: List[_TerminalSession] = [_TerminalSession(path) for path in paths]
+        self._attached: Optional[_TerminalSession] = None
+        self._lock = threading.RLock()
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+
+    @contextmanager
+    def lease(self, credentials: Optional[MT5Credentials] = None):
+        """
+        Lease the terminal logged into ``credentials``.
+
+        Yields the MetaTrader5 module with the session attached. Passing
+        ``None`` leases whichever session is warm, which is enough for market
+        data calls that do not depend on the account.
+        """
+        with self._lock:
+            session = self._acquire(credentials)
+            try:
+                yield mt5
+            finally:
+                session.last_used = time.monotonic()
+
+    def invalidate(self, credentials: Optional[MT5Credentials] = None):
+        """Drop the session for ``credentials`` (or all sessions) so the next lease logs in again"""
+        with self._lock:
+            for session in self._sessions:
+                if credentials is None or session.credentials == credentials:
+                    session.credentials = None
+                    session.last_checked = 0.0
+
+    def shutdown(self):
+        """Detach from the terminal and forget every session"""
+        with self._lock:
+            if self._attached is not None:
+                try:
+                    mt5.shutdown()
+                except Exception:
+                    pass
+            self._attached = None
+            for session in self._sessions:
+                session.initialized = False
+                session.credentials = None
+
+    def _acquire(self, credentials: Optional[MT5Credentials]) -> _TerminalSession:
+        session = self._select(credentials)
+        self._attach(session)
+        if credentials is not None and session.credentials != credentials:
+            self._login(session, credentials)
+        elif self._is_stale(session) and not self._is_healthy(session):
+            # Terminal lost its connection or was restarted behind our back
+            stale_credentials = session.credentials
+            self._reinitialize(session)
+            if stale_credentials is not None:
+                self._login(session, stale_credentials)
+        return session
+
+    def _select(self, credentials: Optional[MT5Credentials]) -> _TerminalSession:
+        if credentials is None:
+            # Whatever account is logged in: callers only lease without credentials for market data
+            return self._attached or self._sessions[0]
+        for session in self._sessions:
+            if session.credentials == credentials:
+                return session
+        # No terminal holds this account yet: evict the least recently used session
+        return min(self._sessions, key=lambda s: s.last_used)
+
+    def _attach(self, session: _TerminalSession):
+        if self._attached is session and session.initialized:
+            return
+        if self._attached is not None:
+            mt5.shutdown()
+            self._attached.initialized = False
+        self._attached = None
+        self._initialize(session)
+
+    def _initialize(self, session: _TerminalSession):
+        kwargs = {}
+        if self.timeout:
+            kwargs['timeout'] = self.timeout
+        if session.credentials is not None:
+            # Re-attaching to a terminal that already holds this account skips a fresh login
+            kwargs.update(login=session.credentials.login,
+                          password=session.credentials.password,
+                          server=session.credentials.server)
+        args = (session.path,) if session.path else ()
+        if not mt5.initialize(*args, **kwargs):
+            error = mt5.last_error()
+            logger.error(f"MT5 initialization failed: {error}")
+            session.initialized = False
+            session.credentials = None
+            raise MT5SessionError('Failed to initialize MetaTrader 5', error)
+        session.initialized = True
+        session.last_checked = time.monotonic()
+        self._attached = session
+
+    def _reinitialize(self, session: _TerminalSession):
+        logger.info(f"Re-initializing stale MT5 session on terminal {session.path or 'default'}")
+        try:
+            mt5.shutdown()
+        except Exception:
+            pass
+        session.initialized = False
+        session.credentials = None
+        self._attached = None
+        self._initialize(session)
+
+    def _login(self, session: _TerminalSession, credentials: MT5Credentials):
+        authorized = mt5.login(
+            login=int(credentials.login),
+            password=credentials.password,
+            server=credentials.server
+        )
+        if not authorized:
+            error = mt5.last_error()
+            logger.error(f"MT5 login failed for account {credentials.login}: {error}")
+            session.credentials = None
+            raise MT5LoginError('Login failed', error)
+        session.credentials = credentials
+        session.last_checked = time.monotonic()
+
+    def _is_stale(self, session: _TerminalSession) -> bool:
+        now = time.monotonic()
+        return (now - session.last_used > self.idle_timeout or
+                now - session.last_checked > self.health_check_interval)
+
+    def _is_healthy(self, session: _TerminalSession) -> bool:
+        session.last_checked = time.monotonic()
+        terminal_info = mt5.terminal_info()
+        if terminal_info is None or not terminal_info.connected:
+            return False
+        if session.credentials is not None:
+            account_info = mt5.account_info()
+            if account_info is None or account_info.login != int(session.credentials.login):
+                return False
+        return True
@@ -0,0 +1,616 @@
+"""
+EA supervisor: a long-running process that owns every EA subprocess.
+
+Web workers used to Popen an EA per request and keep only its PID, so nothing
+reaped, restarted or watched the process, and stop could signal a PID that had
+since been reused. The supervisor (``manage.py run_ea_supervisor``) starts EAs
+on request and keeps their process handles. It restarts crashed EAs with
+exponential backoff and reports status changes, heartbeats and resource usage
+through a callback.
+
+Web code talks to it through ``EASupervisorClient`` over the IPC protocol in
+``ipc.py``. Replies use the same ``{'status', 'message', ...}`` dicts as
+MT5AlgorithmManager.
+"""
+
+import logging
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+from . import ipc
+from .log_collector import EALogCollector
+
+try:
+    import psutil
+except ImportError:  # resource usage falls back to /proc (Linux) or is not reported
+    psutil = None
+
+
+logger = logging.getLogger(__name__)
+
+STOP_TIMEOUT = 15       # seconds an EA gets to shut down before it is killed
+STABLE_AFTER = 300      # seconds of uptime after which the restart backoff starts over
+
+_ALGORITHM_NAME = re.compile(r'^\w+$')
+_CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def process_usage(pid: int) -> Optional[Tuple[float, int]]:
+    """(CPU seconds used, resident memory in bytes) of a process, or None if unknown"""
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            times = process.cpu_times()
+            return times.user + times.system, process.memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            # Fields after the command name, which may itself contain spaces
+            fields = f.read().rpartition(')')[2].split()
+        with open(f'/proc/{pid}/statm') as f:
+            rss_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS, rss_pages * _PAGE_SIZE
+
+
+def _interrupt(process: subprocess.Popen):
+    """Ask an EA to shut down through its KeyboardInterrupt handler"""
+    try:
+        if os.name == 'nt':
+            process.send_signal(signal.CTRL_BREAK_EVENT)
+        else:
+            process.send_signal(signal.SIGINT)
+    except OSError:
+        pass
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+class _Child:
+    """One supervised EA execution"""
+
+    def __init__(self, execution_id: int, algorithm: str, symbol: str):
+        self.execution_id = execution_id
+        self.algorithm = algorithm
+        self.symbol = symbol
+        self.process = None
+        # running, backoff (waiting to restart), stopping, stopped, completed, error
+        self.state = 'running'
+        # Control state the execution should be in; a restarted EA is started in it
+        self.paused = False
+        self.new_entries = True
+        # Restarted with that state and not yet confirmed by its control channel
+        self.control_pending = False
+        self.started_at = 0.0
+        self.restart_at = 0.0
+        self.kill_at = 0.0
+        self.restarts = 0
+        self.failures = 0          # consecutive crashes, drives the backoff
+        self.cpu_seconds = None
+        self.usage_at = 0.0
+        self.cpu_percent = None
+        self.memory_mb = None
+        self.startup_ms = None     # time the last launch took
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process is not None else None
+
+    @property
+    def execution_status(self) -> str:
+        return 'paused' if self.paused and not self.control_pending else 'running'
+
+    def as_dict(self) -> Dict:
+        return {
+            'execution_id': self.execution_id,
+            'algorithm_name': self.algorithm,
+            'symbol': self.symbol,
+            'state': self.state,
+            'paused': self.paused and not self.control_pending,
+            'new_entries': self.new_entries,
+            # Requested paused/new_entries state the restarted EA has not confirmed yet
+            'pending': {'paused': self.paused, 'new_entries': self.new_entries} if self.control_pending else None,
+            'pid': self.pid,
+            'uptime': round(time.monotonic() - self.started_at, 1) if self.state == 'running' else None,
+            'restart_count': self.restarts,
+            'cpu_percent': self.cpu_percent,
+            'memory_mb': self.memory_mb,
+            'startup_ms': self.startup_ms,
+        }
+
+
+class EASupervisor:
+    """
+    Starts, stops and watches EA processes.
+
+    Args:
+        algorithms_dir: directory holding ``<algorithm>/mt5_<algorithm>.py``.
+        project_root: working directory and PYTHONPATH entry of the EAs.
+        on_status: called as ``on_status(execution_id, fields)`` with
+            AlgorithmExecution column values whenever something changes.
+        restart_on_error: restart EAs that exit with a non-zero code.
+        max_restarts: consecutive crashes tolerated before giving up.
+        backoff, max_backoff: first and largest restart delay in seconds.
+        heartbeat_interval: seconds between heartbeat/resource usage reports.
+        log_dir: EA stdout/stderr go to ``<log_dir>/<execution_id>.log``
+            (kept in memory only when None).
+        log_collector: drains EA output; defaults to an ``EALogCollector``
+            writing to ``log_dir``.
+        control_client: ``ControlClient`` class (ALGORITHMSMT5EA/control_channel.py)
+            used to reach each EA's control channel; without it pause and
+            resume fall back to pause.flag in the EA folder.
+        fork_server: a ``ForkServerClient`` (ALGORITHMSMT5EA/fork_server.py)
+            to launch EAs from a pre-warmed parent; falls back to a new
+            interpreter when the server cannot be reached.
+    """
+
+    def __init__(self, algorithms_dir: str, project_root: str,
+                 on_status: Optional[Callable[[int, Dict], None]] = None,
+                 restart_on_error: bool = True, max_restarts: int = 5,
+                 backoff: float = 5.0, max_backoff: float = 300.0,
+                 heartbeat_interval: float = 60.0, log_dir: Optional[str] = None,
+                 poll_interval: float = 1.0, fork_server=None,
+                 log_collector: Optional[EALogCollector] = None, control_client=None):
+        self.algorithms_dir = algorithms_dir
+        self.project_root = project_root
+        self.on_status = on_status
+        self.restart_on_error = restart_on_error
+        self.max_restarts = max_restarts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.heartbeat_interval = heartbeat_interval
+        self.log_dir = log_dir
+        self.logs = log_collector or EALogCollector(log_dir)
+        self.poll_interval = poll_interval
+        self.fork_server = fork_server
+        self.control_client = control_client
+        self.python = sys.executable or 'python'
+        self._children: Dict[int, _Child] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._last_heartbeat = 0.0
+
+    # Commands
+
+    def start(self, execution_id: int, algorithm: str, symbol: str = '') -> Dict:
+        if not _ALGORITHM_NAME.match(algorithm or ''):
+            return {'status': 'error', 'message': f'Invalid algorithm name: {algorithm}'}
+        script = self._script_path(algorithm)
+        if not os.path.isfile(script):
+            return {
+                'status': 'error',
+                'message': f'EA script not found for {algorithm}',
+                'details': script
+            }
+        with self._lock:
+            if execution_id in self._children:
+                return {'status': 'error', 'message': f'Execution {execution_id} is already supervised'}
+            child = _Child(execution_id, algorithm, symbol or '')
+            try:
+                self._spawn(child)
+            except OSError as e:
+                logger.error(f"Failed to start {algorithm}: {e}")
+                return {'status': 'error', 'message': 'Failed to start algorithm', 'details': str(e)}
+            self._children[execution_id] = child
+        logger.info(f"Started {algorithm} {symbol} for execution {execution_id} "
+                    f"(pid {child.pid}, {child.startup_ms} ms)")
+        return {
+            'status': 'success',
+            'message': f'Algorithm {algorithm} started successfully',
+            'pid': child.pid,
+            'startup_ms': child.startup_ms
+        }
+
+    def stop(self, execution_id: int) -> Dict:
+        with self._lock:
+            child = self._children.get(execution_id)
+            if child is None:
+                return {'status': 'error', 'message': f'Execution {execution_id} is not running'}
+            if child.state == 'backoff':
+                # Nothing to signal; just cancel the pending restart
+                child.state = 'stopped'
+                del self._children[execution_id]
+                report = True
+            else:
+                if child.state != 'stopping':
+                    child.state = 'stopping'
+                    child.kill_at = time.monotonic() + STOP_TIMEOUT
+                    _interrupt(child.process)
+                report = False
+        if report:
+            self._report(execution_id, {'execution_status': 'stopped', 'stopped_at': _now()})
+        return {'status': 'success', 'message': 'Algorithm stopped successfully'}
+
+    def pause(self, execution_id: int) -> Dict:
+        return self._set_paused(execution_id, True)
+
+    def resume(self, execution_id: int) -> Dict:
+        return self._set_paused(execution_id, False)
+
+    def control(self, execution_id: int, command: str, params: Optional[Dict] = None) -> Dict:
+        """Send a control channel command (stop_new_entries, close_all, set_params, ...) to the EA"""
+        if command in ('pause', 'resume'):
+            return self._set_paused(execution_id, command == 'pause')
+        with self._lock:
+            child = self._children.get(execution_id)
+            if child is None or child.state != 'running':
+                return {'status': 'error', 'message': f'Execution {execution_id} is not running'}
+        result = self._send_control(execution_id, command, params=params)
+        if command in ('stop_new_entries', 'allow_new_entries') and result.get('status') == 'success':
+            with self._lock:
+                child.new_entries = command == 'allow_new_entries'
+        return result
+
+    def status(self, execution_id: Optional[int] = None) -> Dict:
+        with self._lock:
+            if execution_id is not None:
+                child = self._children.get(execution_id)
+                if child is None:
+                    return {'status': 'error', 'message': f'Execution {execution_id} is not running'}
+                return {'status': 'success', 'execution': child.as_dict()}
+            return {'status': 'success', 'executions': [child.as_dict() for child in self._children.values()]}
+
+    def logs_tail(self, execution_id: int, lines: int = 100, after: Optional[int] = None,
+                  wait: float = 0.0) -> Dict:
+        """Recent EA output; see EALogCollector.tail"""
+        return self.logs.tail(execution_id, lines=lines, after=after, wait=wait)
+
+    # Monitoring
+
+    def run(self):
+        """Watch the EAs until shutdown() is called"""
+        while not self._stopped.is_set():
+            try:
+                self.check()
+            except Exception:
+                logger.exception('EA supervisor check failed')
+            self._stopped.wait(self.poll_interval)
+
+    def check(self):
+        """Reap exited EAs, restart due ones and send heartbeats"""
+        now = time.monotonic()
+        updates = []
+        with self._lock:
+            for child in list(self._children.values()):
+                fields = self._check_child(child, now)
+                if fields:
+                    updates.append((child.execution_id, fields))
+                if child.state in ('stopped', 'completed', 'error'):
+                    del self._children[child.execution_id]
+            if now - self._last_heartbeat >= self.heartbeat_interval:
+                self._last_heartbeat = now
+                heartbeat = _now()
+                for child in self._children.values():
+                    if child.state == 'running':
+                        self._sample_usage(child, now)
+                        updates.append((child.execution_id, {
+                            'last_heartbeat': heartbeat,
+                            'cpu_percent': child.cpu_percent,
+                            'memory_mb': child.memory_mb,
+                        }))
+            # Restarted EAs whose paused/new_entries state is not confirmed yet
+            pending = [child for child in self._children.values()
+                       if child.control_pending and child.state == 'running']
+        for child in pending:
+            fields = self._confirm_control(child)
+            if fields:
+                updates.append((child.execution_id, fields))
+        for execution_id, fields in updates:
+            self._report(execution_id, fields)
+
+    def shutdown(self):
+        """Stop every EA (killing those that do not exit in time) and the monitor loop"""
+        self._stopped.set()
+        with self._lock:
+            children = list(self._children.values())
+            for child in children:
+                if child.state in ('running', 'stopping'):
+                    _interrupt(child.process)
+            deadline = time.monotonic() + STOP_TIMEOUT
+            for child in children:
+                if child.process is None or child.state not in ('running', 'stopping'):
+                    continue
+                try:
+                    child.process.wait(max(0.0, deadline - time.monotonic()))
+                except subprocess.TimeoutExpired:
+                    child.process.kill()
+                    child.process.wait()
+            self._children.clear()
+        for child in children:
+            self._report(child.execution_id, {'execution_status': 'stopped', 'stopped_at': _now()})
+
+    # Internals
+
+    def _script_path(self, algorithm: str) -> str:
+        # EAs follow convention: <algoname>/mt5_<algoname>.py
+        return os.path.join(self.algorithms_dir, algorithm, f"mt5_{algorithm}.py")
+
+    def _spawn(self, child: _Child):
+        command = [self.python, self._script_path(child.algorithm)]
+        if child.symbol:
+            command.append(child.symbol)
+        started = time.perf_counter()
+        child.process = None
+        # Lets the EA open the control channel of this execution, in the state it was left in
+        ea_env = {'EA_EXECUTION_ID': str(child.execution_id)}
+        if child.paused:
+            ea_env['EA_START_PAUSED'] = '1'
+        if not child.new_entries:
+            ea_env['EA_START_NO_NEW_ENTRIES'] = '1'
+        child.control_pending = self.control_client is not None and (child.paused or not child.new_entries)
+        if self.fork_server is not None:
+            read_fd, write_fd = os.pipe()
+            try:
+                child.process = self.fork_server.launch(command[1:], self.project_root, write_fd, env=ea_env)
+            except OSError as e:
+                os.close(read_fd)
+                logger.warning(f"Fork server unavailable, starting {child.algorithm} in a new interpreter: {e}")
+            else:
+                self.logs.attach(child.execution_id, os.fdopen(read_fd, 'rb'))
+            finally:
+                os.close(write_fd)
+        if child.process is None:
+            child.process = self._popen(command, ea_env)
+            self.logs.attach(child.execution_id, child.process.stdout)
+        child.startup_ms = round((time.perf_counter() - started) * 1000, 1)
+        child.state = 'running'
+        child.started_at = time.monotonic()
+        child.cpu_seconds = None
+
+    def _popen(self, command, ea_env: Dict) -> subprocess.Popen:
+        env = dict(os.environ, **ea_env)
+        existing_pp = env.get('PYTHONPATH', '')
+        env['PYTHONPATH'] = self.project_root + (os.pathsep + existing_pp if existing_pp else '')
+        if os.name == 'nt':
+            # Own process group so CTRL_BREAK_EVENT reaches only this EA
+            platform_options = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            # Own session so a Ctrl+C meant for the supervisor does not hit the EAs first
+            platform_options = {'start_new_session': True}
+        return subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=self.project_root,
+            env=env,
+            **platform_options
+        )
+
+    def _check_child(self, child: _Child, now: float) -> Optional[Dict]:
+        if child.state == 'backoff':
+            if now < child.restart_at:
+                return None
+            try:
+                self._spawn(child)
+            except OSError as e:
+                logger.error(f"Failed to restart {child.algorithm} (execution {child.execution_id}): {e}")
+                child.state = 'error'
+                return {'execution_status': 'error', 'error_message': f'Restart failed: {e}', 'stopped_at': _now()}
+            logger.info(f"Restarted {child.algorithm} for execution {child.execution_id} "
+                        f"(pid {child.pid}, {child.startup_ms} ms)")
+            return {'execution_status': child.execution_status, 'pid': child.pid, 'restart_count': child.restarts}
+
+        exit_code = child.process.poll()
+        if exit_code is None:
+            if child.state == 'stopping' and now >= child.kill_at:
+                logger.warning(f"{child.algorithm} (pid {child.pid}) ignored the stop request; killing it")
+                child.process.kill()
+            elif child.failures and now - child.started_at >= STABLE_AFTER:
+                child.failures = 0
+            return None
+
+        if child.state == 'stopping':
+            child.state = 'stopped'
+            return {'execution_status': 'stopped', 'stopped_at': _now()}
+        if exit_code == 0:
+            child.state = 'completed'
+            return {'execution_status': 'completed', 'stopped_at': _now()}
+
+        message = f"{child.algorithm} exited with code {exit_code}"
+        if self.restart_on_error and child.failures < self.max_restarts:
+            delay = min(self.backoff * 2 ** child.failures, self.max_backoff)
+            child.failures += 1
+            child.restarts += 1
+            child.state = 'backoff'
+            child.restart_at = now + delay
+            logger.warning(f"{message}; restarting in {delay:.0f}s (execution {child.execution_id})")
+            return {'error_message': f"{message}; restarting in {delay:.0f}s", 'restart_count': child.restarts}
+        logger.error(f"{message}; not restarting (execution {child.execution_id})")
+        child.state = 'error'
+        return {'execution_status': 'error', 'error_message': message, 'stopped_at': _now()}
+
+    def _sample_usage(self, child: _Child, now: float):
+        usage = process_usage(child.pid)
+        if usage is None:
+            return
+        cpu_seconds, rss = usage
+        if child.cpu_seconds is not None and now > child.usage_at:
+            child.cpu_percent = round((cpu_seconds - child.cpu_seconds) / (now - child.usage_at) * 100, 1)
+        child.cpu_seconds, child.usage_at = cpu_seconds, now
+        child.memory_mb = round(rss / (1024 * 1024), 1)
+
+    def _set_paused(self, execution_id: int, paused: bool) -> Dict:
+        with self._lock:
+            child = self._children.get(execution_id)
+            if child is None:
+                return {'status': 'error', 'message': f'Execution {execution_id} is not running'}
+            algorithm = child.algorithm
+        verb = 'paused' if paused else 'resumed'
+        if self.control_client is not None:
+            result = self._send_control(execution_id, 'pause' if paused else 'resume')
+            if result['status'] != 'success':
+                return result
+        else:
+            # The EAs poll pause.flag in their own directory (common_ea.check_pause_flag)
+            flag = os.path.join(self.algorithms_dir, algorithm, 'pause.flag')
+            try:
+                if paused:
+                    with open(flag, 'w') as f:
+                        f.write('paused')
+                elif os.path.exists(flag):
+                    os.remove(flag)
+            except OSError as e:
+                return {'status': 'error', 'message': 'Failed to update pause flag', 'details': str(e)}
+            result = {}
+        with self._lock:
+            child.paused = paused
+        return dict(result, status='success', message=f'Algorithm {verb} successfully')
+
+    def _confirm_control(self, child: _Child) -> Optional[Dict]:
+        """
+        Check that a restarted EA is in its paused/new_entries state, re-sending
+        pause or stop_new_entries if it is not. Returns the status fields to
+        report once it is; None while its channel is not up yet.
+        """
+        reply = self._send_control(child.execution_id, 'status')
+        if reply.get('status') != 'success':
+            return None
+        with self._lock:
+            paused, new_entries = child.paused, child.new_entries
+        if reply.get('paused') != paused:
+            reply = self._send_control(child.execution_id, 'pause' if paused else 'resume')
+        if reply.get('status') == 'success' and reply.get('new_entries') != new_entries:
+            reply = self._send_control(child.execution_id, 'allow_new_entries' if new_entries else 'stop_new_entries')
+        if reply.get('status') != 'success':
+            logger.warning(f"Could not restore the control state of execution {child.execution_id}: "
+                           f"{reply.get('message')}")
+            return None
+        with self._lock:
+            if (child.paused, child.new_entries) != (paused, new_entries):
+                return None  # changed meanwhile; checked again on the next pass
+            child.control_pending = False
+        logger.info(f"Execution {child.execution_id} restarted with paused={paused}, new_entries={new_entries}")
+        return {'execution_status': child.execution_status}
+
+    def _send_control(self, execution_id: int, command: str, **arguments) -> Dict:
+        if self.control_client is None:
+            return {'status': 'error', 'message': 'EA control channels are not enabled'}
+        try:
+            return self.control_client(execution_id).send(command, **arguments)
+        except OSError as e:
+            # Also the case while the EA is still starting up
+            return {'status': 'error', 'message': 'EA control channel unavailable', 'details': str(e)}
+
+    def _report(self, execution_id: int, fields: Dict):
+        if self.on_status is None:
+            return
+        try:
+            self.on_status(execution_id, fields)
+        except Exception:
+            logger.exception(f"Failed to record status of execution {execution_id}")
+
+
+class EASupervisorServer:
+    """Serves supervisor commands from the web workers"""
+
+    _COMMANDS = ('start', 'stop', 'pause', 'resume', 'control', 'status', 'logs_tail')
+
+    def __init__(self, address: str, supervisor: EASupervisor):
+        self.address = address
+        self.supervisor = supervisor
+        self._socket = None
+        self._running = False
+
+    def serve_forever(self):
+        self._socket = ipc.listen(self.address)
+        self._running = True
+        monitor = threading.Thread(target=self.supervisor.run, name='ea-supervisor-monitor', daemon=True)
+        monitor.start()
+        logger.info(f"EA supervisor listening on {self.address}")
+        try:
+            while self._running:
+                try:
+                    conn, _ = self._socket.accept()
+                except OSError:
+                    if not self._running:
+                        break
+                    raise
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self.supervisor.shutdown()
+
+    def shutdown(self):
+        self._running = False
+        if self._socket is not None:
+            self._socket.close()
+
+    def _handle(self, conn):
+        with conn:
+            while self._running:
+                try:
+                    message = ipc.recv_message(conn)
+                    if message is None:
+                        break
+                    ipc.send_message(conn, self.dispatch(message))
+                except (OSError, ValueError) as e:
+                    logger.debug(f"EA supervisor client disconnected: {e}")
+                    break
+
+    def dispatch(self, message: dict) -> dict:
+        command = message.pop('op', None)
+        if command not in self._COMMANDS:
+            return {'status': 'error', 'message': f'Unsupported supervisor command: {command}'}
+        try:
+            return getattr(self.supervisor, command)(**message)
+        except TypeError as e:
+            return {'status': 'error', 'message': 'Invalid supervisor command', 'details': str(e)}
+        except Exception as e:
+            logger.exception(f"EA supervisor command failed: {command}")
+            return {'status': 'error', 'message': 'EA supervisor command failed', 'details': str(e)}
+
+
+class EASupervisorClient:
+    """Sends commands to the EA supervisor; one short connection per command"""
+
+    def __init__(self, address: str, timeout: float = 10.0):
+        self.address = address
+        self.timeout = timeout
+
+    def request(self, command: str, timeout: Optional[float] = None, **params) -> Dict:
+        try:
+            with ipc.connect(self.address, timeout=timeout or self.timeout) as sock:
+                ipc.send_message(sock, dict(params, op=command))
+                response = ipc.recv_message(sock)
+        except (OSError, ValueError) as e:
+            logger.error(f"EA supervisor command {command} failed: {e}")
+            return {'status': 'error', 'message': 'EA supervisor unavailable', 'details': str(e)}
+        if response is None:
+            return {'status': 'error', 'message': 'EA supervisor closed the connection'}
+        return response
+
+    def start(self, execution_id: int, algorithm: str, symbol: str = '') -> Dict:
+        return self.request('start', execution_id=execution_id, algorithm=algorithm, symbol=symbol)
+
+    def stop(self, execution_id: int) -> Dict:
+        return self.request('stop', execution_id=execution_id)
+
+    def pause(self, execution_id: int) -> Dict:
+        return self.request('pause', execution_id=execution_id)
+
+    def resume(self, execution_id: int) -> Dict:
+        return self.request('resume', execution_id=execution_id)
+
+    def control(self, execution_id: int, command: str, params: Optional[Dict] = None) -> Dict:
+        return self.request('control', execution_id=execution_id, command=command, params=params)
+
+    def status(self, execution_id: Optional[int] = None) -> Dict:
+        return self.request('status', execution_id=execution_id)
+
+    def logs_tail(self, execution_id: int, lines: int = 100, after: Optional[int] = None,
+                  wait: float = 0.0) -> Dict:
+        # The supervisor holds the reply for up to ``wait`` seconds
+        return self.request('logs_tail', timeout=self.timeout + wait,
+                            execution_id=execution_id, lines=lines, after=after, wait=wait)
@@ -0,0 +1,74 @@
+"""
+Bounded executors that run blocking MT5 calls for the async views.
+
+Each terminal gets one worker thread, so its calls run one at a time in
+arrival order exactly as the terminal would process them. Here a terminal
+means the gateway that serves the account, or this process when there is no
+gateway. A slow broker login only delays requests for the same terminal, and
+the event loop keeps serving everyone else. Each terminal accepts at most
+MT5_EXECUTOR_MAX_PENDING queued calls; beyond that requests fail fast with
+TerminalBusy instead of piling up.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from .mt5_service import terminal_address
+from .session_pool import MT5Credentials
+
+
+class TerminalBusy(Exception):
+    """Raised when a terminal already has the maximum number of queued calls"""
+
+
+class _TerminalExecutor:
+    def __init__(self, name: str, max_pending: int):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"mt5-{name}")
+        self.max_pending = max_pending
+        self.pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise TerminalBusy(f"{self.pending} MT5 calls already queued for this terminal")
+            self.pending += 1
+        future = self.executor.submit(fn, *args, **kwargs)
+        # Released when the call really finishes, even if the awaiting request was cancelled
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future):
+        with self._lock:
+            self.pending -= 1
+
+
+_executors: Dict[str, _TerminalExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def executor_for(credentials: Optional[MT5Credentials] = None) -> _TerminalExecutor:
+    """Executor of the terminal that serves ``credentials``"""
+    key = terminal_address(credentials) or 'local'
+    executor = _executors.get(key)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(key)
+            if executor is None:
+                executor = _TerminalExecutor(
+                    str(len(_executors)),
+                    getattr(settings, 'MT5_EXECUTOR_MAX_PENDING', 64),
+                )
+                _executors[key] = executor
+    return executor
+
+
+async def run_on_terminal(credentials: Optional[MT5Credentials], fn, *args, **kwargs):
+    """Run blocking ``fn(*args, **kwargs)`` on the executor of the terminal serving ``credentials``"""
+    future = executor_for(credentials).submit(functools.partial(fn, *args, **kwargs))
+    return await asyncio.wrap_future(future)
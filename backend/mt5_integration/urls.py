@@ -3,10 +3,12 @@ from django.urls import path
 from .api_views.mt5_authentication_views import mt5_account
 from .api_views.mt5_verification_views import test_mt5_connection, refresh_account_status
 from .api_views.user_mt5_views import delete_mt5_account
-from .api_views.ea_trading_views import algorithm_executions
-from .api_views.trade_execution_views import start_algorithm, stop_algorithm, pause_algorithm, resume_algorithm
+from .api_views.ea_trading_views import algorithm_executions, algorithm_logs
+from .api_views.trade_execution_views import start_algorithm, stop_algorithm, pause_algorithm, resume_algorithm, control_algorithm
 from .api_views.account_status_views import account_statistics
 from .api_views.manual_trading_views import manual_statistics
+from .api_views.market_data_views import market_data
+from .api_views import async_views
 
 urlpatterns = [
     path('account/', mt5_account, name='mt5_account'),
@@ -14,10 +16,19 @@ urlpatterns = [
     path('refresh-status/', refresh_account_status, name='refresh_account_status'),
     path('delete-account/', delete_mt5_account, name='delete_mt5_account'),
     path('algorithms/', algorithm_executions, name='algorithm_executions'),
+    path('algorithm-logs/<int:execution_id>/', algorithm_logs, name='algorithm_logs'),
     path('start-algorithm/', start_algorithm, name='start_algorithm'),
     path('stop-algorithm/<int:execution_id>/', stop_algorithm, name='stop_algorithm'),
     path('pause-algorithm/<int:execution_id>/', pause_algorithm, name='pause_algorithm'),
     path('resume-algorithm/<int:execution_id>/', resume_algorithm, name='resume_algorithm'),
+    path('control-algorithm/<int:execution_id>/', control_algorithm, name='control_algorithm'),
     path('account-statistics/', account_statistics, name='account_statistics'),
     path('manual-statistics/', manual_statistics, name='manual_statistics'),
+    path('market-data/', market_data, name='market_data'),
+    # ASGI variants: MT5 calls run on per-terminal executors instead of blocking the worker
+    path('async/manual-statistics/', async_views.manual_statistics, name='async_manual_statistics'),
+    path('async/test-connection/', async_views.test_mt5_connection, name='async_test_mt5_connection'),
+    path('async/refresh-status/', async_views.refresh_account_status, name='async_refresh_account_status'),
+    path('async/start-algorithm/', async_views.start_algorithm, name='async_start_algorithm'),
+    path('async/algorithm-logs/<int:execution_id>/', async_views.algorithm_logs, name='async_algorithm_logs'),
 ]